@@ -0,0 +1,148 @@
+"""Test the streaming download of datasets in CSV format."""
+
+import csv
+import gzip
+import io
+import os
+import shutil
+import unittest
+
+from flask import Flask
+from unittest import mock
+
+from vizier.api.webservice.download import csv_chunks, file_range
+from vizier.api.webservice.download import csv_response, parse_range
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
+
+import vizier.api.webservice.download as download
+
+
+BASE_DIR = './.tmp'
+
+ROW_COUNT = 1000
+
+
+class TestCsvDownload(unittest.TestCase):
+
+    def setUp(self):
+        """Create a dataset in a file system datastore and a web app that
+        downloads the dataset.
+        """
+        if os.path.isdir(BASE_DIR):
+            shutil.rmtree(BASE_DIR)
+        os.makedirs(BASE_DIR)
+        datastore = FileSystemDatastore(BASE_DIR)
+        descriptor = datastore.create_dataset(
+            columns=[
+                DatasetColumn(identifier=0, name='Name'),
+                DatasetColumn(identifier=1, name='Age')
+            ],
+            rows=[
+                DatasetRow(identifier=i, values=['Name, ' + str(i), i])
+                for i in range(ROW_COUNT)
+            ]
+        )
+        self.dataset = datastore.get_dataset(descriptor.identifier)
+        # Expected file content
+        si = io.StringIO()
+        writer = csv.writer(si)
+        writer.writerow(['Name', 'Age'])
+        for i in range(ROW_COUNT):
+            writer.writerow(['Name, ' + str(i), i])
+        self.content = si.getvalue().encode('utf-8')
+        app = Flask(__name__)
+        app.add_url_rule(
+            '/csv',
+            'csv',
+            lambda: csv_response(self.dataset, filename='data.csv')
+        )
+        self.client = app.test_client()
+
+    def tearDown(self):
+        """Delete the datastore directory."""
+        if os.path.isdir(BASE_DIR):
+            shutil.rmtree(BASE_DIR)
+
+    def test_chunks(self):
+        """Test generating the CSV file in chunks."""
+        chunks = list(csv_chunks(self.dataset, chunk_size=100))
+        self.assertTrue(len(chunks) > 100)
+        self.assertEqual(b''.join(chunks), self.content)
+        f = io.BytesIO(self.content)
+        self.assertEqual(
+            b''.join(file_range(f, 150, 1049, chunk_size=100)),
+            self.content[150:1050]
+        )
+        self.assertEqual(
+            b''.join(file_range(f, 0, len(self.content) + 10)),
+            self.content
+        )
+
+    def test_download(self):
+        """Test downloading the dataset with and without compression."""
+        response = self.client.get('/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.data, self.content)
+        self.assertEqual(response.headers['Accept-Ranges'], 'bytes')
+        self.assertIsNone(response.headers.get('Content-Encoding'))
+        etag = response.headers['ETag']
+        self.assertEqual(etag, '"{}"'.format(self.dataset.identifier))
+        response = self.client.get('/csv', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), self.content)
+        # Compressed and uncompressed responses have different entity tags
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_range(self):
+        """Test resuming a download using byte ranges."""
+        length = len(self.content)
+        # The file is generated only once for a range request
+        with mock.patch.object(download, 'csv_chunks', wraps=csv_chunks) as generate:
+            response = self.client.get('/csv', headers={'Range': 'bytes=100-'})
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response.data, self.content[100:])
+            self.assertEqual(generate.call_count, 1)
+        self.assertEqual(
+            response.headers['Content-Range'],
+            'bytes 100-{}/{}'.format(length - 1, length)
+        )
+        # Ranges are never compressed
+        response = self.client.get(
+            '/csv',
+            headers={'Range': 'bytes=-10', 'Accept-Encoding': 'gzip'}
+        )
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, self.content[-10:])
+        response = self.client.get('/csv', headers={'Range': 'bytes=' + str(length) + '-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers['Content-Range'], 'bytes */' + str(length))
+        # The full file is returned if the entity tag does not match
+        response = self.client.get('/csv', headers={'Range': 'bytes=100-', 'If-Range': '"XYZ"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, self.content)
+        etag = response.headers['ETag']
+        response = self.client.get('/csv', headers={'Range': 'bytes=100-199', 'If-Range': etag})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, self.content[100:200])
+
+    def test_parse_range(self):
+        """Test parsing the value of Range headers."""
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-2000', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-2000', 1000), (0, 999))
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 1000))
+        self.assertIsNone(parse_range('items=0-1', 1000))
+        self.assertIsNone(parse_range('bytes=a-1', 1000))
+        self.assertIsNone(parse_range('bytes=10-1', 1000))
+        with self.assertRaises(ValueError):
+            parse_range('bytes=1000-', 1000)
+        with self.assertRaises(ValueError):
+            parse_range('bytes=-0', 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
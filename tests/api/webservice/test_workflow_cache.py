@@ -0,0 +1,120 @@
+"""Test caching serialized workflow and module handles."""
+
+import os
+import shutil
+import time
+import unittest
+
+from vizier.api.routes.base import UrlFactory
+from vizier.api.serialize.cache import SerializationCache
+from vizier.api.webservice.base import get_engine
+from vizier.api.webservice.workflow import VizierWorkflowApi
+from vizier.config.app import AppConfig
+from vizier.engine.packages.pycell.command import python_cell
+
+import vizier.api.serialize.workflow as serialwf
+import vizier.config.app as app
+
+
+SERVER_DIR = './.tmp'
+PACKAGES_DIR = './tests/engine/workflows/.files/packages'
+PROCESSORS_DIR = './tests/engine/workflows/.files/processors'
+
+
+class TestWorkflowCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create the workflow API for an empty server directory."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+        os.makedirs(SERVER_DIR)
+        os.environ[app.VIZIERENGINE_DATA_DIR] = SERVER_DIR
+        os.environ[app.VIZIERSERVER_PACKAGE_PATH] = PACKAGES_DIR
+        os.environ[app.VIZIERSERVER_PROCESSOR_PATH] = PROCESSORS_DIR
+        os.environ[app.VIZIERENGINE_BACKEND] = 'MULTIPROCESS'
+        self.engine = get_engine(AppConfig())
+        self.urls = UrlFactory(base_url='http://localhost/vizier-db/api/v1')
+        self.api = VizierWorkflowApi(engine=self.engine, urls=self.urls)
+
+    def tearDown(self):
+        """Clean-up by dropping the server directory."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+
+    def append_and_wait(self, project, source):
+        """Append a Python cell to the default branch and wait until the
+        workflow is finished.
+        """
+        branch = project.viztrail.default_branch
+        self.engine.append_workflow_module(
+            project_id=project.identifier,
+            branch_id=branch.identifier,
+            command=python_cell(source)
+        )
+        while branch.head.is_active:
+            time.sleep(0.1)
+
+    def test_cache_lru(self):
+        """Test evicting least recently used entries."""
+        cache = SerializationCache(capacity=2)
+        cache.put('A', 1)
+        cache.put('B', 2)
+        self.assertEqual(cache.get('A'), 1)
+        cache.put('C', 3)
+        self.assertIsNone(cache.get('B'))
+        self.assertEqual(cache.get('A'), 1)
+        self.assertEqual(cache.get('C'), 3)
+
+    def test_workflow_cache(self):
+        """Test reusing serialized workflows and modules."""
+        project = self.engine.projects.create_project()
+        branch = project.viztrail.default_branch
+        project_id = project.identifier
+        branch_id = branch.identifier
+        empty_tag = self.api.get_workflow_etag(project_id, branch_id)
+        self.assertIsNotNone(empty_tag)
+        self.assertIsNone(self.api.get_workflow_etag(project_id, 'unknown'))
+        self.append_and_wait(project, 'print(\'A\')')
+        etag = self.api.get_workflow_etag(project_id, branch_id)
+        self.assertNotEqual(etag, empty_tag)
+        wf1 = self.api.get_workflow(project_id, branch_id)
+        # The serialization is taken from the cache if nothing changed and is
+        # the same as the serialization without cache.
+        self.assertEqual(self.api.get_workflow_etag(project_id, branch_id), etag)
+        self.assertIs(self.api.get_workflow(project_id, branch_id), wf1)
+        expected = serialwf.WORKFLOW_HANDLE(
+            project=project,
+            branch=branch,
+            workflow=branch.head,
+            urls=self.urls
+        )
+        self.assertEqual(wf1, expected)
+        # Modules are reused across workflow versions.
+        self.append_and_wait(project, 'print(\'B\')')
+        self.assertNotEqual(self.api.get_workflow_etag(project_id, branch_id), etag)
+        wf2 = self.api.get_workflow(project_id, branch_id)
+        self.assertEqual(len(wf2['modules']), 2)
+        self.assertIs(wf2['modules'][0], wf1['modules'][0])
+        self.assertEqual(wf2['modules'][1]['outputs']['stdout'][0]['value'], 'B')
+        # The previous workflow is read-only and is serialized differently.
+        wf1 = self.api.get_workflow(project_id, branch_id, workflow_id=wf1['id'])
+        self.assertTrue(wf1['readOnly'])
+        self.assertIsNot(wf1['modules'][0], wf2['modules'][0])
+        # Entity tags for modules change with the module state.
+        module_id = wf2['modules'][1]['id']
+        module_tag = self.api.get_workflow_module_etag(project_id, branch_id, module_id)
+        self.assertIsNotNone(module_tag)
+        self.assertIs(
+            self.api.get_workflow_module(project_id, branch_id, module_id),
+            wf2['modules'][1]
+        )
+        self.assertIsNone(self.api.get_workflow_module_etag(project_id, branch_id, 'unknown'))
+        branch.head.modules[1].set_error()
+        self.assertNotEqual(
+            self.api.get_workflow_module_etag(project_id, branch_id, module_id),
+            module_tag
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
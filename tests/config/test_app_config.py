@@ -7,10 +7,20 @@ from vizier.core.util import delete_env
 import vizier.config.app as env
 
 
+def restore_env(environ):
+    """Reset all environment variables to the given values."""
+    os.environ.clear()
+    os.environ.update(environ)
+
+
 class TestAppConfig(unittest.TestCase):
 
     def setUp(self):
-        """Clear all relevant environment variables."""
+        """Clear all relevant environment variables. The environment is
+        restored after each test.
+        """
+        environ = dict(os.environ)
+        self.addCleanup(restore_env, environ)
         # Test the default configuration. Ensure that no environment variable
         # is set.
         delete_env(env.VIZIERSERVER_NAME)
@@ -12,10 +12,20 @@ import vizier.config.app as env
 import vizier.config.container as container
 
 
+def restore_env(environ):
+    """Reset all environment variables to the given values."""
+    os.environ.clear()
+    os.environ.update(environ)
+
+
 class TestContainerConfig(unittest.TestCase):
 
     def setUp(self):
-        """Clear all relevant environment variables."""
+        """Clear all relevant environment variables. The environment is
+        restored after each test.
+        """
+        environ = dict(os.environ)
+        self.addCleanup(restore_env, environ)
         # Test the default configuration. Ensure that no environment variable
         # is set.
         delete_env(env.VIZIERSERVER_NAME)
@@ -41,6 +41,36 @@ class TestDefaultObjectStore(unittest.TestCase):
         """Delete base directory."""
         shutil.rmtree(BASE_DIRECTORY)
 
+    def test_append_object(self):
+        """Test appending documents to an object."""
+        store = DefaultObjectStore()
+        filename = store.join(BASE_DIRECTORY, 'A')
+        with self.assertRaises(ValueError):
+            store.read_appended_objects(filename)
+        store.create_object(BASE_DIRECTORY, identifier='A')
+        self.assertEqual(store.read_appended_objects(filename), [])
+        for i in range(3):
+            store.append_object(filename, content={'id': i})
+        self.assertEqual(
+            store.read_appended_objects(filename),
+            [{'id': 0}, {'id': 1}, {'id': 2}]
+        )
+        # An incomplete last document is ignored
+        with open(filename, 'a') as f:
+            f.write('{"id": ')
+        self.assertEqual(len(store.read_appended_objects(filename)), 3)
+        # and removed by the next append
+        store.append_object(filename, content={'id': 3})
+        self.assertEqual(
+            store.read_appended_objects(filename),
+            [{'id': 0}, {'id': 1}, {'id': 2}, {'id': 3}]
+        )
+        # Incomplete documents that are not last are an error
+        with open(filename, 'a') as f:
+            f.write('{"id": \n{"id": 4}\n')
+        with self.assertRaises(ValueError):
+            store.read_appended_objects(filename)
+
     def test_create_and_delete_folder(self):
         """Test default functionality of create_folder and delete_folder
         methods.
@@ -202,5 +232,27 @@ class TestDefaultObjectStore(unittest.TestCase):
         self.assertTrue('B' in dirs)
 
 
+    def test_write_object_atomic(self):
+        """Test atomic writes that replace the object with a completely
+        written temporary file.
+        """
+        store = DefaultObjectStore()
+        filename = store.join(BASE_DIRECTORY, 'A.file')
+        # Simulate the remains of an interrupted write
+        with open(filename, 'w') as f:
+            f.write('{"value": [1, 2')
+        with self.assertRaises(ValueError):
+            store.read_object(filename)
+        store.write_object(filename, {'value': [1, 2, 3]}, atomic=True)
+        self.assertEqual(store.read_object(filename), {'value': [1, 2, 3]})
+        # No temporary files are left behind
+        self.assertEqual(os.listdir(BASE_DIRECTORY), ['A.file'])
+        # A failed write leaves the previous object unchanged
+        with self.assertRaises(TypeError):
+            store.write_object(filename, {'value': object()}, atomic=True)
+        self.assertEqual(store.read_object(filename), {'value': [1, 2, 3]})
+        self.assertEqual(os.listdir(BASE_DIRECTORY), ['A.file'])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,170 @@
+"""Test the functionality of the SQLite object store."""
+
+import os
+import shutil
+import unittest
+
+from vizier.core.io.base import DefaultObjectStore
+from vizier.core.io.sqlite import SQLiteObjectStore, migrate_folder
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.viztrail.module.base import ModuleHandle
+from vizier.viztrail.objectstore.repository import OSViztrailRepository
+from vizier.viztrail.workflow import ACTION_APPEND
+
+
+"""Base directory for all resources."""
+BASE_DIRECTORY = './.files/'
+DATABASE_FILE = './.files/objects.db'
+VIZTRAILS_DIR = './.files/vt'
+
+
+class TestSQLiteObjectStore(unittest.TestCase):
+
+    def setUp(self):
+        """Create an empty directory for the database file."""
+        if os.path.isdir(BASE_DIRECTORY):
+            shutil.rmtree(BASE_DIRECTORY)
+        os.makedirs(BASE_DIRECTORY)
+
+    def tearDown(self):
+        """Delete base directory."""
+        shutil.rmtree(BASE_DIRECTORY)
+
+    def test_folders_and_objects(self):
+        """Test creating, listing, and deleting folders and objects."""
+        store = SQLiteObjectStore(DATABASE_FILE)
+        self.assertEqual(store.create_folder(BASE_DIRECTORY, identifier='A'), 'A')
+        folder = store.join(BASE_DIRECTORY, 'A')
+        self.assertTrue(store.exists(folder))
+        self.assertTrue(store.exists(os.path.abspath(folder)))
+        # Objects are not written to the file system
+        self.assertFalse(os.path.isdir(folder))
+        store.create_object(folder, identifier='B', content={'id': 100})
+        obj_id = store.create_object(folder)
+        with self.assertRaises(ValueError):
+            store.read_object(store.join(folder, obj_id))
+        store.write_object(store.join(folder, obj_id), content=[1, 2])
+        self.assertEqual(store.read_object(store.join(folder, 'B')), {'id': 100})
+        self.assertEqual(store.read_object(store.join(folder, obj_id)), [1, 2])
+        self.assertEqual(sorted(store.list_objects(folder)), sorted(['B', obj_id]))
+        sub_id = store.create_folder(folder)
+        store.create_object(store.join(folder, sub_id), identifier='C', content={})
+        self.assertEqual(store.list_folders(folder), [sub_id])
+        self.assertEqual(store.list_folders(store.join(folder, 'X'), create=False), [])
+        self.assertFalse(store.exists(store.join(folder, 'X')))
+        store.list_folders(store.join(folder, 'X'))
+        self.assertTrue(store.exists(store.join(folder, 'X')))
+        # Objects are visible to a new store instance
+        store = SQLiteObjectStore(DATABASE_FILE)
+        store.delete_object(store.join(folder, 'B'))
+        self.assertFalse(store.exists(store.join(folder, 'B')))
+        with self.assertRaises(ValueError):
+            store.read_object(store.join(folder, 'B'))
+        store = SQLiteObjectStore(DATABASE_FILE, keep_deleted_files=True)
+        store.delete_folder(folder)
+        self.assertTrue(store.exists(folder))
+        store.delete_folder(folder, force_delete=True)
+        self.assertFalse(store.exists(folder))
+        self.assertFalse(store.exists(store.join(store.join(folder, sub_id), 'C')))
+        self.assertEqual(store.list_objects(folder), [])
+
+    def test_append_and_transaction(self):
+        """Test appending documents to an object and grouping writes into a
+        transaction.
+        """
+        store = SQLiteObjectStore(DATABASE_FILE)
+        path = store.join(BASE_DIRECTORY, 'A')
+        with self.assertRaises(ValueError):
+            store.read_appended_objects(path)
+        store.create_object(BASE_DIRECTORY, identifier='A')
+        self.assertEqual(store.read_appended_objects(path), [])
+        for i in range(3):
+            store.append_object(path, content={'id': i})
+        self.assertEqual(
+            store.read_appended_objects(path),
+            [{'id': 0}, {'id': 1}, {'id': 2}]
+        )
+        # All writes in a failed transaction are rolled back
+        with self.assertRaises(RuntimeError):
+            with store.transaction():
+                store.append_object(path, content={'id': 3})
+                with store.transaction():
+                    store.create_object(BASE_DIRECTORY, identifier='B', content={})
+                raise RuntimeError()
+        self.assertEqual(len(store.read_appended_objects(path)), 3)
+        self.assertFalse(store.exists(store.join(BASE_DIRECTORY, 'B')))
+        with store.transaction():
+            store.append_object(path, content={'id': 3})
+            store.create_object(BASE_DIRECTORY, identifier='B', content={})
+        self.assertEqual(len(store.read_appended_objects(path)), 4)
+        self.assertTrue(store.exists(store.join(BASE_DIRECTORY, 'B')))
+
+    def test_migrate_repository(self):
+        """Test copying a viztrails repository from the default object store
+        into the SQLite object store.
+        """
+        repo = OSViztrailRepository(base_path=VIZTRAILS_DIR)
+        vt = repo.create_viztrail(properties={'name': 'My Project'})
+        branch = vt.get_default_branch()
+        command = python_cell(source='print(1)')
+        for _ in range(3):
+            branch.append_workflow(
+                modules=branch.get_head().modules if branch.get_head() else [],
+                action=ACTION_APPEND,
+                command=command,
+                pending_modules=[ModuleHandle(command=command, external_form='print(1)')]
+            )
+        folders, objects = migrate_folder(VIZTRAILS_DIR, SQLiteObjectStore(DATABASE_FILE))
+        self.assertTrue(folders > 0)
+        self.assertTrue(objects > 0)
+        # Load the repository from the database after the files are deleted.
+        shutil.rmtree(VIZTRAILS_DIR)
+        repo = OSViztrailRepository(
+            base_path=VIZTRAILS_DIR,
+            object_store=SQLiteObjectStore(DATABASE_FILE)
+        )
+        vt = repo.get_viztrail(vt.identifier)
+        self.assertEqual(vt.name, 'My Project')
+        branch = vt.get_default_branch()
+        self.assertEqual(len(branch.get_history()), 3)
+        self.assertEqual(len(branch.get_head().modules), 3)
+        # Continue to work with the migrated repository
+        branch.append_workflow(
+            modules=branch.get_head().modules,
+            action=ACTION_APPEND,
+            command=command,
+            pending_modules=[ModuleHandle(command=command, external_form='print(1)')]
+        )
+        repo = OSViztrailRepository(
+            base_path=VIZTRAILS_DIR,
+            object_store=SQLiteObjectStore(DATABASE_FILE)
+        )
+        branch = repo.get_viztrail(vt.identifier).get_default_branch()
+        self.assertEqual(len(branch.get_history()), 4)
+        self.assertEqual(len(branch.get_head().modules), 4)
+        # No objects are written to the file system
+        for filename in DefaultObjectStore().list_objects(BASE_DIRECTORY):
+            self.assertTrue(filename.startswith('objects.db'))
+        self.assertEqual(os.listdir(VIZTRAILS_DIR), [])
+        # The repository can be moved together with the database and opened
+        # from a different working directory.
+        moved_dir = os.path.join(BASE_DIRECTORY, 'moved')
+        os.makedirs(moved_dir)
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.isfile(DATABASE_FILE + suffix):
+                shutil.move(DATABASE_FILE + suffix, moved_dir)
+        cwd = os.getcwd()
+        os.chdir(moved_dir)
+        try:
+            repo = OSViztrailRepository(
+                base_path='vt',
+                object_store=SQLiteObjectStore('objects.db')
+            )
+            branch = repo.get_viztrail(vt.identifier).get_default_branch()
+            self.assertEqual(len(branch.get_history()), 4)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    unittest.main()
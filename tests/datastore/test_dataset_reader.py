@@ -4,6 +4,7 @@ import unittest
 
 from vizier.datastore.dataset import DatasetRow
 from vizier.datastore.reader import DelimitedFileReader, DefaultJsonDatasetReader
+from vizier.datastore.reader import IndexedJsonDatasetReader
 
 
 CSV_FILE = './tests/datastore/.files/dataset.csv'
@@ -71,6 +72,47 @@ class TestDatasetReader(unittest.TestCase):
         self.assertEqual(count, len(rows))
         os.remove(tmp_file)
 
+    def test_indexed_json_reader(self):
+        """Test functionality of the indexed Json dataset reader."""
+        tmp_file = tempfile.mkstemp()[1]
+        tmp_index = tempfile.mkstemp()[1]
+        values = ['A', 'B\nC', 1, None]
+        rows = (DatasetRow(i, values) for i in range(100))
+        count = IndexedJsonDatasetReader(tmp_file, index_file=tmp_index).write(rows)
+        self.assertEqual(count, 100)
+        reader = IndexedJsonDatasetReader(tmp_file, index_file=tmp_index)
+        with self.assertRaises(StopIteration):
+            next(reader)
+        count = 0
+        with reader.open() as r:
+            for row in r:
+                self.assertEqual(row.values, values)
+                self.assertEqual(row.identifier, count)
+                count += 1
+        self.assertEqual(count, 100)
+        with self.assertRaises(StopIteration):
+            next(reader)
+        # Read pages of rows. A negative limit returns all remaining rows.
+        for offset, limit, expected in [
+            (0, 10, list(range(10))),
+            (95, 10, list(range(95, 100))),
+            (50, 0, []),
+            (99, None, [99]),
+            (90, -1, list(range(90, 100))),
+            (100, 10, []),
+            (1000, None, [])
+        ]:
+            reader = IndexedJsonDatasetReader(
+                tmp_file,
+                index_file=tmp_index,
+                offset=offset,
+                limit=limit
+            )
+            with reader.open() as r:
+                self.assertEqual([row.identifier for row in r], expected)
+        os.remove(tmp_file)
+        os.remove(tmp_index)
+
     def read_dataset(self, reader):
         """The reader should contain three rows with three values each."""
         count = 0
@@ -1,5 +1,6 @@
 """Test functionality of the default datastore."""
 
+import gzip
 import os
 import shutil
 import unittest
@@ -7,10 +8,13 @@ import unittest
 from vizier.datastore.base import METADATA_FILE
 from vizier.datastore.dataset import DatasetColumn, DatasetRow
 from vizier.datastore.fs.base import FileSystemDatastore
-from vizier.datastore.fs.base import DATA_FILE, DESCRIPTOR_FILE
-from vizier.datastore.fs.base import validate_dataset
+from vizier.datastore.fs.base import DATA_FILE, DELTA_FILE, DESCRIPTOR_FILE, INDEX_FILE
+from vizier.datastore.fs.base import LEGACY_DATA_FILE, PARQUET_DATA_FILE
+from vizier.datastore.fs.dataset import FORMAT_PARQUET
+from vizier.datastore.fs.base import migrate_dataset, validate_dataset
+from vizier.datastore.reader import DefaultJsonDatasetReader
 from vizier.filestore.fs.base import FileSystemFilestore
-from vizier.filestore.base import FileHandle, FORMAT_TSV
+from vizier.filestore.base import FileHandle, ENCODING_GZIP, FORMAT_CSV, FORMAT_TSV
 
 BASE_DIR = './.tmp'
 STORE_DIR = './.tmp/ds'
@@ -79,6 +83,51 @@ class TestFileSystemDatastore(unittest.TestCase):
         if os.path.isdir(BASE_DIR):
             shutil.rmtree(BASE_DIR)
 
+    def test_parquet_format(self):
+        """Test storing datasets in Parquet format."""
+        store = FileSystemDatastore(STORE_DIR, data_format=FORMAT_PARQUET)
+        ds = store.load_dataset(f_handle=FILE)
+        dataset_dir = os.path.join(STORE_DIR, ds.identifier)
+        self.assertTrue(os.path.isfile(os.path.join(dataset_dir, PARQUET_DATA_FILE)))
+        self.assertFalse(os.path.isfile(os.path.join(dataset_dir, DATA_FILE)))
+        self.validate_class_size_dataset(ds)
+        # Rows are the same as for datasets in Json format. Datasets are read
+        # in their original format independently of the datastore format.
+        json_ds = FileSystemDatastore(STORE_DIR).load_dataset(f_handle=FILE)
+        rows = json_ds.fetch_rows()
+        for store_ds in [ds, FileSystemDatastore(STORE_DIR).get_dataset(ds.identifier)]:
+            parquet_rows = store_ds.fetch_rows()
+            self.assertEqual([r.identifier for r in parquet_rows], [r.identifier for r in rows])
+            self.assertEqual([r.values for r in parquet_rows], [r.values for r in rows])
+            page = store_ds.fetch_rows(offset=2, limit=3)
+            self.assertEqual([r.values for r in page], [r.values for r in rows[2:5]])
+            self.assertEqual(len(store_ds.fetch_rows(offset=len(rows) + 1)), 0)
+        # Mixed value types and null values are preserved.
+        ds = store.create_dataset(
+            columns=[
+                DatasetColumn(identifier=0, name='A'),
+                DatasetColumn(identifier=1, name='B'),
+                DatasetColumn(identifier=2, name='C')
+            ],
+            rows=[
+                DatasetRow(identifier=0, values=[1, 'a', 1.5]),
+                DatasetRow(identifier=1, values=['x', None, 2]),
+                DatasetRow(identifier=2, values=[None, 'c', None])
+            ]
+        )
+        ds = store.get_dataset(ds.identifier)
+        self.assertEqual(
+            [r.values for r in ds.fetch_rows()],
+            [[1, 'a', 1.5], ['x', None, 2], [None, 'c', None]]
+        )
+        df = store.get_dataset_frame(ds.identifier)
+        self.assertEqual(list(df.columns), ['A', 'B', 'C'])
+        self.assertEqual(list(df.index), ['0', '1', '2'])
+        self.assertEqual(list(df['A']), [1, 'x', None])
+        self.assertIsNone(store.get_dataset_frame('0000'))
+        with self.assertRaises(ValueError):
+            FileSystemDatastore(STORE_DIR, data_format='csv')
+
     def test_properties(self):
         """Test loading a dataset from file."""
         store = FileSystemDatastore(STORE_DIR)
@@ -168,6 +217,70 @@ class TestFileSystemDatastore(unittest.TestCase):
         self.assertIsNone(store.get_dataset(ds_id))
         self.assertIsNone(store.get_dataset(ds_id_2))
 
+    def test_delta_dataset(self):
+        """Test creating datasets as deltas of existing datasets."""
+        store = FileSystemDatastore(STORE_DIR, max_delta_chain=2)
+        ds = store.create_dataset(
+            columns=[
+                DatasetColumn(identifier=0, name='A'),
+                DatasetColumn(identifier=1, name='B')
+            ],
+            rows=[DatasetRow(identifier=i, values=[i, str(i)]) for i in range(10)]
+        )
+        base = store.get_dataset(ds.identifier)
+        # Update a cell and delete, insert, and move rows.
+        ds = store.create_delta(
+            base,
+            columns=base.columns,
+            updates={'1': {1: 'x'}},
+            deletes=['0', '5'],
+            inserts=[(0, DatasetRow(identifier='10', values=[10, 'y']))]
+        )
+        dataset_dir = os.path.join(STORE_DIR, ds.identifier)
+        self.assertTrue(os.path.isfile(os.path.join(dataset_dir, DELTA_FILE)))
+        self.assertFalse(os.path.isfile(os.path.join(dataset_dir, DATA_FILE)))
+        ds = store.get_dataset(ds.identifier)
+        self.assertEqual(ds.row_count, 9)
+        self.assertEqual(ds.max_row_id(), 10)
+        rows = ds.fetch_rows()
+        self.assertEqual([int(r.identifier) for r in rows], [10, 1, 2, 3, 4, 6, 7, 8, 9])
+        self.assertEqual(rows[1].values, [1, 'x'])
+        self.assertEqual([int(r.identifier) for r in ds.fetch_rows(offset=4, limit=2)], [4, 6])
+        self.assertTrue(ds.has_row(10))
+        self.assertTrue(ds.has_row('6'))
+        self.assertFalse(ds.has_row(5))
+        self.assertFalse(ds.has_row(11))
+        # Row identifiers that do not match the row positions.
+        reversed_ds = store.get_dataset(store.create_dataset(
+            columns=base.columns,
+            rows=[DatasetRow(identifier=9 - i, values=[i, str(i)]) for i in range(10)]
+        ).identifier)
+        self.assertTrue(all(reversed_ds.has_row(i) for i in range(10)))
+        # Schema changes: move column B to the front and add a new column.
+        columns = [ds.columns[1], ds.columns[0], DatasetColumn(identifier=2, name='C')]
+        ds = store.get_dataset(store.create_delta(ds, columns=columns).identifier)
+        self.assertEqual(ds.delta.depth, 2)
+        self.assertEqual(ds.fetch_rows(offset=1, limit=1)[0].values, ['x', 1, None])
+        self.assertEqual(list(store.get_dataset_frame(ds.identifier).columns), ['B', 'A', 'C'])
+        # The third delta exceeds the maximum chain length and is compacted.
+        ds = store.get_dataset(store.create_delta(ds, columns=ds.columns[:1]).identifier)
+        self.assertIsNone(ds.delta)
+        dataset_dir = os.path.join(STORE_DIR, ds.identifier)
+        self.assertFalse(os.path.isfile(os.path.join(dataset_dir, DELTA_FILE)))
+        self.assertTrue(os.path.isfile(os.path.join(dataset_dir, DATA_FILE)))
+        self.assertEqual([r.values for r in ds.fetch_rows(limit=3)], [['y'], ['x'], ['2']])
+        # Deleting a dataset compacts the datasets that depend on it.
+        child = store.create_delta(base, columns=base.columns, deletes=['9'])
+        self.assertTrue(store.delete_dataset(base.identifier))
+        child = store.get_dataset(child.identifier)
+        self.assertIsNone(child.delta)
+        self.assertEqual(len(child.fetch_rows()), 9)
+        self.assertFalse(store.compact_dataset(child.identifier))
+        # Deltas are disabled if the maximum chain length is zero.
+        store = FileSystemDatastore(STORE_DIR, max_delta_chain=0)
+        ds = store.create_delta(child, columns=child.columns, deletes=['1'])
+        self.assertIsNone(store.get_dataset(ds.identifier).delta)
+
     def test_download_dataset(self):
         """Test loading a dataset from Url. Note that this test depends on the
         accessed web service to be running. It will fail otherwise."""
@@ -228,6 +341,70 @@ class TestFileSystemDatastore(unittest.TestCase):
         self.validate_class_size_dataset(ds)
         with self.assertRaises(ValueError):
             store.load_dataset(f_handle=None)
+        # Load a gzip-compressed copy of the file
+        gz_file = os.path.join(BASE_DIR, 'r.csv.gz')
+        with open(FILE.filepath, 'rb') as f_in:
+            with gzip.open(gz_file, 'wb') as f_out:
+                f_out.write(f_in.read())
+        gz_ds = store.load_dataset(
+            f_handle=FileHandle(
+                identifier='0001',
+                filepath=gz_file,
+                file_name='r.csv.gz',
+                mimetype=FORMAT_CSV,
+                encoding=ENCODING_GZIP
+            )
+        )
+        self.assertEqual(
+            [row.values for row in gz_ds.fetch_rows()],
+            [row.values for row in ds.fetch_rows()]
+        )
+        # No dataset folder is left behind if loading fails
+        invalid_file = os.path.join(BASE_DIR, 'invalid.csv')
+        with open(invalid_file, 'w') as f:
+            f.write('')
+        with self.assertRaises(ValueError):
+            store.load_dataset(
+                f_handle=FileHandle(
+                    identifier='0002',
+                    filepath=invalid_file,
+                    file_name='invalid.csv'
+                )
+            )
+        self.assertEqual(
+            sorted(os.listdir(STORE_DIR)),
+            sorted([ds.identifier, gz_ds.identifier])
+        )
+
+    def test_migrate_dataset(self):
+        """Test converting a dataset in legacy Json format into the indexed
+        format."""
+        store = FileSystemDatastore(STORE_DIR)
+        ds = store.load_dataset(f_handle=FILE)
+        rows = ds.fetch_rows()
+        dataset_dir = os.path.join(STORE_DIR, ds.identifier)
+        self.assertTrue(os.path.isfile(os.path.join(dataset_dir, INDEX_FILE)))
+        # Replace the data file with a file in the legacy format
+        os.remove(os.path.join(dataset_dir, DATA_FILE))
+        os.remove(os.path.join(dataset_dir, INDEX_FILE))
+        legacy_file = os.path.join(dataset_dir, LEGACY_DATA_FILE)
+        DefaultJsonDatasetReader(legacy_file).write(rows)
+        self.assertFalse(migrate_dataset(os.path.join(STORE_DIR, 'unknown')))
+        # The dataset is converted when it is accessed.
+        ds = store.get_dataset(ds.identifier)
+        self.assertFalse(os.path.isfile(legacy_file))
+        self.assertTrue(os.path.isfile(os.path.join(dataset_dir, DATA_FILE)))
+        self.assertTrue(os.path.isfile(os.path.join(dataset_dir, INDEX_FILE)))
+        self.assertFalse(migrate_dataset(dataset_dir))
+        self.validate_class_size_dataset(ds)
+        migrated = ds.fetch_rows()
+        self.assertEqual([r.identifier for r in migrated], [r.identifier for r in rows])
+        self.assertEqual([r.values for r in migrated], [r.values for r in rows])
+        # Read pages of rows
+        self.assertEqual(ds.fetch_rows(offset=1, limit=2)[0].values, rows[1].values)
+        self.assertEqual(len(ds.fetch_rows(offset=1, limit=2)), 2)
+        self.assertEqual(len(ds.fetch_rows(offset=len(rows) - 1)), 1)
+        self.assertEqual(len(ds.fetch_rows(offset=len(rows) + 1)), 0)
 
     def test_query_annotations(self):
         """Test retrieving annotations via the datastore."""
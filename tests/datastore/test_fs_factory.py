@@ -4,7 +4,9 @@ import os
 import shutil
 import unittest
 
+from vizier.datastore.fs.dataset import FORMAT_JSON, FORMAT_PARQUET
 from vizier.datastore.fs.factory import FileSystemDatastoreFactory, PARA_DIRECTORY
+from vizier.datastore.fs.factory import PARA_FORMAT
 
 
 SERVER_DIR = './.tmp'
@@ -39,6 +41,18 @@ class TestDefaultDatastoreFactory(unittest.TestCase):
         with self.assertRaises(ValueError):
             FileSystemDatastoreFactory()
 
+    def test_data_format(self):
+        """Test configuring the data format for new datasets."""
+        fact = FileSystemDatastoreFactory(properties={PARA_DIRECTORY: SERVER_DIR})
+        self.assertEqual(fact.get_datastore('0123').data_format, FORMAT_JSON)
+        fact = FileSystemDatastoreFactory(
+            properties={PARA_DIRECTORY: SERVER_DIR, PARA_FORMAT: FORMAT_PARQUET}
+        )
+        self.assertEqual(fact.get_datastore('0123').data_format, FORMAT_PARQUET)
+        fact = FileSystemDatastoreFactory(SERVER_DIR, data_format='unknown')
+        with self.assertRaises(ValueError):
+            fact.get_datastore('0123')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,127 @@
+"""Test functionality of the streaming CSV ingest for the file system
+datastore.
+"""
+
+import gzip
+import os
+import shutil
+import unittest
+
+from vizier.core.util import cast
+from vizier.datastore.fs.ingest import CsvIngest, infer_values
+from vizier.filestore.base import FileHandle, ENCODING_GZIP, FORMAT_CSV
+
+
+BASE_DIR = './.tmp'
+CSV_FILE = './.tmp/data.csv'
+GZIP_FILE = './.tmp/data.csv.gz'
+
+CSV_DATA = 'Name, Age ,Salary\nAlice,23,35.5\n\nBob, 32 ,\nClaire,inf,1e3\nDave\n'
+
+
+class TestCsvIngest(unittest.TestCase):
+
+    def setUp(self):
+        """Create the input files."""
+        if os.path.isdir(BASE_DIR):
+            shutil.rmtree(BASE_DIR)
+        os.makedirs(BASE_DIR)
+        with open(CSV_FILE, 'w') as f:
+            f.write(CSV_DATA)
+        with gzip.open(GZIP_FILE, 'wt') as f:
+            f.write(CSV_DATA)
+
+    def tearDown(self):
+        """Clean-up by deleting the input files."""
+        if os.path.isdir(BASE_DIR):
+            shutil.rmtree(BASE_DIR)
+
+    def read_file(self, f_handle, chunk_size):
+        """Read the given file. Returns the column names and the list of row
+        identifier and values.
+        """
+        with CsvIngest(f_handle, chunk_size=chunk_size) as ingest:
+            rows = [(row.identifier, row.values) for row in ingest.rows()]
+            self.assertEqual(ingest.row_count, len(rows))
+        return [col.name for col in ingest.columns], rows
+
+    def test_infer_values(self):
+        """Test that the type inference gives the same result as the cast
+        function.
+        """
+        values = [
+            '1', '+5', '-0', '007', '12345678901234567890', '1_000', '1.',
+            '.5', '1e5', '1.5E-3', 'inf', '-Infinity', 'nan', '', 'abc',
+            '1.2.3', 'e5', '.', '-', '0x10', '1e', 'information', 'x1',
+            '١٢'
+        ]
+        result = infer_values(values)
+        self.assertEqual(len(result), len(values))
+        for value, inferred in zip(values, result):
+            expected = cast(value)
+            self.assertEqual(type(inferred), type(expected))
+            if expected == expected:
+                self.assertEqual(inferred, expected)
+            else:
+                self.assertNotEqual(inferred, inferred)
+        self.assertEqual(infer_values(['1', '2']), [1, 2])
+        self.assertEqual(infer_values(['1.5', '2']), [1.5, 2])
+        self.assertEqual(infer_values([]), [])
+
+    def test_read_file(self):
+        """Test reading plain and compressed files with different chunk
+        sizes.
+        """
+        progress = list()
+        f_handle = FileHandle(
+            identifier='0000',
+            filepath=CSV_FILE,
+            file_name='data.csv',
+            mimetype=FORMAT_CSV
+        )
+        with CsvIngest(f_handle, chunk_size=2, progress=lambda n, r: progress.append(n)) as ingest:
+            rows = list(ingest.rows())
+        self.assertEqual(progress, [2, 4])
+        self.assertEqual([col.name for col in ingest.columns], ['Name', 'Age', 'Salary'])
+        self.assertEqual([col.identifier for col in ingest.columns], [0, 1, 2])
+        self.assertEqual([row.identifier for row in rows], ['0', '1', '2', '3'])
+        self.assertEqual(rows[0].values, ['Alice', 23, 35.5])
+        self.assertEqual(rows[1].values, ['Bob', 32, ''])
+        self.assertEqual(rows[2].values, ['Claire', float('inf'), 1000.0])
+        self.assertEqual(rows[3].values, ['Dave', '', ''])
+        rows = [(row.identifier, row.values) for row in rows]
+        for chunk_size in [1, 3, 100]:
+            self.assertEqual(self.read_file(f_handle, chunk_size)[1], rows)
+        gz_handle = FileHandle(
+            identifier='0001',
+            filepath=GZIP_FILE,
+            file_name='data.csv.gz',
+            mimetype=FORMAT_CSV,
+            encoding=ENCODING_GZIP
+        )
+        self.assertEqual(self.read_file(gz_handle, 2), (['Name', 'Age', 'Salary'], rows))
+
+    def test_invalid_file(self):
+        """Test reading empty files and files with rows that have too many
+        values.
+        """
+        f_handle = FileHandle(
+            identifier='0000',
+            filepath=CSV_FILE,
+            file_name='data.csv',
+            mimetype=FORMAT_CSV
+        )
+        with open(CSV_FILE, 'w') as f:
+            f.write('')
+        with self.assertRaises(ValueError):
+            self.read_file(f_handle, 10)
+        with open(CSV_FILE, 'w') as f:
+            f.write('A,B\n1,2\n1,2,3\n1\n')
+        _, rows = self.read_file(f_handle, 10)
+        self.assertEqual([values for _, values in rows], [[1, 2], [1, 2, 3], [1, '']])
+        with self.assertRaises(ValueError):
+            CsvIngest(f_handle, chunk_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
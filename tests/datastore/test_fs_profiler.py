@@ -0,0 +1,116 @@
+"""Test the native column profiler of the file system datastore."""
+
+import os
+import shutil
+import unittest
+
+from unittest import mock
+
+import pandas as pd
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore, PROFILER_NATIVE
+
+import vizier.datastore.profiling.columnar as columnar
+
+
+STORE_DIR = './.tmp/ds'
+
+
+class TestFileSystemProfiler(unittest.TestCase):
+
+    def setUp(self):
+        """Create an empty datastore directory."""
+        if os.path.isdir(STORE_DIR):
+            shutil.rmtree(STORE_DIR)
+        os.makedirs(STORE_DIR)
+
+    def tearDown(self):
+        """Delete datastore directory."""
+        shutil.rmtree(STORE_DIR)
+
+    def test_hll_estimate(self):
+        """Test the estimate for the number of distinct values."""
+        self.assertEqual(columnar.hll_estimate(pd.Series([], dtype=object)), 0)
+        self.assertEqual(columnar.hll_estimate(pd.Series(['a', 'b', 'a'])), 2)
+        estimate = columnar.hll_estimate(pd.Series(list(range(10000)) * 2))
+        self.assertLess(abs(estimate - 10000), 500)
+
+    def test_profile_column(self):
+        """Test statistics for individual columns."""
+        profile = columnar.profile_column('A', [1, 2, 3, None, '4'], bins=3)
+        self.assertEqual(profile['structural_type'], columnar.TYPE_INTEGER)
+        self.assertEqual(profile['missing_values_ratio'], 0.2)
+        self.assertEqual(profile['num_distinct_values'], 4)
+        self.assertEqual(profile['mean'], 2.5)
+        self.assertEqual(profile['coverage'], [{'range': {'gte': 1.0, 'lte': 4.0}}])
+        self.assertEqual(profile['plot']['type'], 'histogram_numerical')
+        self.assertEqual([b['count'] for b in profile['plot']['data']], [1, 1, 2])
+        profile = columnar.profile_column('B', ['x', 'y', 'x', 'x', ''])
+        self.assertEqual(profile['structural_type'], columnar.TYPE_TEXT)
+        self.assertEqual(profile['semantic_types'], [columnar.TYPE_ENUMERATION])
+        self.assertEqual(profile['plot']['data'][0], {'bin': 'x', 'count': 3})
+        profile = columnar.profile_column('C', ['2020-01-01', '2020-02-01', '2020-03-01'])
+        self.assertEqual(profile['semantic_types'], [columnar.TYPE_DATETIME])
+        self.assertEqual(profile['plot']['type'], 'histogram_temporal')
+        profile = columnar.profile_column('D', [1.5, 'abc'])
+        self.assertEqual(profile['structural_type'], columnar.TYPE_TEXT)
+        profile = columnar.profile_column('E', [None, None])
+        self.assertEqual(profile['missing_values_ratio'], 1.0)
+        self.assertEqual(profile['num_distinct_values'], 0)
+
+    def test_profile_dataset(self):
+        """Test profiling datasets in the datastore and reusing the results for
+        columns that are not modified by a delta.
+        """
+        store = FileSystemDatastore(STORE_DIR, profiler=PROFILER_NATIVE)
+        ds = store.create_dataset(
+            columns=[
+                DatasetColumn(identifier=0, name='A'),
+                DatasetColumn(identifier=1, name='B')
+            ],
+            rows=[DatasetRow(identifier=i, values=[i, 'abc'[i % 3]]) for i in range(100)]
+        )
+        ds = store.get_dataset(ds.identifier, force_profiler=True)
+        self.assertEqual([col.data_type for col in ds.columns], ['int', 'categorical'])
+        self.assertEqual(ds.properties['is_profiled'], [columnar.PROFILER_NAME])
+        self.assertEqual(ds.properties[columnar.KEY_NB_ROWS], 100)
+        self.assertEqual(ds.properties[columnar.KEY_COLUMNS][0]['num_distinct_values'], 100)
+        # Datasets are profiled only once.
+        with mock.patch.object(columnar, 'run') as run:
+            store.get_dataset(ds.identifier, force_profiler=True)
+            run.assert_not_called()
+        # Only the updated column of a delta is profiled again.
+        delta = store.create_delta(ds, columns=ds.columns, updates={'1': {1: 'x'}})
+        with mock.patch.object(columnar, 'profile_column', wraps=columnar.profile_column) as profile:
+            child = store.get_dataset(delta.identifier, force_profiler=True)
+            self.assertEqual([c[0][0] for c in profile.call_args_list], ['B'])
+        profiles = child.properties[columnar.KEY_COLUMNS]
+        self.assertEqual(profiles[0], ds.properties[columnar.KEY_COLUMNS][0])
+        self.assertEqual(profiles[1]['num_distinct_values'], 4)
+        # Profile a sample of the rows.
+        store = FileSystemDatastore(STORE_DIR, profiler_sample=10)
+        ds = store.create_dataset(
+            columns=[DatasetColumn(identifier=0, name='A')],
+            rows=[DatasetRow(identifier=i, values=[i]) for i in range(100)]
+        )
+        ds = store.get_dataset(ds.identifier, force_profiler=True)
+        self.assertEqual(ds.properties[columnar.KEY_NB_ROWS], 100)
+        self.assertEqual(ds.properties[columnar.KEY_NB_PROFILED_ROWS], 10)
+        with self.assertRaises(ValueError):
+            FileSystemDatastore(STORE_DIR, profiler='unknown')
+
+    def test_reservoir_sample(self):
+        """Test random sampling of dataset rows."""
+        rows = [DatasetRow(identifier=i, values=[i]) for i in range(1000)]
+        sample, count = columnar.reservoir_sample(rows, 50, seed=42)
+        self.assertEqual(count, 1000)
+        self.assertEqual(len(sample), 50)
+        self.assertEqual(len(set(row.identifier for row in sample)), 50)
+        sample, count = columnar.reservoir_sample(rows[:20], 50)
+        self.assertEqual(count, 20)
+        self.assertEqual(len(sample), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""Test evaluating SQL queries over datasets in the file system datastore."""
+
+import os
+import shutil
+import unittest
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
+from vizier.datastore.fs.dataset import FORMAT_PARQUET
+
+import vizier.datastore.fs.sql as sql
+
+
+STORE_DIR = './.tmp/ds'
+
+
+class TestFileSystemSQL(unittest.TestCase):
+
+    def setUp(self):
+        """Create an empty datastore directory."""
+        if os.path.isdir(STORE_DIR):
+            shutil.rmtree(STORE_DIR)
+        os.makedirs(STORE_DIR)
+        self.store = FileSystemDatastore(STORE_DIR)
+        self.people = self.store.create_dataset(
+            columns=[
+                DatasetColumn(identifier=0, name='Name'),
+                DatasetColumn(identifier=1, name='Age', data_type='int'),
+                DatasetColumn(identifier=2, name='City')
+            ],
+            rows=[
+                DatasetRow(identifier=0, values=['Alice', '23', 'NYC']),
+                DatasetRow(identifier=1, values=['Bob', '32', 'Buffalo']),
+                DatasetRow(identifier=2, values=['Claire', None, 'NYC'])
+            ]
+        )
+        self.cities = FileSystemDatastore(STORE_DIR, data_format=FORMAT_PARQUET).create_dataset(
+            columns=[
+                DatasetColumn(identifier=0, name='city'),
+                DatasetColumn(identifier=1, name='state')
+            ],
+            rows=[
+                DatasetRow(identifier=0, values=['NYC', 'NY']),
+                DatasetRow(identifier=1, values=['Buffalo', 'NY'])
+            ]
+        )
+        self.datasets = {'people': self.people, 'cities': self.cities}
+
+    def tearDown(self):
+        """Delete datastore directory."""
+        shutil.rmtree(STORE_DIR)
+
+    def test_query(self):
+        """Test joins and aggregates over datasets."""
+        # Only referenced datasets are materialized as tables.
+        result = self.store.execute_query(
+            'SELECT "Name" FROM People WHERE age > 30',
+            {'people': self.people.identifier, 'cities': self.cities.identifier}
+        )
+        self.assertEqual(result.rows, [['Bob']])
+        self.assertEqual(result.dependencies, ['people'])
+        people_dir = self.store.get_dataset_dir(self.people.identifier)
+        cities_dir = self.store.get_dataset_dir(self.cities.identifier)
+        self.assertTrue(os.path.isfile(os.path.join(people_dir, sql.TABLE_FILE)))
+        self.assertFalse(os.path.isfile(os.path.join(cities_dir, sql.TABLE_FILE)))
+        result = self.store.query(
+            'SELECT c.state, COUNT(*) AS cnt, AVG(p.age) AS age '
+            'FROM people p JOIN cities c ON p.city = c.city GROUP BY c.state',
+            self.datasets
+        )
+        self.assertEqual(result['schema'], [
+            {'name': 'state', 'type': 'varchar'},
+            {'name': 'cnt', 'type': 'int'},
+            {'name': 'age', 'type': 'real'}
+        ])
+        self.assertEqual(result['data'], [['NY', 3, 27.5]])
+        self.assertEqual(result['prov'], ['0'])
+
+    def test_query_errors(self):
+        """Test that invalid queries and modifications are rejected."""
+        for query in [
+            'SELECT * FROM unknown',
+            'DELETE FROM people',
+            'DROP VIEW people',
+            'CREATE TABLE t(a)'
+        ]:
+            with self.assertRaises(ValueError):
+                self.store.query(query, self.datasets)
+        result = self.store.query('SELECT COUNT(*) FROM people', self.datasets)
+        self.assertEqual(result['data'], [[3]])
+
+    def test_many_datasets(self):
+        """Test queries that reference more datasets than can be attached."""
+        names = ['t{}'.format(i) for i in range(sql.MAX_ATTACHED + 3)]
+        query = ' UNION ALL '.join(['SELECT * FROM {}'.format(n) for n in names])
+        result = self.store.execute_query(
+            query,
+            {name: self.cities.identifier for name in names}
+        )
+        self.assertEqual(len(result.rows), 2 * len(names))
+        self.assertEqual(sorted(result.dependencies), sorted(names))
+
+
+if __name__ == '__main__':
+    unittest.main()
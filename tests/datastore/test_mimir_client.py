@@ -0,0 +1,179 @@
+"""Test the HTTP client for the Mimir gateway against a local stub gateway."""
+
+import json
+import threading
+import unittest
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import vizier.mimir as mimir
+from vizier.mimir import MimirError
+
+
+class StubGateway(ThreadingMixIn, HTTPServer):
+    """Stub for the Mimir gateway. Responses are taken from a dictionary
+    that maps routes to a list of (status code, response body) pairs. The
+    last response for a route is repeated. Keeps track of the requested
+    routes and of the client ports of all connections.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super(StubGateway, self).__init__(('127.0.0.1', 0), StubHandler)
+        self.responses = dict()
+        self.requests = list()
+        self.clients = set()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/api/v2/'.format(self.server_address[1])
+
+    def next_response(self, route):
+        with self.lock:
+            self.requests.append(route)
+            responses = self.responses.get(route, [(404, {})])
+            if len(responses) > 1:
+                return responses.pop(0)
+            return responses[0]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.respond()
+
+    def do_PUT(self):
+        self.respond()
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length', 0))
+        if length > 0:
+            self.rfile.read(length)
+        self.server.clients.add(self.client_address[1])
+        route = self.path.split('?')[0][len('/api/v2/'):]
+        status, body = self.server.next_response(route)
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TestMimirClient(unittest.TestCase):
+
+    def setUp(self):
+        """Start the stub gateway and point the client to it."""
+        self.gateway = StubGateway()
+        self.thread = threading.Thread(target=self.gateway.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.mimir_url = mimir._mimir_url
+        self.retry_backoff = mimir._retry_backoff
+        mimir._mimir_url = self.gateway.url
+        mimir._retry_backoff = 0.0
+        mimir.resetSession()
+        mimir.resetLatencyMetrics()
+
+    def tearDown(self):
+        """Stop the stub gateway and restore the client configuration."""
+        mimir.resetSession()
+        mimir.resetLatencyMetrics()
+        mimir._mimir_url = self.mimir_url
+        mimir._retry_backoff = self.retry_backoff
+        self.gateway.shutdown()
+        self.gateway.server_close()
+
+    def test_keep_alive(self):
+        """Test that consecutive requests reuse the same connection."""
+        self.gateway.responses['query/table'] = [(200, {'data': []})]
+        self.gateway.responses['lens'] = [(200, {'lensTypes': ['TYPE']})]
+        for _ in range(5):
+            mimir.getTable('T')
+        self.assertEqual(mimir.getAvailableLensTypes(), ['TYPE'])
+        self.assertEqual(len(self.gateway.requests), 6)
+        self.assertEqual(len(self.gateway.clients), 1)
+
+    def test_latency_metrics(self):
+        """Test recording request latencies per endpoint."""
+        self.gateway.responses['schema'] = [(200, {'schema': [{'name': 'A'}]})]
+        self.gateway.responses['blob/1'] = [(200, {})]
+        self.gateway.responses['blob/2'] = [(404, {})]
+        mimir.getSchema('SELECT 1')
+        mimir.getSchema('SELECT 2')
+        mimir.getBlob('1')
+        with self.assertRaises(MimirError):
+            mimir.getBlob('2')
+        metrics = mimir.getLatencyMetrics()
+        self.assertEqual(set(metrics.keys()), set(['POST schema', 'GET blob']))
+        self.assertEqual(metrics['POST schema']['count'], 2)
+        self.assertEqual(metrics['POST schema']['errors'], 0)
+        self.assertEqual(metrics['GET blob']['count'], 2)
+        self.assertEqual(metrics['GET blob']['errors'], 1)
+        for metric in metrics.values():
+            self.assertTrue(metric['maxTime'] >= metric['avgTime'] >= 0)
+        mimir.resetLatencyMetrics()
+        self.assertEqual(mimir.getLatencyMetrics(), dict())
+
+    def test_retry(self):
+        """Test that only idempotent requests are retried."""
+        self.gateway.responses['query/table'] = [
+            (503, {}),
+            (502, {}),
+            (200, {'data': [[1]]})
+        ]
+        self.assertEqual(mimir.getTable('T'), {'data': [[1]]})
+        self.assertEqual(self.gateway.requests, ['query/table'] * 3)
+        self.gateway.responses['view/create'] = [
+            (503, {}),
+            (200, {'name': 'V'})
+        ]
+        with self.assertRaises(MimirError):
+            mimir.createView({}, 'SELECT 1')
+        self.assertEqual(self.gateway.requests.count('view/create'), 1)
+        # Give up after the maximum number of retries
+        self.gateway.responses['tableInfo'] = [(503, {})]
+        with self.assertRaises(MimirError):
+            mimir.getTableInfo('T')
+        self.assertEqual(
+            self.gateway.requests.count('tableInfo'),
+            mimir._max_retries + 1
+        )
+
+    def test_mimir_error(self):
+        """Test that errors reported by the gateway are raised."""
+        self.gateway.responses['query/data'] = [
+            (400, {'errorType': 'java.sql.SQLException', 'errorMessage': 'bad query'})
+        ]
+        with self.assertRaises(MimirError):
+            mimir.sqlQuery('SELECT')
+        self.assertEqual(self.gateway.requests, ['query/data'])
+
+    def test_concurrent_requests(self):
+        """Test that concurrent requests never open more connections than
+        the pool size.
+        """
+        self.gateway.responses['query/table'] = [(200, {'data': []})]
+        threads = [
+            threading.Thread(target=lambda: [mimir.getTable('T') for _ in range(5)])
+            for _ in range(mimir._max_connections * 2)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.gateway.requests), len(threads) * 5)
+        self.assertTrue(len(self.gateway.clients) <= mimir._max_connections)
+
+
+if __name__ == '__main__':
+    unittest.main()
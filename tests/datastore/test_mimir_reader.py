@@ -0,0 +1,108 @@
+"""Test batched reading of Mimir datasets. Uses a replacement for the
+getTable call to the Mimir gateway that returns rows from a list.
+"""
+
+import threading
+import unittest
+
+from unittest import mock
+
+from vizier.datastore.mimir.dataset import MimirDatasetColumn
+from vizier.datastore.mimir.reader import MimirDatasetReader
+
+
+ROW_COUNT = 25
+
+
+class GetTable(object):
+    """Replacement for vizier.mimir.getTable over a table with ROW_COUNT
+    rows. Keeps track of the (offset, limit) of all requests and of the
+    threads that made them.
+    """
+    def __init__(self):
+        self.requests = list()
+        self.threads = set()
+
+    def __call__(self, table, columns, offset_to_rowid, limit, offset, include_uncertainty):
+        self.requests.append((offset, limit))
+        self.threads.add(threading.current_thread().ident)
+        start = offset if offset is not None else 0
+        end = ROW_COUNT if limit is None else min(start + limit, ROW_COUNT)
+        rows = list(range(start, end))
+        return {
+            'data': [[i, 'R' + str(i)] for i in rows],
+            'prov': [str(i) for i in rows],
+            'colTaint': [[True, i % 2 == 0] for i in rows]
+        }
+
+
+class TestMimirDatasetReader(unittest.TestCase):
+
+    def setUp(self):
+        """Create the dataset columns."""
+        self.columns = [
+            MimirDatasetColumn(identifier=0, name_in_dataset='A', name_in_rdb='A', data_type='int'),
+            MimirDatasetColumn(identifier=1, name_in_dataset='B', name_in_rdb='B', data_type='varchar')
+        ]
+
+    def read(self, prefetch=True, **kwargs):
+        """Read all rows using the given reader arguments. Returns the rows
+        and the replacement for getTable.
+        """
+        get_table = GetTable()
+        with mock.patch('vizier.mimir.getTable', new=get_table):
+            reader = MimirDatasetReader(
+                table_name='T',
+                columns=self.columns,
+                prefetch=prefetch,
+                **kwargs
+            )
+            with reader:
+                rows = [row for row in reader]
+            self.assertFalse(reader.is_open)
+        return rows, get_table
+
+    def test_batches(self):
+        """Test reading a dataset in batches with and without prefetching."""
+        for prefetch in [True, False]:
+            rows, get_table = self.read(prefetch=prefetch, batch_size=10)
+            self.assertEqual([row.identifier for row in rows], [str(i) for i in range(ROW_COUNT)])
+            self.assertEqual(rows[3].values, [3, 'R3'])
+            self.assertEqual(rows[3].caveats, [False, True])
+            self.assertEqual(get_table.requests, [(None, 10), (10, 10), (20, 10)])
+            self.assertEqual(len(get_table.threads), 2 if prefetch else 1)
+        # A batch that has as many rows as requested is followed by a
+        # request for an empty batch
+        rows, get_table = self.read(batch_size=5)
+        self.assertEqual(len(rows), ROW_COUNT)
+        self.assertEqual(len(get_table.requests), 6)
+
+    def test_offset_and_limit(self):
+        """Test reading ranges of a dataset."""
+        rows, get_table = self.read(batch_size=10, offset=5, limit=12)
+        self.assertEqual([row.values[0] for row in rows], list(range(5, 17)))
+        self.assertEqual(get_table.requests, [(5, 10), (15, 2)])
+        rows, get_table = self.read(batch_size=10, offset=20, limit=100)
+        self.assertEqual([row.values[0] for row in rows], list(range(20, 25)))
+        self.assertEqual(get_table.requests, [(20, 10)])
+        rows, get_table = self.read(batch_size=10, limit=0)
+        self.assertEqual(rows, [])
+        self.assertEqual(get_table.requests, [])
+        with self.assertRaises(Exception):
+            MimirDatasetReader(table_name='T', columns=self.columns, batch_size=0)
+
+    def test_close_early(self):
+        """Test closing a reader before all rows have been read."""
+        get_table = GetTable()
+        with mock.patch('vizier.mimir.getTable', new=get_table):
+            reader = MimirDatasetReader(table_name='T', columns=self.columns, batch_size=10)
+            with reader:
+                self.assertEqual(next(reader).identifier, '0')
+            self.assertIsNone(reader.executor)
+            self.assertIsNone(reader.pending)
+            with self.assertRaises(StopIteration):
+                next(reader)
+
+
+if __name__ == '__main__':
+    unittest.main()
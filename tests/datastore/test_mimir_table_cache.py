@@ -0,0 +1,193 @@
+"""Test caching the schema and properties of Mimir tables against a local stub
+gateway.
+"""
+
+import json
+import os
+import shutil
+import threading
+import unittest
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from vizier.datastore.artifact import ArtifactDescriptor
+from vizier.datastore.dataset import DatasetDescriptor
+from vizier.datastore.mimir.cache import TableInfoCache
+from vizier.datastore.mimir.store import MimirDatastore
+from vizier.engine.task.base import TaskContext
+
+import vizier.datastore.mimir.cache as cache
+import vizier.mimir as mimir
+
+
+DATASTORE_DIR = './.temp'
+
+
+class StubGateway(ThreadingMixIn, HTTPServer):
+    """Stub for the tableInfo endpoint of the Mimir gateway. Returns a single
+    column schema for every table in the tables list, a server error for
+    tables in the failing list, and an error for all other tables. The
+    properties contain the profile flag of the request.
+    """
+    daemon_threads = True
+
+    def __init__(self, tables):
+        super(StubGateway, self).__init__(('127.0.0.1', 0), StubHandler)
+        self.tables = tables
+        self.failing = list()
+        self.requests = list()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/api/v2/'.format(self.server_address[1])
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        req = json.loads(self.rfile.read(length).decode('utf-8'))
+        with self.server.lock:
+            self.server.requests.append(req)
+        if req['table'] in self.server.failing:
+            data = b'Internal Server Error'
+            self.send_response(500)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        elif req['table'] in self.server.tables:
+            status = 200
+            body = {
+                'schema': [{'name': 'A', 'type': 'int'}],
+                'properties': {'profiled': req.get('profile', None)}
+            }
+        else:
+            status = 400
+            body = {'errorType': 'java.sql.SQLException', 'errorMessage': 'unknown table'}
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TestMimirTableCache(unittest.TestCase):
+
+    def setUp(self):
+        """Start the stub gateway, point the client to it, and create an
+        empty datastore and table cache.
+        """
+        self.gateway = StubGateway(tables=['DS1', 'DS2', 'DS3'])
+        self.thread = threading.Thread(target=self.gateway.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.mimir_url = mimir._mimir_url
+        mimir._mimir_url = self.gateway.url
+        mimir.resetSession()
+        cache._cache = TableInfoCache(capacity=2)
+        if os.path.isdir(DATASTORE_DIR):
+            shutil.rmtree(DATASTORE_DIR)
+        os.makedirs(DATASTORE_DIR)
+        self.datastore = MimirDatastore(DATASTORE_DIR)
+
+    def tearDown(self):
+        """Stop the stub gateway and restore the client configuration."""
+        mimir.resetSession()
+        mimir._mimir_url = self.mimir_url
+        cache._cache = None
+        self.gateway.shutdown()
+        self.gateway.server_close()
+        shutil.rmtree(DATASTORE_DIR)
+
+    def test_batch(self):
+        """Test resolving all datasets of a task context in one batch."""
+        self.datastore.get_dataset('DS1')
+        context = TaskContext(
+            project_id='P',
+            datastore=self.datastore,
+            filestore=None,
+            artifacts={
+                'a': DatasetDescriptor(identifier='DS1'),
+                'b': DatasetDescriptor(identifier='DS2'),
+                'c': DatasetDescriptor(identifier='DS3'),
+                'd': DatasetDescriptor(identifier='DS3'),
+                'f': ArtifactDescriptor(identifier='F', name='f', artifact_type='python')
+            }
+        )
+        datasets = context.get_datasets()
+        self.assertEqual(sorted(datasets.keys()), ['a', 'b', 'c', 'd'])
+        self.assertEqual(datasets['b'].identifier, 'DS2')
+        self.assertEqual(datasets['b'].columns[0].name, 'A')
+        # DS1 was cached. DS3 is requested only once.
+        tables = [req['table'] for req in self.gateway.requests]
+        self.assertEqual(sorted(tables), ['DS1', 'DS2', 'DS3'])
+        # Unknown datasets are omitted from the batch result and not cached
+        self.assertEqual(
+            sorted(self.datastore.get_datasets(['DS2', 'DS4', 'DS5']).keys()),
+            ['DS2']
+        )
+        self.assertEqual(self.datastore.get_datasets(['DS4']), dict())
+        context.datasets['e'] = DatasetDescriptor(identifier='DS4')
+        with self.assertRaisesRegex(ValueError, 'unknown dataset \'e\''):
+            context.get_datasets()
+        with self.assertRaises(mimir.MimirError):
+            self.datastore.get_dataset('DS4')
+        self.assertEqual(len(cache.get_cache()), 2)
+
+    def test_gateway_error(self):
+        """Test that errors other than unknown tables are raised by batch
+        lookups.
+        """
+        self.gateway.failing.append('DS2')
+        with self.assertRaisesRegex(mimir.MimirError, '500'):
+            self.datastore.get_datasets(['DS1', 'DS2', 'DS4'])
+        with self.assertRaisesRegex(mimir.MimirError, '500'):
+            self.datastore.get_datasets(['DS2'])
+        context = TaskContext(
+            project_id='P',
+            datastore=self.datastore,
+            filestore=None,
+            artifacts={'b': DatasetDescriptor(identifier='DS2')}
+        )
+        with self.assertRaises(mimir.MimirError):
+            context.get_datasets()
+        # Unknown tables are still omitted once the gateway recovers
+        self.gateway.failing.clear()
+        datasets = self.datastore.get_datasets(['DS1', 'DS2', 'DS4'])
+        self.assertEqual(sorted(datasets.keys()), ['DS1', 'DS2'])
+
+    def test_get_dataset(self):
+        """Test reading datasets through the table cache."""
+        for _ in range(3):
+            ds = self.datastore.get_dataset('DS1')
+            self.assertEqual(ds.identifier, 'DS1')
+            self.assertEqual(self.datastore.get_properties('DS1'), {'profiled': None})
+            self.assertEqual(self.datastore.get_descriptor('DS1').columns[0].name, 'A')
+        self.assertEqual(len(self.gateway.requests), 1)
+        # Forcing the profiler refreshes the cached properties
+        ds = self.datastore.get_dataset('DS1', force_profiler=True)
+        self.assertEqual(ds.get_properties(), {'profiled': True})
+        self.assertEqual(self.datastore.get_properties('DS1'), {'profiled': True})
+        self.assertEqual(len(self.gateway.requests), 2)
+        # Results without profiling are not cached
+        ds = self.datastore.get_dataset('DS2', force_profiler=False)
+        self.assertEqual(ds.get_properties(), {'profiled': False})
+        self.datastore.get_dataset('DS2')
+        self.assertEqual(len(self.gateway.requests), 4)
+        # The least recently used table is evicted
+        self.datastore.get_dataset('DS3')
+        self.datastore.get_dataset('DS1')
+        self.assertEqual(len(self.gateway.requests), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
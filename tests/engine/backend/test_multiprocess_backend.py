@@ -49,6 +49,7 @@ class FakeWorkflowController(WorkflowController):
         self.state = None
         self.outputs = None
         self.task_id = None
+        self.finished = list()
 
     def set_error(self, 
             task_id: str, 
@@ -58,6 +59,7 @@ class FakeWorkflowController(WorkflowController):
         self.task_id = task_id
         self.outputs = outputs
         self.state = 'ERROR'
+        self.finished.append(task_id)
 
     def set_success(self, 
             task_id: str, 
@@ -67,6 +69,7 @@ class FakeWorkflowController(WorkflowController):
         self.task_id = task_id
         self.outputs = result.outputs
         self.state = 'SUCCESS'
+        self.finished.append(task_id)
 
     def set_running(self):
         pass
@@ -96,7 +99,8 @@ class TestMultiprocessBackend(unittest.TestCase):
                 PACKAGE_DATA: vtp,
                 'error': FakeTaskProcessor()
             },
-            projects=projects
+            projects=projects,
+            processes=2
         )
 
     def tearDown(self):
@@ -128,6 +132,31 @@ class TestMultiprocessBackend(unittest.TestCase):
         self.assertIsNone(controller.task_id)
         self.assertIsNone(controller.state)
 
+    def test_cancel_keeps_pool(self) -> None:
+        """Test that canceling a task does not affect other tasks that are
+        executed by the pool.
+        """
+        controller = FakeWorkflowController()
+        sources = ['import time\ntime.sleep(5)', 'import time\ntime.sleep(1)\nprint(2+2)']
+        for i, source in enumerate(sources):
+            self.backend.execute_async(
+                task=TaskHandle(
+                    task_id=str(i),
+                    project_id=self.PROJECT_ID,
+                    controller=controller
+                ),
+                command=pycell.python_cell(source=source, validate=True),
+                artifacts=dict()
+            )
+        time.sleep(0.5)
+        self.backend.cancel_task('0')
+        time.sleep(3)
+        self.assertEqual(controller.finished, ['1'])
+        self.assertEqual(controller.state, 'SUCCESS')
+        self.assertEqual(controller.outputs.stdout[0].value, '4')
+        # The canceled worker has been replaced by a new worker
+        self.assertEqual(len(self.backend.pool.workers), 2)
+
     def test_error(self) -> None:
         """Test executing a command with processor that raises an exception
         instead of returning an execution result.
@@ -177,6 +206,26 @@ class TestMultiprocessBackend(unittest.TestCase):
         self.assertEqual(controller.state, 'SUCCESS')
         self.assertEqual(controller.outputs.stdout[0].value, '4')
 
+    def test_execute_queued(self):
+        """Test executing more tasks than there are workers in the pool."""
+        controller = FakeWorkflowController()
+        for i in range(5):
+            self.backend.execute_async(
+                task=TaskHandle(
+                    task_id=str(i),
+                    project_id=self.PROJECT_ID,
+                    controller=controller
+                ),
+                command=pycell.python_cell(
+                    source='import time\ntime.sleep(0.5)\nprint(2+2)',
+                    validate=True
+                ),
+                artifacts=dict()
+            )
+        time.sleep(4)
+        self.assertEqual(sorted(controller.finished), ['0', '1', '2', '3', '4'])
+        self.assertEqual(len(self.backend.pool.workers), 2)
+
 
 if __name__ == '__main__':
     unittest.main()
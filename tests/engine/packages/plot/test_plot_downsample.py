@@ -0,0 +1,130 @@
+"""Test reducing chart query results to a point budget."""
+
+import math
+import os
+import shutil
+import unittest
+
+import numpy as np
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
+from vizier.engine.packages.plot.downsample import downsample, lttb
+from vizier.engine.packages.plot.query import ChartQuery, cast_value, cast_values
+from vizier.view.chart import ChartViewHandle
+
+
+SERVER_DIR = './.tmp'
+DATASTORE_DIR = './.tmp/ds'
+
+ROW_COUNT = 10000
+
+
+class TestChartDownsampling(unittest.TestCase):
+
+    def setUp(self):
+        """Create an instance of the file system datastore for an empty server
+        directory.
+        """
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+        os.makedirs(SERVER_DIR)
+        self.datastore = FileSystemDatastore(DATASTORE_DIR)
+
+    def tearDown(self):
+        """Clean-up by dropping the server directory."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+
+    def test_cast_values(self):
+        """Test casting the values of a data series."""
+        self.assertEqual(cast_values(['1', '2,000', None, 3], True), [1, 2000, None, 3])
+        values = cast_values(['1', '2.5', '3.0', 4], True)
+        self.assertEqual(values, [1, 2.5, 3.0, 4])
+        self.assertEqual([type(v) for v in values], [int, float, float, int])
+        values = cast_values(['2.5', '1.5'], True)
+        self.assertEqual(values, [2.5, 1.5])
+        self.assertTrue(all(isinstance(v, float) for v in values))
+        # Integers that do not fit into 64 bits are not cast to floats
+        big = str(2 ** 70)
+        self.assertEqual(cast_values([big, '1'], True), [2 ** 70, 1])
+        self.assertEqual(cast_values([big, '1.5'], True), [2 ** 70, 1.5])
+        # The result is the same as casting values one by one
+        values = ['1', '-2', '1e3', '0.5', '1,000', 'inf', 'nan', big]
+        self.assertEqual(
+            [str(v) for v in cast_values(values, True)],
+            [str(cast_value(v)) for v in values]
+        )
+        self.assertEqual(cast_values(['1', 'A', '2.5', '1,5'], True), [1, 'A', 2.5, 15])
+        self.assertEqual(cast_values(['1', 'A'], False), ['1', 'A'])
+
+    def test_downsample_chart_types(self):
+        """Test downsampling for the different chart types."""
+        x = list(range(ROW_COUNT))
+        y = [math.sin(i / 100.0) for i in x]
+        y[5000] = 10.0
+        rows = [[x[i], y[i], i % 7] for i in range(ROW_COUNT)]
+        caveats = [[False, i == 5001, False] for i in range(ROW_COUNT)]
+        # Results within the budget are not modified.
+        result = downsample(rows, caveats, 'Line Chart', 0, ROW_COUNT)
+        self.assertIs(result[0], rows)
+        for chart_type in ['Line Chart', 'Area Chart', 'Scatter Plot']:
+            data, data_caveats = downsample(rows, caveats, chart_type, 0, 500)
+            self.assertTrue(0 < len(data) <= 500)
+            self.assertEqual(len(data), len(data_caveats))
+            # Points are taken from the dataset in their original order.
+            self.assertEqual(data, sorted(data, key=lambda r: r[0]))
+            for row in data:
+                self.assertEqual(row, rows[row[0]])
+            # The outlier is preserved.
+            self.assertIn(rows[5000], data)
+        # Bar charts aggregate buckets of rows.
+        data, data_caveats = downsample(rows, caveats, 'Bar Chart', 0, 100)
+        self.assertEqual(len(data), 100)
+        self.assertEqual(data[0][0], 0)
+        self.assertAlmostEqual(data[0][1], float(np.mean(y[:100])))
+        self.assertAlmostEqual(data[0][2], float(np.mean([i % 7 for i in range(100)])))
+        self.assertTrue(data_caveats[50][1])
+        self.assertFalse(data_caveats[49][1])
+
+    def test_exec_query_with_budget(self):
+        """Test running a chart query with a point budget."""
+        ds = self.datastore.create_dataset(
+            columns=[
+                DatasetColumn(identifier=0, name='X'),
+                DatasetColumn(identifier=1, name='Y')
+            ],
+            rows=[
+                DatasetRow(identifier=i, values=[str(i), str(i % 100)])
+                for i in range(ROW_COUNT)
+            ]
+        )
+        ds = self.datastore.get_dataset(ds.identifier)
+        view = ChartViewHandle(dataset_name='ABC', x_axis=0, chart_type='Line Chart')
+        view.add_series(0)
+        view.add_series(1)
+        data, caveats = ChartQuery.exec_query(dataset=ds, view=view)
+        self.assertEqual(len(data), ROW_COUNT)
+        self.assertEqual(data[10], ['10', 10])
+        data, caveats = ChartQuery.exec_query(dataset=ds, view=view, max_points=1000)
+        self.assertTrue(len(data) <= 1000)
+        self.assertEqual(len(data), len(caveats))
+        # The peaks of the saw-tooth series are selected.
+        self.assertEqual(max(row[1] for row in data), 99)
+        self.assertEqual(min(row[1] for row in data), 0)
+
+    def test_lttb(self):
+        """Test selecting points of a series with LTTB."""
+        x = np.arange(100, dtype=float)
+        y = np.zeros(100)
+        y[37] = 5.0
+        indices = lttb(x, y, 10)
+        self.assertEqual(len(indices), 10)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 99)
+        self.assertIn(37, indices)
+        self.assertEqual(len(lttb(x, y, 200)), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
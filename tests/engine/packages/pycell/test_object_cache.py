@@ -0,0 +1,137 @@
+"""Test caching datasets and exported Python objects across Python cells."""
+
+import os
+import shutil
+import unittest
+
+from pandas import DataFrame
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
+from vizier.engine.packages.pycell.cache import ObjectCache, get_cache
+from vizier.engine.packages.pycell.cache import KIND_CODE, KIND_FRAME, KIND_ROWS
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.engine.packages.pycell.processor.base import PyCellTaskProcessor
+from vizier.engine.task.base import TaskContext
+from vizier.filestore.fs.base import FileSystemFilestore
+
+
+SERVER_DIR = './.tmp'
+FILESTORE_DIR = './.tmp/fs'
+DATASTORE_DIR = './.tmp/ds'
+
+UPDATE_ROWS_PY = """
+ds = vizierdb.get_dataset('people')
+for row in ds.rows:
+    row.set_value('Name', row.get_value('Name').upper())
+print(','.join(row.get_value('Name') for row in vizierdb.get_dataset('people').rows))
+df = vizierdb.get_dataset_frame('people')
+df['Name'] = 'X'
+print(','.join(vizierdb.get_dataset_frame('people')['Name']))
+"""
+
+EXPORT_PY = """
+def add_one(x):
+    return x + 1
+export(add_one)
+"""
+
+CALL_PY = """
+print(add_one(41))
+"""
+
+
+class TestPyCellObjectCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create instances of the default datastore and filestore."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+        os.makedirs(SERVER_DIR)
+        self.datastore = FileSystemDatastore(DATASTORE_DIR)
+        self.filestore = FileSystemFilestore(FILESTORE_DIR)
+        get_cache().clear()
+
+    def tearDown(self):
+        """Clean-up by dropping the server directory."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+        get_cache().clear()
+
+    def run_cell(self, source, artifacts):
+        """Execute a Python cell in project 'P1'."""
+        cmd = python_cell(source=source, validate=True)
+        return PyCellTaskProcessor().compute(
+            command_id=cmd.command_id,
+            arguments=cmd.arguments,
+            context=TaskContext(
+                project_id='P1',
+                datastore=self.datastore,
+                filestore=self.filestore,
+                artifacts=artifacts
+            )
+        )
+
+    def test_cache_eviction(self):
+        """Test evicting objects by count and by memory size."""
+        cache = ObjectCache(capacity=2, max_memory=1)
+        cache.put('P1', 'A', KIND_CODE, 'a')
+        cache.put('P1', 'B', KIND_CODE, 'b')
+        self.assertEqual(cache.get('P1', 'A', KIND_CODE), 'a')
+        cache.put('P2', 'C', KIND_CODE, 'c')
+        # B is the least recently used object.
+        self.assertIsNone(cache.get('P1', 'B', KIND_CODE))
+        self.assertEqual(cache.get('P1', 'A', KIND_CODE), 'a')
+        self.assertIsNone(cache.get('P2', 'A', KIND_CODE))
+        cache.clear('P1')
+        self.assertEqual(len(cache), 1)
+        # Objects that exceed the memory limit are not cached.
+        frame = DataFrame({'A': range(300000)})
+        self.assertIs(cache.put('P1', 'D', KIND_FRAME, frame), frame)
+        self.assertIsNone(cache.get('P1', 'D', KIND_FRAME))
+        cache.put('P1', 'E', KIND_FRAME, DataFrame({'A': range(100000)}))
+        cache.put('P1', 'F', KIND_FRAME, DataFrame({'A': range(100000)}))
+        self.assertIsNone(cache.get('P1', 'E', KIND_FRAME))
+        self.assertIsNotNone(cache.get('P1', 'F', KIND_FRAME))
+        self.assertTrue(cache.memory <= cache.max_memory)
+
+    def test_cached_datasets(self):
+        """Test reading the same dataset in multiple cells."""
+        ds = self.datastore.create_dataset(
+            columns=[DatasetColumn(identifier=0, name='Name')],
+            rows=[
+                DatasetRow(identifier=0, values=['Alice']),
+                DatasetRow(identifier=1, values=['Bob'])
+            ]
+        )
+        for _ in range(2):
+            result = self.run_cell(UPDATE_ROWS_PY, {'people': ds})
+            self.assertTrue(result.is_success)
+            # Changes to the rows and data frames of a dataset in a cell are
+            # not visible to other readers.
+            self.assertEqual(result.outputs.stdout[0].value, 'Alice,Bob\nAlice,Bob')
+        cache = get_cache()
+        self.assertIsNotNone(cache.get('P1', ds.identifier, KIND_ROWS))
+        self.assertIsNotNone(cache.get('P1', ds.identifier, KIND_FRAME))
+        self.assertIsNone(cache.get('P2', ds.identifier, KIND_ROWS))
+
+    def test_cached_exports(self):
+        """Test compiling exported functions once."""
+        result = self.run_cell(EXPORT_PY, {})
+        self.assertTrue(result.is_success)
+        artifacts = {'add_one': result.provenance.write['add_one']}
+        identifier = artifacts['add_one'].identifier
+        for _ in range(2):
+            result = self.run_cell(CALL_PY, artifacts)
+            self.assertTrue(result.is_success)
+            self.assertEqual(result.outputs.stdout[0].value, '42')
+        self.assertIsNotNone(get_cache().get('P1', identifier, KIND_CODE))
+        # Syntax errors in the cell are reported without an offset for the
+        # exported functions.
+        result = self.run_cell('x = (', artifacts)
+        self.assertFalse(result.is_success)
+        self.assertIn('line 1', result.outputs.stderr[0].value)
+
+
+if __name__ == '__main__':
+    unittest.main()
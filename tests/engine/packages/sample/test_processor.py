@@ -0,0 +1,164 @@
+"""Test the sampling processor for the file system datastore."""
+
+import os
+import shutil
+import unittest
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
+from vizier.engine.packages.sample.processor import SamplingProcessor
+from vizier.engine.task.base import TaskContext
+from vizier.filestore.fs.base import FileSystemFilestore
+from vizier.viztrail.command import ModuleCommand
+
+import vizier.engine.packages.sample.base as cmd
+import vizier.engine.packages.sample.sampler as sampler
+
+
+SERVER_DIR = './.tmp'
+FILESTORE_DIR = './.tmp/fs'
+DATASTORE_DIR = './.tmp/ds'
+
+ROW_COUNT = 1000
+
+
+class TestSamplingProcessor(unittest.TestCase):
+
+    def setUp(self):
+        """Create an instance of the file system datastore for an empty server
+        directory with a single dataset.
+        """
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+        os.makedirs(SERVER_DIR)
+        self.datastore = FileSystemDatastore(DATASTORE_DIR)
+        self.filestore = FileSystemFilestore(FILESTORE_DIR)
+        # Stratum 'A' contains 80% of the rows.
+        self.dataset = self.datastore.create_dataset(
+            columns=[
+                DatasetColumn(identifier=0, name='ID', data_type='int'),
+                DatasetColumn(identifier=1, name='Group')
+            ],
+            rows=[
+                DatasetRow(identifier=i, values=[i, 'A' if i % 5 != 0 else 'B'])
+                for i in range(ROW_COUNT)
+            ]
+        )
+
+    def tearDown(self):
+        """Clean-up by dropping the server directory."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+
+    def compute(self, command_id, arguments):
+        """Run a sampling command on the test dataset. Returns the rows in the
+        sample.
+        """
+        command = ModuleCommand(
+            package_id=cmd.PACKAGE_SAMPLE,
+            command_id=command_id,
+            arguments=[
+                {'id': cmd.PARA_INPUT_DATASET, 'value': 'data'},
+                {'id': cmd.PARA_OUTPUT_DATASET, 'value': 'sample'}
+            ] + arguments,
+            packages=None
+        )
+        result = SamplingProcessor().compute(
+            command_id=command.command_id,
+            arguments=command.arguments,
+            context=TaskContext(
+                project_id='P',
+                artifacts={'data': self.dataset},
+                datastore=self.datastore,
+                filestore=self.filestore
+            )
+        )
+        self.assertEqual(result.provenance.read, {'data': self.dataset.identifier})
+        output = result.provenance.write['sample']
+        ds = self.datastore.get_dataset(output.identifier)
+        self.assertEqual([c.name for c in ds.columns], ['ID', 'Group'])
+        rows = ds.fetch_rows()
+        # Rows keep their identifier and their order in the input dataset.
+        for row in rows:
+            self.assertEqual(row.identifier, row.values[0])
+        self.assertEqual(rows, sorted(rows, key=lambda r: r.identifier))
+        return rows
+
+    def test_automatic_stratified_sample(self):
+        """Test drawing samples of equal size for each stratum."""
+        rows = self.compute(
+            cmd.AUTOMATIC_STRATIFIED_SAMPLE,
+            [
+                {'id': cmd.PARA_STRATIFICATION_COLUMN, 'value': 1},
+                {'id': cmd.PARA_SAMPLING_RATE, 'value': 0.2}
+            ]
+        )
+        self.assertEqual(len([r for r in rows if r.values[1] == 'A']), 100)
+        self.assertEqual(len([r for r in rows if r.values[1] == 'B']), 100)
+        # Stratum 'B' has too few rows for a sample of 2 * 300 rows.
+        with self.assertRaises(ValueError):
+            self.compute(
+                cmd.AUTOMATIC_STRATIFIED_SAMPLE,
+                [
+                    {'id': cmd.PARA_STRATIFICATION_COLUMN, 'value': 1},
+                    {'id': cmd.PARA_SAMPLING_RATE, 'value': 0.6}
+                ]
+            )
+
+    def test_basic_sample(self):
+        """Test uniform sampling."""
+        rows = self.compute(
+            cmd.BASIC_SAMPLE,
+            [{'id': cmd.PARA_SAMPLING_RATE, 'value': 0.5}]
+        )
+        self.assertTrue(0 < len(rows) < ROW_COUNT)
+        self.assertEqual(
+            len(self.compute(cmd.BASIC_SAMPLE, [{'id': cmd.PARA_SAMPLING_RATE, 'value': 1.0}])),
+            ROW_COUNT
+        )
+        with self.assertRaises(Exception):
+            self.compute(cmd.BASIC_SAMPLE, [{'id': cmd.PARA_SAMPLING_RATE, 'value': 1.5}])
+
+    def test_manual_stratified_sample(self):
+        """Test sampling with a separate sampling rate for each stratum."""
+        rows = self.compute(
+            cmd.MANUAL_STRATIFIED_SAMPLE,
+            [
+                {'id': cmd.PARA_STRATIFICATION_COLUMN, 'value': 1},
+                {'id': cmd.PARA_STRATA, 'value': [[
+                    {'id': cmd.PARA_STRATUM_VALUE, 'value': 'B'},
+                    {'id': cmd.PARA_SAMPLING_RATE, 'value': 1.0}
+                ]]}
+            ]
+        )
+        self.assertEqual(len(rows), ROW_COUNT / 5)
+        self.assertTrue(all(r.values[1] == 'B' for r in rows))
+
+    def test_reservoir_capacity(self):
+        """Test that reservoirs never hold more rows than the final sample if
+        the strata are discovered late in the input.
+        """
+        rows = [
+            DatasetRow(identifier=i, values=[i if i >= 90 else 0])
+            for i in range(100)
+        ]
+        sample = sampler.automatic_stratified_sample(
+            rows=rows,
+            column=0,
+            probability=0.01,
+            row_count=100,
+            seed=42
+        )
+        self.assertEqual(len(sample), 0)
+        sample = sampler.automatic_stratified_sample(
+            rows=rows,
+            column=0,
+            probability=0.11,
+            row_count=100,
+            seed=42
+        )
+        self.assertEqual([r.values[0] for r in sample if r.values[0] != 0], list(range(90, 100)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Test the SQL processor for the file system datastore."""
+
+import os
+import shutil
+import unittest
+
+from unittest import mock
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
+from vizier.engine.packages.sql.command import sql_cell
+from vizier.engine.packages.sql.processor import SQLTaskProcessor
+from vizier.engine.task.base import TaskContext
+from vizier.filestore.fs.base import FileSystemFilestore
+from vizier.viztrail.module.output import DatasetOutput
+
+
+SERVER_DIR = './.tmp'
+FILESTORE_DIR = './.tmp/fs'
+DATASTORE_DIR = './.tmp/ds'
+
+
+def dataset_output(ds, project_id, name=None, raise_error_on_missing=False):
+    """Create a dataset output without serializing the dataset through the
+    web service API (which depends on the global server configuration).
+    """
+    return DatasetOutput({'id': ds.identifier, 'name': name})
+
+
+class TestFileSystemSQLProcessor(unittest.TestCase):
+
+    def setUp(self):
+        """Create an instance of the file system datastore for an empty server
+        directory.
+        """
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+        os.makedirs(SERVER_DIR)
+        self.datastore = FileSystemDatastore(DATASTORE_DIR)
+        self.filestore = FileSystemFilestore(FILESTORE_DIR)
+        patcher = mock.patch.object(
+            DatasetOutput,
+            'from_handle',
+            side_effect=dataset_output
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Clean-up by dropping the server directory."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+
+    def compute(self, source, output_dataset, artifacts):
+        """Run a SQL cell in a context with the given artifacts."""
+        cmd = sql_cell(source=source, output_dataset=output_dataset, validate=True)
+        return SQLTaskProcessor().compute(
+            command_id=cmd.command_id,
+            arguments=cmd.arguments,
+            context=TaskContext(
+                project_id='P',
+                artifacts=artifacts,
+                datastore=self.datastore,
+                filestore=self.filestore
+            )
+        )
+
+    def test_run_sql_query(self):
+        """Test running a SQL query and storing the result as a dataset."""
+        ds = self.datastore.create_dataset(
+            columns=[
+                DatasetColumn(identifier=0, name='Name'),
+                DatasetColumn(identifier=1, name='Age', data_type='int')
+            ],
+            rows=[
+                DatasetRow(identifier=0, values=['Alice', 23]),
+                DatasetRow(identifier=1, values=['Bob', 32])
+            ]
+        )
+        other = self.datastore.create_dataset(
+            columns=[DatasetColumn(identifier=0, name='A')],
+            rows=[DatasetRow(identifier=0, values=[1])]
+        )
+        artifacts = {'people': ds, 'other': other}
+        result = self.compute(
+            'SELECT name, age + 1 AS age FROM people WHERE age > 30',
+            'older',
+            artifacts
+        )
+        self.assertTrue(result.is_success)
+        self.assertEqual(result.provenance.read, {'people': ds.identifier})
+        output = result.provenance.write['older']
+        dataset = self.datastore.get_dataset(output.identifier)
+        self.assertEqual([col.name for col in dataset.columns], ['Name', 'age'])
+        self.assertEqual([row.values for row in dataset.fetch_rows()], [['Bob', 33]])
+        self.assertEqual(
+            result.outputs.stdout[0].value,
+            {'id': output.identifier, 'name': 'older'}
+        )
+        # Errors in the query are reported in the module outputs.
+        result = self.compute('SELECT * FROM unknown', 'older', artifacts)
+        self.assertFalse(result.is_success)
+        self.assertEqual(len(result.outputs.stderr), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
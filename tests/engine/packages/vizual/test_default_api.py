@@ -4,8 +4,13 @@ import os
 import shutil
 import unittest
 
+from vizier.api.client.datastore.dataset import RemoteDatasetHandle
+from vizier.core.util import get_unique_identifier
+from vizier.datastore.base import DefaultDatastore
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
 from vizier.datastore.fs.base import FileSystemDatastore
 from vizier.engine.packages.vizual.api.base import RESOURCE_DATASET, RESOURCE_FILEID, RESOURCE_URL
+from vizier.engine.packages.vizual.api.base import RESOURCE_VALIDATORS
 from vizier.engine.packages.vizual.api.fs import DefaultVizualApi
 from vizier.filestore.fs.base import FileSystemFilestore
 
@@ -371,7 +376,10 @@ class TestDefaultVizualApi(unittest.TestCase):
         prev_id = result.dataset.identifier
         self.assertEqual(result.dataset.identifier, prev_id)
         # If we re-run with reload flag true a new dataset should be returned
+        # (the resource is always downloaded if there are no validators from
+        # the previous download)
         resources[RESOURCE_URL] = DOWNLOAD_URL
+        resources.pop(RESOURCE_VALIDATORS, None)
         result = self.api.load_dataset(
             datastore=self.datastore,
             filestore=self.filestore,
@@ -752,5 +760,97 @@ class TestDefaultVizualApi(unittest.TestCase):
             self.api.update_cell(ds.identifier, 0, 100, 'MyValue', self.datastore)
 
 
+class InMemDatastore(DefaultDatastore):
+    """Datastore that keeps datasets in memory. Used to test the vizual API
+    with datastores other than the file system datastore (e.g., the HISTORE
+    datastore).
+    """
+    def __init__(self, base_path):
+        super(InMemDatastore, self).__init__(base_path)
+        self.datasets = dict()
+
+    def create_dataset(self, columns, rows, properties=None, human_readable_name=None, backend_options=None, dependencies=None):
+        identifier = get_unique_identifier()
+        self.datasets[identifier] = RemoteDatasetHandle(
+            identifier=identifier,
+            columns=columns,
+            rows=rows,
+            store=self
+        )
+        return self.datasets[identifier]
+
+    def get_dataset(self, identifier, force_profiler=None):
+        return self.datasets.get(identifier)
+
+    def get_dataset_frame(self, identifier, force_profiler=None):
+        raise NotImplementedError
+
+    def get_properties(self, identifier):
+        return dict()
+
+    def load_dataset(self, f_handle, proposed_schema=[]):
+        raise NotImplementedError
+
+    def query(self, query, datasets):
+        raise NotImplementedError
+
+    def unload_dataset(self, filepath, dataset_name, format='csv', options=[], filename=''):
+        raise NotImplementedError
+
+
+class TestInMemVizualApi(unittest.TestCase):
+    def setUp(self):
+        """Create an instance of the default vizier API and a datastore that
+        is not a file system datastore.
+        """
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+        os.makedirs(SERVER_DIR)
+        self.api = DefaultVizualApi()
+        self.datastore = InMemDatastore(DATASTORE_DIR)
+        self.ds = self.datastore.create_dataset(
+            columns=[DatasetColumn(0, 'Name'), DatasetColumn(1, 'Age')],
+            rows=[
+                DatasetRow(0, ['Alice', 23]),
+                DatasetRow(1, ['Bob', 32]),
+                DatasetRow(2, ['Claire', 45])
+            ]
+        )
+
+    def tearDown(self):
+        """Clean-up by dropping the server directory."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+
+    def test_vizual_operations(self):
+        """Test that vizual operations create new datasets in datastores that
+        do not support deltas.
+        """
+        ds = self.api.delete_column(self.ds.identifier, 1, self.datastore).dataset
+        self.assertEqual([col.name for col in ds.columns], ['Name'])
+        self.assertEqual([row.values for row in ds.fetch_rows()], [['Alice'], ['Bob'], ['Claire']])
+        ds = self.api.delete_row(self.ds.identifier, 1, self.datastore).dataset
+        self.assertEqual([row.identifier for row in ds.fetch_rows()], [0, 2])
+        ds = self.api.insert_column(self.ds.identifier, 1, 'Salary', self.datastore).dataset
+        self.assertEqual(ds.fetch_rows()[0].values, ['Alice', None, 23])
+        ds = self.api.insert_row(self.ds.identifier, 1, self.datastore).dataset
+        rows = ds.fetch_rows()
+        self.assertEqual([row.identifier for row in rows], [0, '3', 1, 2])
+        self.assertEqual(rows[1].values, [None, None])
+        ds = self.api.move_row(self.ds.identifier, 0, 2, self.datastore).dataset
+        self.assertEqual([row.values[0] for row in ds.fetch_rows()], ['Bob', 'Claire', 'Alice'])
+        ds = self.api.rename_column(self.ds.identifier, 1, 'Years', self.datastore).dataset
+        self.assertEqual([col.name for col in ds.columns], ['Name', 'Years'])
+        ds = self.api.update_cell(self.ds.identifier, 1, 2, 50, self.datastore).dataset
+        self.assertEqual(ds.fetch_rows()[2].values, ['Claire', 50])
+        with self.assertRaises(ValueError):
+            self.api.update_cell(self.ds.identifier, 1, 5, 50, self.datastore)
+        ds = self.api.materialize_dataset(ds.identifier, self.datastore).dataset
+        self.assertEqual(ds.fetch_rows()[2].values, ['Claire', 50])
+        # The original dataset is unchanged
+        ds = self.datastore.get_dataset(self.ds.identifier)
+        self.assertEqual([row.values for row in ds.fetch_rows()], [['Alice', 23], ['Bob', 32], ['Claire', 45]])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,13 +3,18 @@ vizier engine."""
 
 import os
 import shutil
+import threading
 import unittest
 
 from vizier.datastore.fs.factory import FileSystemDatastoreFactory
-from vizier.engine.project.cache.common import CommonProjectCache
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.engine.project.cache.common import CommonProjectCache, LazyProjectHandle
 from vizier.filestore.fs.factory import FileSystemFilestoreFactory
+from vizier.viztrail.module.base import ModuleHandle
+from vizier.viztrail.module.base import MODULE_PENDING, MODULE_SUCCESS
 from vizier.viztrail.objectstore.repository import OSViztrailRepository
 from vizier.viztrail.named_object import PROPERTY_NAME
+from vizier.viztrail.workflow import ACTION_APPEND
 
 
 SERVER_DIR = './.tmp'
@@ -33,14 +38,104 @@ class TestCommonProjectCache(unittest.TestCase):
         if os.path.isdir(SERVER_DIR):
             shutil.rmtree(SERVER_DIR)
 
-    def create_cache(self):
+    def append_module(self, project, state):
+        """Append a module in the given state to the default branch of the
+        project.
+        """
+        command = python_cell('print(2+2)')
+        branch = project.get_default_branch()
+        head = branch.get_head()
+        branch.append_workflow(
+            modules=head.modules if head is not None else [],
+            action=ACTION_APPEND,
+            command=command,
+            pending_modules=[
+                ModuleHandle(command=command, external_form='', state=state)
+            ]
+        )
+
+    def create_cache(self, max_projects=100, max_modules=10000):
         """Create instance of the project cache."""
         return CommonProjectCache(
             datastores=FileSystemDatastoreFactory(DATASTORES_DIR),
             filestores=FileSystemFilestoreFactory(FILESTORES_DIR),
-            viztrails=OSViztrailRepository(base_path=VIZTRAILS_DIR)
+            viztrails=OSViztrailRepository(base_path=VIZTRAILS_DIR),
+            max_projects=max_projects,
+            max_modules=max_modules
         )
 
+    def test_cache_eviction(self):
+        """Test evicting least recently used projects from the cache."""
+        self.cache = self.create_cache(max_projects=2, max_modules=3)
+        pj1 = self.cache.create_project()
+        self.append_module(pj1, MODULE_SUCCESS)
+        pj2 = self.cache.create_project()
+        pj3 = self.cache.create_project()
+        self.assertEqual(list(self.cache.projects.keys()), [pj2.identifier, pj3.identifier])
+        self.assertEqual(self.cache.evictions, 1)
+        # The workflows of evicted projects are released and read again when
+        # the project is accessed next.
+        branch = pj1.get_default_branch()
+        self.assertEqual(branch.get_loaded_workflows(), [])
+        project = self.cache.get_project(pj1.identifier)
+        self.assertIsNot(project, pj1)
+        self.assertEqual(len(project.get_default_branch().get_head().modules), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        self.assertIs(self.cache.get_project(pj1.identifier), project)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        # Listing projects does not modify the cache.
+        self.assertEqual(len(self.cache.list_projects()), 3)
+        self.assertEqual(list(self.cache.projects.keys()), [pj3.identifier, pj1.identifier])
+        # Projects with active workflows are not evicted.
+        self.append_module(self.cache.get_project(pj3.identifier), MODULE_PENDING)
+        self.cache.get_project(pj1.identifier)
+        self.cache.get_project(pj2.identifier)
+        self.assertEqual(list(self.cache.projects.keys()), [pj3.identifier, pj2.identifier])
+        # Evict projects if too many modules are loaded.
+        self.cache.max_projects = 0
+        for _ in range(3):
+            self.append_module(self.cache.get_project(pj2.identifier), MODULE_SUCCESS)
+        self.cache.get_project(pj2.identifier).get_default_branch().get_head()
+        self.cache.get_project(pj1.identifier)
+        self.assertEqual(list(self.cache.projects.keys()), [pj3.identifier, pj1.identifier])
+        self.assertTrue(self.cache.delete_project(pj2.identifier))
+        self.assertIsNone(self.cache.get_project(pj2.identifier))
+
+    def test_eviction_locks(self):
+        """Test that projects whose locks are held by another thread are not
+        evicted.
+        """
+        self.cache = self.create_cache(max_projects=1)
+        pj1 = self.cache.create_project()
+        branch_id = pj1.get_default_branch().identifier
+        acquired, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            with self.cache.locks.branch(pj1.identifier, branch_id):
+                acquired.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        acquired.wait()
+        try:
+            pj2 = self.cache.create_project()
+            self.assertEqual(list(self.cache.projects.keys()), [pj1.identifier, pj2.identifier])
+        finally:
+            release.set()
+            thread.join()
+        # The project is evicted once the lock is released.
+        pj3 = self.cache.create_project()
+        self.assertEqual(list(self.cache.projects.keys()), [pj3.identifier])
+        # Projects that are not cached are listed without creating their
+        # datastores.
+        datastores = os.listdir(DATASTORES_DIR)
+        projects = {p.identifier: p for p in self.cache.list_projects()}
+        self.assertIsInstance(projects[pj1.identifier], LazyProjectHandle)
+        self.assertEqual(os.listdir(DATASTORES_DIR), datastores)
+        self.assertIsNotNone(projects[pj1.identifier].datastore)
+        self.assertIs(projects[pj3.identifier], self.cache.get_project(pj3.identifier))
+
     def test_empty_repository(self):
         """Test accessing and deleting projects for an empty repository."""
         self.assertEqual(len(self.cache.list_projects()), 0)
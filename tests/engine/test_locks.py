@@ -0,0 +1,58 @@
+"""Test the project and branch locks of the workflow engine."""
+
+import threading
+import unittest
+
+from vizier.engine.locks import LockManager
+
+
+class TestLockManager(unittest.TestCase):
+
+    def try_lock(self, locks, project_id, branch_id):
+        """Return True if the branch lock can be acquired by another thread
+        within a short period of time.
+        """
+        acquired = threading.Event()
+
+        def acquire():
+            with locks.branch(project_id, branch_id):
+                acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.daemon = True
+        thread.start()
+        return acquired.wait(timeout=0.5)
+
+    def test_branch_locks(self):
+        """Test that branch locks only block changes to the same branch."""
+        locks = LockManager()
+        with locks.branch('P1', 'B1'):
+            self.assertTrue(self.try_lock(locks, 'P1', 'B2'))
+            self.assertTrue(self.try_lock(locks, 'P2', 'B1'))
+            self.assertFalse(self.try_lock(locks, 'P1', 'B1'))
+        # The waiting thread acquires the lock once it is released.
+        with locks.branch('P1', 'B1'):
+            pass
+        with locks.project('P1'):
+            self.assertTrue(self.try_lock(locks, 'P1', 'B1'))
+
+    def test_reentrant_locks(self):
+        """Test acquiring the same lock more than once and removing locks
+        that are no longer used.
+        """
+        locks = LockManager()
+        with locks.project('P1'):
+            with locks.branch('P1', 'B1'):
+                with locks.branch('P1', 'B1'):
+                    self.assertEqual(locks.branches[('P1', 'B1')].users, 2)
+                self.assertEqual(locks.branches[('P1', 'B1')].users, 1)
+        self.assertEqual(len(locks.branches), 0)
+        self.assertEqual(len(locks.projects), 0)
+        with self.assertRaises(ValueError):
+            with locks.branch('P1', 'B1'):
+                raise ValueError()
+        self.assertEqual(len(locks.branches), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+"""Test re-executing workflows with modules that access different datasets
+and that are therefore executed in parallel. The tests use the file system
+datastore of the development engine.
+"""
+
+import os
+import shutil
+import time
+import unittest
+
+from vizier.datastore.dataset import DatasetDescriptor
+from vizier.engine.backend.base import VizierBackend
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.engine.packages.vizual.command import load_dataset
+from vizier.engine.task.processor import ExecResult
+from vizier.api.webservice.base import get_engine
+from vizier.config.app import AppConfig
+from vizier.engine.base import compute_context
+from vizier.viztrail.module.provenance import ModuleProvenance
+
+import vizier.config.app as app
+import vizier.config.base as base
+import vizier.engine.packages.base as pckg
+import vizier.viztrail.module.base as mstate
+
+
+SERVER_DIR = './.tmp'
+PACKAGES_DIR = './tests/engine/workflows/.files/packages'
+PROCESSORS_DIR = './tests/engine/workflows/.files/processors'
+CSV_FILE = './tests/engine/workflows/.files/people.csv'
+
+DATASET_NAME = 'people'
+SECOND_DATASET_NAME = 'employee'
+
+PY_ADD_ONE = """ds = vizierdb.get_dataset('{}')
+age = int(ds.rows[0].get_value('Age'))
+ds.rows[0].set_value('Age', age + 1)
+vizierdb.update_dataset('{}', ds)
+"""
+
+
+class RecordingBackend(VizierBackend):
+    """Backend that does not execute any tasks. Keeps track of the tasks that
+    are submitted and canceled. Tasks are completed by the test.
+    """
+    def __init__(self):
+        super(RecordingBackend, self).__init__()
+        self.submitted = list()
+        self.canceled = list()
+
+    def cancel_task(self, task_id):
+        self.canceled.append(task_id)
+
+    def execute_async(self, task, command, artifacts, resources=dict()):
+        self.submitted.append(task)
+
+    def next_task_state(self):
+        return mstate.MODULE_RUNNING
+
+    def task_finished(self, task_id):
+        pass
+
+
+def provenance(read, write):
+    """Get provenance information for a module that reads and writes the
+    datasets with the given names. Read dependencies have unknown identifiers
+    to force the re-execution of the module.
+    """
+    return ModuleProvenance(
+        read=dict((name, None) for name in read),
+        write=dict(
+            (name, DatasetDescriptor(identifier=name.upper(), name=name))
+            for name in write
+        ),
+        delete=set()
+    )
+
+
+class TestParallelUpdate(unittest.TestCase):
+
+    def setUp(self):
+        """Create an instance of the vizier engine with a file system
+        datastore for an empty server directory.
+        """
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+        os.makedirs(SERVER_DIR)
+        os.environ[app.VIZIERENGINE_DATA_DIR] = SERVER_DIR
+        os.environ[app.VIZIERSERVER_PACKAGE_PATH] = PACKAGES_DIR
+        os.environ[app.VIZIERSERVER_PROCESSOR_PATH] = PROCESSORS_DIR
+        os.environ[app.VIZIERENGINE_BACKEND] = 'MULTIPROCESS'
+        os.environ[app.VIZIERSERVER_ENGINE] = base.DEV_ENGINE
+        self.engine = get_engine(AppConfig())
+
+    def tearDown(self):
+        """Clean-up by dropping the server directory."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+
+    def get_value(self, project, name):
+        """Get the age value in the first row of the dataset with the given
+        name in the current head of the default branch.
+        """
+        wf = project.viztrail.default_branch.head
+        datasets = compute_context(wf.modules)
+        ds = project.datastore.get_dataset(datasets[name].identifier)
+        return ds.fetch_rows()[0].values[1]
+
+    def wait(self, project):
+        """Wait until the workflow at the head of the default branch is no
+        longer active.
+        """
+        while project.viztrail.default_branch.head.is_active:
+            time.sleep(0.1)
+
+    def test_delete_independent(self):
+        """Test deleting a module in a workflow where modules that access
+        different datasets can be executed in parallel.
+        """
+        project = self.engine.projects.create_project()
+        branch_id = project.viztrail.default_branch.identifier
+        for name in [DATASET_NAME, SECOND_DATASET_NAME]:
+            fh = project.filestore.upload_file(CSV_FILE)
+            self.engine.append_workflow_module(
+                project_id=project.identifier,
+                branch_id=branch_id,
+                command=load_dataset(
+                    dataset_name=name,
+                    file={pckg.FILE_ID: fh.identifier}
+                )
+            )
+        for i in range(3):
+            for name in [DATASET_NAME, SECOND_DATASET_NAME]:
+                self.engine.append_workflow_module(
+                    project_id=project.identifier,
+                    branch_id=branch_id,
+                    command=python_cell(PY_ADD_ONE.format(name, name))
+                )
+        self.wait(project)
+        wf = project.viztrail.default_branch.head
+        self.assertTrue(wf.get_state().is_success)
+        self.assertEqual(self.get_value(project, DATASET_NAME), 26)
+        self.assertEqual(self.get_value(project, SECOND_DATASET_NAME), 26)
+        second = compute_context(wf.modules)[SECOND_DATASET_NAME].identifier
+        # Delete the first module that updates the first dataset. Modules
+        # that update the second dataset do not need to be executed again.
+        self.engine.delete_workflow_module(
+            project_id=project.identifier,
+            branch_id=branch_id,
+            module_id=wf.modules[2].identifier
+        )
+        self.wait(project)
+        wf = project.viztrail.default_branch.head
+        self.assertEqual(len(wf.modules), 7)
+        self.assertTrue(wf.get_state().is_success)
+        self.assertEqual(self.get_value(project, DATASET_NAME), 25)
+        self.assertEqual(self.get_value(project, SECOND_DATASET_NAME), 26)
+        self.assertEqual(
+            compute_context(wf.modules)[SECOND_DATASET_NAME].identifier,
+            second
+        )
+
+    def test_unpredicted_conflict(self):
+        """Test that modules following a module that has to be executed
+        again because it accessed datasets of a concurrently running module
+        are executed again if they were started based on the module's
+        predicted footprint.
+        """
+        backend = RecordingBackend()
+        self.engine.backend = backend
+        project = self.engine.projects.create_project()
+        project_id = project.identifier
+        branch_id = project.viztrail.default_branch.identifier
+
+        def complete(module_id, prov):
+            """Complete the last task that was submitted for the module."""
+            task = [t for t in backend.submitted if t.module_id == module_id][-1]
+            return self.engine.set_success(
+                task.task_id,
+                result=ExecResult(provenance=prov)
+            )
+
+        def submissions(module_id):
+            return len([t for t in backend.submitted if t.module_id == module_id])
+
+        ids = list()
+        for name in ['a', 'm', 'n']:
+            module = self.engine.append_workflow_module(
+                project_id=project_id,
+                branch_id=branch_id,
+                command=python_cell('# ' + name)
+            )
+            ids.append(module.identifier)
+        a_id, m_id, n_id = ids
+        # The modules have no provenance yet and are executed in order.
+        for module_id, name in zip(ids, ['a', 'm', 'n']):
+            self.assertEqual(submissions(module_id), 1)
+            complete(module_id, provenance([name], [name]))
+        self.assertTrue(project.viztrail.default_branch.head.get_state().is_success)
+        # Re-execute the workflow. All three modules access different
+        # datasets and are executed in parallel.
+        with self.engine.update_branch(project_id, branch_id) as branch:
+            workflow = branch.get_head()
+            self.engine.reset_modules(project_id, workflow, 0)
+            self.engine.schedule_modules(project_id, workflow)
+        self.assertEqual([submissions(i) for i in ids], [2, 2, 2])
+        # M writes the dataset of A (that is still running) and the dataset
+        # that N reads. M is executed again after A, and N after M.
+        complete(m_id, provenance(['m'], ['a', 'm', 'n']))
+        self.assertEqual(len(backend.canceled), 1)
+        self.assertIsNone(complete(n_id, provenance(['n'], ['n'])))
+        modules = project.viztrail.default_branch.head.modules
+        self.assertTrue(modules[1].is_pending)
+        self.assertTrue(modules[2].is_pending)
+        complete(a_id, provenance(['a'], ['a']))
+        self.assertEqual([submissions(i) for i in ids], [2, 3, 2])
+        complete(m_id, provenance(['m'], ['a', 'm', 'n']))
+        self.assertEqual([submissions(i) for i in ids], [2, 3, 3])
+        complete(n_id, provenance(['n'], ['n']))
+        self.assertTrue(project.viztrail.default_branch.head.get_state().is_success)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""Test notifications about changes to the workflow at the head of a project
+branch.
+"""
+
+import os
+import shutil
+import unittest
+
+from vizier.engine.events import EventBus, WorkflowEvent
+from vizier.engine.events import EVENT_MODULE, EVENT_WORKFLOW
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.api.webservice.base import get_engine
+from vizier.config.app import AppConfig
+from vizier.viztrail.module.base import ModuleHandle
+
+import vizier.config.app as app
+import vizier.viztrail.module.base as mstate
+
+
+SERVER_DIR = './.tmp'
+PACKAGES_DIR = './tests/engine/workflows/.files/packages'
+PROCESSORS_DIR = './tests/engine/workflows/.files/processors'
+
+
+def module(identifier):
+    """Create a pending module handle with the given identifier."""
+    return ModuleHandle(
+        identifier=identifier,
+        command=python_cell('pass'),
+        external_form='pass',
+        state=mstate.MODULE_PENDING
+    )
+
+
+class TestWorkflowEvents(unittest.TestCase):
+
+    def setUp(self):
+        """Create an instance of the vizier engine for an empty server
+        directory.
+        """
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+        os.makedirs(SERVER_DIR)
+        os.environ[app.VIZIERENGINE_DATA_DIR] = SERVER_DIR
+        os.environ[app.VIZIERSERVER_PACKAGE_PATH] = PACKAGES_DIR
+        os.environ[app.VIZIERSERVER_PROCESSOR_PATH] = PROCESSORS_DIR
+        os.environ[app.VIZIERENGINE_BACKEND] = 'MULTIPROCESS'
+        self.engine = get_engine(AppConfig())
+
+    def tearDown(self):
+        """Clean-up by dropping the server directory."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+
+    def test_event_bus(self):
+        """Test delivering events to subscriptions."""
+        bus = EventBus(queue_size=3)
+        sub1 = bus.subscribe('P', 'B')
+        sub2 = bus.subscribe('P', 'C')
+        modules = [module(str(i)) for i in range(4)]
+        bus.publish_modules('P', 'B', None, modules[:2])
+        # Events for the same module replace each other.
+        bus.publish_modules('P', 'B', None, modules[:1])
+        self.assertEqual(sub1.get(timeout=0).module.identifier, '1')
+        self.assertEqual(sub1.get(timeout=0).module.identifier, '0')
+        self.assertIsNone(sub1.get(timeout=0))
+        self.assertIsNone(sub2.get(timeout=0))
+        # A full queue is replaced by a workflow event.
+        bus.publish_modules('P', 'B', None, modules)
+        event = sub1.get(timeout=0)
+        self.assertEqual(event.event_type, EVENT_WORKFLOW)
+        self.assertIsNone(sub1.get(timeout=0))
+        # No events are delivered after unsubscribing.
+        bus.unsubscribe(sub1)
+        self.assertFalse(bus.has_subscriptions('P', 'B'))
+        bus.publish(WorkflowEvent(EVENT_MODULE, 'P', 'B', None, modules[0]))
+        self.assertIsNone(sub1.get(timeout=0))
+
+    def test_module_events(self):
+        """Test events for the execution of a module."""
+        project = self.engine.projects.create_project()
+        branch_id = project.get_default_branch().identifier
+        subscription = self.engine.events.subscribe(project.identifier, branch_id)
+        self.engine.append_workflow_module(
+            project_id=project.identifier,
+            branch_id=branch_id,
+            command=python_cell('print(\'DONE\')')
+        )
+        events = list()
+        while True:
+            event = subscription.get(timeout=30)
+            self.assertIsNotNone(event)
+            events.append(event)
+            if event.is_module_event and not event.module.is_active:
+                break
+        self.assertEqual(events[0].event_type, EVENT_WORKFLOW)
+        workflow = project.viztrail.default_branch.head
+        self.assertEqual(events[0].workflow.identifier, workflow.identifier)
+        self.assertTrue(events[-1].module.is_success)
+        self.assertEqual(events[-1].module.identifier, workflow.modules[0].identifier)
+        self.engine.events.unsubscribe(subscription)
+
+
+if __name__ == '__main__':
+    unittest.main()
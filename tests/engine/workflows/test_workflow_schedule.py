@@ -0,0 +1,106 @@
+"""Test finding workflow modules that are ready for execution based on the
+provenance information from previous module executions.
+"""
+
+import unittest
+
+from vizier.datastore.dataset import DatasetDescriptor
+from vizier.engine.base import find_ready_module, get_footprint
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.viztrail.module.base import ModuleHandle
+from vizier.viztrail.module.provenance import ModuleProvenance
+
+import vizier.viztrail.module.base as mstate
+
+
+def module(identifier, state, read=None, write=None, delete=None, unexecuted=False):
+    """Create a module handle with the given provenance. Written datasets get
+    the module identifier as their dataset identifier.
+    """
+    if write is not None:
+        write = dict((name, DatasetDescriptor(identifier=identifier, name=name)) for name in write)
+    return ModuleHandle(
+        identifier=identifier,
+        command=python_cell('pass'),
+        external_form='pass',
+        state=state,
+        provenance=ModuleProvenance(
+            read=dict((name, None) for name in read) if read is not None else None,
+            write=write,
+            delete=set(delete) if delete is not None else None,
+            unexecuted=unexecuted
+        )
+    )
+
+
+class TestWorkflowSchedule(unittest.TestCase):
+
+    def test_footprint(self):
+        """Test getting the names of datasets that a module accesses."""
+        m = module('0', mstate.MODULE_SUCCESS, read=['A'], write=['B'], delete=['C'])
+        self.assertEqual(get_footprint(m.provenance), set(['A', 'B', 'C']))
+        m = module('0', mstate.MODULE_SUCCESS, read=['A'])
+        self.assertIsNone(get_footprint(m.provenance))
+        m = module('0', mstate.MODULE_PENDING, read=['A'], write=['A'], unexecuted=True)
+        self.assertIsNone(get_footprint(m.provenance))
+
+    def test_independent_modules(self):
+        """Test scheduling modules that access different datasets."""
+        modules = [
+            module('0', mstate.MODULE_SUCCESS, read=[], write=['A', 'B']),
+            module('1', mstate.MODULE_RUNNING, read=['A'], write=['A']),
+            module('2', mstate.MODULE_PENDING, read=['A'], write=['A']),
+            module('3', mstate.MODULE_PENDING, read=['B'], write=['B']),
+            module('4', mstate.MODULE_PENDING, read=['B'], write=['C'])
+        ]
+        index, context, concurrent = find_ready_module(modules, set(['1']))
+        self.assertEqual(index, 3)
+        self.assertEqual(context['B'].identifier, '0')
+        self.assertEqual(concurrent, set(['A']))
+        # Module 4 has to wait for module 3
+        self.assertIsNone(find_ready_module(modules, set(['1', '3'])))
+        # Module 2 is next once module 1 is finished
+        modules[1].state = mstate.MODULE_SUCCESS
+        index, context, concurrent = find_ready_module(modules, set(['3']))
+        self.assertEqual(index, 2)
+        self.assertEqual(context['A'].identifier, '1')
+        self.assertEqual(concurrent, set())
+
+    def test_unknown_provenance(self):
+        """Test that modules with unknown provenance are executed in
+        workflow order.
+        """
+        modules = [
+            module('0', mstate.MODULE_RUNNING, read=['A'], write=['A']),
+            module('1', mstate.MODULE_PENDING, read=['B'], write=['B'], unexecuted=True),
+            module('2', mstate.MODULE_PENDING, read=['C'], write=['C'])
+        ]
+        self.assertIsNone(find_ready_module(modules, set(['0'])))
+        modules[0].state = mstate.MODULE_SUCCESS
+        index, _, _ = find_ready_module(modules, set())
+        self.assertEqual(index, 1)
+        self.assertIsNone(find_ready_module(modules, set(['1'])))
+        # A running module with unknown provenance blocks all following
+        # modules
+        modules = [
+            module('0', mstate.MODULE_RUNNING, read=None, write=None),
+            module('1', mstate.MODULE_PENDING, read=['C'], write=['C'])
+        ]
+        self.assertIsNone(find_ready_module(modules, set(['0'])))
+
+    def test_stopped_workflow(self):
+        """Test that no module is ready after a module that failed."""
+        modules = [
+            module('0', mstate.MODULE_ERROR, read=['A'], write=['A']),
+            module('1', mstate.MODULE_PENDING, read=['B'], write=['B'])
+        ]
+        self.assertIsNone(find_ready_module(modules, set()))
+        modules = [
+            module('0', mstate.MODULE_SUCCESS, read=[], write=['A']),
+            module('1', mstate.MODULE_SUCCESS, read=['A'], write=['A'])
+        ]
+        self.assertIsNone(find_ready_module(modules, set()))
+
+
+if __name__ == '__main__':
+    unittest.main()
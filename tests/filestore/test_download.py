@@ -0,0 +1,248 @@
+"""Test streaming, conditional, and parallel downloads of web resources from a
+local HTTP server.
+"""
+
+import http.server
+import io
+import os
+import re
+import shutil
+import threading
+import time
+import unittest
+
+from vizier.datastore.fs.base import FileSystemDatastore
+from vizier.engine.packages.vizual.api.base import RESOURCE_DATASET, RESOURCE_VALIDATORS
+from vizier.engine.packages.vizual.api.fs import DefaultVizualApi
+from vizier.filestore.download import Download, VALIDATOR_ETAG, VALIDATOR_LAST_MODIFIED
+from vizier.filestore.fs.base import FileSystemFilestore
+
+
+SERVER_DIR = './.tmp'
+DATASTORE_DIR = './.tmp/ds'
+FILESTORE_DIR = './.tmp/fs'
+
+CONTENT = ('Name,Age\n' + ''.join('P{},{}\n'.format(i, i % 90) for i in range(5000))).encode('utf-8')
+ETAG = '"v1"'
+LAST_MODIFIED = 'Wed, 21 Oct 2015 07:28:00 GMT'
+
+
+class ResourceHandler(http.server.BaseHTTPRequestHandler):
+    """Serve a CSV file with validators and support for range requests."""
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.server.etag is not None and self.headers.get('If-None-Match') == self.server.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.server.etag)
+            self.end_headers()
+            return
+        content = self.server.content
+        byte_range = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        if_range = self.headers.get('If-Range')
+        if self.server.etag is not None:
+            valid_range = if_range is None or if_range == self.server.etag
+        else:
+            valid_range = if_range is None or if_range == LAST_MODIFIED
+        if byte_range and self.server.ranges and valid_range:
+            start, end = int(byte_range.group(1)), int(byte_range.group(2))
+            body = content[start:end + 1]
+            self.send_response(206)
+            self.send_header(
+                'Content-Range',
+                'bytes {}-{}/{}'.format(start, start + len(body) - 1, len(content))
+            )
+        else:
+            body = content
+            self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(body)))
+        if self.server.etag is not None:
+            self.send_header('ETag', self.server.etag)
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        if self.server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestDownload(unittest.TestCase):
+
+    def setUp(self):
+        """Start the HTTP server and create an empty server directory."""
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+        os.makedirs(SERVER_DIR)
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ResourceHandler)
+        self.server.content = CONTENT
+        self.server.etag = ETAG
+        self.server.ranges = True
+        self.server.requests = list()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}/data.csv'.format(self.server.server_address[1])
+
+    def tearDown(self):
+        """Stop the HTTP server and remove the server directory."""
+        self.server.shutdown()
+        self.server.server_close()
+        if os.path.isdir(SERVER_DIR):
+            shutil.rmtree(SERVER_DIR)
+
+    def test_conditional_download(self):
+        """Test skipping the download of an unmodified resource."""
+        datastore = FileSystemDatastore(DATASTORE_DIR)
+        dataset, validators = datastore.download_dataset_if_modified(url=self.url)
+        self.assertEqual(dataset.row_count, 5000)
+        self.assertEqual(validators[VALIDATOR_ETAG], ETAG)
+        unchanged, unchanged_validators = datastore.download_dataset_if_modified(
+            url=self.url,
+            validators=validators
+        )
+        self.assertIsNone(unchanged)
+        self.assertEqual(unchanged_validators, validators)
+        self.assertEqual(self.server.requests[-1]['If-None-Match'], ETAG)
+        self.assertEqual(self.server.requests[-1]['If-Modified-Since'], LAST_MODIFIED)
+        # Modify the resource.
+        self.server.etag = '"v2"'
+        modified, modified_validators = datastore.download_dataset_if_modified(
+            url=self.url,
+            validators=validators
+        )
+        self.assertNotEqual(modified.identifier, dataset.identifier)
+        self.assertEqual(modified_validators[VALIDATOR_ETAG], '"v2"')
+        self.assertEqual(datastore.download_dataset(url=self.url).row_count, 5000)
+
+    def test_reload_dataset(self):
+        """Test re-executing a load dataset command with the reload flag."""
+        api = DefaultVizualApi()
+        datastore = FileSystemDatastore(DATASTORE_DIR)
+        filestore = FileSystemFilestore(FILESTORE_DIR)
+        result = api.load_dataset(datastore=datastore, filestore=filestore, url=self.url)
+        resources = result.resources
+        self.assertEqual(resources[RESOURCE_VALIDATORS][VALIDATOR_ETAG], ETAG)
+        # Unmodified resources are not downloaded again.
+        result = api.load_dataset(
+            datastore=datastore,
+            filestore=filestore,
+            url=self.url,
+            resources=resources,
+            reload=True
+        )
+        self.assertEqual(result.dataset.identifier, resources[RESOURCE_DATASET])
+        self.assertEqual(len(self.server.requests), 2)
+        # Without the reload flag no request is sent.
+        api.load_dataset(
+            datastore=datastore,
+            filestore=filestore,
+            url=self.url,
+            resources=resources
+        )
+        self.assertEqual(len(self.server.requests), 2)
+        self.server.etag = '"v2"'
+        result = api.load_dataset(
+            datastore=datastore,
+            filestore=filestore,
+            url=self.url,
+            resources=resources,
+            reload=True
+        )
+        self.assertNotEqual(result.dataset.identifier, resources[RESOURCE_DATASET])
+        self.assertEqual(result.resources[RESOURCE_VALIDATORS][VALIDATOR_ETAG], '"v2"')
+
+    def test_download_file(self):
+        """Test downloading a resource into the filestore."""
+        filestore = FileSystemFilestore(FILESTORE_DIR)
+        fh = filestore.download_file(url=self.url, username='user', password='pw')
+        self.assertEqual(fh.file_name, 'data.csv')
+        with open(fh.filepath, 'rb') as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertTrue(self.server.requests[0]['Authorization'].startswith('Basic '))
+        # Failed downloads do not leave a file behind.
+        with self.assertRaises(Exception):
+            filestore.download_file(url='http://127.0.0.1:1/data.csv')
+        self.assertEqual(len(filestore.list_files()), 1)
+
+    def test_parallel_download(self):
+        """Test fetching parts of a resource in parallel."""
+        f = io.BytesIO()
+        with Download(self.url, parts=4, min_parallel_size=1024, chunk_size=100) as download:
+            self.assertEqual(len(download.get_parts()), 4)
+            self.assertEqual(download.write_to(f), len(CONTENT))
+        self.assertEqual(f.getvalue(), CONTENT)
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(
+            sorted(r['Range'] for r in self.server.requests[1:]),
+            sorted('bytes={}-{}'.format(start, end) for start, end in download.get_parts()[1:])
+        )
+        # Resources that change while they are downloaded are streamed from
+        # the initial response.
+        f = io.BytesIO()
+        with Download(self.url, parts=4, min_parallel_size=1024) as download:
+            self.server.etag = '"v2"'
+            self.assertEqual(download.write_to(f), len(CONTENT))
+        self.assertEqual(f.getvalue(), CONTENT)
+        # Small resources and servers without range support use a single
+        # request.
+        self.server.requests = list()
+        self.server.ranges = False
+        f = io.BytesIO()
+        with Download(self.url, parts=4, min_parallel_size=1024) as download:
+            download.write_to(f)
+        self.assertEqual(f.getvalue(), CONTENT)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_parallel_download_validators(self):
+        """Test that range requests use the modification date if the resource
+        has no entity tag.
+        """
+        self.server.etag = None
+        filename = os.path.join(SERVER_DIR, 'data.csv')
+        with open(filename, 'wb') as f:
+            with Download(self.url, parts=4, min_parallel_size=1024) as download:
+                self.assertNotIn(VALIDATOR_ETAG, download.validators)
+                self.assertEqual(download.validators[VALIDATOR_LAST_MODIFIED], LAST_MODIFIED)
+                download.write_to(f)
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertEqual(len(self.server.requests), 4)
+        for r in self.server.requests[1:]:
+            self.assertEqual(r['If-Range'], LAST_MODIFIED)
+        # Temporary files for the parts are removed.
+        self.assertEqual(os.listdir(SERVER_DIR), ['data.csv'])
+
+    def test_parallel_download_failure(self):
+        """Test that a failed part cancels the remaining parts."""
+        class FailingDownload(Download):
+            """Fail the first range request. All other range requests block
+            until they are canceled.
+            """
+            def fetch_part(self, byte_range, filename, canceled=None):
+                self.temp_files.append(filename)
+                if byte_range[0] == self.get_parts()[1][0]:
+                    raise ValueError('failed')
+                if canceled.wait(timeout=10):
+                    self.canceled_parts += 1
+                    raise ValueError('download canceled')
+                return filename
+
+        f = io.BytesIO()
+        start = time.time()
+        with FailingDownload(self.url, parts=4, min_parallel_size=1024) as download:
+            download.canceled_parts = 0
+            download.temp_files = list()
+            self.assertEqual(download.write_to(f, temp_dir=SERVER_DIR), len(CONTENT))
+        self.assertTrue(time.time() - start < 5)
+        self.assertEqual(f.getvalue(), CONTENT)
+        self.assertEqual(download.canceled_parts, 2)
+        self.assertEqual(len(download.temp_files), 3)
+        for filename in download.temp_files:
+            self.assertEqual(os.path.dirname(filename), os.path.abspath(SERVER_DIR))
+        self.assertEqual(os.listdir(SERVER_DIR), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 """Test functionality of the default file store factory."""
 
+import hashlib
 import os
 import shutil
 import unittest
@@ -44,6 +45,25 @@ class TestFileSystemFilestoreFactory(unittest.TestCase):
         with self.assertRaises(ValueError):
             FileSystemFilestoreFactory()
 
+    def test_shared_blobs(self):
+        """Test sharing file contents between filestores."""
+        fact = FileSystemFilestoreFactory(properties={PARA_DIRECTORY: SERVER_DIR})
+        fh1 = fact.get_filestore('0123').upload_file(CSV_FILE)
+        fh2 = fact.get_filestore('4567').upload_file(CSV_FILE)
+        self.assertTrue(os.path.samefile(fh1.filepath, fh2.filepath))
+        blob = fact.blobs.get_blob_file(digest(CSV_FILE))
+        self.assertEqual(os.stat(blob).st_nlink, 3)
+        fact.delete_filestore('0123')
+        self.assertTrue(os.path.isfile(blob))
+        fact.delete_filestore('4567')
+        self.assertFalse(os.path.isfile(blob))
+
+
+def digest(filename):
+    """Compute the SHA-256 hash for the content of the given file."""
+    with open(filename, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
 
 if __name__ == '__main__':
     unittest.main()
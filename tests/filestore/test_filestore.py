@@ -37,6 +37,36 @@ class TestFileSystemFilestore(unittest.TestCase):
         if os.path.isdir(SERVER_DIR):
             shutil.rmtree(SERVER_DIR)
 
+    def test_deduplicate_files(self):
+        """Test storing files with the same content only once."""
+        db = FileSystemFilestore(SERVER_DIR)
+        fh1 = db.upload_file(CSV_FILE)
+        fh2 = db.upload_file(CSV_FILE)
+        fh3 = db.upload_file(TSV_FILE)
+        self.assertTrue(os.path.samefile(fh1.filepath, fh2.filepath))
+        self.assertFalse(os.path.samefile(fh1.filepath, fh3.filepath))
+        self.assertEqual(len(db.list_files()), 3)
+        # The blob is removed when the last file that references it is
+        # deleted.
+        blob = os.stat(fh1.filepath)
+        self.assertEqual(blob.st_nlink, 3)
+        db.delete_file(fh1.identifier)
+        self.assertEqual(os.stat(fh2.filepath).st_nlink, 2)
+        db.delete_file(fh2.identifier)
+        blob_dir = os.path.join(SERVER_DIR, '.blobs')
+        blobs = [f for d in os.listdir(blob_dir) if d != 'tmp' for f in os.listdir(os.path.join(blob_dir, d))]
+        self.assertEqual(len(blobs), 1)
+        # Replacing the file content does not modify other files with the
+        # same content.
+        fh4 = db.upload_file(TSV_FILE)
+        with db.replace_file(fh3.identifier) as f:
+            f.write(b'A,B\n1,2\n')
+        with open(db.get_file(fh3.identifier).filepath, 'rb') as f:
+            self.assertEqual(f.read(), b'A,B\n1,2\n')
+        with open(fh4.filepath, 'rb') as f_out, open(TSV_FILE, 'rb') as f_in:
+            self.assertEqual(f_out.read(), f_in.read())
+        self.assertEqual(db.get_file(fh3.identifier).file_name, os.path.basename(TSV_FILE))
+
     def test_delete_file(self):
         """Test delete file method."""
         db = FileSystemFilestore(SERVER_DIR)
@@ -0,0 +1,113 @@
+"""Test loading branches from the workflow index."""
+
+import os
+import shutil
+import unittest
+
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.core.timestamp import get_current_time
+from vizier.viztrail.objectstore.branch import OBJ_WORKFLOWINDEX
+from vizier.viztrail.objectstore.module import OSModuleHandle
+from vizier.viztrail.objectstore.viztrail import OSViztrailHandle
+from vizier.viztrail.module.base import MODULE_SUCCESS
+from vizier.viztrail.module.output import ModuleOutputs
+from vizier.viztrail.module.provenance import ModuleProvenance
+from vizier.viztrail.module.timestamp import ModuleTimestamp
+from vizier.viztrail.workflow import ACTION_INSERT
+
+
+REPO_DIR = './.temp'
+
+
+class TestOSBranchIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Create a viztrail with five workflows in the default branch."""
+        if os.path.isdir(REPO_DIR):
+            shutil.rmtree(REPO_DIR)
+        os.makedirs(REPO_DIR)
+        self.base_path = os.path.join(os.path.abspath(REPO_DIR), 'ABC')
+        os.makedirs(self.base_path)
+        vt = OSViztrailHandle.create_viztrail(
+            identifier='ABC',
+            properties={},
+            base_path=self.base_path
+        )
+        branch = vt.get_default_branch()
+        for i in range(5):
+            ts = get_current_time()
+            command = python_cell(source='print ' + str(i))
+            module = OSModuleHandle.create_module(
+                command=command,
+                external_form='print ' + str(i),
+                state=MODULE_SUCCESS,
+                outputs=ModuleOutputs(),
+                provenance=ModuleProvenance(),
+                timestamp=ModuleTimestamp(created_at=ts, started_at=ts, finished_at=ts),
+                module_folder=vt.modules_folder,
+                object_store=vt.object_store
+            )
+            modules = branch.head.modules if branch.head is not None else []
+            branch.append_workflow(
+                modules=modules + [module],
+                action=ACTION_INSERT,
+                command=command
+            )
+        self.history = [wf.identifier for wf in branch.get_history()]
+        self.index_path = os.path.join(branch.base_path, OBJ_WORKFLOWINDEX)
+
+    def tearDown(self):
+        """Delete repository directory."""
+        shutil.rmtree(REPO_DIR)
+
+    def load_branch(self):
+        """Load the default branch of the viztrail."""
+        return OSViztrailHandle.load_viztrail(self.base_path).get_default_branch()
+
+    def test_lazy_load(self):
+        """Test that workflows are read when the branch is first accessed."""
+        branch = self.load_branch()
+        self.assertIsNone(branch._workflows)
+        self.assertIsNone(branch._head)
+        self.assertEqual([wf.identifier for wf in branch.get_history()], self.history)
+        self.assertIsNone(branch._head)
+        head = branch.get_head()
+        self.assertEqual(head.identifier, self.history[-1])
+        self.assertEqual(len(head.modules), 5)
+        self.assertTrue(branch.get_head() is head)
+        # Appending a workflow to a branch that has not been accessed yet
+        branch = self.load_branch()
+        branch.append_workflow(
+            modules=[],
+            action=ACTION_INSERT,
+            command=python_cell(source='print 5')
+        )
+        self.assertEqual(len(branch.get_history()), 6)
+        branch = self.load_branch()
+        self.assertEqual(len(branch.get_history()), 6)
+        self.assertEqual(len(branch.get_head().modules), 0)
+
+    def test_missing_index(self):
+        """Test loading branches that do not have a complete workflow index."""
+        # Remove the last entry in the index to simulate an interrupted update
+        with open(self.index_path, 'r') as f:
+            lines = f.readlines()
+        with open(self.index_path, 'w') as f:
+            f.write(''.join(lines[:-1]))
+        branch = self.load_branch()
+        self.assertEqual([wf.identifier for wf in branch.get_history()], self.history)
+        with open(self.index_path, 'r') as f:
+            self.assertEqual(len(f.readlines()), 5)
+        # Remove the index to simulate a branch that was created before the
+        # index was introduced
+        os.remove(self.index_path)
+        branch = self.load_branch()
+        self.assertEqual([wf.identifier for wf in branch.get_history()], self.history)
+        self.assertEqual(len(branch.get_head().modules), 5)
+        self.assertTrue(os.path.isfile(self.index_path))
+        branch = self.load_branch()
+        self.assertEqual([wf.identifier for wf in branch.get_history()], self.history)
+
+
+if __name__ == '__main__':
+    unittest.main()
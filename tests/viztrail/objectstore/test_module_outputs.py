@@ -0,0 +1,120 @@
+"""Test storing large module outputs separately from the module objects."""
+
+import os
+import shutil
+import unittest
+
+from vizier.core.io.base import DefaultObjectStore
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.viztrail.module.base import MODULE_PENDING, MODULE_SUCCESS
+from vizier.viztrail.module.output import ModuleOutputs, OutputObject
+from vizier.viztrail.module.output import StoredOutput, TextOutput
+from vizier.viztrail.module.timestamp import ModuleTimestamp
+from vizier.viztrail.objectstore.output import ModuleOutputStore
+from vizier.viztrail.objectstore.viztrail import OSViztrailHandle
+from vizier.viztrail.workflow import ACTION_CREATE
+
+import vizier.api.serialize.base as serialize
+
+
+BASE_DIR = './.temp'
+BLOB_SIZE = 100
+PREVIEW_SIZE = 50
+
+
+class TestModuleOutputs(unittest.TestCase):
+
+    def setUp(self):
+        """Create an empty directory."""
+        if os.path.isdir(BASE_DIR):
+            shutil.rmtree(BASE_DIR)
+        os.makedirs(BASE_DIR)
+        self.store = DefaultObjectStore()
+
+    def tearDown(self):
+        """Delete directory."""
+        shutil.rmtree(BASE_DIR)
+
+    def test_output_store(self):
+        """Test writing values to the output store and getting previews."""
+        outputs = ModuleOutputStore(
+            base_path=BASE_DIR,
+            object_store=self.store,
+            blob_size=BLOB_SIZE,
+            preview_size=PREVIEW_SIZE
+        )
+        # Small values are not stored
+        self.assertIsNone(outputs.write('ABC'))
+        self.assertFalse(os.path.isdir(outputs.folder_path))
+        # Identical values are stored once
+        text = 'X' * 200
+        identifier, size, preview = outputs.write(text)
+        self.assertEqual(outputs.write(text)[0], identifier)
+        self.assertEqual(os.listdir(outputs.folder_path), [identifier])
+        self.assertEqual(size, 202)
+        self.assertEqual(preview, 'X' * PREVIEW_SIZE)
+        self.assertEqual(outputs.read(identifier), text)
+        # Dataset previews contain a prefix of the rows
+        dataset = {'id': 'DS', 'rows': [{'id': i, 'values': [i]} for i in range(20)]}
+        identifier, size, preview = outputs.write(dataset)
+        self.assertEqual(preview['id'], 'DS')
+        self.assertTrue(0 < len(preview['rows']) < 20)
+        self.assertEqual(outputs.read(identifier), dataset)
+        # Unknown or invalid identifier
+        with self.assertRaises(ValueError):
+            outputs.read('0' * 64)
+        with self.assertRaises(ValueError):
+            outputs.read('../' + identifier)
+
+    def test_viztrail_outputs(self):
+        """Test reading large outputs of workflow modules lazily."""
+        base_path = os.path.join(os.path.abspath(BASE_DIR), 'ABC')
+        os.makedirs(base_path)
+        vt = OSViztrailHandle.create_viztrail(
+            identifier='ABC',
+            properties=None,
+            base_path=base_path
+        )
+        vt.output_store.blob_size = BLOB_SIZE
+        vt.output_store.preview_size = PREVIEW_SIZE
+        branch = vt.get_default_branch()
+        module = vt.create_module(
+            command=python_cell(source='print(1)'),
+            external_form='print(1)',
+            state=MODULE_PENDING,
+            timestamp=ModuleTimestamp()
+        )
+        branch.append_workflow(
+            modules=[module],
+            action=ACTION_CREATE,
+            command=module.command
+        )
+        text = 'Y' * 1000
+        module.set_success(
+            outputs=ModuleOutputs(stdout=[TextOutput('ABC'), TextOutput(text)])
+        )
+        vt = OSViztrailHandle.load_viztrail(base_path)
+        m = vt.get_default_branch().get_head().modules[0]
+        self.assertEqual(m.state, MODULE_SUCCESS)
+        small, large = m.outputs.stdout
+        self.assertEqual(small.value, 'ABC')
+        self.assertIsInstance(large, StoredOutput)
+        self.assertEqual(large.size, 1002)
+        self.assertEqual(large.value, text)
+        self.assertEqual(vt.read_output(large.identifier), text)
+        # The web service serialization contains the preview only
+        obj = serialize.OUTPUT(large)
+        self.assertTrue(obj['truncated'])
+        self.assertEqual(obj['value'], 'Y' * PREVIEW_SIZE)
+        self.assertEqual(serialize.OUTPUT(small), {'type': small.type, 'value': 'ABC'})
+        # Rewriting the module keeps the reference without reading the value
+        large.reader = None
+        m.set_error(outputs=ModuleOutputs(stdout=[large, OutputObject('text/plain', 'E')]))
+        vt = OSViztrailHandle.load_viztrail(base_path)
+        m = vt.get_default_branch().get_head().modules[0]
+        self.assertEqual(m.outputs.stdout[0].value, text)
+        self.assertEqual(len(os.listdir(vt.output_store.folder_path)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+"""Test writing module state changes to the module state log of a viztrail."""
+
+import os
+import shutil
+import unittest
+
+from vizier.core.io.base import DefaultObjectStore
+from vizier.datastore.dataset import DatasetDescriptor
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.viztrail.module.base import MODULE_ERROR, MODULE_PENDING, MODULE_RUNNING
+from vizier.viztrail.module.base import MODULE_SUCCESS
+from vizier.viztrail.module.output import ModuleOutputs, TextOutput
+from vizier.viztrail.module.provenance import ModuleProvenance
+from vizier.viztrail.module.timestamp import ModuleTimestamp
+from vizier.viztrail.objectstore.module import ModuleStateLog, OSModuleHandle
+from vizier.viztrail.objectstore.viztrail import OSViztrailHandle
+from vizier.viztrail.workflow import ACTION_CREATE
+
+
+MODULE_DIR = './.temp'
+LOG_FILE = './.temp/states'
+
+
+class TestModuleStateLog(unittest.TestCase):
+
+    def setUp(self):
+        """Create an empty directory."""
+        if os.path.isdir(MODULE_DIR):
+            shutil.rmtree(MODULE_DIR)
+        os.makedirs(MODULE_DIR)
+        self.store = DefaultObjectStore()
+
+    def tearDown(self):
+        """Delete directory."""
+        shutil.rmtree(MODULE_DIR)
+
+    def create_module(self, state_log):
+        """Create a pending module with outputs and provenance."""
+        return OSModuleHandle.create_module(
+            command=python_cell(source='print 2+2'),
+            external_form='TEST MODULE',
+            state=MODULE_PENDING,
+            timestamp=ModuleTimestamp(),
+            outputs=ModuleOutputs(stdout=[TextOutput('ABC')]),
+            provenance=ModuleProvenance(
+                read={'DS1': 'ID1'},
+                write={'DS1': DatasetDescriptor(identifier='ID2', name='ID2')}
+            ),
+            module_folder=MODULE_DIR,
+            object_store=self.store,
+            state_log=state_log
+        )
+
+    def create_state_log(self, compact_threshold=1000):
+        """Create a state log for modules in the test directory."""
+        return ModuleStateLog(
+            object_path=LOG_FILE,
+            modules_folder=MODULE_DIR,
+            object_store=self.store,
+            compact_threshold=compact_threshold
+        )
+
+    def load_module(self, module, state_log=None):
+        """Load the given module from the object store."""
+        return OSModuleHandle.load_module(
+            identifier=module.identifier,
+            module_path=module.module_path,
+            object_store=self.store,
+            state_log=state_log
+        )
+
+    def test_batch(self):
+        """Test coalescing state changes in a batch into a single log
+        document.
+        """
+        state_log = self.create_state_log()
+        m1 = self.create_module(state_log)
+        m2 = self.create_module(state_log)
+        with state_log.batch():
+            m1.set_running(external_form='RUN MODULE')
+            # Skipped modules keep their outputs and provenance
+            with state_log.batch():
+                m2.set_success(outputs=m2.outputs, provenance=m2.provenance)
+            # Nothing is written before the batch ends
+            self.assertFalse(os.path.isfile(LOG_FILE))
+        docs = self.store.read_appended_objects(LOG_FILE)
+        self.assertEqual(len(docs), 1)
+        self.assertEqual(sorted(docs[0].keys()), sorted([m1.identifier, m2.identifier]))
+        # The module objects are not modified
+        self.assertEqual(self.load_module(m1).state, MODULE_PENDING)
+        self.assertEqual(self.load_module(m2).state, MODULE_PENDING)
+        # The state records are applied when loading modules with the log
+        state_log = self.create_state_log()
+        m = self.load_module(m1, state_log=state_log)
+        self.assertEqual(m.state, MODULE_RUNNING)
+        self.assertEqual(m.external_form, 'RUN MODULE')
+        self.assertEqual(len(m.outputs.stdout), 0)
+        self.assertIsNotNone(m.timestamp.started_at)
+        self.assertEqual(m.provenance.read, {'DS1': 'ID1'})
+        m = self.load_module(m2, state_log=state_log)
+        self.assertEqual(m.state, MODULE_SUCCESS)
+        self.assertEqual(m.outputs.stdout[0].value, 'ABC')
+        self.assertIsNotNone(m.timestamp.finished_at)
+        # Changes outside of a batch are written immediately
+        m.set_running()
+        self.assertEqual(len(self.store.read_appended_objects(LOG_FILE)), 2)
+
+    def test_compact(self):
+        """Test merging the state records into the module objects."""
+        state_log = self.create_state_log()
+        module = self.create_module(state_log)
+        module.set_running()
+        module.set_error(outputs=ModuleOutputs(stderr=[TextOutput('ERROR')]))
+        module.set_pending()
+        self.assertEqual(len(self.store.read_appended_objects(LOG_FILE)), 3)
+        # The log is compacted when it is read
+        state_log = self.create_state_log(compact_threshold=2)
+        m = self.load_module(module, state_log=state_log)
+        self.assertFalse(os.path.isfile(LOG_FILE))
+        self.assertEqual(state_log.records, dict())
+        m = self.load_module(module)
+        self.assertEqual(m.state, MODULE_PENDING)
+        self.assertEqual(m.outputs.stderr[0].value, 'ERROR')
+        self.assertEqual(m.version, module.version)
+        # Changes after compaction are more recent than the module object
+        m = self.load_module(module, state_log=self.create_state_log())
+        m.set_running()
+        m = self.load_module(module, state_log=self.create_state_log())
+        self.assertEqual(m.state, MODULE_RUNNING)
+        # The log is compacted when a write exceeds the threshold
+        state_log = self.create_state_log(compact_threshold=2)
+        m = self.load_module(module, state_log=state_log)
+        m.set_error()
+        self.assertTrue(os.path.isfile(LOG_FILE))
+        m.set_pending()
+        self.assertFalse(os.path.isfile(LOG_FILE))
+        self.assertEqual(len(state_log.records), 0)
+        self.assertEqual(self.load_module(module).state, MODULE_PENDING)
+
+    def test_interrupted_append(self):
+        """Test reading the log after an append was interrupted."""
+        state_log = self.create_state_log()
+        module = self.create_module(state_log)
+        module.set_running()
+        with open(LOG_FILE, 'a') as f:
+            f.write('{"' + module.identifier + '": {"st')
+        state_log = self.create_state_log()
+        m = self.load_module(module, state_log=state_log)
+        self.assertEqual(m.state, MODULE_RUNNING)
+        m.set_error()
+        state_log = self.create_state_log()
+        m = self.load_module(module, state_log=state_log)
+        self.assertEqual(m.state, MODULE_ERROR)
+        self.assertEqual(len(state_log.records), 1)
+        # A corrupted log is not treated as empty
+        with open(LOG_FILE, 'a') as f:
+            f.write('{"' + module.identifier + '": {"st\n{}\n')
+        with self.assertRaises(ValueError):
+            self.create_state_log().records
+
+    def test_module_write(self):
+        """Test rewriting the module object if the provenance changes."""
+        state_log = self.create_state_log()
+        module = self.create_module(state_log)
+        with state_log.batch():
+            module.set_running()
+            module.set_success(
+                outputs=ModuleOutputs(stdout=[TextOutput('DEF')]),
+                provenance=ModuleProvenance(read={'DS2': 'ID3'})
+            )
+        self.assertFalse(os.path.isfile(LOG_FILE))
+        m = self.load_module(module)
+        self.assertEqual(m.state, MODULE_SUCCESS)
+        self.assertEqual(m.outputs.stdout[0].value, 'DEF')
+        self.assertEqual(m.provenance.read, {'DS2': 'ID3'})
+
+    def test_viztrail(self):
+        """Test reading module states when loading a viztrail."""
+        base_path = os.path.join(os.path.abspath(MODULE_DIR), 'ABC')
+        os.makedirs(base_path)
+        vt = OSViztrailHandle.create_viztrail(
+            identifier='ABC',
+            properties=None,
+            base_path=base_path
+        )
+        branch = vt.get_default_branch()
+        module = vt.create_module(
+            command=python_cell(source='print 2+2'),
+            external_form='print 2+2',
+            state=MODULE_PENDING
+        )
+        branch.append_workflow(
+            modules=[module],
+            action=ACTION_CREATE,
+            command=module.command
+        )
+        with branch.batch():
+            module.set_running()
+            module.set_success(outputs=ModuleOutputs(stdout=[TextOutput('4')]))
+        vt = OSViztrailHandle.load_viztrail(base_path)
+        m = vt.get_default_branch().get_head().modules[0]
+        self.assertEqual(m.state, MODULE_SUCCESS)
+        self.assertEqual(m.outputs.stdout[0].value, '4')
+
+
+if __name__ == '__main__':
+    unittest.main()
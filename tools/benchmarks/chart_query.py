@@ -0,0 +1,80 @@
+"""Benchmark for chart queries over large datasets.
+
+Creates a dataset with the given number of rows in the file system datastore
+with string values (as for datasets that are loaded from CSV files). The
+script reports the time to run a chart query for each chart type with and
+without a point budget, and the number of points in the result.
+
+Usage: python tools/benchmarks/chart_query.py [<number-of-rows>]
+"""
+
+import math
+import shutil
+import sys
+import tempfile
+import time
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
+from vizier.engine.packages.plot.query import ChartQuery, DEFAULT_MAX_POINTS
+from vizier.view.chart import ChartViewHandle
+
+
+COLUMNS = [
+    DatasetColumn(identifier=0, name='x'),
+    DatasetColumn(identifier=1, name='y'),
+    DatasetColumn(identifier=2, name='z')
+]
+
+CHART_TYPES = ['Line Chart', 'Area Chart', 'Bar Chart', 'Scatter Plot']
+
+
+def timed(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def run(row_count):
+    base_dir = tempfile.mkdtemp()
+    try:
+        store = FileSystemDatastore(base_dir)
+        ds = store.create_dataset(
+            columns=COLUMNS,
+            rows=[
+                DatasetRow(
+                    identifier=i,
+                    values=[
+                        str(i),
+                        '{:.4f}'.format(math.sin(i / 1000.0)),
+                        str(i % 97)
+                    ]
+                )
+                for i in range(row_count)
+            ]
+        )
+        dataset = store.get_dataset(ds.identifier)
+        print('rows: {}'.format(row_count))
+        for chart_type in CHART_TYPES:
+            view = ChartViewHandle(dataset_name='data', x_axis=0, chart_type=chart_type)
+            view.add_series(0)
+            view.add_series(1)
+            view.add_series(2)
+            for max_points in [None, DEFAULT_MAX_POINTS]:
+                query_time, result = timed(lambda: ChartQuery.exec_query(
+                    dataset=dataset,
+                    view=view,
+                    max_points=max_points
+                ))
+                print('{:<13} {:>6} {:8.2f}s  ({} points)'.format(
+                    chart_type,
+                    max_points if max_points is not None else 'all',
+                    query_time,
+                    len(result[0])
+                ))
+    finally:
+        shutil.rmtree(base_dir)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
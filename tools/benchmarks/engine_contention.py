@@ -0,0 +1,114 @@
+"""Benchmark for concurrent workflow updates in different projects.
+
+Creates a number of projects and starts one client thread per project. Each
+client loads a CSV file and appends a sequence of Python cells to the default
+branch of its project. Appending a module and finishing a module require the
+lock of the modified branch, i.e., clients that work on different projects do
+not block each other. The script reports the average and maximum latency of
+the append requests and the number of executed modules per second.
+
+Usage: python tools/benchmarks/engine_contention.py [<number-of-projects>] [<number-of-modules>]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from vizier.api.webservice.base import get_engine
+from vizier.config.app import AppConfig
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.engine.packages.vizual.command import load_dataset
+
+import vizier.config.app as app
+import vizier.config.base as base
+import vizier.engine.packages.base as pckg
+
+
+CSV_FILE = './tests/engine/workflows/.files/people.csv'
+DATASET_NAME = 'people'
+
+PY_ADD_ONE = """ds = vizierdb.get_dataset('""" + DATASET_NAME + """')
+age = int(ds.rows[0].get_value('Age'))
+ds.rows[0].set_value('Age', age + 1)
+vizierdb.update_dataset('""" + DATASET_NAME + """', ds)
+"""
+
+
+def wait_for(project):
+    """Wait until the head of the default branch is no longer active."""
+    while project.viztrail.default_branch.head.is_active:
+        time.sleep(0.01)
+
+
+def client(engine, project, module_count, latencies):
+    """Append modules to the default branch of the given project and keep the
+    latency of each request.
+    """
+    branch_id = project.viztrail.default_branch.identifier
+    fh = project.filestore.upload_file(CSV_FILE)
+    commands = [
+        load_dataset(
+            dataset_name=DATASET_NAME,
+            file={pckg.FILE_ID: fh.identifier}
+        )
+    ]
+    commands += [python_cell(PY_ADD_ONE) for _ in range(module_count - 1)]
+    for command in commands:
+        start = time.time()
+        engine.append_workflow_module(
+            project_id=project.identifier,
+            branch_id=branch_id,
+            command=command
+        )
+        latencies.append(time.time() - start)
+    wait_for(project)
+
+
+def run(project_count, module_count):
+    server_dir = tempfile.mkdtemp()
+    try:
+        os.environ[app.VIZIERENGINE_DATA_DIR] = server_dir
+        os.environ[app.VIZIERSERVER_ENGINE] = base.DEV_ENGINE
+        os.environ[app.VIZIERSERVER_PACKAGE_PATH] = './resources/packages/common'
+        os.environ[app.VIZIERSERVER_PROCESSOR_PATH] = './resources/processors/common:./resources/processors/dev'
+        os.environ[app.VIZIERENGINE_BACKEND] = base.BACKEND_MULTIPROCESS
+        engine = get_engine(AppConfig())
+        projects = [engine.projects.create_project() for _ in range(project_count)]
+        latencies = list()
+        threads = [
+            threading.Thread(
+                target=client,
+                args=(engine, project, module_count, latencies)
+            )
+            for project in projects
+        ]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+        failed = 0
+        for project in projects:
+            head = project.viztrail.default_branch.head
+            failed += len([m for m in head.modules if not m.is_success])
+        total = project_count * module_count
+        print('projects       : {}'.format(project_count))
+        print('modules        : {}'.format(total))
+        print('failed         : {}'.format(failed))
+        print('total          : {:.3f}s'.format(elapsed))
+        print('modules/second : {:.1f}'.format(total / elapsed))
+        print('append (avg)   : {:.4f}s'.format(sum(latencies) / len(latencies)))
+        print('append (max)   : {:.4f}s'.format(max(latencies)))
+    finally:
+        shutil.rmtree(server_dir)
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    )
@@ -0,0 +1,118 @@
+"""Benchmark for the data formats of the file system datastore.
+
+Creates a dataset with the given number of rows in each of the supported
+formats (and in the legacy Json format that stores all rows in a single Json
+array) and reports the time to write the dataset, the time to fetch a page of
+rows from the middle of the dataset, the time for a full scan over all rows,
+and the size of the data files on disk. For the Parquet format the script
+also reports the time to read the dataset into a pandas data frame.
+
+Usage: python tools/benchmarks/fs_dataset_format.py [<number-of-rows>]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
+from vizier.datastore.fs.dataset import FORMAT_JSON, FORMAT_PARQUET
+from vizier.datastore.fs.dataset import FileSystemDatasetHandle
+from vizier.datastore.reader import DefaultJsonDatasetReader
+
+
+PAGE_SIZE = 100
+
+COLUMNS = [
+    DatasetColumn(identifier=0, name='id', data_type='int'),
+    DatasetColumn(identifier=1, name='name', data_type='varchar'),
+    DatasetColumn(identifier=2, name='score', data_type='real'),
+    DatasetColumn(identifier=3, name='city', data_type='varchar')
+]
+
+CITIES = ['Buffalo', 'New York', 'Chicago', 'Berlin', 'Paris']
+
+
+def get_rows(row_count):
+    return [
+        DatasetRow(
+            identifier=str(i),
+            values=[i, 'name_{}'.format(i % 1000), i * 0.5, CITIES[i % len(CITIES)]]
+        )
+        for i in range(row_count)
+    ]
+
+
+def dir_size(dirname):
+    return sum(
+        os.path.getsize(os.path.join(dirname, f))
+        for f in os.listdir(dirname)
+    )
+
+
+def timed(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def scan(dataset):
+    count = 0
+    with dataset.reader() as reader:
+        for _ in reader:
+            count += 1
+    return count
+
+
+def report(label, row_count, write_time, dataset, dataset_dir):
+    offset = row_count // 2
+    page_time, _ = timed(lambda: dataset.fetch_rows(offset=offset, limit=PAGE_SIZE))
+    scan_time, count = timed(lambda: scan(dataset))
+    assert count == row_count
+    print('{:<8} write {:8.2f}s  page {:8.4f}s  scan {:8.2f}s  size {:8.1f}MB'.format(
+        label,
+        write_time,
+        page_time,
+        scan_time,
+        dir_size(dataset_dir) / (1024 * 1024)
+    ))
+
+
+def run(row_count):
+    base_dir = tempfile.mkdtemp()
+    try:
+        rows = get_rows(row_count)
+        print('rows: {}'.format(row_count))
+        # Legacy format (single Json array)
+        legacy_dir = os.path.join(base_dir, 'legacy')
+        os.makedirs(legacy_dir)
+        data_file = os.path.join(legacy_dir, 'data.json')
+        write_time, _ = timed(lambda: DefaultJsonDatasetReader(data_file).write(rows))
+        dataset = FileSystemDatasetHandle(
+            identifier='legacy',
+            columns=COLUMNS,
+            data_file=data_file,
+            row_count=row_count,
+            max_row_id=row_count - 1
+        )
+        report('legacy', row_count, write_time, dataset, legacy_dir)
+        # Datastore formats
+        for data_format in [FORMAT_JSON, FORMAT_PARQUET]:
+            store = FileSystemDatastore(
+                os.path.join(base_dir, data_format),
+                data_format=data_format
+            )
+            write_time, ds = timed(lambda: store.create_dataset(columns=COLUMNS, rows=rows))
+            dataset = store.get_dataset(ds.identifier)
+            report(data_format, row_count, write_time, dataset, store.get_dataset_dir(ds.identifier))
+            if data_format == FORMAT_PARQUET:
+                frame_time, _ = timed(lambda: dataset.to_dataframe())
+                print('{:<8} to_dataframe {:8.2f}s'.format(data_format, frame_time))
+    finally:
+        shutil.rmtree(base_dir)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000000)
@@ -0,0 +1,101 @@
+"""Benchmark for loading CSV files into the file system datastore.
+
+Creates a CSV file (and a gzip-compressed copy) with the given number of rows
+and reports the time to load the file using the streaming ingest of the
+datastore. For comparison the script also reports the time to read the file
+row by row, converting each cell value using vizier.core.util.cast (which is
+how files were loaded before the streaming ingest).
+
+Usage: python tools/benchmarks/fs_load_dataset.py [<number-of-rows>]
+"""
+
+import csv
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from vizier.core.util import cast
+from vizier.datastore.dataset import DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
+from vizier.filestore.base import FileHandle, ENCODING_GZIP, FORMAT_CSV
+
+
+CITIES = ['Buffalo', 'New York', 'Chicago', 'Berlin', 'Paris']
+
+
+def write_file(filename, row_count):
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'name', 'score', 'city', 'note'])
+        for i in range(row_count):
+            writer.writerow([
+                i,
+                'name_{}'.format(i % 1000),
+                i * 0.5,
+                CITIES[i % len(CITIES)],
+                '' if i % 3 else 'n/a'
+            ])
+
+
+def read_rows(filename):
+    rows = list()
+    with open(filename, 'r') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            values = [cast(v.strip()) for v in row]
+            rows.append(DatasetRow(identifier=str(len(rows)), values=values))
+    return rows
+
+
+def timed(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def report(label, row_count, elapsed):
+    print('{:<8} {:8.2f}s  {:10.0f} rows/sec'.format(label, elapsed, row_count / elapsed))
+
+
+def run(row_count):
+    base_dir = tempfile.mkdtemp()
+    try:
+        csv_file = os.path.join(base_dir, 'data.csv')
+        gz_file = os.path.join(base_dir, 'data.csv.gz')
+        write_file(csv_file, row_count)
+        with open(csv_file, 'rb') as f_in:
+            with gzip.open(gz_file, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+        print('rows: {}'.format(row_count))
+        elapsed, _ = timed(lambda: read_rows(csv_file))
+        report('cast', row_count, elapsed)
+        store = FileSystemDatastore(os.path.join(base_dir, 'ds'))
+        f_handle = FileHandle(
+            identifier='csv',
+            filepath=csv_file,
+            file_name='data.csv',
+            mimetype=FORMAT_CSV
+        )
+        elapsed, ds = timed(lambda: store.load_dataset(f_handle=f_handle))
+        assert ds.row_count == row_count
+        report('load', row_count, elapsed)
+        gz_handle = FileHandle(
+            identifier='gz',
+            filepath=gz_file,
+            file_name='data.csv.gz',
+            mimetype=FORMAT_CSV,
+            encoding=ENCODING_GZIP
+        )
+        elapsed, ds = timed(lambda: store.load_dataset(f_handle=gz_handle))
+        assert ds.row_count == row_count
+        report('load-gz', row_count, elapsed)
+    finally:
+        shutil.rmtree(base_dir)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
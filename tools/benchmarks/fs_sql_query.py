@@ -0,0 +1,98 @@
+"""Benchmark for SQL queries over datasets in the file system datastore.
+
+Creates two datasets in the datastore. The first dataset contains the given
+number of rows. The second dataset is a dimension table with one row for each
+distinct key in the first dataset. The script reports the time to create the
+SQLite tables for the datasets on first use and the time for a set of
+aggregate and join queries. All queries are run twice to show the time for
+queries over datasets that have been used before.
+
+Usage: python tools/benchmarks/fs_sql_query.py [<number-of-rows>]
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
+
+
+KEY_COUNT = 1000
+
+FACT_COLUMNS = [
+    DatasetColumn(identifier=0, name='id', data_type='int'),
+    DatasetColumn(identifier=1, name='key', data_type='int'),
+    DatasetColumn(identifier=2, name='score', data_type='real'),
+    DatasetColumn(identifier=3, name='city', data_type='varchar')
+]
+
+DIM_COLUMNS = [
+    DatasetColumn(identifier=0, name='key', data_type='int'),
+    DatasetColumn(identifier=1, name='label', data_type='varchar')
+]
+
+CITIES = ['Buffalo', 'New York', 'Chicago', 'Berlin', 'Paris']
+
+QUERIES = [
+    ('count', 'SELECT COUNT(*) FROM facts'),
+    ('group-by', 'SELECT city, COUNT(*), AVG(score) FROM facts GROUP BY city'),
+    ('filter', 'SELECT COUNT(*) FROM facts WHERE score > 1000 AND city = \'Paris\''),
+    (
+        'join',
+        'SELECT d.label, SUM(f.score) FROM facts f JOIN dims d ON f.key = d.key '
+        'GROUP BY d.label ORDER BY 2 DESC LIMIT 10'
+    ),
+    (
+        'self-join',
+        'SELECT COUNT(*) FROM facts a JOIN facts b ON a.id = b.id '
+        'WHERE a.city = b.city'
+    )
+]
+
+
+def timed(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def run(row_count):
+    base_dir = tempfile.mkdtemp()
+    try:
+        store = FileSystemDatastore(base_dir)
+        facts = store.create_dataset(
+            columns=FACT_COLUMNS,
+            rows=[
+                DatasetRow(
+                    identifier=i,
+                    values=[i, i % KEY_COUNT, i * 0.01, CITIES[i % len(CITIES)]]
+                )
+                for i in range(row_count)
+            ]
+        )
+        dims = store.create_dataset(
+            columns=DIM_COLUMNS,
+            rows=[
+                DatasetRow(identifier=i, values=[i, 'label_{}'.format(i % 50)])
+                for i in range(KEY_COUNT)
+            ]
+        )
+        datasets = {'facts': facts.identifier, 'dims': dims.identifier}
+        print('rows: {}'.format(row_count))
+        load_time, _ = timed(lambda: store.execute_query(
+            'SELECT (SELECT COUNT(*) FROM facts), (SELECT COUNT(*) FROM dims)',
+            datasets
+        ))
+        print('{:<10} {:8.2f}s'.format('tables', load_time))
+        for run_id in range(2):
+            for label, query in QUERIES:
+                query_time, result = timed(lambda: store.execute_query(query, datasets))
+                print('{:<10} {:8.2f}s  ({} rows)'.format(label, query_time, len(result.rows)))
+    finally:
+        shutil.rmtree(base_dir)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,111 @@
+"""Benchmark for loading workflows with large module outputs.
+
+Creates a viztrail with a single workflow where every module has a large
+dataset output (as produced, e.g., by SQL or Python cells that show a dataset)
+and a short text output. The script then reloads the viztrail and reads the
+workflow at the branch head. The variants compare embedding all outputs in the
+module objects with storing large outputs separately. For each variant the
+script reports the time to load the workflow, the total size of the module
+objects, and the time to access all output values.
+
+Usage: python tools/benchmarks/module_outputs.py [<number-of-modules>] [<number-of-rows>]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.viztrail.module.base import MODULE_PENDING
+from vizier.viztrail.module.output import DatasetOutput, ModuleOutputs, TextOutput
+from vizier.viztrail.objectstore.viztrail import OSViztrailHandle
+from vizier.viztrail.workflow import ACTION_CREATE
+
+
+def get_outputs(module_index, row_count):
+    dataset = {
+        'id': 'DS{}'.format(module_index),
+        'columns': [{'id': i, 'name': 'col{}'.format(i), 'type': 'int'} for i in range(10)],
+        'rows': [{'id': r, 'values': [r * i for i in range(10)]} for r in range(row_count)],
+        'rowCount': row_count
+    }
+    return ModuleOutputs(stdout=[
+        TextOutput('module {}'.format(module_index)),
+        DatasetOutput(dataset)
+    ])
+
+
+def run_variant(base_dir, module_count, row_count, blob_size):
+    vt = OSViztrailHandle.create_viztrail(
+        identifier='BENCH',
+        properties=None,
+        base_path=base_dir
+    )
+    vt.output_store.blob_size = blob_size
+    modules = [
+        vt.create_module(
+            command=python_cell(source='print({})'.format(i)),
+            external_form='print({})'.format(i),
+            state=MODULE_PENDING
+        ) for i in range(module_count)
+    ]
+    branch = vt.get_default_branch()
+    branch.append_workflow(
+        modules=modules,
+        action=ACTION_CREATE,
+        command=modules[-1].command
+    )
+    with branch.batch():
+        for i, module in enumerate(modules):
+            module.set_success(outputs=get_outputs(i, row_count))
+    module_bytes = 0
+    for filename in os.listdir(vt.modules_folder):
+        module_bytes += os.path.getsize(os.path.join(vt.modules_folder, filename))
+    states_file = os.path.join(base_dir, 'states')
+    if os.path.isfile(states_file):
+        module_bytes += os.path.getsize(states_file)
+    start = time.time()
+    vt = OSViztrailHandle.load_viztrail(base_dir)
+    workflow = vt.get_default_branch().get_head()
+    load_time = time.time() - start
+    start = time.time()
+    for module in workflow.modules:
+        for out in module.outputs.stdout:
+            out.value
+    access_time = time.time() - start
+    return load_time, access_time, module_bytes
+
+
+def run(module_count, row_count):
+    print('modules : {}'.format(module_count))
+    print('rows    : {}'.format(row_count))
+    variants = [
+        ('inline ', 0),
+        ('offload', 65536)
+    ]
+    for name, blob_size in variants:
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            load_time, access_time, module_bytes = run_variant(
+                tmp_dir,
+                module_count,
+                row_count,
+                blob_size
+            )
+            print('{} : load {:.3f}s, {:.1f} KB module data, access {:.3f}s'.format(
+                name,
+                load_time,
+                module_bytes / 1024,
+                access_time
+            ))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    )
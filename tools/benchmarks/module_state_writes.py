@@ -0,0 +1,151 @@
+"""Benchmark for writing module state changes.
+
+Creates a workflow with the given number of modules, each with outputs and
+provenance, and simulates re-executing the workflow several times. Every other
+module is executed (set to running and then to success with new outputs and
+provenance) while the remaining modules are skipped (set to success with their
+previous outputs and provenance). The script compares rewriting the module
+objects for each state change with writing state records to the module state
+log of the viztrail, either one change at a time or grouped into one batch for
+each workflow update (as done by the workflow engine). For each variant the
+script reports the elapsed time, the number of bytes that were written, and
+the number of synchronized appends to the log.
+
+Usage: python tools/benchmarks/module_state_writes.py [<number-of-modules>] [<number-of-runs>]
+"""
+
+from contextlib import contextmanager
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from vizier.core.io.base import DefaultObjectStore
+from vizier.datastore.dataset import DatasetColumn, DatasetDescriptor
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.viztrail.module.base import MODULE_SUCCESS
+from vizier.viztrail.module.output import ModuleOutputs, TextOutput
+from vizier.viztrail.module.provenance import ModuleProvenance
+from vizier.viztrail.module.timestamp import ModuleTimestamp
+from vizier.viztrail.objectstore.module import ModuleStateLog, OSModuleHandle
+
+
+def get_outputs():
+    return ModuleOutputs(stdout=[TextOutput('line {}'.format(i)) for i in range(100)])
+
+
+def get_provenance():
+    columns = [DatasetColumn(identifier=i, name='col{}'.format(i)) for i in range(20)]
+    return ModuleProvenance(
+        read={'DS': 'ID1'},
+        write={'DS': DatasetDescriptor(identifier='ID2', name='DS', columns=columns)}
+    )
+
+
+class CountingObjectStore(DefaultObjectStore):
+    """Default object store that counts the number of bytes and the number
+    of synchronized appends that are written.
+    """
+    def __init__(self):
+        super(CountingObjectStore, self).__init__()
+        self.bytes = 0
+        self.syncs = 0
+
+    def append_object(self, object_path, content, sync=False):
+        self.bytes += len(json.dumps(content)) + 1
+        self.syncs += 1 if sync else 0
+        super(CountingObjectStore, self).append_object(object_path, content, sync=sync)
+
+    def write_object(self, object_path, content):
+        self.bytes += len(json.dumps(content))
+        super(CountingObjectStore, self).write_object(object_path, content)
+
+
+def run_variant(base_dir, module_count, run_count, use_log, use_batch):
+    store = CountingObjectStore()
+    modules_folder = os.path.join(base_dir, 'modules')
+    os.makedirs(modules_folder)
+    state_log = None
+    if use_log:
+        state_log = ModuleStateLog(
+            object_path=os.path.join(base_dir, 'states'),
+            modules_folder=modules_folder,
+            object_store=store
+        )
+    modules = [
+        OSModuleHandle.create_module(
+            command=python_cell(source='print({})'.format(i)),
+            external_form='print({})'.format(i),
+            state=MODULE_SUCCESS,
+            timestamp=ModuleTimestamp(),
+            outputs=get_outputs(),
+            provenance=get_provenance(),
+            module_folder=modules_folder,
+            object_store=store,
+            state_log=state_log
+        ) for i in range(module_count)
+    ]
+    store.bytes = 0
+    start = time.time()
+    for _ in range(run_count):
+        # Every other module is executed. When a module finishes, the next
+        # module is skipped and the module after that is set to running in
+        # the same workflow update.
+        with batch(state_log, use_batch):
+            modules[0].set_running()
+        for i in range(0, module_count, 2):
+            with batch(state_log, use_batch):
+                modules[i].set_success(outputs=get_outputs(), provenance=get_provenance())
+                if i + 1 < module_count:
+                    skipped = modules[i + 1]
+                    skipped.set_success(outputs=skipped.outputs, provenance=skipped.provenance)
+                if i + 2 < module_count:
+                    modules[i + 2].set_running()
+    return time.time() - start, store.bytes, store.syncs
+
+
+@contextmanager
+def batch(state_log, use_batch):
+    if use_batch:
+        with state_log.batch():
+            yield
+    else:
+        yield
+
+
+def run(module_count, run_count):
+    print('modules : {}'.format(module_count))
+    print('runs    : {}'.format(run_count))
+    variants = [
+        ('rewrite', False, False),
+        ('log    ', True, False),
+        ('batch  ', True, True)
+    ]
+    for name, use_log, use_batch in variants:
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            elapsed, total, syncs = run_variant(
+                tmp_dir,
+                module_count,
+                run_count,
+                use_log,
+                use_batch
+            )
+            print('{} : {:.3f}s, {:.1f} KB written, {} fsyncs'.format(
+                name,
+                elapsed,
+                total / 1024,
+                syncs
+            ))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    )
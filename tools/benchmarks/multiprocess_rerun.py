@@ -0,0 +1,101 @@
+"""Benchmark for the per-module overhead of the MULTIPROCESS backend.
+
+Creates a workflow that loads a CSV file followed by a chain of dependent
+Python cells, waits for the workflow to finish, and then replaces the first
+module. Since every Python cell reads and updates the loaded dataset all
+modules in the workflow are re-executed. The script reports the total time
+for the re-run and the average time per module.
+
+Usage: python tools/benchmarks/multiprocess_rerun.py [<number-of-modules>]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from vizier.api.webservice.base import get_engine
+from vizier.config.app import AppConfig
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.engine.packages.vizual.command import load_dataset
+
+import vizier.config.app as app
+import vizier.config.base as base
+import vizier.engine.packages.base as pckg
+
+
+CSV_FILE = './tests/engine/workflows/.files/people.csv'
+DATASET_NAME = 'people'
+
+PY_ADD_ONE = """ds = vizierdb.get_dataset('""" + DATASET_NAME + """')
+age = int(ds.rows[0].get_value('Age'))
+ds.rows[0].set_value('Age', age + 1)
+vizierdb.update_dataset('""" + DATASET_NAME + """', ds)
+"""
+
+
+def wait_for(project):
+    """Wait until the head of the default branch is no longer active."""
+    while project.viztrail.default_branch.head.is_active:
+        time.sleep(0.01)
+
+
+def run(module_count):
+    server_dir = tempfile.mkdtemp()
+    try:
+        os.environ[app.VIZIERENGINE_DATA_DIR] = server_dir
+        os.environ[app.VIZIERSERVER_ENGINE] = base.DEV_ENGINE
+        os.environ[app.VIZIERSERVER_PACKAGE_PATH] = './resources/packages/common'
+        os.environ[app.VIZIERSERVER_PROCESSOR_PATH] = './resources/processors/common:./resources/processors/dev'
+        os.environ[app.VIZIERENGINE_BACKEND] = base.BACKEND_MULTIPROCESS
+        engine = get_engine(AppConfig())
+        project = engine.projects.create_project()
+        branch_id = project.viztrail.default_branch.identifier
+        fh = project.filestore.upload_file(CSV_FILE)
+        load_cmd = load_dataset(
+            dataset_name=DATASET_NAME,
+            file={pckg.FILE_ID: fh.identifier}
+        )
+        engine.append_workflow_module(
+            project_id=project.identifier,
+            branch_id=branch_id,
+            command=load_cmd
+        )
+        for _ in range(module_count - 1):
+            engine.append_workflow_module(
+                project_id=project.identifier,
+                branch_id=branch_id,
+                command=python_cell(PY_ADD_ONE)
+            )
+        wait_for(project)
+        # Re-run the whole workflow by replacing the first module with a
+        # command that loads a new copy of the file. This forces all dependent
+        # modules to be re-executed.
+        fh = project.filestore.upload_file(CSV_FILE)
+        load_cmd = load_dataset(
+            dataset_name=DATASET_NAME,
+            file={pckg.FILE_ID: fh.identifier}
+        )
+        head = project.viztrail.default_branch.head
+        start = time.time()
+        engine.replace_workflow_module(
+            project_id=project.identifier,
+            branch_id=branch_id,
+            module_id=head.modules[0].identifier,
+            command=load_cmd
+        )
+        wait_for(project)
+        elapsed = time.time() - start
+        head = project.viztrail.default_branch.head
+        failed = len([m for m in head.modules if not m.is_success])
+        print('modules   : {}'.format(module_count))
+        print('failed    : {}'.format(failed))
+        print('total     : {:.3f}s'.format(elapsed))
+        print('per module: {:.3f}s'.format(elapsed / module_count))
+    finally:
+        shutil.rmtree(server_dir)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
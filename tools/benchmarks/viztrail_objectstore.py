@@ -0,0 +1,144 @@
+"""Benchmark for the object stores of the viztrails repository.
+
+Creates a synthetic repository with the given number of projects in the
+default file-based object store and in the SQLite object store. The default
+branch of each project has the given number of workflow versions. For each
+store the script reports the time to create the repository, the time to load
+the repository and read the history and head of every branch, and the number
+of module state changes (running followed by success) that are written per
+second. For the SQLite store the script also reports the time to migrate the
+file-based repository into a new database.
+
+Usage: python tools/benchmarks/viztrail_objectstore.py [<number-of-projects>] [<number-of-workflows>]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from vizier.core.io.base import DefaultObjectStore
+from vizier.core.io.sqlite import SQLiteObjectStore, migrate_folder
+from vizier.core.timestamp import get_current_time
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.viztrail.module.base import ModuleHandle, MODULE_PENDING
+from vizier.viztrail.module.output import ModuleOutputs
+from vizier.viztrail.module.provenance import ModuleProvenance
+from vizier.viztrail.module.timestamp import ModuleTimestamp
+from vizier.viztrail.objectstore.repository import OSViztrailRepository
+from vizier.viztrail.workflow import ACTION_APPEND
+
+
+"""Number of modules in each workflow."""
+MODULE_COUNT = 10
+
+"""Number of module state changes for the write benchmark."""
+STATE_CHANGES = 1000
+
+
+def create_repository(base_dir, object_store, project_count, workflow_count):
+    repo = OSViztrailRepository(base_path=base_dir, object_store=object_store)
+    command = python_cell(source='print(1)')
+    for _ in range(project_count):
+        vt = repo.create_viztrail()
+        branch = vt.get_default_branch()
+        modules = list()
+        for _ in range(workflow_count):
+            ts = ModuleTimestamp(created_at=get_current_time())
+            pending = ModuleHandle(
+                command=command,
+                external_form='print(1)',
+                state=MODULE_PENDING,
+                timestamp=ts,
+                outputs=ModuleOutputs(),
+                provenance=ModuleProvenance()
+            )
+            workflow = branch.append_workflow(
+                modules=modules[-(MODULE_COUNT - 1):],
+                action=ACTION_APPEND,
+                command=command,
+                pending_modules=[pending]
+            )
+            modules = workflow.modules
+    return repo
+
+
+def touch(repo):
+    """Read the workflow history and the branch head for all projects."""
+    for vt in repo.list_viztrails():
+        branch = vt.get_default_branch()
+        assert len(branch.get_history()) > 0
+        assert branch.get_head() is not None
+
+
+def write_states(repo):
+    """Write module state changes for the modules at the branch heads."""
+    modules = list()
+    for vt in repo.list_viztrails():
+        modules.extend(vt.get_default_branch().get_head().modules)
+    for i in range(STATE_CHANGES // 2):
+        module = modules[i % len(modules)]
+        module.set_running(started_at=get_current_time())
+        module.set_success(finished_at=get_current_time())
+
+
+def timed(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def benchmark(name, base_dir, create_store, project_count, workflow_count):
+    elapsed, _ = timed(lambda: create_repository(
+        base_dir,
+        create_store(),
+        project_count,
+        workflow_count
+    ))
+    print('{} create : {:.3f}s'.format(name, elapsed))
+    elapsed, repo = timed(lambda: OSViztrailRepository(
+        base_path=base_dir,
+        object_store=create_store()
+    ))
+    access, _ = timed(lambda: touch(repo))
+    print('{} load   : {:.3f}s'.format(name, elapsed + access))
+    elapsed, _ = timed(lambda: write_states(repo))
+    print('{} writes : {:.0f}/s'.format(name, STATE_CHANGES / elapsed))
+
+
+def run(project_count, workflow_count):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        print('projects   : {}'.format(project_count))
+        print('workflows  : {}'.format(workflow_count))
+        fs_dir = os.path.join(tmp_dir, 'fs', 'vt')
+        benchmark(
+            'fs    ',
+            fs_dir,
+            DefaultObjectStore,
+            project_count,
+            workflow_count
+        )
+        database = os.path.join(tmp_dir, 'sqlite', 'viztrails.db')
+        benchmark(
+            'sqlite',
+            os.path.join(tmp_dir, 'sqlite', 'vt'),
+            lambda: SQLiteObjectStore(database),
+            project_count,
+            workflow_count
+        )
+        elapsed, _ = timed(lambda: migrate_folder(
+            fs_dir,
+            SQLiteObjectStore(os.path.join(tmp_dir, 'migrated.db'))
+        ))
+        print('migrate    : {:.3f}s'.format(elapsed))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    )
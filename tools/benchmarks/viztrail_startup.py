@@ -0,0 +1,105 @@
+"""Benchmark for loading a viztrails repository at server startup.
+
+Creates a synthetic repository with the given number of projects. The default
+branch of each project has the given number of workflow versions. The script
+reports the time to load the repository, which reads the workflow history of a
+branch only when it is first accessed, and the time to read the history and
+the branch head for all projects afterwards. For comparison the script also
+reports the time to load the repository after the workflow index of every
+branch has been removed. In this case all workflow objects in each branch
+folder are read (which is how branches were loaded before the index).
+
+Usage: python tools/benchmarks/viztrail_startup.py [<number-of-projects>] [<number-of-workflows>]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from vizier.core.timestamp import get_current_time
+from vizier.engine.packages.pycell.command import python_cell
+from vizier.viztrail.module.base import MODULE_SUCCESS
+from vizier.viztrail.module.output import ModuleOutputs
+from vizier.viztrail.module.provenance import ModuleProvenance
+from vizier.viztrail.module.timestamp import ModuleTimestamp
+from vizier.viztrail.objectstore.branch import OBJ_WORKFLOWINDEX
+from vizier.viztrail.objectstore.module import OSModuleHandle
+from vizier.viztrail.objectstore.repository import OSViztrailRepository
+from vizier.viztrail.workflow import ACTION_APPEND
+
+
+"""Number of modules in each workflow."""
+MODULE_COUNT = 10
+
+
+def create_repository(base_dir, project_count, workflow_count):
+    repo = OSViztrailRepository(base_path=base_dir)
+    command = python_cell(source='print(1)')
+    for _ in range(project_count):
+        vt = repo.create_viztrail()
+        ts = get_current_time()
+        modules = [
+            OSModuleHandle.create_module(
+                command=command,
+                external_form='print(1)',
+                state=MODULE_SUCCESS,
+                outputs=ModuleOutputs(),
+                provenance=ModuleProvenance(),
+                timestamp=ModuleTimestamp(created_at=ts, started_at=ts, finished_at=ts),
+                module_folder=vt.modules_folder,
+                object_store=vt.object_store
+            )
+            for _ in range(MODULE_COUNT)
+        ]
+        branch = vt.get_default_branch()
+        for _ in range(workflow_count):
+            branch.append_workflow(
+                modules=modules,
+                action=ACTION_APPEND,
+                command=command
+            )
+    return repo
+
+
+def timed(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def touch(repo):
+    """Read the workflow history and the branch head for all projects."""
+    for vt in repo.list_viztrails():
+        branch = vt.get_default_branch()
+        assert len(branch.get_history()) > 0
+        assert branch.get_head() is not None
+
+
+def run(project_count, workflow_count):
+    base_dir = tempfile.mkdtemp()
+    try:
+        repo = create_repository(base_dir, project_count, workflow_count)
+        print('projects : {}'.format(project_count))
+        print('workflows: {}'.format(workflow_count))
+        elapsed, repo = timed(lambda: OSViztrailRepository(base_path=base_dir))
+        print('startup  : {:.3f}s'.format(elapsed))
+        elapsed, _ = timed(lambda: touch(repo))
+        print('access   : {:.3f}s'.format(elapsed))
+        # Remove the workflow index for all branches
+        for vt in repo.list_viztrails():
+            branch = vt.get_default_branch()
+            os.remove(os.path.join(branch.base_path, OBJ_WORKFLOWINDEX))
+        elapsed, repo = timed(lambda: OSViztrailRepository(base_path=base_dir))
+        scan, _ = timed(lambda: touch(repo))
+        print('no index : {:.3f}s'.format(elapsed + scan))
+    finally:
+        shutil.rmtree(base_dir)
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    )
@@ -0,0 +1,46 @@
+"""Copy the viztrails repository in a vizier data directory from the default
+file-based object store into a SQLite object store.
+
+The files in the viztrails folder (vt) are copied into the database file
+viztrails.db in the data directory. The files themselves are not modified.
+Set VIZIERENGINE_OBJECT_STORE=sqlite to use the database when the server is
+started next. The script refuses to overwrite an existing database.
+
+Usage: python tools/migrate_objectstore.py [<data-dir>]
+"""
+
+import os
+import sys
+import time
+
+from vizier.config.app import DEFAULT_VIZTRAILS_DIR
+from vizier.config.base import ENV_DIRECTORY
+from vizier.core.io.sqlite import SQLiteObjectStore, DEFAULT_DATABASE_FILE
+from vizier.core.io.sqlite import migrate_folder
+
+
+def run(data_dir):
+    viztrails_dir = os.path.join(data_dir, DEFAULT_VIZTRAILS_DIR)
+    database = os.path.join(data_dir, DEFAULT_DATABASE_FILE)
+    if not os.path.isdir(viztrails_dir):
+        print('no viztrails repository in \'{}\''.format(data_dir))
+        sys.exit(1)
+    if os.path.exists(database):
+        print('database \'{}\' already exists'.format(database))
+        sys.exit(1)
+    start = time.time()
+    try:
+        folders, objects = migrate_folder(viztrails_dir, SQLiteObjectStore(database))
+    except Exception:
+        # Remove the incomplete database
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.exists(database + suffix):
+                os.remove(database + suffix)
+        raise
+    print('folders : {}'.format(folders))
+    print('objects : {}'.format(objects))
+    print('time    : {:.3f}s'.format(time.time() - start))
+
+
+if __name__ == '__main__':
+    run(sys.argv[1] if len(sys.argv) > 1 else ENV_DIRECTORY)
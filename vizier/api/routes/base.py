@@ -33,6 +33,9 @@ PAGE_OFFSET = 'offset'
 """Profiling."""
 FORCE_PROFILER = 'profile'
 
+"""Maximum number of points in chart view data."""
+CHART_POINTS = 'points'
+
 
 class UrlFactory(object):
     """Factory to create urls for all routes that the webservice supports."""
@@ -237,6 +240,23 @@ class UrlFactory(object):
         """
         return self.get_branch(project_id, branch_id) + '/head'
 
+    def get_branch_head_events(self, project_id: str, branch_id: str) -> str:
+        """Url to subscribe to the stream of events for changes to the
+        workflow at the head of the given project branch.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        branch_id: string
+            Unique branch identifier
+
+        Returns
+        -------
+        string
+        """
+        return self.get_branch_head(project_id, branch_id) + '/events'
+
     def update_branch(self, project_id: str, branch_id: str) -> str:
         """Url to update properties for the project branch with the given
         identifier.
@@ -392,6 +412,23 @@ class UrlFactory(object):
         """
         return self.get_workflow_module(project_id, branch_id, module_id)
 
+    def get_module_output(self, project_id: str, output_id: str) -> str:
+        """Url to retrieve the full value of a module output that is stored
+        separately from the module.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        output_id: string
+            Unique output identifier
+
+        Returns
+        -------
+        string
+        """
+        return self.get_project(project_id) + '/outputs/' + output_id
+
     # --------------------------------------------------------------------------
     # Datasets
     # --------------------------------------------------------------------------
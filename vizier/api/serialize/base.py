@@ -18,10 +18,14 @@
 serialize web resources.
 """
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, TYPE_CHECKING
 
+import vizier.api.serialize.hateoas as ref
 import vizier.api.serialize.labels as labels
 from vizier.viztrail.module.output import ModuleOutputs, OutputObject
+from vizier.viztrail.module.output import StoredOutput
+if TYPE_CHECKING:
+    from vizier.api.routes.base import UrlFactory
 
 
 def HATEOAS(links: Dict[str, Optional[str]]) -> List[Dict[str, Optional[str]]]:
@@ -69,22 +73,53 @@ def PROPERTIES(properties: Dict[str, Any]) -> List[Dict[str, Any]]:
 # Output streams
 # ------------------------------------------------------------------------------
 
-def OUTPUT(out: OutputObject) -> Dict[str, Any]:
-    """Get dictionary serialization for an output object.
+def OUTPUT(
+        out: OutputObject,
+        project_id: Optional[str] = None,
+        urls: Optional["UrlFactory"] = None
+    ) -> Dict[str, Any]:
+    """Get dictionary serialization for an output object. For outputs that
+    are stored separately from their module only the truncated preview is
+    included. If the url factory is given the serialization contains a
+    reference to retrieve the full output value.
 
     Parameters
     ----------
     out: vizier.viztrail.module.output.OutputObject
         Object in module output stream
+    project_id: string, optional
+        Unique identifier of the project that contains the module
+    urls: vizier.api.routes.base.UrlFactory, optional
+        Factory for resource urls
 
     Returns
     -------
     dict
     """
-    return {'type': out.type, 'value': out.value}
-
-
-def OUTPUTS(output_streams: ModuleOutputs) -> Dict[str, Any]:
+    if not isinstance(out, StoredOutput):
+        return {'type': out.type, 'value': out.value}
+    obj = {
+        'type': out.type,
+        'value': out.preview,
+        labels.ID: out.identifier,
+        labels.OUTPUT_SIZE: out.size,
+        labels.OUTPUT_TRUNCATED: True
+    }
+    if urls is not None and project_id is not None:
+        obj[labels.LINKS] = HATEOAS({
+            ref.SELF: urls.get_module_output(
+                project_id=project_id,
+                output_id=out.identifier
+            )
+        })
+    return obj
+
+
+def OUTPUTS(
+        output_streams: ModuleOutputs,
+        project_id: Optional[str] = None,
+        urls: Optional["UrlFactory"] = None
+    ) -> Dict[str, Any]:
     """Get dictionary serialization for a pair of STDOUT and STDERR output
     stream.
 
@@ -92,12 +127,16 @@ def OUTPUTS(output_streams: ModuleOutputs) -> Dict[str, Any]:
     ----------
     output_streams: vizier.viztrail.module.output.ModuleOutputs
         Module output streams
+    project_id: string, optional
+        Unique identifier of the project that contains the module
+    urls: vizier.api.routes.base.UrlFactory, optional
+        Factory for resource urls
 
     Returns
     -------
     dict()
     """
     return {
-        'stdout': [OUTPUT(out) for out in output_streams.stdout],
-        'stderr': [OUTPUT(out) for out in output_streams.stderr]
+        'stdout': [OUTPUT(out, project_id, urls) for out in output_streams.stdout],
+        'stderr': [OUTPUT(out, project_id, urls) for out in output_streams.stderr]
     }
@@ -0,0 +1,219 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cache for serialized workflow resources. Modules and datasets are shared
+between the workflows of a branch. The serialization of a module only changes
+when the module state changes. Serialized modules and datasets are therefore
+cached and reused across requests and across workflow versions.
+
+Cache entries are keyed by tuples that contain all the values that the
+serialization depends on. The same keys are used to compute entity tags for
+HTTP responses. Cached serializations are shared and must not be modified.
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Tuple, TYPE_CHECKING
+if TYPE_CHECKING:
+    from vizier.view.chart import ChartViewHandle
+
+import hashlib
+import threading
+
+from collections import OrderedDict
+
+from vizier.datastore.artifact import ArtifactDescriptor
+from vizier.viztrail.module.base import ModuleHandle
+
+
+"""Default maximum number of cached serializations."""
+DEFAULT_CACHE_SIZE = 10000
+
+
+class SerializationCache(object):
+    """Least-recently used cache for serialized resources."""
+    def __init__(self, capacity: int = DEFAULT_CACHE_SIZE):
+        """Initialize the cache capacity.
+
+        Parameters
+        ----------
+        capacity: int, optional
+            Maximum number of cached serializations
+        """
+        self.capacity = capacity
+        self.entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get the cached serialization for the given key. Returns None if no
+        entry for the key exists.
+
+        Parameters
+        ----------
+        key: tuple
+            Cache key
+
+        Returns
+        -------
+        any
+        """
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """Add a serialization to the cache. Evicts the least recently used
+        entries if the capacity is exceeded. Returns the given value.
+
+        Parameters
+        ----------
+        key: tuple
+            Cache key
+        value: any
+            Serialized resource
+
+        Returns
+        -------
+        any
+        """
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return value
+
+
+def artifacts_key(artifacts: Dict[str, ArtifactDescriptor]) -> Tuple:
+    """Get key for the database state of a module.
+
+    Parameters
+    ----------
+    artifacts: dict(vizier.datastore.artifact.ArtifactDescriptor)
+        Artifacts in the database state by name
+
+    Returns
+    -------
+    tuple
+    """
+    return tuple(sorted(
+        (name, artifact.identifier) for name, artifact in artifacts.items()
+    ))
+
+
+def chart_key(
+        dataset_id: str,
+        view: "ChartViewHandle",
+        max_points: Optional[int]
+    ) -> Tuple:
+    """Get the cache key for the result of a chart query. The key contains
+    all parts of the chart definition that affect the query result. Series
+    labels and the chart name are not part of the key.
+
+    Parameters
+    ----------
+    dataset_id: string
+        Unique identifier of the queried dataset
+    view: vizier.view.chart.ChartViewHandle
+        Chart view definition handle
+    max_points: int
+        Maximum number of points in the query result
+
+    Returns
+    -------
+    tuple
+    """
+    return (
+        'chart',
+        dataset_id,
+        view.chart_type,
+        view.x_axis,
+        tuple((s.column, s.range_start, s.range_end) for s in view.data),
+        max_points
+    )
+
+
+def entity_tag(key: Hashable) -> str:
+    """Get a strong entity tag for a serialization with the given cache key.
+
+    Parameters
+    ----------
+    key: tuple
+        Cache key
+
+    Returns
+    -------
+    string
+    """
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+def module_key(
+        project_id: str,
+        branch_id: str,
+        workflow_id: Optional[str],
+        module: ModuleHandle,
+        artifacts: Optional[Dict[str, ArtifactDescriptor]],
+        charts: Optional[List["ChartViewHandle"]],
+        include_self: bool
+    ) -> Optional[Tuple]:
+    """Get the cache key for the serialization of a module. The result is
+    None if the module is not persistent, i.e., has no identifier.
+
+    The workflow identifier is part of the key only if the module has charts
+    since chart references contain the workflow identifier.
+
+    Parameters
+    ----------
+    project_id: string
+        Unique project identifier
+    branch_id: string
+        Unique branch identifier
+    workflow_id: string
+        Identifier of the workflow that contains the module
+    module: vizier.viztrail.module.base.ModuleHandle
+        Module handle
+    artifacts: dict(vizier.datastore.artifact.ArtifactDescriptor)
+        Database state after the module
+    charts: list(vizier.view.chart.ChartViewHandle)
+        List of handles for available chart views
+    include_self: bool
+        Indicate if self link is included
+
+    Returns
+    -------
+    tuple
+    """
+    if module.identifier is None:
+        return None
+    timestamp = module.timestamp
+    chart_ids: Optional[Tuple] = None
+    if charts:
+        chart_ids = (workflow_id,) + tuple(c.identifier for c in charts)
+    return (
+        'module',
+        project_id,
+        branch_id,
+        module.identifier,
+        module.state,
+        module.external_form,
+        timestamp.created_at,
+        timestamp.started_at,
+        timestamp.finished_at,
+        artifacts_key(artifacts) if artifacts is not None and not module.is_active else None,
+        chart_ids,
+        include_self
+    )
@@ -29,6 +29,7 @@ API_HOME = 'api.doc'
 BRANCH_CREATE = 'branch.create'
 BRANCH_DELETE = 'branch.delete'
 BRANCH_HEAD = 'branch.head'
+BRANCH_HEAD_EVENTS = 'branch.head.events'
 BRANCH_UPDATE = 'branch.update'
 
 # Dataset
@@ -64,6 +64,8 @@ STATE = 'state'
 CHARTS = 'charts'
 DATASETS = 'datasets'
 OUTPUTS = 'outputs'
+OUTPUT_SIZE = 'size'
+OUTPUT_TRUNCATED = 'truncated'
 PROVENANCE = 'provenance'
 ARTIFACTS = 'artifacts'
 
@@ -27,6 +27,7 @@ from vizier.viztrail.branch import BranchHandle
 from vizier.viztrail.module.base import ModuleHandle
 from vizier.viztrail.workflow import WorkflowHandle
 from vizier.api.routes.base import UrlFactory
+from vizier.api.serialize.cache import SerializationCache, module_key
 from vizier.view.chart import ChartViewHandle
 
 import vizier.api.serialize.base as serialize
@@ -41,7 +42,9 @@ def MODULE_HANDLE(
         urls: Optional[UrlFactory], 
         workflow: Optional[WorkflowHandle] = None, 
         charts: List[ChartViewHandle] = None, 
-        include_self: bool = True
+        include_self: bool = True,
+        artifacts: Optional[Dict[str, ArtifactDescriptor]] = None,
+        cache: Optional[SerializationCache] = None
     ) -> Dict[str, Any]:
     """Dictionary serialization for a handle in the workflow at the branch
     head.
@@ -49,6 +52,11 @@ def MODULE_HANDLE(
     The list of references will only contain a self referene if the include_self
     flag is True.
 
+    The database state after the module is computed from the workflow unless
+    it is given. If a cache is given the serialization is taken from the cache
+    if the module did not change. The result must not be modified in this
+    case.
+
     Parameters
     ----------
     project: vizier.engine.project.base.ProjectHandle
@@ -65,6 +73,10 @@ def MODULE_HANDLE(
         Factory for resource urls
     include_self: bool, optional
         Indicate if self link is included
+    artifacts: dict(vizier.datastore.artifact.ArtifactDescriptor), optional
+        Database state after the module
+    cache: vizier.api.serialize.cache.SerializationCache, optional
+        Cache for serialized modules
 
     Returns
     -------
@@ -73,6 +85,30 @@ def MODULE_HANDLE(
     project_id = project.identifier
     branch_id = branch.identifier if branch is not None else ""
     module_id = module.identifier
+    actual_workflow: Optional[WorkflowHandle] = None
+    if branch is not None:
+        actual_workflow = branch.get_head() if workflow is None else workflow
+        if artifacts is None and not module.is_active:
+            artifacts = dict()
+            for precursor in actual_workflow.modules:
+                artifacts = precursor.provenance.get_database_state(artifacts)
+                if precursor == module:
+                    break
+    key = None
+    if cache is not None:
+        key = module_key(
+            project_id=project_id,
+            branch_id=branch_id,
+            workflow_id=actual_workflow.identifier if actual_workflow is not None else None,
+            module=module,
+            artifacts=artifacts,
+            charts=charts,
+            include_self=include_self
+        )
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
     cmd = module.command
     timestamp = module.timestamp
     obj: Dict[str, Any] = {
@@ -120,15 +156,9 @@ def MODULE_HANDLE(
             ))
     if not timestamp.started_at is None:
         obj[labels.TIMESTAMPS][labels.STARTED_AT] = timestamp.started_at.isoformat()
-    if branch is not None:
+    if actual_workflow is not None:
         # Add outputs and datasets if module is not active.
-        actual_workflow = branch.get_head() if workflow is None else workflow
-        if not module.is_active:
-            artifacts: Dict[str, ArtifactDescriptor] = dict()
-            for precursor in actual_workflow.modules:
-                artifacts = precursor.provenance.get_database_state(artifacts)
-                if precursor == module:
-                    break
+        if artifacts is not None and not module.is_active:
             datasets = list()
             other_artifacts = list()
             for artifact_name in artifacts:
@@ -168,7 +198,11 @@ def MODULE_HANDLE(
                     available_charts.append(chart_serialized)
             obj[labels.DATASETS] = datasets
             obj[labels.CHARTS] = available_charts
-            obj[labels.OUTPUTS] = serialize.OUTPUTS(module.outputs)
+            obj[labels.OUTPUTS] = serialize.OUTPUTS(
+                module.outputs,
+                project_id=project_id,
+                urls=urls
+            )
             obj[labels.ARTIFACTS] = other_artifacts
             if not timestamp.finished_at is None:
                 obj[labels.TIMESTAMPS][labels.FINISHED_AT] = timestamp.finished_at.isoformat()
@@ -179,6 +213,8 @@ def MODULE_HANDLE(
             obj[labels.CHARTS] = list()
             obj[labels.OUTPUTS] = serialize.OUTPUTS(ModuleOutputs())
             obj[labels.ARTIFACTS] = list()
+    if cache is not None and key is not None:
+        cache.put(key, obj)
     return obj
 
 
@@ -17,13 +17,18 @@
 """This module contains helper methods for the webservice that are used to
 serialize workflow resources.
 """
-from typing import TYPE_CHECKING, Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
 if TYPE_CHECKING:
+    from vizier.engine.events import WorkflowEvent
     from vizier.engine.project.base import ProjectHandle
+    from vizier.view.chart import ChartViewHandle
     from vizier.viztrail.branch import BranchHandle
+    from vizier.viztrail.module.base import ModuleHandle
     from vizier.viztrail.workflow import WorkflowHandle, WorkflowDescriptor
 
 from vizier.api.routes.base import UrlFactory
+from vizier.api.serialize.cache import SerializationCache, module_key
+from vizier.datastore.artifact import ArtifactDescriptor
 import vizier.api.serialize.base as serialize
 import vizier.api.serialize.labels as labels
 import vizier.api.serialize.dataset as serialds
@@ -115,14 +120,71 @@ def WORKFLOW_DESCRIPTOR(
     return ret
 
 
+def WORKFLOW_EVENT(
+        project: "ProjectHandle",
+        branch: "BranchHandle",
+        event: "WorkflowEvent",
+        urls: Optional[UrlFactory],
+        charts: Optional[List["ChartViewHandle"]] = None,
+        cache: Optional[SerializationCache] = None
+    ) -> Dict[str, Any]:
+    """Dictionary serialization for a change in the workflow at the branch
+    head. Contains the identifier and state of the workflow. Module events in
+    addition contain the position and the serialization of the modified
+    module.
+
+    Parameters
+    ----------
+    project: vizier.engine.project.base.ProjectHandle
+        Handle for the containing project
+    branch : vizier.viztrail.branch.BranchHandle
+        Branch handle
+    event: vizier.engine.events.WorkflowEvent
+        Published event
+    urls: vizier.api.routes.base.UrlFactory
+        Factory for resource urls
+    charts: list(vizier.view.chart.ChartViewHandle), optional
+        List of handles for charts that are available for the module
+    cache: vizier.api.serialize.cache.SerializationCache, optional
+        Cache for serialized modules
+
+    Returns
+    -------
+    dict
+    """
+    workflow = event.workflow
+    obj: Dict[str, Any] = {
+        'type': event.event_type,
+        'workflow': workflow.identifier if workflow is not None else None,
+        'state': workflow.get_state().state if workflow is not None else -1
+    }
+    if event.module is not None and workflow is not None:
+        obj['position'] = workflow.modules.index(event.module)
+        obj['module'] = serialmd.MODULE_HANDLE(
+            project=project,
+            branch=branch,
+            workflow=workflow,
+            module=event.module,
+            charts=charts,
+            urls=urls,
+            cache=cache
+        )
+    return obj
+
+
 def WORKFLOW_HANDLE(
         project: "ProjectHandle", 
         branch: "BranchHandle", 
         workflow: "WorkflowHandle", 
-        urls: Optional[UrlFactory]
+        urls: Optional[UrlFactory],
+        cache: Optional[SerializationCache] = None
     ) -> Dict[str, Any]:
     """Dictionary serialization for a workflow handle.
 
+    If a cache is given, the serializations of the workflow, its modules and
+    its datasets are taken from the cache if they did not change. The result
+    must not be modified in this case.
+
     Parameters
     ----------
     project: vizier.engine.project.base.ProjectHandle
@@ -133,6 +195,8 @@ def WORKFLOW_HANDLE(
         Workflow handle
     urls: vizier.api.routes.base.UrlFactory
         Factory for resource urls
+    cache: vizier.api.serialize.cache.SerializationCache, optional
+        Cache for serialized resources
 
     Returns
     -------
@@ -143,36 +207,32 @@ def WORKFLOW_HANDLE(
     workflow_id = workflow.identifier
     descriptor = workflow.descriptor
     read_only = (branch.get_head().identifier != workflow_id)
+    contexts = MODULE_CONTEXTS(workflow)
+    key = None
+    if cache is not None:
+        key = WORKFLOW_HANDLE_KEY(project, branch, workflow, contexts=contexts)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
     # Create lists of module handles and dataset handles
     modules = list()
     datasets = dict()
-    dataset_names = list()
     dataobjects = dict()
-    charts = dict()
-    for m in workflow.modules:
-        if not m.provenance.charts is None:
-            for chart_name, chart in m.provenance.charts:
-                charts[chart_name] = chart
-        available_charts = list()
-        # Only include charts for modules that completed successful
+    for m, artifacts, available_charts in contexts:
         for artifact in m.artifacts:
             if artifact.is_dataset:
-                datasets[artifact.identifier] = serialds.DATASET_DESCRIPTOR(
+                datasets[artifact.identifier] = DATASET_DESCRIPTOR(
                     dataset=artifact,
                     project=project,
-                    urls=urls
+                    urls=urls,
+                    cache=cache
                 )
-                dataset_names.append(artifact.name)
             else:
                 dataobjects[artifact.identifier] = serialds.ARTIFACT_DESCRIPTOR(
                     artifact=artifact,
                     project=project,
                     urls=urls
                 )
-        if m.is_success:
-            for c_handle in list(charts.values()):
-                if c_handle.dataset_name in dataset_names:
-                    available_charts.append(c_handle)
         modules.append(
             serialmd.MODULE_HANDLE(
                 project=project,
@@ -181,7 +241,9 @@ def WORKFLOW_HANDLE(
                 module=m,
                 charts=available_charts,
                 urls=urls,
-                include_self=(not read_only)
+                include_self=(not read_only),
+                artifacts=artifacts,
+                cache=cache
             )
         )
     handle_links: Optional[Dict[str,Optional[str]]] = None
@@ -201,7 +263,7 @@ def WORKFLOW_HANDLE(
                     urls=urls,
                     links=handle_links
                 )}
-    return {
+    obj = {
         'id': workflow_id,
         'createdAt': descriptor.created_at.isoformat(),
         'action': descriptor.action,
@@ -214,6 +276,144 @@ def WORKFLOW_HANDLE(
         'readOnly': read_only,
         **links
     }
+    if cache is not None and key is not None:
+        cache.put(key, obj)
+    return obj
+
+
+def WORKFLOW_HANDLE_KEY(
+        project: "ProjectHandle",
+        branch: "BranchHandle",
+        workflow: "WorkflowHandle",
+        contexts: Optional[List[Tuple["ModuleHandle", Dict[str, ArtifactDescriptor], List["ChartViewHandle"]]]] = None
+    ) -> Tuple:
+    """Get the cache key for the serialization of a workflow handle. The key
+    is also used to compute the entity tag for the workflow handle.
+
+    Parameters
+    ----------
+    project: vizier.engine.project.base.ProjectHandle
+        Handle for the containing project
+    branch : vizier.viztrail.branch.BranchHandle
+        Branch handle
+    workflow: vizier.viztrail.workflow.WorkflowHandle
+        Workflow handle
+    contexts: list, optional
+        Result of MODULE_CONTEXTS for the workflow
+
+    Returns
+    -------
+    tuple
+    """
+    project_id = project.identifier
+    branch_id = branch.identifier
+    read_only = (branch.get_head().identifier != workflow.identifier)
+    if contexts is None:
+        contexts = MODULE_CONTEXTS(workflow)
+    modules = list()
+    for m, artifacts, charts in contexts:
+        modules.append((
+            module_key(
+                project_id=project_id,
+                branch_id=branch_id,
+                workflow_id=workflow.identifier,
+                module=m,
+                artifacts=artifacts,
+                charts=charts,
+                include_self=(not read_only)
+            ),
+            tuple((a.name, a.identifier) for a in m.artifacts)
+        ))
+    return (
+        'workflow',
+        project_id,
+        branch_id,
+        workflow.identifier,
+        read_only,
+        tuple(modules)
+    )
+
+
+def MODULE_CONTEXTS(
+        workflow: "WorkflowHandle"
+    ) -> List[Tuple["ModuleHandle", Dict[str, ArtifactDescriptor], List["ChartViewHandle"]]]:
+    """Get the database state after each module in a workflow together with
+    the list of charts that are available for the module. Charts are only
+    available for modules that completed successfully.
+
+    Parameters
+    ----------
+    workflow: vizier.viztrail.workflow.WorkflowHandle
+        Workflow handle
+
+    Returns
+    -------
+    list((vizier.viztrail.module.base.ModuleHandle, dict, list))
+    """
+    result = list()
+    artifacts: Dict[str, ArtifactDescriptor] = dict()
+    dataset_names = list()
+    charts = dict()
+    for m in workflow.modules:
+        artifacts = m.provenance.get_database_state(artifacts)
+        if not m.provenance.charts is None:
+            for chart_name, chart in m.provenance.charts:
+                charts[chart_name] = chart
+        for artifact in m.artifacts:
+            if artifact.is_dataset:
+                dataset_names.append(artifact.name)
+        available_charts = list()
+        if m.is_success:
+            for c_handle in list(charts.values()):
+                if c_handle.dataset_name in dataset_names:
+                    available_charts.append(c_handle)
+        result.append((m, artifacts, available_charts))
+    return result
+
+
+def DATASET_DESCRIPTOR(
+        dataset: ArtifactDescriptor,
+        project: "ProjectHandle",
+        urls: Optional[UrlFactory],
+        cache: Optional[SerializationCache] = None
+    ) -> Dict[str, Any]:
+    """Dictionary serialization for a dataset in a workflow handle. Datasets
+    are immutable. If a cache is given the serialization is therefore taken
+    from the cache if the dataset was serialized before.
+
+    Parameters
+    ----------
+    dataset: vizier.datastore.dataset.DatasetDescriptor
+        Dataset descriptor
+    project: vizier.engine.project.base.ProjectHandle
+        Handle for the containing project
+    urls: vizier.api.routes.base.UrlFactory
+        Factory for resource urls
+    cache: vizier.api.serialize.cache.SerializationCache, optional
+        Cache for serialized resources
+
+    Returns
+    -------
+    dict
+    """
+    if cache is None:
+        return serialds.DATASET_DESCRIPTOR(
+            dataset=dataset,
+            project=project,
+            urls=urls
+        )
+    key = ('dataset', project.identifier, dataset.identifier, dataset.name)
+    obj = cache.get(key)
+    if obj is None:
+        obj = cache.put(
+            key,
+            serialds.DATASET_DESCRIPTOR(
+                dataset=dataset,
+                project=project,
+                urls=urls
+            )
+        )
+    return obj
 
 
 def WORKFLOW_HANDLE_LINKS(
@@ -257,6 +457,10 @@ def WORKFLOW_HANDLE_LINKS(
         project_id=project_id,
         branch_id=branch_id
     )
+    links[ref.BRANCH_HEAD_EVENTS] = urls.get_branch_head_events(
+        project_id=project_id,
+        branch_id=branch_id
+    )
     links[ref.WORKFLOW_PROJECT] = urls.get_project(project_id)
     links[ref.FILE_UPLOAD] = urls.upload_file(project_id)
     # Only include self reference if workflow identifier is given
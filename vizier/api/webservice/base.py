@@ -41,7 +41,8 @@ from vizier.api.routes.container import ContainerEngineUrlFactory
 from vizier.config.app import AppConfig
 from vizier.config.celery import config_routes
 from vizier.core import VERSION_INFO
-from vizier.core.io.base import DefaultObjectStore
+from vizier.core.io.base import DefaultObjectStore, ObjectStore
+from vizier.core.io.sqlite import SQLiteObjectStore, DEFAULT_DATABASE_FILE
 from vizier.core.timestamp import get_current_time
 from vizier.core.util import get_short_identifier, get_unique_identifier
 from vizier.datastore.factory import DatastoreFactory
@@ -53,6 +54,7 @@ from vizier.engine.backend.remote.celery.base import CeleryBackend
 from vizier.engine.backend.remote.container import ContainerBackend
 from vizier.engine.backend.synchron import SynchronousTaskEngine
 from vizier.engine.base import VizierEngine
+from vizier.engine.locks import LockManager
 from vizier.engine.packages.load import load_packages
 from vizier.engine.task.processor import TaskProcessor
 from vizier.engine.project.cache.base import ProjectCache
@@ -118,7 +120,8 @@ class VizierApi(object):
         )
         self.branches = VizierBranchApi(
             projects=self.engine.projects,
-            urls=self.urls
+            urls=self.urls,
+            locks=self.engine.locks
         )
         self.datasets = VizierDatastoreApi(
             projects=self.engine.projects,
@@ -219,22 +222,32 @@ def get_engine(config: AppConfig) -> VizierEngine:
     if backend_id not in base.BACKENDS:
         raise ValueError('unknown backend \'' + str(backend_id) + '\'')
     # Get the identifier factory for the viztrails repository and create
-    # the object store. At this point we use the default object store only.
-    # We could add another environment variable to use different object
-    # stores (once implemented).
+    # the object store. The viztrails repository either keeps objects as
+    # files (default) or in a SQLite database in the data directory.
     if config.engine.use_short_ids:
         id_factory = get_short_identifier
     else:
         id_factory = get_unique_identifier
-    object_store = DefaultObjectStore(
-        identifier_factory=id_factory
-    )
+    base_dir = config.engine.data_dir
+    object_store: ObjectStore
+    if config.engine.object_store == base.OBJECT_STORE_SQLITE:
+        object_store = SQLiteObjectStore(
+            database=os.path.join(base_dir, DEFAULT_DATABASE_FILE),
+            identifier_factory=id_factory
+        )
+    elif config.engine.object_store == base.OBJECT_STORE_FS:
+        object_store = DefaultObjectStore(
+            identifier_factory=id_factory
+        )
+    else:
+        raise ValueError('unknown object store \'' + str(config.engine.object_store) + '\'')
     # Create index of supported packages
     packages = load_packages(config.engine.package_path)
+    # Project and branch locks are shared by the engine and the project cache
+    locks = LockManager()
     # By default the vizier engine uses the objectstore implementation for
     # the viztrails repository. The datastore and filestore factories depend
     # on the values of engine identifier (DEV or MIMIR).
-    base_dir = config.engine.data_dir
     # Create the local viztrails repository
     viztrails = OSViztrailRepository(
         base_path=os.path.join(base_dir, app.DEFAULT_VIZTRAILS_DIR),
@@ -246,7 +259,13 @@ def get_engine(config: AppConfig) -> VizierEngine:
         filestore_factory=FileSystemFilestoreFactory(filestores_dir)
         datastore_factory: DatastoreFactory
         if config.engine.identifier == base.DEV_ENGINE:
-            datastore_factory = FileSystemDatastoreFactory(datastores_dir)
+            datastore_factory = FileSystemDatastoreFactory(
+                datastores_dir,
+                data_format=config.engine.datastore.format,
+                max_delta_chain=config.engine.datastore.max_delta_chain,
+                profiler=config.engine.datastore.profiler,
+                profiler_sample=config.engine.datastore.profiler_sample
+            )
         elif config.engine.identifier == base.HISTORE_ENGINE:
             import vizier.datastore.histore.factory as histore
             datastore_factory = histore.HistoreDatastoreFactory(datastores_dir)
@@ -256,7 +275,10 @@ def get_engine(config: AppConfig) -> VizierEngine:
         projects: ProjectCache = CommonProjectCache(
             datastores=datastore_factory,
             filestores=filestore_factory,
-            viztrails=viztrails
+            viztrails=viztrails,
+            max_projects=config.engine.project_cache.max_projects,
+            max_modules=config.engine.project_cache.max_modules,
+            locks=locks
         )
         # Get set of task processors for supported packages
         processors = load_processors(config.engine.processor_path)
@@ -281,7 +303,8 @@ def get_engine(config: AppConfig) -> VizierEngine:
             backend = MultiProcessBackend(
                 processors=processors,
                 projects=projects,
-                synchronous=synchronous
+                synchronous=synchronous,
+                processes=config.engine.backend.multiprocess.workers
             )
         elif backend_id == base.BACKEND_CELERY:
             # Create and configure routing information (if given)
@@ -312,7 +335,8 @@ def get_engine(config: AppConfig) -> VizierEngine:
         name=config.engine.identifier + ' (' + backend_id + ')',
         projects=projects,
         backend=backend,
-        packages=packages
+        packages=packages,
+        locks=locks
     )
 
 
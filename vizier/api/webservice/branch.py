@@ -18,8 +18,12 @@
 project branches.
 """
 
+from contextlib import ExitStack
+from typing import Optional
+
 from vizier.api.base import validate_name
 from vizier.viztrail.branch import BranchProvenance
+from vizier.engine.locks import LockManager
 from vizier.engine.project.cache.base import ProjectCache
 from vizier.api.routes.base import UrlFactory
 
@@ -31,7 +35,8 @@ class VizierBranchApi(object):
     """
     def __init__(self, 
             projects: ProjectCache, 
-            urls: UrlFactory
+            urls: UrlFactory,
+            locks: Optional[LockManager] = None
         ):
         """Initialize the API components.
 
@@ -41,9 +46,12 @@ class VizierBranchApi(object):
             Cache for project handles
         urls: vizier.api.routes.base.UrlFactory
             Factory for resource urls
+        locks: vizier.engine.locks.LockManager, optional
+            Project and branch locks of the workflow engine
         """
         self.projects = projects
         self.urls = urls
+        self.locks = locks if locks is not None else LockManager()
 
     def create_branch(
         self, project_id, branch_id=None, workflow_id=None, module_id=None,
@@ -80,38 +88,45 @@ class VizierBranchApi(object):
         project = self.projects.get_project(project_id)
         if project is None:
             return None
-        if branch_id is None and workflow_id is None and module_id is None:
-            # Create an empty branch if the branch point is not specified
-            branch = project.viztrail.create_branch(properties=properties)
-        else:
-            # Ensure that the branch point exist and get the index position of
-            # the source module
-            source_branch = project.viztrail.get_branch(branch_id)
-            if source_branch is None:
-                raise ValueError('unknown source branch \'' + str(branch_id) + '\'')
-            workflow = source_branch.get_workflow(workflow_id)
-            if workflow is None:
-                raise ValueError('unknown workflow \'' + str(workflow_id) + '\'')
-            module_index = -1
-            for i in range(len(workflow.modules)):
-                module = workflow.modules[i]
-                if module.identifier == module_id:
-                    module_index = i
-                    break
-            if module_index == -1:
-                raise ValueError('unknown module \'' + str(module_id) + '\'')
-            modules = [m.identifier for m in workflow.modules[:module_index+1]]
-            # Create a new branch that contains all source modules including
-            # the specified one.
-            branch = project.viztrail.create_branch(
-                provenance=BranchProvenance(
-                    source_branch=source_branch.identifier,
-                    workflow_id=workflow_id,
-                    module_id=module_id
-                ),
-                properties=properties,
-                modules=modules
-            )
+        # Hold the project lock while the branch index is modified. The lock
+        # of the source branch prevents changes to the branch point while the
+        # modules are copied.
+        with ExitStack() as stack:
+            stack.enter_context(self.locks.project(project_id))
+            if branch_id is not None:
+                stack.enter_context(self.locks.branch(project_id, branch_id))
+            if branch_id is None and workflow_id is None and module_id is None:
+                # Create an empty branch if the branch point is not specified
+                branch = project.viztrail.create_branch(properties=properties)
+            else:
+                # Ensure that the branch point exist and get the index position of
+                # the source module
+                source_branch = project.viztrail.get_branch(branch_id)
+                if source_branch is None:
+                    raise ValueError('unknown source branch \'' + str(branch_id) + '\'')
+                workflow = source_branch.get_workflow(workflow_id)
+                if workflow is None:
+                    raise ValueError('unknown workflow \'' + str(workflow_id) + '\'')
+                module_index = -1
+                for i in range(len(workflow.modules)):
+                    module = workflow.modules[i]
+                    if module.identifier == module_id:
+                        module_index = i
+                        break
+                if module_index == -1:
+                    raise ValueError('unknown module \'' + str(module_id) + '\'')
+                modules = [m.identifier for m in workflow.modules[:module_index+1]]
+                # Create a new branch that contains all source modules including
+                # the specified one.
+                branch = project.viztrail.create_branch(
+                    provenance=BranchProvenance(
+                        source_branch=source_branch.identifier,
+                        workflow_id=workflow_id,
+                        module_id=module_id
+                    ),
+                    properties=properties,
+                    modules=modules
+                )
         return serialize.BRANCH_DESCRIPTOR(
             branch=branch,
             project=project,
@@ -143,8 +158,10 @@ class VizierBranchApi(object):
         if project is None:
             return False
         # Delete viztrail branch. The result indicates if the branch existed
-        # or not.
-        return project.viztrail.delete_branch(branch_id=branch_id)
+        # or not. Do not delete the branch while its workflow is modified.
+        with self.locks.project(project_id):
+            with self.locks.branch(project_id, branch_id):
+                return project.viztrail.delete_branch(branch_id=branch_id)
 
     def get_branch(self, project_id, branch_id):
         """Retrieve a branch from a given project.
@@ -21,9 +21,7 @@ the Vizier Container Web API that are documented in
 http://cds-swg1.cims.nyu.edu/doc/vizier-db-container/.
 """
 
-import csv
 import os
-import io
 
 from flask import Flask, jsonify, make_response, request, send_file
 from flask_cors import CORS # type: ignore[import]
@@ -31,6 +29,7 @@ from werkzeug.utils import secure_filename
 
 from vizier.api.routes.base import PAGE_LIMIT, PAGE_OFFSET
 from vizier.api.webservice.container.base import VizierContainerApi
+from vizier.api.webservice.download import csv_response
 from vizier.config.container import ContainerConfig
 from vizier.viztrail.command import ModuleCommand
 
@@ -278,18 +277,8 @@ def download_dataset(dataset_id):
     _, dataset = api.datasets.get_dataset_handle(config.project_id, dataset_id)
     if dataset is None:
         raise srv.ResourceNotFound('unknown dataset \'' + dataset_id + '\'')
-    # Read the dataset into a string buffer in memory
-    si = io.StringIO()
-    cw = csv.writer(si)
-    cw.writerow([col.name for col in dataset.columns])
-    with dataset.reader() as reader:
-        for row in reader:
-            cw.writerow(row.values)
-    # Return the CSV file file
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = "attachment; filename=export.csv"
-    output.headers["Content-type"] = "text/csv"
-    return output
+    # Stream the dataset in CSV format
+    return csv_response(dataset, filename='export.csv')
 
 
 # ------------------------------------------------------------------------------
@@ -0,0 +1,240 @@
+# Copyright (C) 2017-2019 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming download of datasets in CSV format. The CSV file is generated
+from the dataset reader in chunks of fixed size while the response is sent to
+the client. The server therefore never holds more than a single chunk of the
+file in memory.
+
+Responses are gzip-compressed if the client accepts the gzip content encoding.
+Downloads can be resumed using single byte ranges. Datasets are immutable.
+The dataset identifier is therefore used as the entity tag for the response.
+Compressed responses have a different entity tag than uncompressed ones.
+"""
+
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+
+import csv
+import io
+import tempfile
+import zlib
+
+from flask import Response, request
+
+from vizier.datastore.dataset import DatasetHandle
+
+
+"""Size (in characters) of the chunks of the generated CSV file."""
+CSV_CHUNK_SIZE = 64 * 1024
+
+
+def csv_chunks(
+        dataset: DatasetHandle,
+        chunk_size: int = CSV_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+    """Generate the UTF-8 encoded CSV file for the given dataset in chunks.
+    The first row of the file contains the column names.
+
+    Parameters
+    ----------
+    dataset: vizier.datastore.dataset.DatasetHandle
+        Handle for the downloaded dataset
+    chunk_size: int, optional
+        Minimal number of characters in each chunk (except the last one)
+
+    Returns
+    -------
+    iterator(bytes)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([col.name for col in dataset.columns])
+    with dataset.reader() as reader:
+        for row in reader:
+            writer.writerow(row.values)
+            if buffer.tell() >= chunk_size:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+    if buffer.tell() > 0:
+        yield buffer.getvalue().encode('utf-8')
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a sequence of chunks using gzip.
+
+    Parameters
+    ----------
+    chunks: iterable(bytes)
+        Uncompressed data
+
+    Returns
+    -------
+    iterator(bytes)
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def file_range(
+        f: BinaryIO,
+        start: int,
+        end: int,
+        chunk_size: int = CSV_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+    """Read the bytes from position start to end (inclusive) from a file in
+    chunks.
+
+    Parameters
+    ----------
+    f: file object
+        Input file
+    start: int
+        Position of the first byte in the range
+    end: int
+        Position of the last byte in the range
+    chunk_size: int, optional
+        Maximal number of bytes in each chunk
+
+    Returns
+    -------
+    iterator(bytes)
+    """
+    f.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        data = f.read(min(chunk_size, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+        yield data
+
+
+def parse_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """Parse the value of a Range request header. Only single byte ranges are
+    supported. The result is None if the header is missing or cannot be
+    handled, i.e., if the full content should be returned. Raises ValueError if
+    the range is not satisfiable.
+
+    Parameters
+    ----------
+    header: string
+        Value of the Range header
+    length: int
+        Length of the full content in bytes
+
+    Returns
+    -------
+    (int, int)
+    """
+    if header is None:
+        return None
+    unit, _, ranges = header.partition('=')
+    if unit.strip() != 'bytes' or ',' in ranges:
+        return None
+    first, _, last = [val.strip() for val in ranges.partition('-')]
+    for val in [first, last]:
+        if val != '' and not val.isdigit():
+            return None
+    if first == '':
+        if last == '':
+            return None
+        # Suffix range containing the last bytes of the content
+        suffix = int(last)
+        if suffix == 0 or length == 0:
+            raise ValueError('unsatisfiable range')
+        return max(length - suffix, 0), length - 1
+    start = int(first)
+    if last != '' and start > int(last):
+        return None
+    if start >= length:
+        raise ValueError('unsatisfiable range')
+    end = int(last) if last != '' else length - 1
+    return start, min(end, length - 1)
+
+
+def csv_response(dataset: DatasetHandle, filename: str) -> Response:
+    """Get a streaming response for downloading the given dataset in CSV
+    format for the current request.
+
+    A request that contains a single byte range returns the respective part
+    of the (uncompressed) file. To set the Content-Range header the length of
+    the file is computed first by generating the whole file into a temporary
+    file that the range is then read from. Otherwise, the file is
+    gzip-compressed if the client accepts the gzip encoding.
+
+    Parameters
+    ----------
+    dataset: vizier.datastore.dataset.DatasetHandle
+        Handle for the downloaded dataset
+    filename: string
+        Name of the downloaded file
+
+    Returns
+    -------
+    flask.Response
+    """
+    # Byte ranges always refer to the uncompressed file.
+    etag = '"{}"'.format(dataset.identifier)
+    headers = {
+        'Content-Disposition': 'attachment; filename={}'.format(filename),
+        'Accept-Ranges': 'bytes',
+        'ETag': etag,
+        'Vary': 'Accept-Encoding'
+    }
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header is not None and (if_range is None or if_range == etag):
+        f = tempfile.TemporaryFile()
+        try:
+            for chunk in csv_chunks(dataset):
+                f.write(chunk)
+        except Exception:
+            f.close()
+            raise
+        length = f.tell()
+        try:
+            content_range = parse_range(range_header, length)
+        except ValueError:
+            f.close()
+            headers['Content-Range'] = 'bytes */{}'.format(length)
+            return Response(status=416, headers=headers)
+        if content_range is not None:
+            start, end = content_range
+            headers['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, length)
+            headers['Content-Length'] = str(end - start + 1)
+            response = Response(
+                file_range(f, start, end),
+                status=206,
+                mimetype='text/csv',
+                headers=headers
+            )
+            response.call_on_close(f.close)
+            return response
+        f.close()
+    if 'gzip' in request.accept_encodings:
+        headers['Content-Encoding'] = 'gzip'
+        headers['ETag'] = '"{}-gzip"'.format(dataset.identifier)
+        return Response(
+            gzip_chunks(csv_chunks(dataset)),
+            mimetype='text/csv',
+            headers=headers
+        )
+    return Response(csv_chunks(dataset), mimetype='text/csv', headers=headers)
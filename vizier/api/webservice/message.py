@@ -107,6 +107,24 @@ def UNKNOWN_MODULE(project_id, branch_id, module_id):
     return msg.format(module_id, branch_id, project_id)
 
 
+def UNKNOWN_OUTPUT(project_id, output_id):
+    """Error message for requests that access stored module outputs.
+
+    Parameters
+    ----------
+    project_id: string
+        Unique project identifier.
+    output_id: string
+        Unique output identifier.
+
+    Returns
+    -------
+    string
+    """
+    msg = "unknown output '{}' or project '{}'"
+    return msg.format(output_id, project_id)
+
+
 def UNKNOWN_WORKFLOW(project_id, branch_id, workflow_id):
     """Error message for requests that access workflows.
 
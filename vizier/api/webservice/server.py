@@ -19,18 +19,19 @@ for the Vizier Web API as documented in:
 
     http://cds-swg1.cims.nyu.edu/vizier/api/v1/doc/
 """
-from typing import Optional
+from typing import Any, Callable, Dict, Optional
 
-import csv
 import os
 import io
 import traceback
 
-from flask import Blueprint, Response, jsonify, make_response, request, send_file, send_from_directory
+from flask import Blueprint, Response, jsonify, request, send_file, send_from_directory
 from werkzeug.utils import secure_filename
 
 from vizier.api.routes.base import PAGE_LIMIT, PAGE_OFFSET, FORCE_PROFILER
+from vizier.api.routes.base import CHART_POINTS
 from vizier.api.webservice.base import VizierApi
+from vizier.api.webservice.download import csv_response
 from vizier.config.app import AppConfig
 
 import vizier.api.base as srv
@@ -396,11 +397,14 @@ def update_branch(project_id, branch_id):
 @bp.route('/projects/<string:project_id>/branches/<string:branch_id>/head')
 def get_branch_head(project_id, branch_id):
     """Get handle for a workflow at the HEAD of a given project branch."""
-    # Get the workflow handle. The result is None if the project, branch or
-    # workflow do not exist.
-    workflow = api.workflows.get_workflow(project_id=project_id, branch_id=branch_id)
-    if workflow is not None:
-        return jsonify(workflow)
+    # Get the entity tag for the workflow handle. The result is None if the
+    # project, branch or workflow do not exist.
+    etag = api.workflows.get_workflow_etag(project_id=project_id, branch_id=branch_id)
+    if etag is not None:
+        return conditional_json(
+            etag,
+            lambda: api.workflows.get_workflow(project_id=project_id, branch_id=branch_id)
+        )
     raise srv.ResourceNotFound(msg.UNKNOWN_BRANCH(project_id, branch_id))
 
 
@@ -444,6 +448,25 @@ def append_branch_head(project_id, branch_id):
     raise srv.ResourceNotFound(msg.UNKNOWN_BRANCH(project_id, branch_id))
 
 
+@bp.route('/projects/<string:project_id>/branches/<string:branch_id>/head/events')
+def get_branch_head_events(project_id, branch_id):
+    """Stream server-sent events for changes to the workflow at the HEAD of a
+    given project branch.
+    """
+    # The result is None if the project or branch do not exist.
+    events = api.workflows.get_workflow_events(
+        project_id=project_id,
+        branch_id=branch_id
+    )
+    if events is not None:
+        return Response(
+            events,
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    raise srv.ResourceNotFound(msg.UNKNOWN_BRANCH(project_id, branch_id))
+
+
 @bp.route(
     '/projects/<string:project_id>/branches/<string:branch_id>/head/cancel',
     methods=['POST']
@@ -466,15 +489,22 @@ def cancel_workflow(project_id, branch_id):
 @bp.route('/projects/<string:project_id>/branches/<string:branch_id>/workflows/<string:workflow_id>')  # noqa: E501
 def get_workflow(project_id, branch_id, workflow_id):
     """Get handle for a workflow in a given project branch."""
-    # Get the workflow handle. The result is None if the project, branch or
-    # workflow do not exist.
-    workflow = api.workflows.get_workflow(
+    # Get the entity tag for the workflow handle. The result is None if the
+    # project, branch or workflow do not exist.
+    etag = api.workflows.get_workflow_etag(
         project_id=project_id,
         branch_id=branch_id,
         workflow_id=workflow_id
     )
-    if workflow is not None:
-        return jsonify(workflow)
+    if etag is not None:
+        return conditional_json(
+            etag,
+            lambda: api.workflows.get_workflow(
+                project_id=project_id,
+                branch_id=branch_id,
+                workflow_id=workflow_id
+            )
+        )
     raise srv.ResourceNotFound(
         msg.UNKNOWN_WORKFLOW(project_id, branch_id, workflow_id)
     )
@@ -484,20 +514,52 @@ def get_workflow(project_id, branch_id, workflow_id):
 def get_workflow_module(project_id, branch_id, module_id):
     """Get handle for a module in the head workflow of a given project branch.
     """
-    # Get the workflow handle. The result is None if the project, branch or
-    # workflow do not exist.
-    module = api.workflows.get_workflow_module(
+    # Get the entity tag for the module handle. The result is None if the
+    # project, branch or module do not exist.
+    etag = api.workflows.get_workflow_module_etag(
         project_id=project_id,
         branch_id=branch_id,
         module_id=module_id
     )
-    if module is not None:
-        return jsonify(module)
+    if etag is not None:
+        return conditional_json(
+            etag,
+            lambda: api.workflows.get_workflow_module(
+                project_id=project_id,
+                branch_id=branch_id,
+                module_id=module_id
+            )
+        )
     raise srv.ResourceNotFound(
         msg.UNKNOWN_MODULE(project_id, branch_id, module_id)
     )
 
 
+@bp.route('/projects/<string:project_id>/outputs/<string:output_id>')
+def get_module_output(project_id, output_id):
+    """Get the full value of a module output that is stored separately from
+    its module. Output values are immutable (the identifier is the hash of the
+    value) and the identifier therefore serves as the entity tag.
+    """
+    if api.projects.projects.get_project(project_id) is None:
+        raise srv.ResourceNotFound(msg.UNKNOWN_PROJECT(project_id))
+
+    def get_output():
+        # Only read the (potentially large) output value if the client does
+        # not already have a copy.
+        result = api.workflows.get_module_output(
+            project_id=project_id,
+            output_id=output_id
+        )
+        if result is None:
+            raise srv.ResourceNotFound(
+                msg.UNKNOWN_OUTPUT(project_id, output_id)
+            )
+        return result
+
+    return conditional_json(output_id, get_output)
+
+
 @bp.route(
     '/projects/<string:project_id>/branches/<string:branch_id>/head/modules/<string:module_id>',   # noqa: E501
     methods=['DELETE']
@@ -616,7 +678,10 @@ def query_workflow_head(project_id, branch_id):
     query = request.args.get('query', None)
     if query is None: 
         query = request.data.decode()
-    result = api.workflows.query_workflow(query, project_id, branch_id)
+    try:
+        result = api.workflows.query_workflow(query, project_id, branch_id)
+    except ValueError as ex:
+        raise srv.InvalidRequest(str(ex))
     return result
 
 # ------------------------------------------------------------------------------
@@ -808,18 +873,8 @@ def download_dataset(project_id, dataset_id):
     _, dataset = api.datasets.get_dataset_handle(project_id, dataset_id)
     if dataset is None:
         raise srv.ResourceNotFound(msg.UNKNOWN_DATASET(project_id, dataset_id))
-    # Read the dataset into a string buffer in memory
-    si = io.StringIO()
-    cw = csv.writer(si)
-    cw.writerow([col.name for col in dataset.columns])
-    with dataset.reader() as reader:
-        for row in reader:
-            cw.writerow(row.values)
-    # Return the CSV file file
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = "attachment; filename={}.csv".format(dataset_id)
-    output.headers["Content-type"] = "text/csv"
-    return output
+    # Stream the dataset in CSV format
+    return csv_response(dataset, filename="{}.csv".format(dataset_id))
 
 
 # ------------------------------------------------------------------------------
@@ -829,15 +884,20 @@ def download_dataset(project_id, dataset_id):
 def get_dataset_chart_view(
     project_id, branch_id, workflow_id, module_id, chart_id
 ):
-    """Get content of a dataset chart view for a given workflow module.
+    """Get content of a dataset chart view for a given workflow module. The
+    optional points parameter limits the number of points in the chart data.
     """
+    max_points = request.args.get(CHART_POINTS, type=int)
+    if max_points is not None and max_points <= 0:
+        raise srv.InvalidRequest("Invalid number of points {}".format(max_points))
     try:
         view = api.views.get_dataset_chart_view(
             project_id=project_id,
             branch_id=branch_id,
             workflow_id=workflow_id,
             module_id=module_id,
-            chart_id=chart_id
+            chart_id=chart_id,
+            max_points=max_points
         )
     except ValueError as ex:
         raise srv.InvalidRequest(str(ex))
@@ -917,3 +977,40 @@ def static_files(path):
         return send_from_directory(webui_file_dir, path)
     else:
         return send_from_directory(webui_file_dir, 'index.html')
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def conditional_json(
+        etag: str,
+        get_document: Callable[[], Optional[Dict[str, Any]]]
+    ) -> Response:
+    """Get a Json response for a resource with the given entity tag. If the
+    tag matches the If-None-Match header of the request the response has
+    status 304 (Not Modified) and the resource is not serialized.
+
+    Parameters
+    ----------
+    etag: string
+        Entity tag for the current version of the resource
+    get_document: callable
+        Function that returns the serialized resource
+
+    Returns
+    -------
+    flask.Response
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        document = get_document()
+        if document is None:
+            # The resource was deleted after the entity tag was computed.
+            raise srv.ResourceNotFound('unknown resource')
+        response = jsonify(document)
+    response.set_etag(etag)
+    # Clients have to revalidate the resource for every request.
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -16,7 +16,10 @@
 
 """Query workflow states to get results for a dataset chart view."""
 
-from vizier.engine.packages.plot.query import ChartQuery
+from typing import Optional
+
+from vizier.api.serialize.cache import SerializationCache, chart_key
+from vizier.engine.packages.plot.query import ChartQuery, DEFAULT_MAX_POINTS
 from vizier.viztrail.module.output import CHART_VIEW_DATA
 
 import vizier.api.serialize.view as serialize
@@ -24,30 +27,50 @@ from vizier.engine.project.cache.base import ProjectCache
 from vizier.api.routes.base import UrlFactory
 
 
+"""Default maximum number of cached chart query results."""
+DEFAULT_CHART_CACHE_SIZE = 100
+
+
 class VizierDatasetViewApi(object):
     """The vizier dataset view API implements the methods that query a vizier
     workflow module state to get the results for a dataset chart view.
     """
     def __init__(self, 
             projects: ProjectCache, 
-            urls: UrlFactory
+            urls: UrlFactory,
+            cache: Optional[SerializationCache] = None
         ):
         """Initialize the API components.
 
+        Chart query results are cached by the dataset identifier and the
+        chart definition. Datasets are immutable. Cached results therefore
+        never become invalid.
+
         Parameters
         ----------
         projects: vizier.engine.project.cache.base.ProjectCache
             Cache for project handles
         urls: vizier.api.routes.base.UrlFactory
             Factory for resource urls
+        cache: vizier.api.serialize.cache.SerializationCache, optional
+            Cache for chart query results
         """
         self.projects = projects
         self.urls = urls
+        self.cache = cache if cache is not None else SerializationCache(
+            capacity=DEFAULT_CHART_CACHE_SIZE
+        )
 
-    def get_dataset_chart_view(self, project_id, branch_id, workflow_id, module_id, chart_id):
+    def get_dataset_chart_view(self,
+            project_id, branch_id, workflow_id, module_id, chart_id,
+            max_points: Optional[int] = None
+        ):
         """Get chart view data for a given workflow module. Returns None if
         either of the specified resources does not exist.
 
+        The chart data is reduced to at most max_points points. If no point
+        budget is given the default budget is used.
+
         Raises a ValueError if the chart exists but the specified datasets does
         not exist in the workflow module.
 
@@ -63,6 +86,8 @@ class VizierDatasetViewApi(object):
             Unique module identifier
         chart_id: string
             Unique chart identifier
+        max_points: int, optional
+            Maximum number of points in the chart data
 
         Returns
         -------
@@ -110,13 +135,24 @@ class VizierDatasetViewApi(object):
         # can take the result directly from the module output.
         if not chart.dataset_name in datasets:
             raise ValueError('unknown dataset \'' + chart.dataset_name + '\'')
+        # The module output contains the chart data for the default point
+        # budget.
         module_charts = [c[0] for c in module.provenance.charts]
-        if not module.provenance.charts is None and chart.chart_name in module_charts:
+        if max_points is None:
+            max_points = DEFAULT_MAX_POINTS
+        if not module.provenance.charts is None and chart.chart_name in module_charts and max_points == DEFAULT_MAX_POINTS:
             data = module.outputs.stdout[0].value
         else:
             dataset_id = datasets[chart.dataset_name]
-            dataset = project.datastore.get_dataset(dataset_id)
-            (rows, caveats) = ChartQuery.exec_query(dataset=dataset, view=chart)
+            key = chart_key(dataset_id=dataset_id, view=chart, max_points=max_points)
+            result = self.cache.get(key)
+            if result is None:
+                dataset = project.datastore.get_dataset(dataset_id)
+                result = self.cache.put(
+                    key,
+                    ChartQuery.exec_query(dataset=dataset, view=chart, max_points=max_points)
+                )
+            (rows, caveats) = result
             data = CHART_VIEW_DATA(view=chart, rows=rows, caveats=caveats)
         return serialize.CHART_VIEW(
             project_id=project_id,
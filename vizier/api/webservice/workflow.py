@@ -17,17 +17,31 @@
 """Vizier Workflow API - Implements all methods of the API to interact with
 workflows in vizier projects.
 """
-from typing import TYPE_CHECKING, List, Optional, Dict, Any
+from typing import TYPE_CHECKING, Iterator, List, Optional, Dict, Any
 if TYPE_CHECKING:
+    from vizier.engine.project.base import ProjectHandle
     from vizier.view.chart import ChartViewHandle
+    from vizier.viztrail.branch import BranchHandle
     from vizier.viztrail.workflow import WorkflowHandle
 
+from vizier.engine.events import EventSubscription, WorkflowEvent
+from vizier.engine.events import EVENT_WORKFLOW
 from vizier.viztrail.command import ModuleCommand
 
+import vizier.api.serialize.labels as labels
 import vizier.api.serialize.module as serialmd
 import vizier.api.serialize.workflow as serialwf
 from vizier.engine.base import VizierEngine
 from vizier.api.routes.base import UrlFactory
+from vizier.api.serialize.cache import SerializationCache, entity_tag, module_key
+
+import json
+
+
+"""Number of seconds after which a comment is sent on an idle event stream to
+keep the connection open.
+"""
+EVENT_KEEPALIVE = 15
 
 
 class VizierWorkflowApi(object):
@@ -36,7 +50,8 @@ class VizierWorkflowApi(object):
     """
     def __init__(self, 
             engine: VizierEngine, 
-            urls: UrlFactory
+            urls: UrlFactory,
+            cache: Optional[SerializationCache] = None
         ):
         """Initialize the API components.
 
@@ -46,9 +61,12 @@ class VizierWorkflowApi(object):
             Instance of the API engine
         urls: vizier.api.routes.base.UrlFactory
             Factory for resource urls
+        cache: vizier.api.serialize.cache.SerializationCache, optional
+            Cache for serialized workflows, modules, and datasets
         """
         self.engine = engine
         self.urls = urls
+        self.cache = cache if cache is not None else SerializationCache()
 
     def append_workflow_module(self, 
             project_id: str, 
@@ -108,7 +126,8 @@ class VizierWorkflowApi(object):
             project=project,
             branch=branch,
             workflow=branch.get_head(),
-            urls=self.urls
+            urls=self.urls,
+            cache=self.cache
         )
 
     def cancel_workflow(self, project_id, branch_id):
@@ -145,7 +164,8 @@ class VizierWorkflowApi(object):
             project=project,
             branch=branch,
             workflow=branch.head,
-            urls=self.urls
+            urls=self.urls,
+            cache=self.cache
         )
 
     def delete_workflow_module(self, project_id, branch_id, module_id):
@@ -187,7 +207,8 @@ class VizierWorkflowApi(object):
                 project=project,
                 branch=branch,
                 workflow=branch.head,
-                urls=self.urls
+                urls=self.urls,
+                cache=self.cache
             )
         return None
 
@@ -236,7 +257,8 @@ class VizierWorkflowApi(object):
                     project=project,
                     branch=branch,
                     workflow=workflow,
-                    urls=self.urls
+                    urls=self.urls,
+                    cache=self.cache
                 )
         return None
 
@@ -286,10 +308,210 @@ class VizierWorkflowApi(object):
                         urls=self.urls,
                         workflow=workflow,
                         charts=charts,
-                        include_self=True
+                        include_self=True,
+                        cache=self.cache
                     )
         return None
 
+    def get_module_output(self, project_id, output_id):
+        """Get the full value of a module output that is stored separately
+        from its module. Module handles only contain a truncated preview of
+        these outputs.
+
+        Returns None if the project or the output do not exist.
+
+        Parameters
+        ----------
+        project_id : string
+            Unique project identifier
+        output_id: string
+            Unique output identifier
+
+        Returns
+        -------
+        dict
+        """
+        # Retrieve the project from the repository to ensure that it exists
+        project = self.engine.projects.get_project(project_id)
+        if project is None:
+            return None
+        try:
+            value = project.viztrail.read_output(output_id)
+        except ValueError:
+            return None
+        return {labels.ID: output_id, labels.VALUE: value}
+
+    def get_workflow_etag(self, project_id, branch_id, workflow_id=None):
+        """Get the entity tag for the serialization of a workflow in a given
+        project branch. If the workflow identifier is omitted, the tag for the
+        workflow at the head of the branch is returned. The tag changes
+        whenever the serialization of the workflow changes.
+
+        Returns None if the project, branch, or workflow do not exist.
+
+        Parameters
+        ----------
+        project_id : string
+            Unique project identifier
+        branch_id: string
+            Unique workflow branch identifier
+        workflow_id: string, optional
+            Unique identifier for workflow
+
+        Returns
+        -------
+        string
+        """
+        project = self.engine.projects.get_project(project_id)
+        if project is None:
+            return None
+        branch = project.viztrail.get_branch(branch_id)
+        if branch is None:
+            return None
+        if branch.head is None:
+            return entity_tag(('empty', project_id, branch_id))
+        if workflow_id is None:
+            workflow = branch.head
+        else:
+            workflow = branch.get_workflow(workflow_id)
+        if workflow is None:
+            return None
+        return entity_tag(serialwf.WORKFLOW_HANDLE_KEY(project, branch, workflow))
+
+    def get_workflow_module_etag(self, project_id, branch_id, module_id):
+        """Get the entity tag for the serialization of a module in the head
+        workflow of a given project branch.
+
+        Returns None if the project, branch, or module do not exist.
+
+        Parameters
+        ----------
+        project_id : string
+            Unique project identifier
+        branch_id: string
+            Unique workflow branch identifier
+        module_id: string
+            Unique identifier for module
+
+        Returns
+        -------
+        string
+        """
+        project = self.engine.projects.get_project(project_id)
+        if project is None:
+            return None
+        branch = project.viztrail.get_branch(branch_id)
+        if branch is None or branch.head is None:
+            return None
+        workflow = branch.head
+        for module, artifacts, charts in serialwf.MODULE_CONTEXTS(workflow):
+            if module.identifier == module_id:
+                return entity_tag(module_key(
+                    project_id=project_id,
+                    branch_id=branch_id,
+                    workflow_id=workflow.identifier,
+                    module=module,
+                    artifacts=artifacts,
+                    charts=charts,
+                    include_self=True
+                ))
+        return None
+
+    def get_workflow_events(self,
+            project_id: str,
+            branch_id: str,
+            keepalive: float = EVENT_KEEPALIVE
+        ) -> Optional[Iterator[str]]:
+        """Get a stream of server-sent events for changes to the workflow at
+        the head of a given project branch. The first event is a workflow
+        event for the current branch head. Clients fetch the full workflow
+        handle for each workflow event and update individual modules for
+        module events.
+
+        Returns None if the project or branch do not exist.
+
+        Parameters
+        ----------
+        project_id : string
+            Unique project identifier
+        branch_id: string
+            Unique workflow branch identifier
+        keepalive: float, optional
+            Number of seconds after which a comment is sent if there are no
+            events
+
+        Returns
+        -------
+        iterator(string)
+        """
+        project = self.engine.projects.get_project(project_id)
+        if project is None:
+            return None
+        branch = project.viztrail.get_branch(branch_id)
+        if branch is None:
+            return None
+        # Subscribe before reading the branch head to not miss any change.
+        subscription = self.engine.events.subscribe(project_id, branch_id)
+        subscription.put(WorkflowEvent(
+            event_type=EVENT_WORKFLOW,
+            project_id=project_id,
+            branch_id=branch_id,
+            workflow=branch.head
+        ))
+        return self.stream_events(project, branch, subscription, keepalive)
+
+    def stream_events(self,
+            project: "ProjectHandle",
+            branch: "BranchHandle",
+            subscription: EventSubscription,
+            keepalive: float
+        ) -> Iterator[str]:
+        """Generate server-sent events for the given subscription. The
+        subscription is removed when the client disconnects.
+
+        Parameters
+        ----------
+        project: vizier.engine.project.base.ProjectHandle
+            Handle for the containing project
+        branch : vizier.viztrail.branch.BranchHandle
+            Branch handle
+        subscription: vizier.engine.events.EventSubscription
+            Subscription for the branch events
+        keepalive: float
+            Number of seconds after which a comment is sent if there are no
+            events
+
+        Returns
+        -------
+        iterator(string)
+        """
+        try:
+            while True:
+                event = subscription.get(timeout=keepalive)
+                if event is None:
+                    yield ': keepalive\n\n'
+                    continue
+                charts = None
+                if event.module is not None and event.module.is_success:
+                    charts = get_module_charts(
+                        event.workflow,
+                        event.module.identifier
+                    )
+                obj = serialwf.WORKFLOW_EVENT(
+                    project=project,
+                    branch=branch,
+                    event=event,
+                    urls=self.urls,
+                    cache=self.cache,
+                    charts=charts
+                )
+                yield 'event: {}\ndata: {}\n\n'.format(
+                    event.event_type,
+                    json.dumps(obj)
+                )
+        finally:
+            self.engine.events.unsubscribe(subscription)
+
     def insert_workflow_module(self, project_id, branch_id, before_module_id, package_id, command_id, arguments):
         """Append a new module to the head of the identified project branch.
         The module command is identified by the package and command identifier.
@@ -344,7 +566,8 @@ class VizierWorkflowApi(object):
                 project=project,
                 branch=branch,
                 workflow=branch.head,
-                urls=self.urls
+                urls=self.urls,
+                cache=self.cache
             )
         return None
 
@@ -402,7 +625,8 @@ class VizierWorkflowApi(object):
                 project=project,
                 branch=branch,
                 workflow=branch.head,
-                urls=self.urls
+                urls=self.urls,
+                cache=self.cache
             )
         return None
 
@@ -40,10 +40,20 @@ engine:
     processor_path: Path to folders containing processor definitions
     sync_commands
     use_short_ids
+    project_cache:
+        max_projects: Maximum number of cached project handles
+        max_modules: Maximum number of workflow modules held in memory
+    datastore:
+        format: Format of data files in the file system datastore (json or parquet)
+        max_delta_chain: Maximum number of deltas before datasets are compacted
+        profiler: Data profiler for datasets (native or datamart)
+        profiler_sample: Number of sampled rows for the native profiler
     backend:
         identifier: Unique backend identifier
         celery:
             routes: Optional routing infformation for celery workers
+        multiprocess:
+            workers: Number of worker processes in the pool
         container:
             ports: First port number for new project containers
             image: Identifier of the project container docker image
@@ -110,12 +120,40 @@ VIZIERENGINE_BACKEND = "VIZIERENGINE_BACKEND"
 VIZIERENGINE_SYNCHRONOUS = 'VIZIERENGINE_SYNCHRONOUS'
 # Flag indicationg whether short identifier are used by the viztrail repository
 VIZIERENGINE_USE_SHORT_IDENTIFIER = 'VIZIERENGINE_USE_SHORT_IDENTIFIER'
+# Object store for the viztrail repository (fs or sqlite) (DEFAULT: fs)
+VIZIERENGINE_OBJECT_STORE = 'VIZIERENGINE_OBJECT_STORE'
+
+"""Project cache"""
+# Maximum number of project handles that are kept in memory. Least recently
+# used projects are evicted if the limit is exceeded. There is no limit if the
+# value is 0 (DEFAULT: 100)
+VIZIERENGINE_PROJECT_CACHE_SIZE = 'VIZIERENGINE_PROJECT_CACHE_SIZE'
+# Maximum number of workflow modules that are kept in memory for the cached
+# projects. There is no limit if the value is 0 (DEFAULT: 10000)
+VIZIERENGINE_PROJECT_CACHE_MODULES = 'VIZIERENGINE_PROJECT_CACHE_MODULES'
+
+"""File system datastore"""
+# Format for the data files of new datasets (json or parquet) (DEFAULT: json)
+VIZIERENGINE_DATASTORE_FORMAT = 'VIZIERENGINE_DATASTORE_FORMAT'
+# Maximum number of deltas between a dataset and its snapshot. Datasets are
+# compacted into a new snapshot when the limit is exceeded (DEFAULT: 10)
+VIZIERENGINE_DATASTORE_MAX_DELTA_CHAIN = 'VIZIERENGINE_DATASTORE_MAX_DELTA_CHAIN'
+# Data profiler that is run on datasets when profiling is requested (native or
+# datamart) (DEFAULT: native)
+VIZIERENGINE_DATASTORE_PROFILER = 'VIZIERENGINE_DATASTORE_PROFILER'
+# Number of randomly sampled rows that are profiled by the native profiler. All
+# rows are profiled if the value is 0 (DEFAULT: 0)
+VIZIERENGINE_DATASTORE_PROFILER_SAMPLE = 'VIZIERENGINE_DATASTORE_PROFILER_SAMPLE'
 
 """Celery backend"""
 # Colon separated list of package.command=queue strings that define routing
 # information for individual commands
 VIZIERENGINE_CELERY_ROUTES = 'VIZIERENGINE_CELERY_ROUTES'
 
+"""Multi-process backend"""
+# Number of long-lived worker processes that execute workflow modules
+VIZIERENGINE_MULTIPROCESS_WORKERS = 'VIZIERENGINE_MULTIPROCESS_WORKERS'
+
 """Container backend"""
 # First port number for new project containers. All following containers will
 # have higher port numbers
@@ -144,8 +182,16 @@ DEFAULT_SETTINGS = {
     VIZIERENGINE_DATA_DIR: base.ENV_DIRECTORY,
     VIZIERENGINE_BACKEND: base.BACKEND_MULTIPROCESS,
     VIZIERENGINE_USE_SHORT_IDENTIFIER: True,
+    VIZIERENGINE_OBJECT_STORE: base.OBJECT_STORE_FS,
     VIZIERENGINE_SYNCHRONOUS: None,
+    VIZIERENGINE_PROJECT_CACHE_SIZE: 100,
+    VIZIERENGINE_PROJECT_CACHE_MODULES: 10000,
+    VIZIERENGINE_DATASTORE_FORMAT: 'json',
+    VIZIERENGINE_DATASTORE_MAX_DELTA_CHAIN: 10,
+    VIZIERENGINE_DATASTORE_PROFILER: 'native',
+    VIZIERENGINE_DATASTORE_PROFILER_SAMPLE: 0,
     VIZIERENGINE_CELERY_ROUTES: None,
+    VIZIERENGINE_MULTIPROCESS_WORKERS: 4,
     VIZIERENGINE_CONTAINER_PORTS: list(range(20171, 20271)),
     VIZIERENGINE_CONTAINER_IMAGE: 'heikomueller/vizierapi:container',
     'doc_url': 'http://cds-swg1.cims.nyu.edu/doc/vizier-db/'
@@ -193,10 +239,20 @@ class AppConfig(object):
             processor_path
             sync_commands
             use_short_ids
+            project_cache:
+                max_projects
+                max_modules
+            datastore:
+                format
+                max_delta_chain
+                profiler
+                profiler_sample
             backend:
                 identifier
                 celery:
                     routes
+                multiprocess:
+                    workers
                 container:
                     ports
                     image
@@ -242,10 +298,31 @@ class AppConfig(object):
                 ('package_path', VIZIERSERVER_PACKAGE_PATH, base.STRING),
                 ('processor_path', VIZIERSERVER_PROCESSOR_PATH, base.STRING),
                 ('use_short_ids', VIZIERENGINE_USE_SHORT_IDENTIFIER, base.BOOL),
+                ('object_store', VIZIERENGINE_OBJECT_STORE, base.STRING),
                 ('sync_commands', VIZIERENGINE_SYNCHRONOUS, base.STRING)
             ],
             default_values=default_values
         )
+        # engine.project_cache
+        project_cache: Any = base.ConfigObject(
+            attributes=[
+                ('max_projects', VIZIERENGINE_PROJECT_CACHE_SIZE, base.INTEGER),
+                ('max_modules', VIZIERENGINE_PROJECT_CACHE_MODULES, base.INTEGER)
+            ],
+            default_values=default_values
+        )
+        setattr(self.engine, 'project_cache', project_cache)
+        # engine.datastore
+        datastore: Any = base.ConfigObject(
+            attributes=[
+                ('format', VIZIERENGINE_DATASTORE_FORMAT, base.STRING),
+                ('max_delta_chain', VIZIERENGINE_DATASTORE_MAX_DELTA_CHAIN, base.INTEGER),
+                ('profiler', VIZIERENGINE_DATASTORE_PROFILER, base.STRING),
+                ('profiler_sample', VIZIERENGINE_DATASTORE_PROFILER_SAMPLE, base.INTEGER)
+            ],
+            default_values=default_values
+        )
+        setattr(self.engine, 'datastore', datastore)
         # engine.backend
         backend: Any = base.ConfigObject(
             attributes=[('identifier', VIZIERENGINE_BACKEND, base.STRING)],
@@ -257,6 +334,12 @@ class AppConfig(object):
             default_values=default_values
         )
         setattr(backend, 'celery', celery)
+        # engine.backend.multiprocess
+        multiprocess: Any = base.ConfigObject(
+            attributes=[('workers', VIZIERENGINE_MULTIPROCESS_WORKERS, base.INTEGER)],
+            default_values=default_values
+        )
+        setattr(backend, 'multiprocess', multiprocess)
         # engine.backend.container
         container: Any = base.ConfigObject(
             attributes=[
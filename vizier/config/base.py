@@ -39,6 +39,10 @@ MIMIR_ENGINE = 'MIMIR'
 
 ENGINES = [DEV_ENGINE, HISTORE_ENGINE, MIMIR_ENGINE]
 
+"""Object stores for the viztrails repository."""
+OBJECT_STORE_FS = 'fs'
+OBJECT_STORE_SQLITE = 'sqlite'
+
 """Supported attribute types."""
 BOOL = 'bool'
 FLOAT = 'float'
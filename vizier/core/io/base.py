@@ -19,7 +19,8 @@ write resources as Json objects.
 """
 
 from abc import abstractmethod
-from typing import Dict, Any, Optional, Callable, Union, List
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Iterator, Union, List, BinaryIO
 
 import json
 import os
@@ -45,6 +46,27 @@ class ObjectStore(object):
     """Abstract object store class that defines the interface methods to read
     and write objects and to maintain folders.
     """
+    @abstractmethod
+    def append_object(self,
+            object_path: str,
+            content: Dict[str, Any],
+            sync: bool = False
+        ) -> None:
+        """Append content as a Json document to the object with the given
+        path. The object is created if it does not exist. Objects that are
+        written using this method are read using read_appended_objects.
+
+        Parameters
+        ----------
+        object_path: string
+            Path identifier for a resource object
+        content: dict
+            Json object
+        sync: bool, optional
+            Flush the appended document to disk before returning
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def create_folder(self, 
             parent_folder: str, 
@@ -201,10 +223,40 @@ class ObjectStore(object):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def read_appended_objects(self, object_path: str) -> List[Dict[str, Any]]:
+        """Read the list of Json documents that were appended to the object
+        with the given path.
+
+        Raises ValueError if no object with given path exists.
+
+        Parameters
+        ----------
+        object_path: string
+            Path identifier for a resource object
+
+        Returns
+        -------
+        list(dict)
+        """
+        raise NotImplementedError()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Context manager that groups all writes within the context into a
+        single atomic transaction. Transactions can be nested. Only the
+        outermost transaction is committed.
+
+        Object stores that do not support transactions write each object
+        immediately. This is the default behavior.
+        """
+        yield
+
     @abstractmethod
     def write_object(self, 
             object_path: str, 
-            content: Union[Dict[str, Any], List[Dict[str, Any]], List[str], None]
+            content: Union[Dict[str, Any], List[Dict[str, Any]], List[str], None],
+            atomic: bool = False
         ) -> None:
         """Write content as Json document to given path.
 
@@ -214,6 +266,9 @@ class ObjectStore(object):
             Path identifier for a resource object
         content: dict or list
             Json object or array
+        atomic: bool, optional
+            Make sure that an interrupted write does not leave an incomplete
+            object at the given path
         """
         raise NotImplementedError()
 
@@ -252,6 +307,32 @@ class DefaultObjectStore(ObjectStore):
             if PARA_LONG_IDENTIFIER in properties and not properties[PARA_LONG_IDENTIFIER]:
                 self.identifier_factory = get_short_identifier
 
+    def append_object(self,
+            object_path: str,
+            content: Dict[str, Any],
+            sync: bool = False
+        ) -> None:
+        """Append content as a Json document to the object with the given
+        path. Each document is written as a single line. The object is created
+        if it does not exist. An incomplete last line (e.g., from an append
+        that was interrupted) is removed before the document is written.
+
+        Parameters
+        ----------
+        object_path: string
+            Path identifier for a resource object
+        content: dict
+            Json object
+        sync: bool, optional
+            Flush the appended document to disk before returning
+        """
+        with open(object_path, 'a+b') as f:
+            truncate_incomplete_line(f)
+            f.write((json.dumps(content) + '\n').encode('utf-8'))
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+
     def create_folder(self, 
             parent_folder: str, 
             identifier: Optional[str] = None
@@ -459,11 +540,44 @@ class DefaultObjectStore(ObjectStore):
         except IOError as ex:
             raise ValueError(ex)
 
+    def read_appended_objects(self, object_path: str) -> List[Dict[str, Any]]:
+        """Read the list of Json documents that were appended to the object
+        with the given path. An incomplete last line, e.g., from a write that
+        was interrupted, is ignored.
+
+        Parameters
+        ----------
+        object_path: string
+            Path identifier for a resource object
+
+        Returns
+        -------
+        list(dict)
+        """
+        try:
+            with open(object_path, 'r') as f:
+                lines = f.read().split('\n')
+        except IOError as ex:
+            raise ValueError(ex)
+        result = list()
+        for i, line in enumerate(lines):
+            if line == '':
+                continue
+            try:
+                result.append(json.loads(line))
+            except ValueError:
+                if i < len(lines) - 1:
+                    raise
+        return result
+
     def write_object(self, 
             object_path: str, 
-            content: Union[List[Dict[str, Any]], Dict[str, Any], List[str], None]
+            content: Union[List[Dict[str, Any]], Dict[str, Any], List[str], None],
+            atomic: bool = False
         ):
-        """Write content as Json document to given path.
+        """Write content as Json document to given path. For atomic writes the
+        content is written to a temporary file in the same folder first that
+        then replaces the object file.
 
         Parameters
         ----------
@@ -471,9 +585,24 @@ class DefaultObjectStore(ObjectStore):
             Path identifier for a resource object
         content: dict or list
             Json object or array
+        atomic: bool, optional
+            Make sure that an interrupted write does not leave an incomplete
+            object at the given path
         """
-        with open(object_path, 'w') as f:
-            json.dump(content, f)
+        if not atomic:
+            with open(object_path, 'w') as f:
+                json.dump(content, f)
+            return
+        tmp_path = object_path + '.' + get_unique_identifier() + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(content, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, object_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
 
 # ------------------------------------------------------------------------------
@@ -498,3 +627,32 @@ def read_object_from_file(filename: str) -> Dict[str, Any]:
             return json.loads(f.read())
         else:
             return yaml.load(f.read(), Loader=yaml.FullLoader)
+
+
+def truncate_incomplete_line(f: BinaryIO) -> None:
+    """Remove the last line of a file if it is not terminated by a newline.
+    The file is expected to be opened for reading and appending in binary
+    mode.
+
+    Parameters
+    ----------
+    f: file object
+        File that is opened in binary mode for reading and appending
+    """
+    size = f.seek(0, os.SEEK_END)
+    if size == 0:
+        return
+    f.seek(size - 1)
+    if f.read(1) == b'\n':
+        return
+    # Find the end of the last complete line
+    end = size
+    while end > 0:
+        start = max(0, end - 4096)
+        f.seek(start)
+        pos = f.read(end - start).rfind(b'\n')
+        if pos >= 0:
+            end = start + pos + 1
+            break
+        end = start
+    f.truncate(end)
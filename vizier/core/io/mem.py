@@ -49,6 +49,21 @@ class MemObjectStore(ObjectStore):
             if PARA_LONG_IDENTIFIER in properties and not properties[PARA_LONG_IDENTIFIER]:
                 self.identifier_factory = get_short_identifier
 
+    def append_object(self, object_path, content, sync=False):
+        """Append content as a Json document to the object with the given
+        path. The object is created if it does not exist.
+
+        Parameters
+        ----------
+        object_path: string
+            Path identifier for a resource object
+        content: dict
+            Json object
+        sync: bool, optional
+            Ignored since objects are not written to disk
+        """
+        self.store.setdefault(object_path, list()).append(content)
+
     def create_folder(self, parent_folder, identifier=None):
         """Create a new folder in the given parent folder. The folder name is
         either given as the identifier argument or a new unique identifier is
@@ -247,7 +262,25 @@ class MemObjectStore(ObjectStore):
         """
         return self.store[object_path]
 
-    def write_object(self, object_path, content):
+    def read_appended_objects(self, object_path):
+        """Read the list of Json documents that were appended to the object
+        with the given path.
+
+        Parameters
+        ----------
+        object_path: string
+            Path identifier for a resource object
+
+        Returns
+        -------
+        list(dict)
+        """
+        if object_path not in self.store:
+            raise ValueError('unknown object \'' + str(object_path) + '\'')
+        # Objects that were created without content are empty.
+        return list(self.store[object_path] or list())
+
+    def write_object(self, object_path, content, atomic=False):
         """Write content as Json document to given path.
 
         Parameters
@@ -256,5 +289,7 @@ class MemObjectStore(ObjectStore):
             Path identifier for a resource object
         content: dict or list
             Json object or array
+        atomic: bool, optional
+            Ignored since all writes are atomic
         """
         self.store[object_path] = content
@@ -0,0 +1,638 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Object store that keeps all objects and folders in a single SQLite database
+file.
+
+Object paths have the same form as for the default object store, i.e., they
+are file system paths. Paths are stored relative to the base directory of
+the store (by default the directory that contains the database file). Objects
+and folders are therefore found independently of whether they are accessed
+using a relative or an absolute path, and the data directory can be moved
+together with the database. The database is opened in WAL mode. Readers
+do not block the writer and each write is atomic. Multiple writes can be
+grouped into a single transaction using the transaction() context manager.
+
+Each thread uses its own database connection.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import json
+import os
+import sqlite3
+import threading
+
+from vizier.core.io.base import ObjectStore, MAX_ATTEMPS
+from vizier.core.io.base import PARA_KEEP_DELETED, PARA_LONG_IDENTIFIER
+from vizier.core.util import get_short_identifier, get_unique_identifier
+
+
+"""Default name of the database file for the viztrails repository."""
+DEFAULT_DATABASE_FILE = 'viztrails.db'
+
+"""Maximum time (in seconds) to wait for a lock on the database."""
+LOCK_TIMEOUT = 60
+
+"""Database schema."""
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS folders('
+    'path TEXT NOT NULL PRIMARY KEY, '
+    'parent TEXT NOT NULL, '
+    'name TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS folders_parent ON folders(parent)',
+    'CREATE TABLE IF NOT EXISTS objects('
+    'path TEXT NOT NULL PRIMARY KEY, '
+    'parent TEXT NOT NULL, '
+    'name TEXT NOT NULL, '
+    'content TEXT)',
+    'CREATE INDEX IF NOT EXISTS objects_parent ON objects(parent)',
+    'CREATE TABLE IF NOT EXISTS appended('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'path TEXT NOT NULL, '
+    'content TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS appended_path ON appended(path)'
+]
+
+
+class SQLiteObjectStore(ObjectStore):
+    """Object store implementation that uses an embedded SQLite database. If
+    the keep_deleted_files flag is set to True none of the delete methods
+    will have any effect.
+    """
+    def __init__(self,
+            database: str,
+            properties: Optional[Dict[str, Any]] = None,
+            identifier_factory: Optional[Callable[[], str]] = None,
+            keep_deleted_files: bool = False,
+            base_path: Optional[str] = None
+        ):
+        """Initialize the database file, the identifier_factory, and the
+        keep_deleted_files flag. The database is created if it does not
+        exist.
+
+        Parameters
+        ----------
+        database: string
+            Path to the database file
+        properties: dict
+            Dictionary for object properties. Overwrites the default values.
+        identifier_factory: func, optional
+            Function to create a new unique identifier
+        keep_deleted_files: bool, optional
+            Flag indicating whether objects and folders are actually deleted
+            or not
+        base_path: string, optional
+            Directory that resource paths are stored relative to. Defaults to
+            the directory that contains the database file.
+        """
+        self.database = os.path.abspath(database)
+        if base_path is not None:
+            self.base_path = os.path.abspath(base_path)
+        else:
+            self.base_path = os.path.dirname(self.database)
+        self.identifier_factory = identifier_factory if identifier_factory is not None else get_unique_identifier
+        self.keep_deleted_files = keep_deleted_files
+        if properties is not None:
+            if PARA_KEEP_DELETED in properties:
+                self.keep_deleted_files = properties[PARA_KEEP_DELETED]
+            if PARA_LONG_IDENTIFIER in properties and not properties[PARA_LONG_IDENTIFIER]:
+                self.identifier_factory = get_short_identifier
+        # Connection and transaction depth for each thread.
+        self.local = threading.local()
+        dirname = os.path.dirname(self.database)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        with self.transaction():
+            con = self.connection()
+            for stmt in SCHEMA:
+                con.execute(stmt)
+
+    def append_object(self,
+            object_path: str,
+            content: Dict[str, Any],
+            sync: bool = False
+        ) -> None:
+        """Append content as a Json document to the object with the given
+        path. The object is created if it does not exist.
+
+        Parameters
+        ----------
+        object_path: string
+            Path identifier for a resource object
+        content: dict
+            Json object
+        sync: bool, optional
+            Ignored. Durability of the appended document is determined by
+            the synchronization mode of the database.
+        """
+        path, parent, name = split_path(object_path, self.base_path)
+        with self.transaction():
+            con = self.connection()
+            con.execute(
+                'INSERT OR IGNORE INTO objects(path, parent, name, content) '
+                'VALUES(?, ?, ?, NULL)',
+                (path, parent, name)
+            )
+            con.execute(
+                'INSERT INTO appended(path, content) VALUES(?, ?)',
+                (path, json.dumps(content))
+            )
+
+    def connection(self) -> sqlite3.Connection:
+        """Get the database connection for the current thread. The connection
+        is opened on first access.
+
+        Returns
+        -------
+        sqlite3.Connection
+        """
+        con = getattr(self.local, 'connection', None)
+        if con is None:
+            # Transactions are controlled explicitly (see transaction()).
+            con = sqlite3.connect(
+                self.database,
+                timeout=LOCK_TIMEOUT,
+                isolation_level=None
+            )
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection = con
+            self.local.depth = 0
+        return con
+
+    def create_folder(self,
+            parent_folder: str,
+            identifier: Optional[str] = None
+        ) -> str:
+        """Create a new folder in the given parent folder. The folder name is
+        either given as the identifier argument or a new unique identifier is
+        created if the argument is None. Returns the identifier for the created
+        folder.
+
+        Parameters
+        ----------
+        parent_folder: string
+            Path to parent folder
+        identifier: string, optional
+            Folder identifier
+
+        Returns
+        -------
+        string
+        """
+        with self.transaction():
+            identifier = self.get_identifier(parent_folder, identifier)
+            path, parent, name = split_path(
+                self.join(parent_folder, identifier),
+                self.base_path
+            )
+            self.connection().execute(
+                'INSERT OR IGNORE INTO folders(path, parent, name) VALUES(?, ?, ?)',
+                (path, parent, name)
+            )
+        return identifier
+
+    def create_object(self,
+            parent_folder: str,
+            identifier: Optional[str] = None,
+            content: Union[List[Any], Dict[str, Any], None] = None
+        ) -> str:
+        """Create a new object in the given parent folder. The object path is
+        either given as the identifier argument or a new unique identifier is
+        created if the argument is None. Returns the identifier for the created
+        object.
+
+        Parameters
+        ----------
+        parent_folder: string
+            Path to parent folder
+        identifier: string, optional
+            Object identifier
+        content: list or dict, optional
+            Default content for the new resource
+
+        Returns
+        -------
+        string
+        """
+        with self.transaction():
+            identifier = self.get_identifier(parent_folder, identifier)
+            self.write_object(
+                object_path=self.join(parent_folder, identifier),
+                content=content
+            )
+        return identifier
+
+    def delete_folder(self,
+            folder_path: str,
+            force_delete: bool = False
+        ) -> None:
+        """Delete the folder with the given path and all of its objects and
+        subfolders.
+
+        Parameters
+        ----------
+        folder_path: string
+            Path to the folder that is being deleted
+        force_delete: bool, optional
+            Force deletion of the resource
+        """
+        if not force_delete and self.keep_deleted_files:
+            return
+        path = normalize_path(folder_path, self.base_path)
+        prefix = path + os.sep if path != os.curdir else ''
+        with self.transaction():
+            con = self.connection()
+            con.execute(
+                'DELETE FROM folders WHERE path = ? OR substr(path, 1, ?) = ?',
+                (path, len(prefix), prefix)
+            )
+            con.execute(
+                'DELETE FROM objects WHERE substr(path, 1, ?) = ?',
+                (len(prefix), prefix)
+            )
+            con.execute(
+                'DELETE FROM appended WHERE substr(path, 1, ?) = ?',
+                (len(prefix), prefix)
+            )
+
+    def delete_object(self,
+            object_path: str,
+            force_delete: bool = False
+        ) -> None:
+        """Delete the object with the given path.
+
+        Parameters
+        ----------
+        object_path: string
+            Path to the object that is being deleted
+        force_delete: bool, optional
+            Force deletion of the resource
+        """
+        if not force_delete and self.keep_deleted_files:
+            return
+        path = normalize_path(object_path, self.base_path)
+        with self.transaction():
+            con = self.connection()
+            con.execute('DELETE FROM objects WHERE path = ?', (path,))
+            con.execute('DELETE FROM appended WHERE path = ?', (path,))
+
+    def exists(self, resource_path: str) -> bool:
+        """Returns True if an object or a folder with the given path exists.
+
+        Parameters
+        ----------
+        resource_path: string
+            Path to resource
+
+        Returns
+        -------
+        bool
+        """
+        path = normalize_path(resource_path, self.base_path)
+        con = self.connection()
+        for table in ['objects', 'folders']:
+            sql = 'SELECT 1 FROM ' + table + ' WHERE path = ?'
+            if con.execute(sql, (path,)).fetchone() is not None:
+                return True
+        return False
+
+    def get_identifier(self, parent_folder: str, identifier: Optional[str]) -> str:
+        """Get an identifier for a new resource in the given folder. Returns
+        the given identifier if it is not None. Otherwise, a new identifier
+        is created that does not reference an existing resource.
+
+        Parameters
+        ----------
+        parent_folder: string
+            Path to parent folder
+        identifier: string, optional
+            Resource identifier
+
+        Returns
+        -------
+        string
+        """
+        count = 0
+        while identifier is None:
+            # Allow repeated calls to the identifier factory until an identifier
+            # is returned that does not reference an existing resource. The max.
+            # attemps counter is used to avoid an endless loop.
+            candidate = self.identifier_factory()
+            if not self.exists(self.join(parent_folder, candidate)):
+                identifier = candidate
+            else:
+                count += 1
+                if count >= MAX_ATTEMPS:
+                    raise RuntimeError('could not generate unique identifier')
+        return identifier
+
+    def join(self, parent_folder: str, identifier: str) -> str:
+        """Concatenate the identifier for a given folder and a folder resource.
+
+        Parameters
+        ----------
+        parent_folder: string
+            Path to the parent folder
+        identifier: string
+            Identifier for resource in the parent folder
+
+        Returns
+        -------
+        string
+        """
+        return os.path.join(parent_folder, identifier)
+
+    def list_folders(self, parent_folder: str, create: bool = True) -> List[str]:
+        """Get a list of all subfolders in the given folder. If the folder does
+        not exist it is created if the create flag is True.
+
+        Parameters
+        ----------
+        parent_folder: string
+            Path to the parent folder
+        create: bool, optional
+            Flag indicating that the parent folder should be created if it does
+            not exist
+
+        Returns
+        -------
+        list(string)
+        """
+        if not self.exists(parent_folder):
+            if create:
+                folder, name = os.path.split(os.path.abspath(parent_folder))
+                self.create_folder(folder, identifier=name)
+            return list()
+        rs = self.connection().execute(
+            'SELECT name FROM folders WHERE parent = ?',
+            (normalize_path(parent_folder, self.base_path),)
+        )
+        return [row[0] for row in rs.fetchall()]
+
+    def list_objects(self, folder_path: str) -> List[str]:
+        """Get a list of all objects in the given folder. Returns a list of
+        resource names.
+
+        Parameters
+        ----------
+        folder_path: string
+            Path to the resource folder
+
+        Returns
+        -------
+        list(string)
+        """
+        rs = self.connection().execute(
+            'SELECT name FROM objects WHERE parent = ?',
+            (normalize_path(folder_path, self.base_path),)
+        )
+        return [row[0] for row in rs.fetchall()]
+
+    def read_object(self,
+            object_path: str
+        ) -> Union[List[Dict[str, Any]], Dict[str, Any], None]:
+        """Read Json document from given path.
+
+        Raises ValueError if no object with given path exists or if the object
+        is empty.
+
+        Parameters
+        ----------
+        object_path: string
+            Path identifier for a resource object
+
+        Returns
+        -------
+        dict or list
+        """
+        row = self.connection().execute(
+            'SELECT content FROM objects WHERE path = ?',
+            (normalize_path(object_path, self.base_path),)
+        ).fetchone()
+        if row is None:
+            raise ValueError('unknown object \'' + str(object_path) + '\'')
+        elif row[0] is None:
+            raise ValueError('empty object \'' + str(object_path) + '\'')
+        return json.loads(row[0])
+
+    def read_appended_objects(self, object_path: str) -> List[Dict[str, Any]]:
+        """Read the list of Json documents that were appended to the object
+        with the given path.
+
+        Raises ValueError if no object with given path exists.
+
+        Parameters
+        ----------
+        object_path: string
+            Path identifier for a resource object
+
+        Returns
+        -------
+        list(dict)
+        """
+        path = normalize_path(object_path, self.base_path)
+        with self.transaction():
+            if not self.exists(object_path):
+                raise ValueError('unknown object \'' + str(object_path) + '\'')
+            rs = self.connection().execute(
+                'SELECT content FROM appended WHERE path = ? ORDER BY id',
+                (path,)
+            )
+            return [json.loads(row[0]) for row in rs.fetchall()]
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Context manager that groups all writes of the current thread into
+        a single transaction. The transaction is committed when the outermost
+        context is left and rolled back if an exception is raised.
+        """
+        con = self.connection()
+        if self.local.depth > 0:
+            self.local.depth += 1
+            try:
+                yield
+            finally:
+                self.local.depth -= 1
+            return
+        con.execute('BEGIN IMMEDIATE')
+        self.local.depth = 1
+        try:
+            yield
+        except BaseException:
+            con.execute('ROLLBACK')
+            raise
+        else:
+            con.execute('COMMIT')
+        finally:
+            self.local.depth = 0
+
+    def write_object(self,
+            object_path: str,
+            content: Union[List[Dict[str, Any]], Dict[str, Any], List[str], None],
+            atomic: bool = False
+        ) -> None:
+        """Write content as Json document to given path. Replaces any previous
+        content of the object, including appended documents.
+
+        Parameters
+        ----------
+        object_path: string
+            Path identifier for a resource object
+        content: dict or list
+            Json object or array
+        atomic: bool, optional
+            Ignored since every write runs in a single transaction
+        """
+        path, parent, name = split_path(object_path, self.base_path)
+        doc = json.dumps(content) if content is not None else None
+        with self.transaction():
+            con = self.connection()
+            con.execute(
+                'INSERT OR REPLACE INTO objects(path, parent, name, content) '
+                'VALUES(?, ?, ?, ?)',
+                (path, parent, name, doc)
+            )
+            con.execute('DELETE FROM appended WHERE path = ?', (path,))
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def migrate_folder(folder_path: str, store: ObjectStore) -> Tuple[int, int]:
+    """Copy all files and subfolders of a folder that was written by the
+    default object store into the given object store. Files that contain a
+    single Json document are copied using write_object. Files that contain a
+    list of appended Json documents (one per line) are copied using
+    append_object. Empty files are copied as empty objects. Returns the
+    number of copied folders and objects.
+
+    Raises ValueError if a file does not contain Json.
+
+    Parameters
+    ----------
+    folder_path: string
+        Path to the source folder
+    store: vizier.core.io.base.ObjectStore
+        Target object store
+
+    Returns
+    -------
+    (int, int)
+    """
+    folders, objects = 0, 0
+    with store.transaction():
+        if not store.exists(folder_path):
+            parent, name = os.path.split(os.path.abspath(folder_path))
+            store.create_folder(parent, identifier=name)
+        for dirpath, dirnames, filenames in os.walk(folder_path):
+            for name in dirnames:
+                store.create_folder(dirpath, identifier=name)
+                folders += 1
+            for name in filenames:
+                filename = os.path.join(dirpath, name)
+                with open(filename, 'r') as f:
+                    text = f.read()
+                store.create_object(dirpath, identifier=name)
+                doc, appended = read_migrated_file(filename, text)
+                if doc is not None:
+                    store.write_object(filename, content=doc)
+                for obj in appended:
+                    store.append_object(filename, content=obj)
+                objects += 1
+    return folders, objects
+
+
+def read_migrated_file(
+        filename: str,
+        text: str
+    ) -> Tuple[Optional[Any], List[Dict[str, Any]]]:
+    """Parse the content of a file that was written by the default object
+    store. Returns either the Json document in the file or the list of
+    documents that were appended to the file. The default store writes
+    appended documents one per line, i.e., the file ends with a line break
+    unless the last write was interrupted. An incomplete last line is ignored
+    in the same way as by the default store.
+
+    Parameters
+    ----------
+    filename: string
+        Path to the file
+    text: string
+        File content
+
+    Returns
+    -------
+    (dict or list, list(dict))
+    """
+    if text.strip() == '':
+        return None, list()
+    if not text.endswith('\n'):
+        try:
+            return json.loads(text), list()
+        except ValueError:
+            pass
+    appended = list()
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        if line == '':
+            continue
+        try:
+            appended.append(json.loads(line))
+        except ValueError:
+            if i < len(lines) - 1:
+                raise ValueError('invalid object \'' + filename + '\'')
+    return None, appended
+
+
+def normalize_path(path: str, base_path: str) -> str:
+    """Get the normalized version of an object or folder path relative to the
+    given base directory.
+
+    Parameters
+    ----------
+    path: string
+        Object or folder path
+    base_path: string
+        Absolute path of the base directory
+
+    Returns
+    -------
+    string
+    """
+    return os.path.relpath(os.path.abspath(path), base_path)
+
+
+def split_path(path: str, base_path: str) -> Tuple[str, str, str]:
+    """Get the normalized path of a resource, the path of its parent folder,
+    and the resource name. Paths are relative to the given base directory.
+
+    Parameters
+    ----------
+    path: string
+        Object or folder path
+    base_path: string
+        Absolute path of the base directory
+
+    Returns
+    -------
+    (string, string, string)
+    """
+    parent, name = os.path.split(os.path.abspath(path))
+    return normalize_path(path, base_path), normalize_path(parent, base_path), name
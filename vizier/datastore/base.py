@@ -151,7 +151,29 @@ class Datastore(metaclass=ABCMeta):
         vizier.datastore.base.DatasetHandle
         """
         raise NotImplementedError
-    
+
+    def get_datasets(self, identifiers: List[str]) -> Dict[str, DatasetHandle]:
+        """Get the handles for all datasets in the given list. The result is
+        keyed by the dataset identifier. Datasets that do not exist are not
+        included in the result. Datastores may override this method to fetch
+        the datasets in a single request.
+
+        Parameters
+        ----------
+        identifiers : list(string)
+            Unique dataset identifiers
+
+        Returns
+        -------
+        dict(string: vizier.datastore.base.DatasetHandle)
+        """
+        result = dict()
+        for identifier in identifiers:
+            dataset = self.get_dataset(identifier)
+            if dataset is not None:
+                result[identifier] = dataset
+        return result
+
     @abstractmethod
     def get_dataset_frame(self, identifier: str, force_profiler: Optional[bool] = None) -> Optional[DataFrame]:
         """Get a pandas DataFrame for the dataset with given identifier from the data
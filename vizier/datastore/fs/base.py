@@ -19,49 +19,226 @@ maintains datasets information in separate file within a dataset-specific
 subfolder of a given base directory.
 """
 
-import csv
 import json
 import os
 import shutil
 import tempfile
-import urllib.request
-import urllib.error
-import urllib.parse
-from typing import Tuple, List, Dict, Any, Optional
+from typing import Tuple, List, Dict, Any, Iterable, Optional, cast
 
-from vizier.core.util import cast, get_unique_identifier
+from vizier.core.util import get_unique_identifier
 from vizier.datastore.base import DefaultDatastore
-from vizier.datastore.dataset import DatasetColumn, DatasetDescriptor
+from vizier.datastore.dataset import DatasetColumn, DatasetDescriptor, DatasetHandle
 from vizier.datastore.dataset import DatasetRow
 from vizier.datastore.fs.dataset import FileSystemDatasetHandle
+from vizier.datastore.fs.dataset import FORMAT_JSON, FORMAT_PARQUET
+from vizier.datastore.fs.delta import DatasetDelta
+from vizier.datastore.fs.ingest import CsvIngest
 from vizier.datastore.object.dataobject import DataObjectMetadata
 from vizier.datastore.reader import DefaultJsonDatasetReader
+from vizier.datastore.reader import IndexedJsonDatasetReader
 from vizier.filestore.base import FileHandle, Filestore
-from vizier.filestore.base import get_download_filename
+from vizier.filestore.download import Download
+import vizier.datastore.fs.sql as sql
+import vizier.datastore.profiling.columnar as columnar
 import vizier.datastore.profiling.datamart as datamart
 from pandas import DataFrame
 
 """Constants for data file names."""
-DATA_FILE = 'data.json'
+DATA_FILE = 'data.jsonl'
+DELTA_FILE = 'delta.json'
+DEPENDENTS_FILE = 'dependents.txt'
 DESCRIPTOR_FILE = 'descriptor.json'
+INDEX_FILE = 'data.idx'
+PARQUET_DATA_FILE = 'data.parquet'
+
+"""Name of the data file for datasets that were created by earlier versions of
+the datastore (all rows in a single Json array). These files are converted
+into the indexed format when the dataset is accessed for the first time.
+"""
+LEGACY_DATA_FILE = 'data.json'
+
+"""Default maximum number of deltas between a dataset and the snapshot that it
+is derived from. Datasets that exceed the limit are compacted into a new
+snapshot.
+"""
+DEFAULT_MAX_DELTA_CHAIN = 10
+
+"""Data profilers that are run on datasets when profiling is requested."""
+PROFILER_DATAMART = 'datamart'
+PROFILER_NATIVE = 'native'
 
 
 class FileSystemDatastore(DefaultDatastore):
     """Implementation of Vizier data store. Uses the file system to maintain
     datasets. For each dataset a new subfolder is created. Within the folder
-    the dataset information is split across three files containing the
-    descriptor, annotation, and the dataset rows.
+    the dataset information is split across files containing the descriptor,
+    annotation, the dataset rows, and the row offset index.
+
+    The data format determines how the rows of new datasets are stored. Rows
+    are either stored as newline-delimited Json (FORMAT_JSON) or in columnar
+    format as a Parquet file (FORMAT_PARQUET). Existing datasets are read in
+    the format that they were written in.
+
+    Datasets that are derived from an existing dataset by a small change can
+    be stored as a delta (see create_delta). Chains of deltas that exceed the
+    maximum chain length are compacted into a new snapshot.
+
+    Datasets are profiled on request either by the native column profiler
+    (PROFILER_NATIVE) or by the Datamart profiler (PROFILER_DATAMART). The
+    profiling results are stored with the dataset properties. The native
+    profiler reuses the results for columns of a delta that were not modified
+    with respect to the parent dataset.
+
+    SQL queries over datasets are evaluated by an embedded SQLite engine (see
+    vizier.datastore.fs.sql).
     """
-    def __init__(self, base_path):
+    def __init__(self,
+            base_path,
+            data_format: str = FORMAT_JSON,
+            max_delta_chain: int = DEFAULT_MAX_DELTA_CHAIN,
+            profiler: str = PROFILER_NATIVE,
+            profiler_sample: int = 0
+        ):
         """Initialize the base directory that contains datasets. Each dataset
         is maintained in a separate subfolder.
 
+        Raises ValueError if the data format is not supported.
+
         Parameters
         ---------
         base_path : string
             Path to base directory for the datastore
+        data_format: string, optional
+            Format for the data files of new datasets
+        max_delta_chain: int, optional
+            Maximum number of deltas between a dataset and its snapshot. Deltas
+            are disabled if the value is zero.
+        profiler: string, optional
+            Data profiler that is run on datasets when profiling is requested
+        profiler_sample: int, optional
+            Number of randomly sampled rows that are profiled by the native
+            profiler. All rows are profiled if the value is zero.
+        """
+        super(FileSystemDatastore, self).__init__(base_path) # type: ignore[no-untyped-call]
+        if data_format not in [FORMAT_JSON, FORMAT_PARQUET]:
+            raise ValueError('unknown data format \'' + str(data_format) + '\'')
+        if profiler not in [PROFILER_DATAMART, PROFILER_NATIVE]:
+            raise ValueError('unknown profiler \'' + str(profiler) + '\'')
+        self.data_format = data_format
+        self.max_delta_chain = max_delta_chain
+        self.profiler = profiler
+        self.profiler_sample = profiler_sample
+
+    def compact_dataset(self, identifier: str) -> bool:
+        """Replace the delta for the dataset with the given identifier by a
+        snapshot that contains all dataset rows. Returns True if the dataset
+        was stored as a delta and False otherwise.
+
+        Raises ValueError if the dataset does not exist.
+
+        Parameters
+        ----------
+        identifier: string
+            Unique dataset identifier
+
+        Returns
+        -------
+        bool
+        """
+        dataset = self.get_dataset(identifier)
+        if dataset is None:
+            raise ValueError('unknown dataset \'' + identifier + '\'')
+        if dataset.delta is None:
+            return False
+        dataset_dir = self.get_dataset_dir(identifier)
+        self.write_rows(dataset_dir, dataset.columns, dataset.fetch_rows())
+        # The data file is complete at this point. Removing the delta file
+        # makes the snapshot visible.
+        os.remove(os.path.join(dataset_dir, DELTA_FILE))
+        return True
+
+    def create_delta(self,
+            dataset: DatasetHandle,
+            columns: List[DatasetColumn],
+            deletes: Optional[List[str]] = None,
+            updates: Optional[Dict[str, Dict[int, Any]]] = None,
+            inserts: Optional[List[Tuple[int, DatasetRow]]] = None
+        ) -> DatasetDescriptor:
+        """Create a new dataset that is derived from the given dataset. The new
+        dataset is stored as a delta that references the given dataset. Column
+        values are mapped from the given dataset to the new dataset by column
+        identifier. Values for new columns are None.
+
+        The row changes are applied in the following order: (1) cell updates,
+        (2) row deletions, and (3) row insertions. Inserted rows are placed at
+        the given position in the resulting dataset.
+
+        If the resulting chain of deltas exceeds the maximum chain length the
+        new dataset is compacted into a snapshot.
+
+        Raises ValueError if the given dataset is not a dataset in the file
+        system datastore, if the column identifier or the identifier of the
+        inserted rows are not unique, or if the number of values for an
+        inserted row does not match the number of columns.
+
+        Parameters
+        ----------
+        dataset: vizier.datastore.dataset.DatasetHandle
+            Handle for the parent dataset
+        columns: list(vizier.datastore.dataset.DatasetColumn)
+            Schema of the new dataset
+        deletes: list(string), optional
+            Identifier of deleted rows
+        updates: dict, optional
+            Updated cell values keyed by row identifier and column identifier
+        inserts: list((int, vizier.datastore.dataset.DatasetRow)), optional
+            Inserted rows and their position in the new dataset
+
+        Returns
+        -------
+        vizier.datastore.dataset.DatasetDescriptor
         """
-        super(FileSystemDatastore, self).__init__(base_path)
+        if not isinstance(dataset, FileSystemDatasetHandle):
+            raise ValueError('not a file system dataset')
+        inserts = inserts if inserts is not None else list()
+        validate_dataset(columns=columns, rows=[row for _, row in inserts])
+        delta = DatasetDelta(
+            parent=dataset.identifier,
+            depth=dataset.delta.depth + 1 if dataset.delta is not None else 1,
+            deletes=deletes,
+            updates=updates,
+            inserts=inserts
+        )
+        max_row_id = dataset.max_row_id()
+        for _, row in inserts:
+            max_row_id = max(max_row_id, int(row.identifier))
+        identifier = get_unique_identifier()
+        dataset_dir = self.get_dataset_dir(identifier)
+        os.makedirs(dataset_dir)
+        delta_file = os.path.join(dataset_dir, DELTA_FILE)
+        delta.to_file(delta_file)
+        # Keep track of the datasets that are stored as a delta of the parent
+        # dataset. They need to be compacted before the parent is deleted.
+        dependents_file = os.path.join(
+            self.get_dataset_dir(dataset.identifier),
+            DEPENDENTS_FILE
+        )
+        with open(dependents_file, 'a') as f:
+            f.write(identifier + '\n')
+        FileSystemDatasetHandle(
+            identifier=identifier,
+            columns=columns,
+            data_file=delta_file,
+            row_count=dataset.row_count - len(delta.deletes) + len(inserts),
+            max_row_id=max_row_id,
+            delta=delta,
+            parent=dataset
+        ).to_file(
+            descriptor_file=os.path.join(dataset_dir, DESCRIPTOR_FILE)
+        )
+        if delta.depth > self.max_delta_chain:
+            self.compact_dataset(identifier)
+        return DatasetDescriptor(identifier=identifier, columns=columns)
 
     def create_dataset(self, 
             columns: List[DatasetColumn], 
@@ -126,8 +303,7 @@ class FileSystemDatastore(DefaultDatastore):
         dataset_dir = self.get_dataset_dir(identifier)
         os.makedirs(dataset_dir)
         # Write rows to data file
-        data_file = os.path.join(dataset_dir, DATA_FILE)
-        DefaultJsonDatasetReader(data_file).write(rows)
+        data_file, index_file = self.write_rows(dataset_dir, columns, rows)
         # Create dataset an write dataset file
         dataset = FileSystemDatasetHandle(
             identifier=identifier,
@@ -135,7 +311,9 @@ class FileSystemDatastore(DefaultDatastore):
             data_file=data_file,
             row_count=len(rows),
             max_row_id=max_row_id,
-            properties=properties
+            properties=properties,
+            index_file=index_file,
+            data_format=self.data_format
         )
         dataset.to_file(
             descriptor_file=os.path.join(dataset_dir, DESCRIPTOR_FILE)
@@ -175,6 +353,18 @@ class FileSystemDatastore(DefaultDatastore):
         dataset_dir = self.get_dataset_dir(identifier)
         if not os.path.isdir(dataset_dir):
             return False
+        # Datasets that are stored as a delta of the deleted dataset need to
+        # be compacted first. Dependents that have been deleted or compacted
+        # in the meantime are skipped.
+        dependents_file = os.path.join(dataset_dir, DEPENDENTS_FILE)
+        if os.path.isfile(dependents_file):
+            with open(dependents_file, 'r') as f:
+                dependents = [line.strip() for line in f if line.strip()]
+            for name in dependents:
+                delta_file = os.path.join(self.get_dataset_dir(name), DELTA_FILE)
+                if os.path.isfile(delta_file):
+                    if DatasetDelta.from_file(delta_file).parent == identifier:
+                        self.compact_dataset(name)
         shutil.rmtree(dataset_dir)
         return True
 
@@ -218,27 +408,70 @@ class FileSystemDatastore(DefaultDatastore):
             # descriptor and file handle
             return self.load_dataset(fh, proposed_schema), fh
         else:
-            # Manually download the file temporarily
-            temp_dir = tempfile.mkdtemp()
-            try:
-                response = urllib.request.urlopen(url)
-                filename = get_download_filename(url, response.info())
+            # Download the file temporarily. Return only the dataset descriptor
+            dataset, _ = self.download_dataset_if_modified(
+                url=url,
+                username=username,
+                password=password,
+                proposed_schema=proposed_schema
+            )
+            return dataset
+
+    def download_dataset_if_modified(self,
+            url: str,
+            username: str = None,
+            password: str = None,
+            validators: Optional[Dict[str, str]] = None,
+            proposed_schema: List[Tuple[str,str]] = []
+        ) -> Tuple[Optional[FileSystemDatasetHandle], Dict[str, str]]:
+        """Create a new dataset from a web resource unless the resource has
+        not been modified since a previous download. The validators (i.e.,
+        ETag and Last-Modified header) of the previous download are sent with
+        the request. Returns the new dataset (or None if the resource has not
+        been modified) and the validators of the resource.
+
+        The resource is streamed into a temporary file that is removed after
+        the dataset has been loaded.
+
+        Raises ValueError if the given file could not be loaded as a dataset.
+
+        Parameters
+        ----------
+        url : string
+            Unique resource identifier for external resource that is accessed
+        username: string, optional
+            Optional user name for authentication
+        password: string, optional
+            Optional password for authentication
+        validators: dict, optional
+            Validators of a previous download of the resource
+
+        Returns
+        -------
+        vizier.datastore.fs.dataset.FileSystemDatasetHandle, dict
+        """
+        temp_dir = tempfile.mkdtemp()
+        try:
+            with Download(
+                url,
+                username=username,
+                password=password,
+                validators=validators
+            ) as download:
+                if not download.modified:
+                    return None, download.validators
+                filename = cast(str, download.filename)
                 download_file = os.path.join(temp_dir, filename)
                 with open(download_file, 'wb') as f:
-                    f.write(response.read())
-                fh = FileHandle(
-                    identifier=filename,
-                    filepath=download_file,
-                    file_name=filename
-                )
-                dataset = self.load_dataset(fh, proposed_schema)
-                shutil.rmtree(temp_dir)
-                # Return only the dataset descriptor
-                return dataset
-            except Exception as ex:
-                if os.path.isdir(temp_dir):
-                    shutil.rmtree(temp_dir)
-                raise ex
+                    download.write_to(f)
+            fh = FileHandle(
+                identifier=filename,
+                filepath=download_file,
+                file_name=filename
+            )
+            return self.load_dataset(fh, proposed_schema), download.validators
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
     def get_dataset(self, identifier, force_profiler: Optional[bool] = None):
         """Read a full dataset from the data store. Returns None if no dataset
@@ -258,60 +491,151 @@ class FileSystemDatastore(DefaultDatastore):
         dataset_dir = self.get_dataset_dir(identifier)
         if not os.path.isdir(dataset_dir):
             return None
-        
         if force_profiler:
             # Get dataset. Raise exception if dataset is unknown
-            dataset = FileSystemDatasetHandle.from_file(
-                descriptor_file=os.path.join(dataset_dir, DESCRIPTOR_FILE),
-                data_file=os.path.join(dataset_dir, DATA_FILE),
+            dataset = read_dataset_handle(
+                dataset_dir=dataset_dir,
                 properties_filename=self.get_properties_filename(identifier)
             )
             if dataset is None:
                 raise ValueError('unknown dataset \'' + identifier + '\'')
+            # Datasets are immutable. Profiling results therefore only need to
+            # be computed once.
+            if self.get_profiler_name() not in dataset.properties.get('is_profiled', []):
+                self.profile_dataset(dataset)
+
+        # Load the dataset handle
+        return read_dataset_handle(
+            dataset_dir=dataset_dir,
+            properties_filename=self.get_properties_filename(identifier)
+        )
+        
+    def get_profiler_name(self) -> str:
+        """Get the name of the configured profiler as it is recorded in the
+        properties of profiled datasets.
+
+        Returns
+        -------
+        string
+        """
+        if self.profiler == PROFILER_DATAMART:
+            return 'datamart_profiler'
+        return columnar.PROFILER_NAME
+
+    def get_column_profiles(self,
+            dataset: FileSystemDatasetHandle
+        ) -> Dict[int, Dict[str, Any]]:
+        """Get profiling results from the parent of a dataset that is stored
+        as a delta for all columns whose values are not modified by the delta.
+        Results can only be reused if the delta does not insert or delete rows
+        and if the parent was profiled by the native profiler. Returns a
+        dictionary that maps column identifier to profiling results.
 
-            column_ids = [col.identifier for col in dataset.columns]
+        Parameters
+        ----------
+        dataset: vizier.datastore.fs.dataset.FileSystemDatasetHandle
+            Handle for a dataset in the datastore
+
+        Returns
+        -------
+        dict
+        """
+        delta = dataset.delta
+        if delta is None or dataset.parent is None or not delta.preserves_rows:
+            return dict()
+        properties = self.get_properties(delta.parent)
+        if columnar.PROFILER_NAME not in properties.get('is_profiled', []):
+            return dict()
+        profiles = properties.get(columnar.KEY_COLUMNS, list())
+        if len(profiles) != len(dataset.parent.columns):
+            return dict()
+        updated = set()
+        for values in delta.updates.values():
+            updated.update(values.keys())
+        return {
+            col.identifier: profile
+            for col, profile in zip(dataset.parent.columns, profiles)
+            if col.identifier not in updated
+        }
+
+    def profile_dataset(self, dataset: FileSystemDatasetHandle) -> None:
+        """Run the configured data profiler on the given dataset. Updates the
+        column types in the dataset descriptor and stores the profiling
+        results in the dataset properties.
+
+        Parameters
+        ----------
+        dataset: vizier.datastore.fs.dataset.FileSystemDatasetHandle
+            Handle for a dataset in the datastore
+        """
+        if self.profiler == PROFILER_DATAMART:
             column_names = [col.name for col in dataset.columns]
             rows = dataset.fetch_rows()
-            rows_values = [el.values for el in rows]
-            df = DataFrame(rows_values, columns=column_names)
+            df = DataFrame([row.values for row in rows], columns=column_names)
             metadata = datamart.run(df)
-            properties_local = metadata
-            properties_local["is_profiled"] = [ "datamart_profiler"]
             column_types = datamart.get_types(df, metadata)
-            # Update column and row objects.
-            columns = []
-            for col_name, col_type, col_id in zip(column_names, column_types, column_ids):
-                columns.append(
-                    DatasetColumn(
-                        identifier=col_id,
-                        name=col_name.strip(),
-                        data_type=col_type
-                    )
+        else:
+            with dataset.reader() as reader:
+                metadata = columnar.run(
+                    columns=dataset.columns,
+                    rows=reader,
+                    sample_size=self.profiler_sample,
+                    profiles=self.get_column_profiles(dataset),
+                    row_count=dataset.row_count
+                )
+            column_types = columnar.get_types(metadata)
+        properties = dict(dataset.properties)
+        properties.update(metadata)
+        properties['is_profiled'] = [self.get_profiler_name()]
+        # Update column and row objects.
+        columns = []
+        for col, col_type in zip(dataset.columns, column_types):
+            columns.append(
+                DatasetColumn(
+                    identifier=col.identifier,
+                    name=col.name.strip(),
+                    data_type=col_type
                 )
-            dataset = FileSystemDatasetHandle(
-                identifier=identifier,
-                columns=columns,
-                data_file=os.path.join(dataset_dir, DATA_FILE),
-                row_count=dataset.row_count,
-                max_row_id=dataset._max_row_id,
-                properties=properties_local
             )
-            dataset.to_file(
-                descriptor_file=os.path.join(dataset_dir, DESCRIPTOR_FILE)
+        profiled = FileSystemDatasetHandle(
+            identifier=dataset.identifier,
+            columns=columns,
+            data_file=dataset.data_file,
+            row_count=dataset.row_count,
+            max_row_id=dataset._max_row_id,
+            properties=properties,
+            index_file=dataset.index_file,
+            data_format=dataset.data_format,
+            delta=dataset.delta,
+            parent=dataset.parent
+        )
+        profiled.to_file(
+            descriptor_file=os.path.join(
+                self.get_dataset_dir(dataset.identifier),
+                DESCRIPTOR_FILE
             )
-            # Write metadata file if annotations are given
-            if properties_local != {}:
-                dataset.write_properties_to_file(self.get_properties_filename(identifier))
-
-        # Load the dataset handle
-        return FileSystemDatasetHandle.from_file(
-            descriptor_file=os.path.join(dataset_dir, DESCRIPTOR_FILE),
-            data_file=os.path.join(dataset_dir, DATA_FILE),
-            properties_filename=self.get_properties_filename(identifier)
         )
-        
+        profiled.write_properties_to_file(
+            self.get_properties_filename(dataset.identifier)
+        )
+
     def get_dataset_frame(self, identifier: str, force_profiler: Optional[bool] = None) -> Optional[DataFrame]:
-        return None
+        """Get a pandas DataFrame for the dataset with given identifier.
+        Returns None if no dataset with the given identifier exists.
+
+        Parameters
+        ----------
+        identifier : string
+            Unique dataset identifier
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        dataset = self.get_dataset(identifier, force_profiler=force_profiler)
+        if dataset is None:
+            return None
+        return dataset.to_dataframe()
 
     def get_objects(self, identifier=None, obj_type=None, key=None) -> DataObjectMetadata:
         """Get list of data objects for a resources of a given dataset. If only
@@ -364,36 +688,33 @@ class FileSystemDatastore(DefaultDatastore):
         if not f_handle.is_tabular:
             raise ValueError('cannot create dataset from file \'' + f_handle.name + '\'')
         # Open the file as a csv file. Expects that the first row contains the
-        # column names. Read dataset schema and dataset rows into two separate
-        # lists.
-        columns: List[DatasetColumn] = []
-        rows: List[DatasetRow] = []
-        with f_handle.open() as csvfile:
-            reader = csv.reader(csvfile, delimiter=f_handle.delimiter)
-            for col_name in next(reader):
-                columns.append(
-                    DatasetColumn(
-                        identifier=len(columns),
-                        name=col_name.strip()
-                    )
+        # column names. Rows are read and converted in chunks and written to
+        # the data file as a stream.
+        with CsvIngest(f_handle) as ingest:
+            columns = ingest.columns
+            # Get unique identifier and create subfolder for the new dataset
+            identifier = get_unique_identifier()
+            dataset_dir = self.get_dataset_dir(identifier)
+            os.makedirs(dataset_dir)
+            try:
+                data_file, index_file = self.write_rows(
+                    dataset_dir,
+                    columns,
+                    ingest.rows()
                 )
-            for row in reader:
-                values = [cast(v.strip()) for v in row]
-                rows.append(DatasetRow(identifier=str(len(rows)), values=values))
-        # Get unique identifier and create subfolder for the new dataset
-        identifier = get_unique_identifier()
-        dataset_dir = self.get_dataset_dir(identifier)
-        os.makedirs(dataset_dir)
-        # Write rows to data file
-        data_file = os.path.join(dataset_dir, DATA_FILE)
-        DefaultJsonDatasetReader(data_file).write(rows)
+            except Exception:
+                shutil.rmtree(dataset_dir)
+                raise
+        row_count = ingest.row_count
         # Create dataset an write descriptor to file
         dataset = FileSystemDatasetHandle(
             identifier=identifier,
             columns=columns,
             data_file=data_file,
-            row_count=len(rows),
-            max_row_id=len(rows) - 1
+            row_count=row_count,
+            max_row_id=row_count - 1,
+            index_file=index_file,
+            data_format=self.data_format
         )
         dataset.to_file(
             descriptor_file=os.path.join(dataset_dir, DESCRIPTOR_FILE)
@@ -431,6 +752,7 @@ class FileSystemDatastore(DefaultDatastore):
             if os.path.exists(data_object_filename):
                 data_object_filename = None
 
+        os.makedirs(os.path.dirname(data_object_filename), exist_ok=True)
         with open(data_object_filename, "wb") as f:
             f.write(value)
         with open(data_object_filename+".mime", "w") as f:
@@ -459,7 +781,7 @@ class FileSystemDatastore(DefaultDatastore):
                 if actual_type != expected_type:
                     raise Exception("Object {} is of type {}, but of type {}".format(identifier, actual_type, expected_type))
         with open(data_object_filename, 'rb') as f:
-            f.read()
+            return f.read()
 
     def get_data_object_file(self, identifier: str) -> str:
         """Get the absolute path of the file that maintains the dataset metadata
@@ -497,6 +819,75 @@ class FileSystemDatastore(DefaultDatastore):
         # TODO: Implementation needed
         raise NotImplementedError()
 
+    def write_rows(self,
+            dataset_dir: str,
+            columns: List[DatasetColumn],
+            rows: Iterable[DatasetRow]
+        ) -> Tuple[str, Optional[str]]:
+        """Write the rows of a new dataset to the data file in the given
+        dataset folder using the data format of the datastore. Returns the
+        path to the data file and the path to the row index file (or None if
+        the data format does not use an index).
+
+        Rows are written as a stream for the Json format. The Parquet format
+        requires all rows to be in memory.
+
+        Parameters
+        ----------
+        dataset_dir: string
+            Path to the dataset folder
+        columns: list(vizier.datastore.dataset.DatasetColumn)
+            Dataset schema
+        rows: iterable(vizier.datastore.dataset.DatasetRow)
+            Dataset rows
+
+        Returns
+        -------
+        string, string
+        """
+        if self.data_format == FORMAT_PARQUET:
+            from vizier.datastore.fs.parquet import write_rows
+            data_file = os.path.join(dataset_dir, PARQUET_DATA_FILE)
+            write_rows(data_file, columns=columns, rows=list(rows))
+            return data_file, None
+        data_file = os.path.join(dataset_dir, DATA_FILE)
+        index_file = os.path.join(dataset_dir, INDEX_FILE)
+        IndexedJsonDatasetReader(data_file, index_file=index_file).write(rows)
+        return data_file, index_file
+
+    def execute_query(self,
+            query: str,
+            datasets: Dict[str, str]
+        ) -> sql.SQLQueryResult:
+        """Evaluate a SQL query over the datasets with the given names using
+        the embedded SQL engine. The datasets are given as a mapping from the
+        dataset name to the dataset identifier. Only datasets whose name
+        occurs in the query are made available to the query.
+
+        Raises ValueError if a referenced dataset does not exist or if the
+        query evaluation fails.
+
+        Parameters
+        ----------
+        query: string
+            SQL query
+        datasets: dict(string, string)
+            Mapping of dataset names to dataset identifier
+
+        Returns
+        -------
+        vizier.datastore.fs.sql.SQLQueryResult
+        """
+        tables = dict()
+        for name in sql.get_referenced_names(query, datasets.keys()):
+            identifier = datasets[name]
+            dataset = self.get_dataset(identifier)
+            if dataset is None:
+                raise ValueError('unknown dataset \'' + identifier + '\'')
+            dataset_dir = self.get_dataset_dir(identifier)
+            tables[name] = (dataset, sql.create_table(dataset, dataset_dir))
+        return sql.execute_query(query, tables)
+
     def query(self, 
         query: str,
         datasets: Dict[str, DatasetDescriptor]
@@ -504,14 +895,112 @@ class FileSystemDatastore(DefaultDatastore):
         """Pose a raw SQL query against the specified datasets.
         Doesn't actually change the data, just queries it.
 
-        Not supported by FS
+        The result is in the data container format that is returned by the
+        Mimir datastore.
         """
-        raise NotImplementedError
+        result = self.execute_query(
+            query=query,
+            datasets={name: ds.identifier for name, ds in datasets.items()}
+        )
+        return result.to_dict()
 
 # ------------------------------------------------------------------------------
 # Helper Methods
 # ------------------------------------------------------------------------------
 
+def migrate_dataset(dataset_dir: str) -> bool:
+    """Convert the rows of a dataset that is stored in the legacy Json format
+    into the indexed format. Returns True if the dataset was converted and
+    False if the dataset is already in the indexed format.
+
+    The new files are written under temporary names first. The data file is
+    moved into place last so that an interrupted migration is repeated when
+    the dataset is accessed the next time.
+
+    Parameters
+    ----------
+    dataset_dir: string
+        Path to the dataset folder
+
+    Returns
+    -------
+    bool
+    """
+    legacy_file = os.path.join(dataset_dir, LEGACY_DATA_FILE)
+    data_file = os.path.join(dataset_dir, DATA_FILE)
+    if os.path.isfile(data_file) or not os.path.isfile(legacy_file):
+        return False
+    index_file = os.path.join(dataset_dir, INDEX_FILE)
+    # Use unique names for the temporary files in case the same dataset is
+    # migrated by multiple processes at the same time.
+    suffix = '.' + get_unique_identifier()
+    tmp_data_file = data_file + suffix
+    tmp_index_file = index_file + suffix
+    with DefaultJsonDatasetReader(legacy_file) as reader:
+        IndexedJsonDatasetReader(
+            tmp_data_file,
+            index_file=tmp_index_file
+        ).write(reader)
+    os.replace(tmp_index_file, index_file)
+    os.replace(tmp_data_file, data_file)
+    if os.path.isfile(legacy_file):
+        os.remove(legacy_file)
+    return True
+
+
+def read_dataset_handle(
+        dataset_dir: str,
+        properties_filename: Optional[str] = None
+    ) -> FileSystemDatasetHandle:
+    """Read the handle for the dataset in the given folder. The format of the
+    data file is determined by the files that exist in the folder. If the
+    dataset is stored as a delta the handles for all datasets in the delta
+    chain are read as well.
+
+    Datasets that were created by earlier versions of the datastore are
+    converted into the indexed format.
+
+    Parameters
+    ----------
+    dataset_dir: string
+        Path to the dataset folder
+    properties_filename: string, optional
+        Path to the file containing the dataset properties
+
+    Returns
+    -------
+    vizier.datastore.fs.dataset.FileSystemDatasetHandle
+    """
+    descriptor_file = os.path.join(dataset_dir, DESCRIPTOR_FILE)
+    delta_file = os.path.join(dataset_dir, DELTA_FILE)
+    if os.path.isfile(delta_file):
+        delta = DatasetDelta.from_file(delta_file)
+        return FileSystemDatasetHandle.from_file(
+            descriptor_file=descriptor_file,
+            data_file=delta_file,
+            properties_filename=properties_filename,
+            delta=delta,
+            parent=read_dataset_handle(
+                os.path.join(os.path.dirname(dataset_dir), delta.parent)
+            )
+        )
+    migrate_dataset(dataset_dir)
+    parquet_file = os.path.join(dataset_dir, PARQUET_DATA_FILE)
+    if os.path.isfile(parquet_file):
+        return FileSystemDatasetHandle.from_file(
+            descriptor_file=descriptor_file,
+            data_file=parquet_file,
+            properties_filename=properties_filename,
+            data_format=FORMAT_PARQUET
+        )
+    return FileSystemDatasetHandle.from_file(
+        descriptor_file=descriptor_file,
+        data_file=os.path.join(dataset_dir, DATA_FILE),
+        properties_filename=properties_filename,
+        index_file=os.path.join(dataset_dir, INDEX_FILE)
+    )
+
+
 def validate_dataset(columns: List[DatasetColumn], rows: List[DatasetRow]) -> Tuple[int,int]:
     """Validate that (i) each column has a unique identifier, (ii) each row has
     a unique identifier, and (iii) each row has exactly one value per column.
@@ -21,18 +21,32 @@ two files: the dataset descriptor and the data itself.
 The dataset descriptor is stored in a file in Json format that contains the
 schema, row count, and the counters for column and row identifier.
 
-The data file is also in Json format containing one an array of rows where each
-row is an object with id and an array of values, one for each of the columns in
-the dataset schema.
+The data file contains one Json object per line. Each row is an object with id
+and an array of values, one for each of the columns in the dataset schema. The
+byte offsets of the rows in the data file are kept in a separate index file to
+allow for random access to pages of rows.
+
+Datasets that were created by earlier versions of the datastore store all rows
+in a single Json array. These datasets do not have an index file. They are
+still readable (and converted by the datastore when they are accessed).
+
+Alternatively, the rows of a dataset can be stored in columnar format in a
+Parquet file (see vizier.datastore.fs.parquet). Datasets that are derived
+from another dataset may also be stored as a delta that references the parent
+dataset (see vizier.datastore.fs.delta).
 """
 
 import json
 import os
-from typing import List, Optional, Dict, Any
+from typing import cast, List, Optional, Dict, Any
+
+from pandas import DataFrame
 
 from vizier.datastore.dataset import DatasetColumn, DatasetHandle
 from vizier.datastore.annotation.base import DatasetCaveat
-from vizier.datastore.reader import DefaultJsonDatasetReader
+from vizier.datastore.fs.delta import DatasetDelta, DeltaDatasetReader, row_key
+from vizier.datastore.reader import DatasetReader, DefaultJsonDatasetReader
+from vizier.datastore.reader import IndexedJsonDatasetReader
 
 
 """Json element labels for dataset serialization."""
@@ -44,6 +58,10 @@ KEY_COLUMNS = 'columns'
 KEY_ROWCOUNT = 'rowCount'
 KEY_MAXROWID = 'maxRowId'
 
+"""Supported formats for data files."""
+FORMAT_JSON = 'json'
+FORMAT_PARQUET = 'parquet'
+
 
 class FileSystemDatasetHandle(DatasetHandle):
     """Handle for a dataset that is stored on the file system.
@@ -51,13 +69,20 @@ class FileSystemDatasetHandle(DatasetHandle):
     The dataset handle keeps counters for columns and rows id's to generate
     unique unique identifier.
 
-    The dataset rows are stored in a separate file. The file format is JSON with
-    the following structure:
+    The dataset rows are stored in a separate file. The file contains one row
+    object per line with the following structure:
+        {'id': int, 'val': [...]}
+    The byte offsets of the rows are stored in the index file. If the data
+    format is Parquet, the rows are stored in a Parquet file instead. If no
+    index file is given the rows are expected to be stored in the legacy Json
+    format:
         {
             'rows': [
-                {'id': int, 'values': [...]}
+                {'id': int, 'val': [...]}
             ]
         }
+    If the dataset is stored as a delta the data file is the delta file and
+    rows are read from the parent dataset.
     """
     def __init__(self, 
             identifier: str, 
@@ -65,7 +90,11 @@ class FileSystemDatasetHandle(DatasetHandle):
             max_row_id: int, 
             data_file: str, 
             row_count: int = 0,
-            properties: Dict[str, Any] = {}
+            properties: Dict[str, Any] = {},
+            index_file: Optional[str] = None,
+            data_format: str = FORMAT_JSON,
+            delta: Optional[DatasetDelta] = None,
+            parent: Optional[DatasetHandle] = None
     ):
         """Initialize the dataset handle.
 
@@ -83,6 +112,16 @@ class FileSystemDatasetHandle(DatasetHandle):
             Number of rows in the dataset
         properties: dict(string, ANY), optional
             Annotations for dataset components
+        index_file: string, optional
+            Path to the row offset index for the data file. If None, the data
+            file is expected to be in the legacy (single Json array) format.
+        data_format: string, optional
+            Format of the data file (FORMAT_JSON or FORMAT_PARQUET)
+        delta: vizier.datastore.fs.delta.DatasetDelta, optional
+            Changes with respect to the parent dataset if the dataset is
+            stored as a delta
+        parent: vizier.datastore.dataset.DatasetHandle, optional
+            Handle for the parent dataset if the dataset is stored as a delta
         """
         super(FileSystemDatasetHandle, self).__init__(
             identifier=identifier,
@@ -91,6 +130,12 @@ class FileSystemDatasetHandle(DatasetHandle):
         self._row_count=row_count
         self.properties = properties
         self.data_file = data_file
+        self.index_file = index_file
+        self.data_format = data_format
+        self.delta = delta
+        self.parent = parent
+        if delta is not None and parent is None:
+            raise ValueError('missing parent for delta')
         if max_row_id is None:
             raise ValueError('invalid max')
         self._max_row_id = max_row_id
@@ -108,7 +153,11 @@ class FileSystemDatasetHandle(DatasetHandle):
     def from_file(
         descriptor_file: str, 
         data_file: str, 
-        properties_filename: Optional[str] = None
+        properties_filename: Optional[str] = None,
+        index_file: Optional[str] = None,
+        data_format: str = FORMAT_JSON,
+        delta: Optional[DatasetDelta] = None,
+        parent: Optional[DatasetHandle] = None
     ) -> "FileSystemDatasetHandle":
         """Read dataset descriptor from file and return a new instance of the
         dataset handle.
@@ -121,6 +170,14 @@ class FileSystemDatasetHandle(DatasetHandle):
             Path to the file that contains the dataset rows.
         properties: vizier.datastore.annotation.dataset.DatasetMetadata, optional
             Annotations for dataset components
+        index_file: string, optional
+            Path to the row offset index for the data file.
+        data_format: string, optional
+            Format of the data file (FORMAT_JSON or FORMAT_PARQUET)
+        delta: vizier.datastore.fs.delta.DatasetDelta, optional
+            Changes with respect to the parent dataset
+        parent: vizier.datastore.dataset.DatasetHandle, optional
+            Handle for the parent dataset
 
         Returns
         -------
@@ -145,7 +202,11 @@ class FileSystemDatasetHandle(DatasetHandle):
             data_file=data_file,
             row_count=doc[KEY_ROWCOUNT],
             max_row_id=doc[KEY_MAXROWID],
-            properties=properties
+            properties=properties,
+            index_file=index_file,
+            data_format=data_format,
+            delta=delta,
+            parent=parent
         )
 
     def write_properties_to_file(self, file: str) -> None:
@@ -183,6 +244,48 @@ class FileSystemDatasetHandle(DatasetHandle):
         """
         return dict()
 
+    def has_row(self, row_id: Any) -> bool:
+        """Test if the dataset contains a row with the given identifier.
+
+        Datasets that are stored as a delta check the changes first and only
+        look at the parent dataset for rows that are not inserted or deleted.
+        Row identifiers in most snapshots equal the row positions. The row at
+        the position that matches the identifier is therefore read first (via
+        the row index). All rows are only scanned if this row has a different
+        identifier (e.g., for sorted datasets).
+
+        Parameters
+        ----------
+        row_id: int or string
+            Unique row identifier
+
+        Returns
+        -------
+        bool
+        """
+        key = row_key(row_id)
+        if int(key) < 0 or int(key) > self.max_row_id():
+            return False
+        if self.delta is not None:
+            # Moved rows are deleted and inserted by the same delta.
+            for _, row in self.delta.inserts:
+                if row_key(row.identifier) == key:
+                    return True
+            if key in self.delta.deletes:
+                return False
+            if isinstance(self.parent, FileSystemDatasetHandle):
+                return self.parent.has_row(key)
+        elif int(key) < self.row_count:
+            with self.reader(offset=int(key), limit=1) as reader:
+                for row in reader:
+                    if row_key(row.identifier) == key:
+                        return True
+        with self.reader() as reader:
+            for row in reader:
+                if row_key(row.identifier) == key:
+                    return True
+        return False
+
     def max_row_id(self) -> int:
         """Get maximum identifier for all rows in the dataset. If the dataset
         is empty the result is -1.
@@ -193,7 +296,7 @@ class FileSystemDatasetHandle(DatasetHandle):
         """
         return self._max_row_id
 
-    def reader(self, offset=0, limit=-1):
+    def reader(self, offset: int = 0, limit: Optional[int] = None) -> DatasetReader:
         """Get reader for the dataset to access the dataset rows. The optional
         offset amd limit parameters are used to retrieve only a subset of
         rows.
@@ -207,8 +310,32 @@ class FileSystemDatasetHandle(DatasetHandle):
 
         Returns
         -------
-        vizier.datastore.reader.DefaultJsonDatasetReader
+        vizier.datastore.reader.DatasetReader
         """
+        if self.delta is not None:
+            return DeltaDatasetReader(
+                parent=cast(DatasetHandle, self.parent),
+                columns=self.columns,
+                delta=self.delta,
+                offset=offset,
+                limit=limit
+            )
+        if self.data_format == FORMAT_PARQUET:
+            from vizier.datastore.fs.parquet import ParquetDatasetReader
+            return ParquetDatasetReader(
+                self.data_file,
+                columns=self.columns,
+                offset=offset,
+                limit=limit
+            )
+        if self.index_file is not None:
+            return IndexedJsonDatasetReader(
+                self.data_file,
+                index_file=self.index_file,
+                columns=self.columns,
+                offset=offset,
+                limit=limit
+            )
         return DefaultJsonDatasetReader(
             self.data_file,
             columns=self.columns,
@@ -216,6 +343,27 @@ class FileSystemDatasetHandle(DatasetHandle):
             limit=limit
         )
 
+    def to_dataframe(self) -> DataFrame:
+        """Get pandas data frame containing the full dataset. The data frame
+        index contains the row identifier.
+
+        For datasets in Parquet format the data file is memory-mapped and
+        numeric columns are converted without copying the data.
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        if self.delta is None and self.data_format == FORMAT_PARQUET:
+            from vizier.datastore.fs.parquet import read_dataframe
+            return read_dataframe(self.data_file, columns=self.columns)
+        rows = self.fetch_rows()
+        return DataFrame(
+            [row.values for row in rows],
+            index=[str(row.identifier) for row in rows],
+            columns=[col.name for col in self.columns]
+        )
+
     def to_file(self, descriptor_file: str) -> None:
         """Write dataset descriptor to file. The default serialization format is
         Json.
@@ -0,0 +1,347 @@
+# Copyright (C) 2017-2019 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Delta storage for datasets in the file system datastore. Instead of
+writing a full copy of the rows, a dataset that is derived from another
+dataset by a small change (e.g., a cell update or a row deletion) can be
+stored as a delta that references the parent dataset.
+
+The schema of the derived dataset is stored in the dataset descriptor. Column
+values are mapped from the parent dataset to the derived dataset by column
+identifier. Columns that do not exist in the parent dataset are empty. The
+delta itself contains three kinds of row changes that are applied in the
+following order: (1) cell updates, (2) row deletions, and (3) row insertions.
+Rows in updates and deletions are referenced by their identifier. Inserted
+rows are placed at the given position in the resulting dataset.
+
+Deltas are resolved while reading. Parent datasets are read as a stream. The
+rows of the derived dataset are therefore never materialized in memory.
+"""
+
+import json
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from vizier.datastore.dataset import DatasetColumn, DatasetHandle, DatasetRow
+from vizier.datastore.reader import DatasetReader
+
+
+"""Json element names for delta serialization."""
+KEY_DELETES = 'deletes'
+KEY_DEPTH = 'depth'
+KEY_INSERTS = 'inserts'
+KEY_PARENT = 'parent'
+KEY_POSITION = 'pos'
+KEY_ROW_ID = 'id'
+KEY_ROW_VALUES = 'val'
+KEY_UPDATES = 'updates'
+
+
+class DatasetDelta(object):
+    """Changes of a dataset with respect to its parent dataset.
+
+    Attributes
+    ----------
+    parent: string
+        Identifier of the parent dataset
+    depth: int
+        Number of deltas between the dataset and the nearest snapshot (i.e., a
+        dataset with a data file)
+    deletes: set(string)
+        Identifier of deleted rows
+    updates: dict
+        Updated cell values. Values are keyed by the row identifier and the
+        column identifier
+    inserts: list((int, vizier.datastore.dataset.DatasetRow))
+        Inserted rows and their position in the resulting dataset
+    """
+    def __init__(self,
+            parent: str,
+            depth: int = 1,
+            deletes: Optional[List[str]] = None,
+            updates: Optional[Dict[str, Dict[int, Any]]] = None,
+            inserts: Optional[List[Tuple[int, DatasetRow]]] = None
+        ):
+        """Initialize the delta components.
+
+        Parameters
+        ----------
+        parent: string
+            Identifier of the parent dataset
+        depth: int, optional
+            Number of deltas between the dataset and the nearest snapshot
+        deletes: list(string), optional
+            Identifier of deleted rows
+        updates: dict, optional
+            Updated cell values keyed by row identifier and column identifier
+        inserts: list((int, vizier.datastore.dataset.DatasetRow)), optional
+            Inserted rows and their position in the resulting dataset
+        """
+        self.parent = parent
+        self.depth = depth
+        self.deletes: Set[str] = set(
+            row_key(row_id) for row_id in deletes
+        ) if deletes is not None else set()
+        self.updates: Dict[str, Dict[int, Any]] = dict()
+        if updates is not None:
+            for row_id, values in updates.items():
+                self.updates[row_key(row_id)] = dict(values)
+        self.inserts: List[Tuple[int, DatasetRow]] = sorted(
+            inserts if inserts is not None else list(),
+            key=lambda entry: entry[0]
+        )
+
+    @staticmethod
+    def from_file(filename: str) -> "DatasetDelta":
+        """Read delta from the given file.
+
+        Parameters
+        ----------
+        filename: string
+            Path to the delta file
+
+        Returns
+        -------
+        vizier.datastore.fs.delta.DatasetDelta
+        """
+        with open(filename, 'r') as f:
+            doc = json.load(f)
+        return DatasetDelta(
+            parent=doc[KEY_PARENT],
+            depth=doc[KEY_DEPTH],
+            deletes=doc[KEY_DELETES],
+            updates={
+                row_id: {int(col_id): v for col_id, v in values.items()}
+                for row_id, values in doc[KEY_UPDATES].items()
+            },
+            inserts=[
+                (
+                    obj[KEY_POSITION],
+                    DatasetRow(
+                        identifier=obj[KEY_ROW_ID],
+                        values=obj[KEY_ROW_VALUES]
+                    )
+                ) for obj in doc[KEY_INSERTS]
+            ]
+        )
+
+    @property
+    def preserves_rows(self) -> bool:
+        """True if the delta does not delete or insert any rows. The position
+        of each row in the resulting dataset is then the same as in the parent
+        dataset.
+
+        Returns
+        -------
+        bool
+        """
+        return len(self.deletes) == 0 and len(self.inserts) == 0
+
+    def to_file(self, filename: str) -> None:
+        """Write delta to the given file.
+
+        Parameters
+        ----------
+        filename: string
+            Path to the delta file
+        """
+        doc = {
+            KEY_PARENT: self.parent,
+            KEY_DEPTH: self.depth,
+            KEY_DELETES: sorted(self.deletes),
+            KEY_UPDATES: {
+                row_id: {str(col_id): v for col_id, v in values.items()}
+                for row_id, values in self.updates.items()
+            },
+            KEY_INSERTS: [{
+                    KEY_POSITION: pos,
+                    KEY_ROW_ID: row.identifier,
+                    KEY_ROW_VALUES: row.values
+                } for pos, row in self.inserts
+            ]
+        }
+        with open(filename, 'w') as f:
+            json.dump(doc, f)
+
+
+class DeltaDatasetReader(DatasetReader):
+    """Dataset reader for datasets that are stored as a delta. The reader
+    resolves the delta while reading the rows of the parent dataset.
+    """
+    def __init__(self,
+            parent: DatasetHandle,
+            columns: List[DatasetColumn],
+            delta: DatasetDelta,
+            offset: int = 0,
+            limit: Optional[int] = None):
+        """Initialize the parent dataset and the delta.
+
+        Parameters
+        ----------
+        parent: vizier.datastore.dataset.DatasetHandle
+            Handle for the parent dataset
+        columns: list(vizier.datastore.base.DatasetColumn)
+            Schema of the resulting dataset
+        delta: vizier.datastore.fs.delta.DatasetDelta
+            Changes with respect to the parent dataset
+        offset: int, optional
+            Number of rows at the beginning of the list that are skipped.
+        limit: int, optional
+            Limits the number of rows that are returned. A negative value or
+            None indicates that all rows are returned.
+        """
+        self.parent = parent
+        self.columns = columns
+        self.delta = delta
+        self.offset = offset
+        self.limit = limit if limit is None or limit >= 0 else None
+        # Variables that maintain the internal state of the reader, i.e., the
+        # iterator over the requested rows.
+        self.is_open = False
+        self.rows: Optional[Iterator[DatasetRow]] = None
+
+    def close(self):
+        """Release the row iterator and set the is_open flag to False."""
+        self.rows = None
+        self.is_open = False
+
+    def __next__(self):
+        """Return the next row in the dataset iterator. Raises StopIteration if
+        end of the dataset is reached or the reader has been closed.
+
+        Returns
+        -------
+        vizier.datastore.base.DatasetRow
+        """
+        if self.is_open and self.rows is not None:
+            row = next(self.rows, None)
+            if row is not None:
+                return row
+            self.close()
+        raise StopIteration
+
+    def open(self):
+        """Setup the reader by opening a reader for the parent dataset.
+
+        Returns
+        -------
+        vizier.datastore.fs.delta.DeltaDatasetReader
+        """
+        if not self.is_open:
+            self.rows = iter_rows(
+                parent=self.parent,
+                columns=self.columns,
+                delta=self.delta,
+                offset=self.offset,
+                limit=self.limit
+            )
+            self.is_open = True
+        return self
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def iter_rows(
+        parent: DatasetHandle,
+        columns: List[DatasetColumn],
+        delta: DatasetDelta,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Iterator[DatasetRow]:
+    """Iterate over the rows of a dataset that is defined by a delta on the
+    given parent dataset.
+
+    If the delta does not delete or insert rows the offset and limit are
+    passed on to the parent reader. Otherwise, the rows of the parent dataset
+    are read from the beginning.
+
+    Parameters
+    ----------
+    parent: vizier.datastore.dataset.DatasetHandle
+        Handle for the parent dataset
+    columns: list(vizier.datastore.base.DatasetColumn)
+        Schema of the resulting dataset
+    delta: vizier.datastore.fs.delta.DatasetDelta
+        Changes with respect to the parent dataset
+    offset: int, optional
+        Number of rows at the beginning of the list that are skipped.
+    limit: int, optional
+        Limits the number of rows that are returned.
+
+    Returns
+    -------
+    iterator(vizier.datastore.base.DatasetRow)
+    """
+    # Map column positions in the resulting dataset to positions in the
+    # parent dataset
+    parent_index = {col.identifier: i for i, col in enumerate(parent.columns)}
+    mapping = [parent_index.get(col.identifier) for col in columns]
+    column_index = {col.identifier: i for i, col in enumerate(columns)}
+    updates = {
+        row_id: [(column_index[col_id], v) for col_id, v in values.items() if col_id in column_index]
+        for row_id, values in delta.updates.items()
+    }
+
+    def transform(row: DatasetRow) -> DatasetRow:
+        values = [row.values[i] if i is not None else None for i in mapping]
+        for col_idx, value in updates.get(row_key(row.identifier), []):
+            values[col_idx] = value
+        return DatasetRow(identifier=row.identifier, values=values)
+
+    if delta.preserves_rows:
+        with parent.reader(offset=offset, limit=limit) as reader:
+            for row in reader:
+                yield transform(row)
+        return
+
+    def merge() -> Iterator[DatasetRow]:
+        inserts = list(delta.inserts)
+        pos = 0
+        with parent.reader() as reader:
+            for row in reader:
+                if row_key(row.identifier) in delta.deletes:
+                    continue
+                while len(inserts) > 0 and inserts[0][0] <= pos:
+                    yield inserts.pop(0)[1]
+                    pos += 1
+                yield transform(row)
+                pos += 1
+        # Rows that are inserted at the end of the dataset
+        for _, row in inserts:
+            yield row
+
+    stop = offset + limit if limit is not None else None
+    for row in islice(merge(), offset, stop):
+        yield row
+
+
+def row_key(identifier: Any) -> str:
+    """Get normalized representation of a row identifier. Row identifier
+    in the file system datastore are integers. Depending on how a dataset was
+    created they are either represented as integers or as strings.
+
+    Parameters
+    ----------
+    identifier: int or string
+        Row identifier
+
+    Returns
+    -------
+    string
+    """
+    return str(int(identifier))
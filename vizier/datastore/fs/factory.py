@@ -21,25 +21,36 @@ import shutil
 from typing import Optional, Dict, Any
 
 from vizier.datastore.factory import DatastoreFactory
-from vizier.datastore.fs.base import FileSystemDatastore
+from vizier.datastore.fs.base import DEFAULT_MAX_DELTA_CHAIN, FileSystemDatastore
+from vizier.datastore.fs.base import PROFILER_NATIVE
+from vizier.datastore.fs.dataset import FORMAT_JSON
 
 
 """Configuration parameter."""
 PARA_DIRECTORY = 'directory'
+PARA_FORMAT = 'format'
+PARA_MAX_DELTA_CHAIN = 'maxDeltaChain'
+PARA_PROFILER = 'profiler'
+PARA_PROFILER_SAMPLE = 'profilerSample'
 
 
 class FileSystemDatastoreFactory(DatastoreFactory):
     """Datastore factory for file system based datastores."""
     def __init__(self, 
             base_path: Optional[str] = None, 
-            properties: Optional[Dict[str, Any]] = None
+            properties: Optional[Dict[str, Any]] = None,
+            data_format: str = FORMAT_JSON,
+            max_delta_chain: int = DEFAULT_MAX_DELTA_CHAIN,
+            profiler: str = PROFILER_NATIVE,
+            profiler_sample: int = 0
         ):
         """Initialize the reference to the base directory that contains all
         datastore folders.
 
-        Expects a base path or a dictionary with a single entry that contains
-        the base path for all created datastores. Raises ValueError if no base
-        path is given.
+        Expects a base path or a dictionary that contains the base path for all
+        created datastores. The dictionary may optionally contain the data
+        format for new datasets, the maximum length of delta chains, and the
+        data profiler settings. Raises ValueError if no base path is given.
 
         Parameters
         ----------
@@ -47,10 +58,30 @@ class FileSystemDatastoreFactory(DatastoreFactory):
             Datastore base path
         properties: dict, optional
             Dictionary of configuration properties
+        data_format: string, optional
+            Format for the data files of new datasets
+        max_delta_chain: int, optional
+            Maximum number of deltas between a dataset and its snapshot
+        profiler: string, optional
+            Data profiler that is run on datasets when profiling is requested
+        profiler_sample: int, optional
+            Number of sampled rows that are profiled (all rows if zero)
         """
         self.base_path = base_path
+        self.data_format = data_format
+        self.max_delta_chain = max_delta_chain
+        self.profiler = profiler
+        self.profiler_sample = profiler_sample
         if properties is not None:
             self.base_path = os.path.abspath(properties[PARA_DIRECTORY])
+            self.data_format = properties.get(PARA_FORMAT, data_format)
+            self.max_delta_chain = int(
+                properties.get(PARA_MAX_DELTA_CHAIN, max_delta_chain)
+            )
+            self.profiler = properties.get(PARA_PROFILER, profiler)
+            self.profiler_sample = int(
+                properties.get(PARA_PROFILER_SAMPLE, profiler_sample)
+            )
         if self.base_path is None:
             raise ValueError('no base path given')
 
@@ -83,4 +114,10 @@ class FileSystemDatastoreFactory(DatastoreFactory):
         vizier.datastore.base.Datastore
         """
         datastore_dir = os.path.join(self.base_path, identifier)
-        return FileSystemDatastore(datastore_dir)
+        return FileSystemDatastore(
+            datastore_dir,
+            data_format=self.data_format,
+            max_delta_chain=self.max_delta_chain,
+            profiler=self.profiler,
+            profiler_sample=self.profiler_sample
+        )
@@ -0,0 +1,210 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming ingest of CSV and TSV files into the file system datastore.
+
+Files are read in chunks of rows. The cell values in each chunk are converted
+one column at a time. Values that are integers or decimal numbers in their
+canonical form are detected and converted using vectorized string operations.
+Only the remaining values that may still be numbers (e.g., 'inf' or '1_000')
+are converted value by value. The result is the same as applying the
+vizier.core.util.cast function to each (stripped) cell value.
+
+Rows are handed to the caller as a stream. Only the rows in the current chunk
+are held in memory.
+"""
+
+import csv
+import io
+import logging
+import time
+from itertools import islice
+from typing import Any, Callable, IO, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from vizier.core.util import cast
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.filestore.base import FileHandle
+
+
+"""Default number of rows per chunk."""
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+"""Patterns for values that are converted using vectorized operations.
+Integers are limited to 18 digits to ensure that they fit into a 64-bit
+integer. Values that match neither pattern are only converted by the cast
+function if they match the candidate pattern. Any string that can be
+converted into an int or float in Python contains either a digit (ASCII or
+non-ASCII) or one of the special float values inf(inity) and nan.
+"""
+INT_PATTERN = r'[+-]?[0-9]{1,18}'
+FLOAT_PATTERN = r'[+-]?(([0-9]+\.[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?|[0-9]+[eE][+-]?[0-9]+)'
+CANDIDATE_PATTERN = r'(?i)[0-9]|[^\x00-\x7f]|inf|nan'
+
+"""String type for vectorized string operations."""
+STRING_DTYPE = 'string[pyarrow]'
+
+
+logger = logging.getLogger(__name__)
+
+
+class CsvIngest(object):
+    """Reader for a CSV or TSV file that returns the dataset schema and a
+    stream of dataset rows. The first row in the file is expected to contain
+    the column names. Rows that have fewer values than there are columns are
+    padded with empty values. Additional values in rows that have more values
+    than there are columns are kept. Empty lines are ignored.
+
+    The reader is a context manager. The file is opened (and the schema is
+    read) when the context is entered.
+    """
+    def __init__(self,
+            f_handle: FileHandle,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            progress: Optional[Callable[[int, float], None]] = None
+        ):
+        """Initialize the file handle and the chunk size.
+
+        Parameters
+        ----------
+        f_handle : vizier.filestore.base.FileHandle
+            Handle for the input file
+        chunk_size: int, optional
+            Number of rows per chunk
+        progress: func, optional
+            Function that is called with the number of rows read so far and
+            the number of rows per second after each chunk
+        """
+        if chunk_size < 1:
+            raise ValueError('invalid chunk size \'' + str(chunk_size) + '\'')
+        self.f_handle = f_handle
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.columns: List[DatasetColumn] = list()
+        self.row_count = 0
+        self.file: Optional[IO] = None
+        self.reader: Optional[Iterator[List[str]]] = None
+
+    def __enter__(self) -> "CsvIngest":
+        """Open the file and read the dataset schema."""
+        f = self.f_handle.open()
+        if self.f_handle.compressed:
+            # Gzip files are opened in binary mode
+            f = io.TextIOWrapper(f)
+        self.file = f
+        self.reader = csv.reader(f, delimiter=self.f_handle.delimiter)
+        header = next(self.reader, None)
+        if header is None:
+            self.close()
+            raise ValueError('empty file \'' + self.f_handle.name + '\'')
+        self.columns = [
+            DatasetColumn(identifier=i, name=name.strip())
+            for i, name in enumerate(header)
+        ]
+        return self
+
+    def __exit__(self, type, value, traceback):
+        """Close the file."""
+        self.close()
+        return False
+
+    def close(self) -> None:
+        """Close the input file."""
+        if self.file is not None:
+            self.file.close()
+        self.file = None
+        self.reader = None
+
+    def rows(self) -> Iterator[DatasetRow]:
+        """Iterate over the rows in the file. Row identifier are assigned in
+        order starting at zero.
+
+        Returns
+        -------
+        iterator(vizier.datastore.dataset.DatasetRow)
+        """
+        if self.reader is None:
+            raise ValueError('file is not open')
+        column_count = len(self.columns)
+        reader = (row for row in self.reader if len(row) > 0)
+        start = time.time()
+        while True:
+            chunk = list(islice(reader, self.chunk_size))
+            if len(chunk) == 0:
+                break
+            # Pad rows to the same length. Values in rows that have more
+            # values than there are columns are kept (like the values in all
+            # other rows).
+            lengths = [max(len(row), column_count) for row in chunk]
+            width = max(lengths)
+            for row in chunk:
+                if len(row) < width:
+                    row.extend([''] * (width - len(row)))
+            columns = [
+                infer_values([row[j].strip() for row in chunk])
+                for j in range(width)
+            ]
+            for values, length in zip(zip(*columns), lengths):
+                yield DatasetRow(
+                    identifier=str(self.row_count),
+                    values=list(values[:length])
+                )
+                self.row_count += 1
+            elapsed = time.time() - start
+            rate = self.row_count / elapsed if elapsed > 0 else float(self.row_count)
+            logger.info('{}: {} rows ({:.0f} rows/sec)'.format(self.f_handle.name, self.row_count, rate))
+            if self.progress is not None:
+                self.progress(self.row_count, rate)
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def infer_values(values: List[str]) -> List[Any]:
+    """Convert a list of string values into integers, floats, or strings. The
+    result is the same as calling vizier.core.util.cast for each value.
+
+    Parameters
+    ----------
+    values: list(string)
+        List of cell values for a single column
+
+    Returns
+    -------
+    list
+    """
+    if len(values) == 0:
+        return list()
+    column = pd.Series(values, dtype=STRING_DTYPE)
+    strings = np.array(values, dtype=str)
+    result = np.array(values, dtype=object)
+    is_int = column.str.fullmatch(INT_PATTERN).to_numpy(dtype=bool)
+    if is_int.all():
+        return strings.astype(np.int64).tolist()
+    if is_int.any():
+        result[is_int] = strings[is_int].astype(np.int64).tolist()
+    is_other = ~is_int
+    is_float = is_other & column.str.fullmatch(FLOAT_PATTERN).to_numpy(dtype=bool)
+    if is_float.any():
+        result[is_float] = strings[is_float].astype(np.float64).tolist()
+        is_other &= ~is_float
+    is_candidate = is_other & column.str.contains(CANDIDATE_PATTERN).to_numpy(dtype=bool)
+    for i in np.flatnonzero(is_candidate):
+        result[i] = cast(result[i])
+    return result.tolist()
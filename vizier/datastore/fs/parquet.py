@@ -0,0 +1,308 @@
+# Copyright (C) 2017-2019 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Columnar storage for datasets in the file system datastore. Dataset rows
+are stored in a Parquet file. The row identifier are kept in a separate
+integer column. Each dataset column is stored in a column that is named by
+the column identifier.
+
+Column values are stored using the native Arrow type if all (non-null)
+values in the column have the same Python type. Columns with values of mixed
+types are stored as Json-encoded strings. These columns are marked in the
+field metadata and decoded when the data is read.
+
+The module depends on pyarrow. It is only imported by the datastore if the
+Parquet format is used.
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+import pyarrow as pa  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+from pandas import DataFrame
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+from vizier.datastore.reader import DatasetReader
+
+
+"""Name of the column that contains the row identifier."""
+ROWID_COLUMN = '__rowid'
+
+"""Field metadata for columns that contain Json-encoded values."""
+ENCODING_KEY = b'vizier.encoding'
+ENCODING_JSON = b'json'
+
+"""Default number of rows per row group and the compression codec for column
+chunks. Row groups are the unit of access for page reads, i.e., reading a
+page of rows decodes at most two row groups (for pages that are smaller than
+the row group size).
+"""
+DEFAULT_ROW_GROUP_SIZE = 64 * 1024
+DEFAULT_COMPRESSION = 'zstd'
+
+
+class ParquetDatasetReader(DatasetReader):
+    """Dataset reader for datasets that are stored in a Parquet file. The
+    reader only decodes the row groups that contain the requested rows. Rows
+    are converted into Python objects one row group at a time.
+    """
+    def __init__(self,
+            filename: str,
+            columns: Optional[List[DatasetColumn]] = None,
+            offset: int = 0,
+            limit: Optional[int] = None):
+        """Initialize information about the Parquet file.
+
+        Parameters
+        ----------
+        filename: string
+            Path to the file on disk
+        columns: list(vizier.datastore.base.DatasetColumn), optional
+            List of columns. It is expected that each column has a unique
+            identifier.
+        offset: int, optional
+            Number of rows at the beginning of the list that are skipped.
+        limit: int, optional
+            Limits the number of rows that are returned. A negative value or
+            None indicates that all rows are returned.
+        """
+        self.filename = filename
+        self.columns = columns
+        self.offset = offset
+        self.limit = limit if limit is None or limit >= 0 else None
+        # Variables that maintain the internal state of the reader, i.e., the
+        # iterator over the requested rows.
+        self.is_open = False
+        self.rows: Optional[Iterator[DatasetRow]] = None
+
+    def close(self):
+        """Release the row iterator and set the is_open flag to False."""
+        self.rows = None
+        self.is_open = False
+
+    def __next__(self):
+        """Return the next row in the dataset iterator. Raises StopIteration if
+        end of file is reached or file has been closed.
+
+        Returns
+        -------
+        vizier.datastore.base.DatasetRow
+        """
+        if self.is_open and self.rows is not None:
+            row = next(self.rows, None)
+            if row is not None:
+                return row
+            self.close()
+        raise StopIteration
+
+    def open(self):
+        """Setup the reader by locating the row group that contains the first
+        requested row.
+
+        Returns
+        -------
+        vizier.datastore.fs.parquet.ParquetDatasetReader
+        """
+        if not self.is_open:
+            self.rows = iter_rows(
+                pq.ParquetFile(self.filename, memory_map=True),
+                offset=self.offset,
+                limit=self.limit
+            )
+            self.is_open = True
+        return self
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def decode_column(array: Any, field: Any) -> List[Any]:
+    """Convert the values in an Arrow array into a list of Python objects.
+
+    Parameters
+    ----------
+    array: pyarrow.Array or pyarrow.ChunkedArray
+        Column values
+    field: pyarrow.Field
+        Schema information for the column
+
+    Returns
+    -------
+    list
+    """
+    values = array.to_pylist()
+    metadata = field.metadata
+    if metadata is not None and metadata.get(ENCODING_KEY) == ENCODING_JSON:
+        return [json.loads(v) if v is not None else None for v in values]
+    return values
+
+
+def encode_column(values: List[Any]) -> Any:
+    """Convert a list of column values into an Arrow array. Returns a tuple
+    of the array and a flag indicating whether the values are Json-encoded.
+
+    Values are only converted into a native Arrow type if all values (that
+    are not None) have the same Python type. This ensures that values are not
+    coerced into a different type (e.g., integers into floats).
+
+    Parameters
+    ----------
+    values: list
+        Column values
+
+    Returns
+    -------
+    pyarrow.Array, bool
+    """
+    types = set(type(v) for v in values if v is not None)
+    if len(types) <= 1:
+        try:
+            return pa.array(values), False
+        except (pa.ArrowException, OverflowError, TypeError, ValueError):
+            pass
+    encoded = [json.dumps(v) if v is not None else None for v in values]
+    return pa.array(encoded, type=pa.string()), True
+
+
+def iter_rows(
+        pf: Any,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Iterator[DatasetRow]:
+    """Iterate over the rows in a Parquet file starting at the given offset.
+    Row groups that precede the offset are skipped without being read. Only
+    the requested rows in each row group are converted into Python objects.
+
+    Parameters
+    ----------
+    pf: pyarrow.parquet.ParquetFile
+        Handle for the Parquet file
+    offset: int, optional
+        Number of rows at the beginning of the file that are skipped.
+    limit: int, optional
+        Limits the number of rows that are returned.
+
+    Returns
+    -------
+    iterator(vizier.datastore.base.DatasetRow)
+    """
+    schema = pf.schema_arrow
+    skip = offset
+    remaining = limit
+    for i in range(pf.metadata.num_row_groups):
+        if remaining is not None and remaining <= 0:
+            return
+        group_size = pf.metadata.row_group(i).num_rows
+        if skip >= group_size:
+            skip -= group_size
+            continue
+        table = pf.read_row_group(i).slice(skip, remaining)
+        columns = [
+            decode_column(table.column(j), schema.field(j))
+            for j in range(1, table.num_columns)
+        ]
+        rowids = table.column(0).to_pylist()
+        for r in range(table.num_rows):
+            yield DatasetRow(
+                identifier=str(rowids[r]),
+                values=[col[r] for col in columns]
+            )
+        if remaining is not None:
+            remaining -= table.num_rows
+        skip = 0
+
+
+def read_dataframe(filename: str, columns: List[DatasetColumn]) -> DataFrame:
+    """Read the Parquet file into a pandas data frame. The data frame index
+    contains the row identifier. Columns are named by the dataset column
+    names.
+
+    The file is memory-mapped. Numeric columns without null values are
+    converted without copying the data.
+
+    Parameters
+    ----------
+    filename: string
+        Path to the file on disk
+    columns: list(vizier.datastore.base.DatasetColumn)
+        Dataset schema
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    table = pq.read_table(filename, memory_map=True)
+    schema = table.schema
+    names = [schema.field(j).name for j in range(table.num_columns)]
+    # Json-encoded columns are decoded into lists of Python objects. All
+    # other columns are converted by Arrow.
+    encoded: Dict[str, List[Any]] = dict()
+    for j in range(1, table.num_columns):
+        field = schema.field(j)
+        if field.metadata is not None and field.metadata.get(ENCODING_KEY) == ENCODING_JSON:
+            encoded[field.name] = decode_column(table.column(j), field)
+    if len(encoded) > 0:
+        table = table.select([name for name in names if name not in encoded])
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    if len(encoded) > 0:
+        for name, values in encoded.items():
+            df[name] = values
+        df = df[names]
+    df = df.set_index(ROWID_COLUMN)
+    df.index.name = None
+    df.index = df.index.astype(str)
+    df.columns = [col.name for col in columns]
+    return df
+
+
+def write_rows(
+        filename: str,
+        columns: List[DatasetColumn],
+        rows: List[DatasetRow],
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        compression: str = DEFAULT_COMPRESSION
+    ) -> None:
+    """Write the given dataset rows to a Parquet file.
+
+    Parameters
+    ----------
+    filename: string
+        Path to the file on disk
+    columns: list(vizier.datastore.base.DatasetColumn)
+        Dataset schema
+    rows: list(vizier.datastore.base.DatasetRow)
+        List of dataset rows
+    row_group_size: int, optional
+        Maximum number of rows per row group
+    compression: string, optional
+        Compression codec for column chunks
+    """
+    arrays = [pa.array([int(row.identifier) for row in rows], type=pa.int64())]
+    fields = [pa.field(ROWID_COLUMN, pa.int64())]
+    for i, col in enumerate(columns):
+        array, is_json = encode_column([row.values[i] for row in rows])
+        metadata = {ENCODING_KEY: ENCODING_JSON} if is_json else None
+        arrays.append(array)
+        fields.append(pa.field(str(col.identifier), array.type, metadata=metadata))
+    table = pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+    pq.write_table(
+        table,
+        filename,
+        row_group_size=row_group_size,
+        compression=compression
+    )
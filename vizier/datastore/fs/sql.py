@@ -0,0 +1,375 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Embedded SQL engine for the file system datastore. Queries are evaluated
+by SQLite in the server process.
+
+The rows of a dataset are copied into a SQLite database file in the dataset
+folder when the dataset is first referenced in a query. Datasets are
+immutable. The database file is therefore created only once and it is
+deleted together with the dataset. Columns in the table are named by their
+position to allow for column names that are not valid SQL identifiers.
+
+For each query the database files of the referenced datasets are attached in
+read-only mode to an in-memory database. The datasets are exposed as
+temporary views under their name in the workflow. The views rename the
+columns of the table to the column names of the dataset.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import os
+import re
+import sqlite3
+
+from vizier.core.util import get_unique_identifier
+from vizier.datastore.dataset import DatasetColumn, DatasetHandle
+from vizier.datastore.dataset import DATATYPE_INT, DATATYPE_LONG
+from vizier.datastore.dataset import DATATYPE_REAL, DATATYPE_SHORT
+from vizier.datastore.dataset import DATATYPE_BOOLEAN, DATATYPE_VARCHAR
+
+
+"""Name of the database file and the table for dataset rows."""
+TABLE_FILE = 'data.sqlite'
+TABLE_NAME = 'data'
+
+"""Name of the table column that contains the row identifier."""
+ROWID_COLUMN = 'rowid_'
+
+"""Number of rows that are inserted into a table in a single batch."""
+BATCH_SIZE = 10000
+
+"""Maximum number of dataset files that are attached to a query connection.
+SQLite limits the number of attached databases (10 by default). The tables of
+additional datasets are copied into temporary tables.
+"""
+MAX_ATTACHED = 8
+
+"""Authorizer action codes for statements that are allowed in queries. The
+code for recursive common table expressions is not exported by all versions
+of the sqlite3 module.
+"""
+READ_ACTIONS = [
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    33  # SQLITE_RECURSIVE
+]
+
+"""Mapping of dataset column types to SQLite column types. All other column
+types are stored as text.
+"""
+SQLITE_TYPES = {
+    DATATYPE_BOOLEAN: 'INTEGER',
+    DATATYPE_INT: 'INTEGER',
+    DATATYPE_LONG: 'INTEGER',
+    DATATYPE_SHORT: 'INTEGER',
+    DATATYPE_REAL: 'REAL'
+}
+
+
+class SQLQueryResult(object):
+    """Result of a SQL query. Contains the schema and rows of the query result
+    and the names of the datasets that were read by the query.
+    """
+    def __init__(self,
+            columns: List[DatasetColumn],
+            rows: List[List[Any]],
+            dependencies: List[str]
+        ):
+        """Initialize the result components.
+
+        Parameters
+        ----------
+        columns: list(vizier.datastore.dataset.DatasetColumn)
+            Columns in the query result
+        rows: list(list)
+            List of rows in the query result
+        dependencies: list(string)
+            Names of the datasets that were read by the query
+        """
+        self.columns = columns
+        self.rows = rows
+        self.dependencies = dependencies
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the query result in the data container format that is returned
+        by the Mimir gateway for raw SQL queries.
+
+        Returns
+        -------
+        dict
+        """
+        return {
+            'schema': [
+                {'name': col.name, 'type': col.data_type}
+                for col in self.columns
+            ],
+            'data': self.rows,
+            'prov': [str(i) for i in range(len(self.rows))],
+            'colTaint': [[False] * len(self.columns) for _ in self.rows],
+            'rowTaint': [False] * len(self.rows),
+            'reasons': [],
+            'properties': {}
+        }
+
+
+def create_table(dataset: DatasetHandle, dataset_dir: str) -> str:
+    """Create the SQLite database file for the given dataset if it does not
+    exist. Returns the path to the database file.
+
+    The file is written under a temporary name first and then moved into
+    place. Concurrent calls for the same dataset may therefore both write the
+    file but never read an incomplete file.
+
+    Parameters
+    ----------
+    dataset: vizier.datastore.dataset.DatasetHandle
+        Handle for the dataset
+    dataset_dir: string
+        Path to the dataset folder
+
+    Returns
+    -------
+    string
+    """
+    table_file = os.path.join(dataset_dir, TABLE_FILE)
+    if os.path.isfile(table_file):
+        return table_file
+    temp_file = table_file + '.' + get_unique_identifier()
+    columns = ['{} {}'.format(quote(ROWID_COLUMN), 'INTEGER')] + [
+        '{} {}'.format(
+            quote(table_column(i)),
+            SQLITE_TYPES.get(col.data_type, 'TEXT')
+        )
+        for i, col in enumerate(dataset.columns)
+    ]
+    insert = 'INSERT INTO {} VALUES({})'.format(
+        TABLE_NAME,
+        ','.join(['?'] * (len(dataset.columns) + 1))
+    )
+    con = sqlite3.connect(temp_file)
+    try:
+        con.execute('PRAGMA journal_mode=OFF')
+        con.execute('PRAGMA synchronous=OFF')
+        con.execute('CREATE TABLE {}({})'.format(TABLE_NAME, ','.join(columns)))
+        with dataset.reader() as reader:
+            batch: List[Tuple] = list()
+            for row in reader:
+                batch.append(
+                    tuple([row.identifier] + [to_sqlite(v) for v in row.values])
+                )
+                if len(batch) >= BATCH_SIZE:
+                    con.executemany(insert, batch)
+                    batch = list()
+            con.executemany(insert, batch)
+        con.commit()
+    finally:
+        con.close()
+    os.replace(temp_file, table_file)
+    return table_file
+
+
+def execute_query(
+        query: str,
+        tables: Dict[str, Tuple[DatasetHandle, str]]
+    ) -> SQLQueryResult:
+    """Evaluate a SQL query over the given datasets. The datasets are given
+    as a mapping from the dataset name to a tuple of the dataset handle and
+    the path of the dataset database file (see create_table). The query
+    cannot modify the attached datasets.
+
+    Raises ValueError if the query is invalid or if query evaluation fails.
+
+    Parameters
+    ----------
+    query: string
+        SQL query
+    tables: dict
+        Mapping of dataset names to the dataset handle and database file
+
+    Returns
+    -------
+    vizier.datastore.fs.sql.SQLQueryResult
+    """
+    con = sqlite3.connect('file::memory:', uri=True, check_same_thread=False)
+    try:
+        names = list(tables.keys())
+        for i, name in enumerate(names):
+            dataset, table_file = tables[name]
+            schema = 'ds{}'.format(i)
+            con.execute(
+                'ATTACH DATABASE ? AS {}'.format(schema),
+                ('file:{}?mode=ro'.format(table_file),)
+            )
+            source = '{}.{}'.format(schema, TABLE_NAME)
+            if i >= MAX_ATTACHED:
+                # Copy the rows into a temporary table to stay within the
+                # limit for attached databases.
+                source = quote('{}_{}'.format(TABLE_NAME, i))
+                con.execute('CREATE TEMP TABLE {} AS SELECT * FROM {}.{}'.format(
+                    source,
+                    schema,
+                    TABLE_NAME
+                ))
+                con.execute('DETACH DATABASE {}'.format(schema))
+            con.execute('CREATE TEMP VIEW {} AS SELECT {} FROM {}'.format(
+                quote(name),
+                ','.join([
+                    '{} AS {}'.format(quote(table_column(c)), quote(col.name))
+                    for c, col in enumerate(dataset.columns)
+                ]),
+                source
+            ))
+        # Keep track of the datasets that are read by the query. Reject any
+        # statement that modifies the database.
+        dependencies: List[str] = list()
+
+        # SQLite reports reads for the columns of a view with the view name
+        # in the case that is used in the query.
+        views = {name.lower(): name for name in names}
+
+        def authorizer(action, arg1, arg2, db_name, source):
+            if action == sqlite3.SQLITE_READ:
+                for view in [arg1, source]:
+                    name = views.get(view.lower()) if view is not None else None
+                    if name is not None and name not in dependencies:
+                        dependencies.append(name)
+            elif action not in READ_ACTIONS:
+                return sqlite3.SQLITE_DENY
+            return sqlite3.SQLITE_OK
+
+        con.set_authorizer(authorizer)
+        cur = con.execute(query)
+        rows = [list(row) for row in cur.fetchall()]
+        column_names = [d[0] for d in cur.description] if cur.description else []
+    except sqlite3.Error as ex:
+        raise ValueError(str(ex))
+    finally:
+        con.close()
+    columns = [
+        DatasetColumn(
+            identifier=i,
+            name=name,
+            data_type=get_column_type(row[i] for row in rows)
+        )
+        for i, name in enumerate(column_names)
+    ]
+    return SQLQueryResult(
+        columns=columns,
+        rows=rows,
+        dependencies=dependencies
+    )
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def get_column_type(values: Iterable[Any]) -> str:
+    """Get the data type for a column in a query result from the column
+    values.
+
+    Parameters
+    ----------
+    values: iterable
+        Values in the result column
+
+    Returns
+    -------
+    string
+    """
+    data_type: Optional[str] = None
+    for value in values:
+        if value is None:
+            continue
+        elif isinstance(value, int):
+            if data_type is None:
+                data_type = DATATYPE_INT
+        elif isinstance(value, float):
+            if data_type in [None, DATATYPE_INT]:
+                data_type = DATATYPE_REAL
+        else:
+            return DATATYPE_VARCHAR
+    return data_type if data_type is not None else DATATYPE_VARCHAR
+
+
+def get_referenced_names(query: str, names: Iterable[str]) -> List[str]:
+    """Get the dataset names that occur in the given query. Names are matched
+    as whole words and case-insensitive.
+
+    Parameters
+    ----------
+    query: string
+        SQL query
+    names: iterable(string)
+        Dataset names
+
+    Returns
+    -------
+    list(string)
+    """
+    return [
+        name for name in names
+        if re.search(r'(?<!\w){}(?!\w)'.format(re.escape(name)), query, re.IGNORECASE)
+    ]
+
+
+def quote(identifier: str) -> str:
+    """Quote an identifier in a SQL statement.
+
+    Parameters
+    ----------
+    identifier: string
+        Table or column name
+
+    Returns
+    -------
+    string
+    """
+    return '"{}"'.format(identifier.replace('"', '""'))
+
+
+def table_column(position: int) -> str:
+    """Name of the table column for the dataset column at the given position.
+
+    Parameters
+    ----------
+    position: int
+        Position of the column in the dataset schema
+
+    Returns
+    -------
+    string
+    """
+    return 'c{}'.format(position)
+
+
+def to_sqlite(value: Any) -> Any:
+    """Convert a cell value into a value that can be stored in SQLite.
+
+    Parameters
+    ----------
+    value: any
+        Dataset cell value
+
+    Returns
+    -------
+    any
+    """
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    return str(value)
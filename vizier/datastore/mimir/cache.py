@@ -0,0 +1,148 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cache for the schema and properties of Mimir tables. Dataset handles are
+created from the table information that is returned by the Mimir gateway.
+Every dataset access (e.g., by vizual commands, SQL cells, or when fetching
+pages of dataset rows in the web service) would otherwise require a request
+to the gateway.
+
+Dataset identifiers are immutable, i.e., the schema of a table never changes.
+The properties only change when profiling of the dataset is forced. Cached
+entries are therefore only invalidated explicitly. Entries are evicted in
+least-recently-used order when the number of entries exceeds the capacity.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import os
+import threading
+
+
+"""Default maximum number of cached tables."""
+DEFAULT_CAPACITY = int(os.environ.get('MIMIR_TABLE_CACHE_SIZE', '1000'))
+
+
+"""Schema and properties of a Mimir table."""
+TableInfo = Tuple[List[Dict[str, str]], Dict[str, Any]]
+
+
+class TableInfoCache(object):
+    """Least-recently-used cache for the schema and properties of Mimir
+    tables, keyed by the table name (i.e., the dataset identifier).
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """Initialize the cache capacity. A cache with a capacity of zero or
+        less does not cache any tables.
+
+        Parameters
+        ----------
+        capacity: int, optional
+            Maximum number of cached tables
+        """
+        self.capacity = capacity
+        self.entries: "OrderedDict[str, TableInfo]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self) -> None:
+        """Remove all cached tables."""
+        with self.lock:
+            self.entries.clear()
+
+    def get(self, identifier: str) -> Optional[TableInfo]:
+        """Get the schema and properties of the given table. Returns None if
+        the table is not cached.
+
+        Parameters
+        ----------
+        identifier: string
+            Unique table name
+
+        Returns
+        -------
+        (list, dict)
+        """
+        with self.lock:
+            entry = self.entries.get(identifier)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(identifier)
+            self.hits += 1
+            return entry
+
+    def invalidate(self, identifier: str) -> None:
+        """Remove the given table from the cache (e.g., because its properties
+        are going to be refreshed).
+
+        Parameters
+        ----------
+        identifier: string
+            Unique table name
+        """
+        with self.lock:
+            self.entries.pop(identifier, None)
+
+    def put(self, identifier: str, info: TableInfo) -> TableInfo:
+        """Add the schema and properties of a table to the cache. Evicts the
+        least recently used tables if the capacity is exceeded. Returns the
+        given table information.
+
+        Parameters
+        ----------
+        identifier: string
+            Unique table name
+        info: (list, dict)
+            Table schema and properties
+
+        Returns
+        -------
+        (list, dict)
+        """
+        if self.capacity <= 0:
+            return info
+        with self.lock:
+            self.entries[identifier] = info
+            self.entries.move_to_end(identifier)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return info
+
+
+"""Cache for the Mimir tables that are accessed by this process."""
+_cache: Optional[TableInfoCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> TableInfoCache:
+    """Get the table information cache of the current process. The cache is
+    created on first access.
+
+    Returns
+    -------
+    vizier.datastore.mimir.cache.TableInfoCache
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TableInfoCache()
+        return _cache
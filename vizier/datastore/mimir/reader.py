@@ -14,8 +14,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Implements reader for datasets that are stored in the Mimir backend."""
-from typing import List
+"""Implements reader for datasets that are stored in the Mimir backend.
+
+Rows are fetched from the Mimir gateway in batches. While the caller consumes
+the rows in one batch the next batch is fetched on a background thread.
+"""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from vizier.datastore.dataset import DatasetRow
 from vizier.datastore.reader import DatasetReader
 
@@ -23,11 +29,17 @@ import vizier.mimir as mimir
 import vizier.datastore.mimir.base as base
 
 
+"""Default number of rows that are fetched with each request to Mimir."""
+DEFAULT_BATCH_SIZE = int(os.environ.get('MIMIR_READER_BATCH_SIZE', '10000'))
+
+
 class MimirDatasetReader(DatasetReader):
     """Dataset reader for Mimir datasets."""
     def __init__(
         self, table_name, columns,
-        offset=0, limit=None, rowid=None
+        offset=0, limit=None, rowid=None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        prefetch: bool = True
     ):
         """Initialize information about the delimited file and the file format.
 
@@ -41,8 +53,14 @@ class MimirDatasetReader(DatasetReader):
             Number of rows at the beginning of the list that are skipped.
         limit: int, optional
             Limits the number of rows that are returned.
-        annotations: vizier.datastore.metadata.DatasetMetadata, optional
-            Annotations for dataset components
+        rowid: string, optional
+            Identifier of the row at which reading starts (offset is relative
+            to this row)
+        batch_size: int, optional
+            Number of rows that are fetched with each request
+        prefetch: bool, optional
+            Fetch the next batch of rows on a background thread while the
+            rows in the current batch are read
         """
         self.table_name = table_name
         self.columns = columns
@@ -53,22 +71,29 @@ class MimirDatasetReader(DatasetReader):
             raise Exception("Invalid Limit: {}".format(limit))
         self.limit = limit
         self.rowid = rowid
-        # Convert row id list into row position index. Depending on whether
-        # offset or limit parameters are given we also limit the entries in the
-        # dictionary. The internal flag .is_range_query keeps track of whether
-        # offset or limit where given (True) or not (False). This information is
-        # later used to generate the query for the database.
-        if offset > 0 or limit is not None:
-            self.is_range_query = True
-        else:
-            self.is_range_query = False
-        # Keep an in-memory copy of the dataset rows when open
+        if batch_size < 1:
+            raise Exception("Invalid Batch Size: {}".format(batch_size))
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        # Keep the rows of the current batch in memory when open. The reader
+        # keeps track of the number of rows that have been requested so far
+        # (position) and whether the end of the dataset has been reached.
         self.is_open = False
         self.read_index = None
         self.rows = None
+        self.position = 0
+        self.is_done = False
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.pending: Optional[Tuple["Future[List[DatasetRow]]", int]] = None
 
     def close(self):
         """Close any open files and set the is_open flag to False."""
+        if self.pending is not None:
+            self.pending[0].cancel()
+            self.pending = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
         self.rows = None
         self.read_index = None
         self.is_open = False
@@ -85,6 +110,9 @@ class MimirDatasetReader(DatasetReader):
         vizier.datastore.base.DatasetRow
         """
         if self.is_open:
+            if self.read_index >= len(self.rows):
+                self.rows = self.next_batch()
+                self.read_index = 0
             if self.read_index < len(self.rows):
                 row = self.rows[self.read_index]
                 self.read_index += 1
@@ -92,9 +120,103 @@ class MimirDatasetReader(DatasetReader):
             self.close()
         raise StopIteration
 
+    def fetch_batch(self, offset: int, limit: int) -> List[DatasetRow]:
+        """Query the database to get the rows in the given range. The offset
+        is relative to the offset of the reader.
+
+        Parameters
+        ----------
+        offset: int
+            Number of rows to skip
+        limit: int
+            Maximum number of rows to return
+
+        Returns
+        -------
+        list(vizier.datastore.dataset.DatasetRow)
+        """
+        offset += self.offset
+        rs = mimir.getTable(
+                table = self.table_name,
+                columns = [col.name_in_rdb for col in self.columns],
+                offset_to_rowid = self.rowid,
+                limit = limit,
+                offset = offset if offset > 0 else None,
+                include_uncertainty = True
+            )
+        # Initialize mapping of column rdb names to index positions in
+        # dataset rows
+        rs_rows = rs['data']
+        row_ids = rs['prov']
+        annotation_flags = rs['colTaint']
+        rows = list()
+        for row_index in range(len(rs_rows)):
+            row = rs_rows[row_index]
+            row_annotation_flags = annotation_flags[row_index]
+            row_id = str(row_ids[row_index])
+            values = [None] * len(self.columns)
+            annotation_flag_values: List[bool] = [False] * len(self.columns)
+            for i in range(len(self.columns)):
+                col = self.columns[i]
+                values[i] = base.mimir_value_to_python(row[i], col)
+                annotation_flag_values[i] = not row_annotation_flags[i]
+            rows.append(DatasetRow(row_id, values, annotation_flag_values))
+        return rows
+
+    def next_batch(self) -> List[DatasetRow]:
+        """Get the next batch of rows. Returns an empty list if the end of the
+        dataset (or the row limit) has been reached. If prefetching is
+        enabled, the following batch is requested before returning.
+
+        Returns
+        -------
+        list(vizier.datastore.dataset.DatasetRow)
+        """
+        if self.pending is not None:
+            future, limit = self.pending
+            self.pending = None
+            rows = future.result()
+        else:
+            batch = self.next_range()
+            if batch is None:
+                return list()
+            limit = batch[1]
+            rows = self.fetch_batch(*batch)
+        # The dataset has no more rows if the batch is incomplete
+        if len(rows) < limit:
+            self.is_done = True
+        elif self.prefetch:
+            batch = self.next_range()
+            if batch is not None:
+                if self.executor is None:
+                    self.executor = ThreadPoolExecutor(max_workers=1)
+                future = self.executor.submit(self.fetch_batch, *batch)
+                self.pending = (future, batch[1])
+        return rows
+
+    def next_range(self) -> Optional[Tuple[int, int]]:
+        """Get offset and limit for the next batch. Returns None if there are
+        no more rows to read.
+
+        Returns
+        -------
+        (int, int)
+        """
+        if self.is_done:
+            return None
+        limit = self.batch_size
+        if self.limit is not None:
+            limit = min(limit, self.limit - self.position)
+        if limit <= 0:
+            self.is_done = True
+            return None
+        offset = self.position
+        self.position += limit
+        return offset, limit
+
     def open(self) -> "MimirDatasetReader":
-        """Setup the reader by querying the database and creating an in-memory
-        copy of the dataset rows.
+        """Setup the reader by querying the database for the first batch of
+        dataset rows.
 
         Returns
         -------
@@ -103,37 +225,9 @@ class MimirDatasetReader(DatasetReader):
         # Query the database to retrieve dataset rows if reader is not already
         # open
         if not self.is_open:
-            # Query the database to get the list of rows. Sort rows according to
-            # order in row_ids and return a InMemReader
-            rs = mimir.getTable(
-                    table = self.table_name,
-                    columns = [col.name_in_rdb for col in self.columns],
-                    offset_to_rowid = self.rowid,
-                    limit = self.limit if self.is_range_query else None,
-                    offset = self.offset if self.is_range_query else None,
-                    include_uncertainty = True
-                )
-
-            #self.row_ids = rs['prov']
-            # Initialize mapping of column rdb names to index positions in
-            # dataset rows
-            rs_rows = rs['data']
-            row_ids = rs['prov']
-            annotation_flags = rs['colTaint']
-            self.rows = list()
-            for row_index in range(len(rs_rows)):
-                row = rs_rows[row_index]
-                row_annotation_flags = annotation_flags[row_index]  
-                row_id = str(row_ids[row_index])
-                values = [None] * len(self.columns)
-                annotation_flag_values: List[bool] = [False] * len(self.columns)
-                for i in range(len(self.columns)):
-                    col = self.columns[i]
-                    values[i] = base.mimir_value_to_python(row[i], col)
-                    annotation_flag_values[i] = not row_annotation_flags[i]
-                self.rows.append(DatasetRow(row_id, values, annotation_flag_values))
+            self.position = 0
+            self.is_done = False
+            self.rows = self.next_batch()
             self.read_index = 0
             self.is_open = True
         return self
-
-    
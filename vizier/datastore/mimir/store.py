@@ -26,6 +26,7 @@ from vizier.filestore.base import FileHandle
 from vizier.datastore.base import DefaultDatastore
 from vizier.datastore.dataset import DatasetRow, DatasetColumn, DatasetDescriptor
 from vizier.datastore.annotation.base import DatasetCaveat
+from vizier.datastore.mimir.cache import TableInfo, get_cache
 from vizier.datastore.mimir.dataset import MimirDatasetColumn, MimirDatasetHandle
 
 import vizier.mimir as mimir
@@ -64,7 +65,7 @@ class MimirDatastore(DefaultDatastore):
         super(MimirDatastore, self).__init__(base_path)
 
     def get_properties(self, identifier):
-        schema, properties = mimir.getTableInfo(identifier)
+        schema, properties = self.get_table_info(identifier)
         return properties
 
     def create_dataset(self, 
@@ -150,9 +151,74 @@ class MimirDatastore(DefaultDatastore):
         vizier.datastore.mimir.dataset.MimirDatasetHandle
         """
         # Return None if the dataset file does not exist
-        schema, properties = mimir.getTableInfo(identifier, force_profiler = force_profiler)
+        schema, properties = self.get_table_info(identifier, force_profiler = force_profiler)
         return MimirDatasetHandle.from_mimir_result(identifier, schema, properties, name)
 
+    def get_datasets(self, identifiers: List[str]) -> Dict[str, MimirDatasetHandle]:
+        """Get the handles for all datasets in the given list. Table
+        information for datasets that are not cached is fetched from Mimir in
+        a single batch. Datasets that do not exist are not included in the
+        result.
+
+        Parameters
+        ----------
+        identifiers : list(string)
+            Unique dataset identifiers
+
+        Returns
+        -------
+        dict(string: vizier.datastore.mimir.dataset.MimirDatasetHandle)
+        """
+        cache = get_cache()
+        tables: Dict[str, TableInfo] = dict()
+        missing: List[str] = list()
+        for identifier in identifiers:
+            info = cache.get(identifier)
+            if info is not None:
+                tables[identifier] = info
+            else:
+                missing.append(identifier)
+        if len(missing) > 0:
+            for identifier, info in mimir.getTableInfos(missing).items():
+                tables[identifier] = cache.put(identifier, info)
+        return {
+            identifier: MimirDatasetHandle.from_mimir_result(identifier, schema, properties)
+            for identifier, (schema, properties) in tables.items()
+        }
+
+    def get_table_info(self, 
+            identifier: str, 
+            force_profiler: Optional[bool] = None
+        ) -> TableInfo:
+        """Get schema and properties of the Mimir table for the dataset with
+        the given identifier. Table information is cached since datasets are
+        immutable. Forcing the profiler refreshes the cached properties. If
+        profiling is disabled the result is not cached since it may lack
+        properties that are computed by the profiler.
+
+        Parameters
+        ----------
+        identifier : string
+            Unique dataset identifier
+        force_profiler: bool, optional
+            Force (True) or skip (False) profiling of the dataset
+
+        Returns
+        -------
+        (list, dict)
+        """
+        cache = get_cache()
+        if force_profiler:
+            cache.invalidate(identifier)
+        else:
+            info = cache.get(identifier)
+            if info is not None:
+                return info
+        info = mimir.getTableInfo(identifier, force_profiler = force_profiler)
+        if force_profiler is False:
+            return info
+        return cache.put(identifier, info)
+
     def get_dataset_frame(self, identifier: str, force_profiler: Optional[bool] = None) -> Optional[DataFrame]:
         import pyarrow as pa #type: ignore
         from pyspark.rdd import _load_from_socket #type: ignore
@@ -0,0 +1,372 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Native column profiler. Computes for each column of a dataset the data
+type, the number of missing values, an estimate for the number of distinct
+values (using HyperLogLog), the value range and a histogram. The dataset rows
+are read once and split into column arrays. All statistics are then computed
+using vectorized operations on these arrays.
+
+Instead of profiling all rows the profiler can use a uniform random sample of
+the rows (reservoir sampling). This bounds the memory and time for profiling
+large datasets. Counts (e.g., histogram counts) are then based on the sample
+while the number of rows is the number of rows in the dataset.
+
+The result uses the same format as the Datamart profiler. Statistics for
+individual columns can therefore be reused when a dataset is derived from
+another dataset by an operation that does not modify all of the columns.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import math
+import random
+
+import numpy as np
+import pandas as pd
+
+from vizier.datastore.dataset import DatasetColumn, DatasetRow
+
+
+"""Name of the profiler."""
+PROFILER_NAME = 'native_profiler'
+
+"""Default number of bins for numeric and temporal histograms."""
+DEFAULT_BINS = 10
+"""Maximum number of values in histograms for categorical columns."""
+MAX_CATEGORIES = 10
+"""Columns with at most this number of distinct values that repeat values are
+considered categorical.
+"""
+CATEGORICAL_MAX_DISTINCT = 20
+"""Number of bits of the hash value that determine the HyperLogLog register.
+The standard error of the distinct value estimate is 1.04 / sqrt(2^p).
+"""
+HLL_PRECISION = 12
+"""Minimal fraction of non-missing values that have to be parseable as dates
+for a text column to be considered temporal.
+"""
+DATETIME_THRESHOLD = 0.9
+"""Number of values that are tested first before parsing all values of a text
+column as dates.
+"""
+DATETIME_SAMPLE = 100
+
+"""Datamart type identifier."""
+TYPE_BOOLEAN = 'http://schema.org/Boolean'
+TYPE_DATETIME = 'http://schema.org/DateTime'
+TYPE_ENUMERATION = 'http://schema.org/Enumeration'
+TYPE_FLOAT = 'http://schema.org/Float'
+TYPE_INTEGER = 'http://schema.org/Integer'
+TYPE_TEXT = 'http://schema.org/Text'
+
+"""Mapping from Datamart data types to Vizier data types."""
+VIZIER_TYPES = {
+    TYPE_BOOLEAN: 'boolean',
+    TYPE_DATETIME: 'datetime',
+    TYPE_ENUMERATION: 'categorical',
+    TYPE_FLOAT: 'real',
+    TYPE_INTEGER: 'int',
+    TYPE_TEXT: 'varchar'
+}
+
+
+"""Json element labels for profiling results."""
+KEY_COLUMNS = 'columns'
+KEY_NB_COLUMNS = 'nb_columns'
+KEY_NB_PROFILED_ROWS = 'nb_profiled_rows'
+KEY_NB_ROWS = 'nb_rows'
+
+
+def get_types(metadata: Dict[str, Any]) -> List[str]:
+    """Get the Vizier data types for all columns in the given profiling
+    results.
+
+    Parameters
+    ----------
+    metadata: dict
+        Profiling results
+
+    Returns
+    -------
+    list(string)
+    """
+    types = list()
+    for column in metadata[KEY_COLUMNS]:
+        semantic_types = column['semantic_types']
+        data_type = semantic_types[0] if semantic_types else column['structural_type']
+        types.append(VIZIER_TYPES.get(data_type, 'varchar'))
+    return types
+
+
+def hll_estimate(values: pd.Series, precision: int = HLL_PRECISION) -> int:
+    """Estimate the number of distinct values in the given series using the
+    HyperLogLog algorithm. The count is exact if the series contains no more
+    values than there are registers.
+
+    Parameters
+    ----------
+    values: pandas.Series
+        Non-missing column values
+    precision: int, optional
+        Number of hash bits that select the register
+
+    Returns
+    -------
+    int
+    """
+    m = 1 << precision
+    if len(values) <= m:
+        return int(values.nunique())
+    hashes = pd.util.hash_pandas_object(values, index=False).values
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    # The rank is the position of the leftmost 1-bit in the remaining bits.
+    # The bit length is computed from the two 32-bit halves to avoid rounding
+    # errors when converting 64-bit integers to floats.
+    rest = hashes << np.uint64(precision)
+    high = (rest >> np.uint64(32)).astype(np.float64)
+    low = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    bit_length = np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])
+    rank = np.minimum(64 - bit_length + 1, 64 - precision + 1).astype(np.uint8)
+    registers = np.zeros(m, dtype=np.uint8)
+    np.maximum.at(registers, index, rank)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.power(2.0, -registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros > 0:
+        # Use linear counting for small cardinalities
+        estimate = m * math.log(m / zeros)
+    return min(int(round(estimate)), len(values))
+
+
+def is_temporal(values: pd.Series) -> bool:
+    """Test if the given text values are dates.
+
+    Parameters
+    ----------
+    values: pandas.Series
+        Non-missing text values
+
+    Returns
+    -------
+    bool
+    """
+    if len(values) == 0:
+        return False
+    dates = pd.to_datetime(values, errors='coerce')
+    return int(dates.notna().sum()) >= DATETIME_THRESHOLD * len(values)
+
+
+def profile_column(
+        name: str,
+        values: List[Any],
+        bins: int = DEFAULT_BINS
+    ) -> Dict[str, Any]:
+    """Compute statistics for the values of a single column.
+
+    Parameters
+    ----------
+    name: string
+        Column name
+    values: list
+        Column values
+    bins: int, optional
+        Number of bins for numeric and temporal histograms
+
+    Returns
+    -------
+    dict
+    """
+    series = pd.Series(values, dtype=object)
+    missing = series.isna() | (series == '')
+    present = series[~missing]
+    count = len(present)
+    result: Dict[str, Any] = {
+        'name': name,
+        'structural_type': TYPE_TEXT,
+        'semantic_types': [],
+        'missing_values_ratio': float(missing.sum()) / len(series) if len(series) > 0 else 0.0
+    }
+    if count == 0:
+        result['num_distinct_values'] = 0
+        return result
+    if present.map(lambda v: isinstance(v, bool)).all():
+        result['structural_type'] = TYPE_BOOLEAN
+        distinct = present.astype(str)
+    else:
+        numbers = pd.to_numeric(present, errors='coerce')
+        if not numbers.isna().any():
+            numbers = numbers.astype(np.float64)
+            is_int = bool(np.all(np.mod(numbers.values, 1) == 0))
+            result['structural_type'] = TYPE_INTEGER if is_int else TYPE_FLOAT
+            # Statistics are computed over finite values only.
+            finite = numbers.values[np.isfinite(numbers.values)]
+            if len(finite) > 0:
+                vmin, vmax = float(finite.min()), float(finite.max())
+                result['mean'] = float(finite.mean())
+                result['stddev'] = float(finite.std())
+                result['coverage'] = [{'range': {'gte': vmin, 'lte': vmax}}]
+                counts, edges = np.histogram(finite, bins=bins)
+                result['plot'] = {
+                    'type': 'histogram_numerical',
+                    'data': [{
+                        'count': int(counts[i]),
+                        'bin_start': float(edges[i]),
+                        'bin_end': float(edges[i + 1])
+                    } for i in range(len(counts))]
+                }
+            distinct = numbers
+        else:
+            distinct = present.astype(str)
+            if is_temporal(distinct.head(DATETIME_SAMPLE)):
+                valid_dates = pd.to_datetime(distinct, errors='coerce').dropna()
+            else:
+                valid_dates = distinct.head(0)
+            if len(valid_dates) >= DATETIME_THRESHOLD * count:
+                result['semantic_types'] = [TYPE_DATETIME]
+                timestamps = valid_dates.values.astype('datetime64[s]').astype(np.int64)
+                counts, edges = np.histogram(timestamps, bins=bins)
+                result['plot'] = {
+                    'type': 'histogram_temporal',
+                    'data': [{
+                        'count': int(counts[i]),
+                        'date_start': pd.Timestamp(int(edges[i]), unit='s').isoformat(),
+                        'date_end': pd.Timestamp(int(edges[i + 1]), unit='s').isoformat()
+                    } for i in range(len(counts))]
+                }
+    num_distinct = hll_estimate(distinct)
+    result['num_distinct_values'] = num_distinct
+    if 'plot' not in result:
+        if num_distinct <= CATEGORICAL_MAX_DISTINCT and num_distinct < count:
+            if result['structural_type'] == TYPE_TEXT:
+                result['semantic_types'] = [TYPE_ENUMERATION]
+        frequencies = distinct.value_counts()
+        result['plot'] = {
+            'type': 'histogram_categorical',
+            'data': [
+                {'bin': str(value), 'count': int(freq)}
+                for value, freq in frequencies.head(MAX_CATEGORIES).items()
+            ]
+        }
+    return result
+
+
+def reservoir_sample(
+        rows: Iterable[DatasetRow],
+        size: int,
+        seed: Optional[int] = None
+    ) -> Tuple[List[DatasetRow], int]:
+    """Select a uniform random sample of the given size from a stream of rows
+    (Algorithm L). Returns the sample and the total number of rows in the
+    stream.
+
+    Parameters
+    ----------
+    rows: iterable(vizier.datastore.dataset.DatasetRow)
+        Stream of dataset rows
+    size: int
+        Sample size
+    seed: int, optional
+        Seed for the random number generator
+
+    Returns
+    -------
+    list(vizier.datastore.dataset.DatasetRow), int
+    """
+    rand = random.Random(seed)
+    sample: List[DatasetRow] = list()
+    w = math.exp(math.log(rand.random()) / size)
+    next_pos = size + int(math.log(rand.random()) / math.log(1 - w)) if w < 1 else size
+    count = 0
+    for row in rows:
+        if count < size:
+            sample.append(row)
+        elif count == next_pos:
+            sample[rand.randrange(size)] = row
+            w *= math.exp(math.log(rand.random()) / size)
+            next_pos += 1 + int(math.log(rand.random()) / math.log(1 - w)) if w < 1 else 1
+        count += 1
+    return sample, count
+
+
+def run(
+        columns: List[DatasetColumn],
+        rows: Iterable[DatasetRow],
+        sample_size: int = 0,
+        profiles: Optional[Dict[int, Dict[str, Any]]] = None,
+        bins: int = DEFAULT_BINS,
+        row_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+    """Profile the columns of a dataset. The rows are read once. They are not
+    read at all if results for all columns are given and the number of rows
+    is known.
+
+    If a sample size greater than zero is given the statistics are computed
+    for a random sample of the rows. Existing profiling results for individual
+    columns can be given as a dictionary keyed by the column identifier. These
+    columns are not profiled again.
+
+    Parameters
+    ----------
+    columns: list(vizier.datastore.dataset.DatasetColumn)
+        Dataset schema
+    rows: iterable(vizier.datastore.dataset.DatasetRow)
+        Dataset rows
+    sample_size: int, optional
+        Number of rows in the random sample. Profile all rows if 0.
+    profiles: dict, optional
+        Profiling results for columns that are not profiled again
+    bins: int, optional
+        Number of bins for numeric and temporal histograms
+    row_count: int, optional
+        Number of rows in the dataset (if known)
+
+    Returns
+    -------
+    dict
+    """
+    profiles = profiles if profiles is not None else dict()
+    positions = [
+        pos for pos, col in enumerate(columns) if col.identifier not in profiles
+    ]
+    values: List[List[Any]] = [list() for _ in positions]
+    if len(positions) == 0 and row_count is not None:
+        profiled_rows = min(sample_size, row_count) if sample_size > 0 else row_count
+    else:
+        if sample_size > 0:
+            rows, row_count = reservoir_sample(rows, sample_size)
+        profiled_rows = 0
+        for row in rows:
+            for i, pos in enumerate(positions):
+                values[i].append(row.values[pos])
+            profiled_rows += 1
+        if sample_size <= 0:
+            row_count = profiled_rows
+    results: List[Dict[str, Any]] = list()
+    computed = dict(zip(positions, values))
+    for pos, col in enumerate(columns):
+        if pos in computed:
+            results.append(profile_column(col.name, computed[pos], bins=bins))
+        else:
+            profile = dict(profiles[col.identifier])
+            profile['name'] = col.name
+            results.append(profile)
+    return {
+        KEY_NB_ROWS: row_count,
+        KEY_NB_PROFILED_ROWS: min(profiled_rows, row_count),
+        KEY_NB_COLUMNS: len(columns),
+        KEY_COLUMNS: results
+    }
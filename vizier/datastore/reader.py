@@ -24,8 +24,9 @@ from abc import abstractmethod
 import csv
 import gzip
 import json
+import struct
 from io import TextIOWrapper
-from typing import cast, List, Optional, IO
+from typing import cast, Iterable, List, Optional, IO
 
 from vizier.datastore.dataset import DatasetRow
 from vizier.datastore.base import DatasetColumn
@@ -35,6 +36,13 @@ KEY_ROWS = 'rows'
 KEY_ROW_ID = 'id'
 KEY_ROW_VALUES = 'val'
 
+"""Format of the entries in the row offset index for indexed Json files. Each
+entry is the byte offset of a row in the data file (unsigned 64-bit integer,
+little-endian).
+"""
+INDEX_ENTRY_FORMAT = '<Q'
+INDEX_ENTRY_SIZE = struct.calcsize(INDEX_ENTRY_FORMAT)
+
 
 class DatasetReader(object):
     """Reader for datasets. Allows to iterate over the the rows in a dataset.
@@ -229,7 +237,8 @@ class DefaultJsonDatasetReader(DatasetReader):
         self.columns = columns
         self.compressed = compressed
         self.offset = offset
-        self.limit = limit
+        # A negative limit is used by some callers to read all rows
+        self.limit = limit if limit is None or limit >= 0 else None
         # Variables that maintain the internal state of the reader, i.e., the
         # opened file and the list of rows (in original Json format). If the
         # is_open flag is True the file handle (fd) and row list and read index
@@ -330,6 +339,140 @@ class DefaultJsonDatasetReader(DatasetReader):
         fh.close()
 
 
+class IndexedJsonDatasetReader(DatasetReader):
+    """Dataset reader for datasets that are stored as newline-delimited Json.
+    Each line in the data file contains a single row object:
+        {'id': int, 'val': [...]}
+
+    The byte offsets of all rows are maintained in a separate index file
+    (one fixed-size entry per row). The index allows the reader to position
+    the data file at the first requested row without parsing any of the
+    preceding rows. Reading a page of rows is therefore linear in the page
+    size and rows are parsed one at a time while iterating.
+    """
+    def __init__(self,
+            filename: str,
+            index_file: str,
+            columns: Optional[List[DatasetColumn]] = None,
+            offset: int = 0,
+            limit: Optional[int] = None):
+        """Initialize information about the data file and the row index.
+
+        Parameters
+        ----------
+        filename: string
+            Path to the data file on disk
+        index_file: string
+            Path to the row offset index on disk
+        columns: list(vizier.datastore.base.DatasetColumn), optional
+            List of columns. It is expected that each column has a unique
+            identifier.
+        offset: int, optional
+            Number of rows at the beginning of the list that are skipped.
+        limit: int, optional
+            Limits the number of rows that are returned. A negative value or
+            None indicates that all rows are returned.
+        """
+        self.filename = filename
+        self.index_file = index_file
+        self.columns = columns
+        self.offset = offset
+        self.limit = limit if limit is None or limit >= 0 else None
+        # Variables that maintain the internal state of the reader, i.e., the
+        # opened data file and the number of rows that remain to be read
+        # (None if all remaining rows in the file are read).
+        self.is_open = False
+        self.fh: Optional[IO[bytes]] = None
+        self.remaining: Optional[int] = None
+
+    def close(self):
+        """Close any open files and set the is_open flag to False."""
+        if self.fh is not None:
+            self.fh.close()
+        self.fh = None
+        self.remaining = None
+        self.is_open = False
+
+    def __next__(self):
+        """Return the next row in the dataset iterator. Raises StopIteration if
+        end of file is reached or file has been closed.
+
+        Automatically closes any open file when end of iteration is reached for
+        the first time.
+
+        Returns
+        -------
+        vizier.datastore.base.DatasetRow
+        """
+        if self.is_open and self.fh is not None:
+            if self.remaining is None or self.remaining > 0:
+                line = self.fh.readline()
+                if line:
+                    r_dict = json.loads(line)
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    return DatasetRow(
+                        identifier=r_dict[KEY_ROW_ID],
+                        values=r_dict[KEY_ROW_VALUES]
+                    )
+            self.close()
+        raise StopIteration
+
+    def open(self):
+        """Setup the reader by opening the data file and moving the read
+        position to the first row that is returned.
+
+        Returns
+        -------
+        vizier.datastore.reader.IndexedJsonDatasetReader
+        """
+        # Only open if flag is false. Otherwise, return immediately
+        if not self.is_open:
+            self.fh = open(self.filename, 'rb')
+            self.remaining = self.limit
+            if self.offset > 0:
+                # Read the byte offset of the first row from the index. If the
+                # offset is beyond the end of the dataset no rows are returned.
+                with open(self.index_file, 'rb') as f:
+                    f.seek(self.offset * INDEX_ENTRY_SIZE)
+                    entry = f.read(INDEX_ENTRY_SIZE)
+                if len(entry) == INDEX_ENTRY_SIZE:
+                    self.fh.seek(struct.unpack(INDEX_ENTRY_FORMAT, entry)[0])
+                else:
+                    self.remaining = 0
+            self.is_open = True
+        return self
+
+    def write(self, rows: Iterable[DatasetRow]) -> int:
+        """Write the given dataset rows to the data file and create the row
+        offset index. Rows are written one at a time. The given rows may
+        therefore be a generator.
+
+        Returns the number of rows that were written.
+
+        Parameters
+        ----------
+        rows: iterable(vizier.datastore.base.DatasetRow)
+            Dataset rows
+
+        Returns
+        -------
+        int
+        """
+        count = 0
+        with open(self.filename, 'wb') as fh, open(self.index_file, 'wb') as fi:
+            for row in rows:
+                fi.write(struct.pack(INDEX_ENTRY_FORMAT, fh.tell()))
+                line = json.dumps({
+                    KEY_ROW_ID: row.identifier,
+                    KEY_ROW_VALUES: row.values
+                })
+                fh.write(line.encode('utf-8'))
+                fh.write(b'\n')
+                count += 1
+        return count
+
+
 class InMemDatasetReader(DatasetReader):
     """Dataset reader for datasets stored in memory."""
     def __init__(self, rows):
@@ -132,9 +132,10 @@ class VizierBackend(object):
     defines a module in a data curation workflow. The second method is used
     by the API to cancel execution (on user request).
 
-    Each backend should provide an implementation-specific lock. The lock is
-    used by the workflow controller to serialize execution for those parts of
-    the code that are used by the controller and the backend.
+    Each backend may provide an implementation-specific lock for its internal
+    state. The workflow controller does not use this lock. Changes to branch
+    workflows are serialized by the controller using per-branch locks (see
+    vizier.engine.locks).
 
     If tasks are executed remotely the lock is a dummy lock. Only for
     multi-process execution the lock shoulc be the default multi-process-lock.
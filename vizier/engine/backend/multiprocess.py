@@ -14,34 +14,51 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Default multi-process backend to execute vizier workflow tasks. The default
-backend starts a separate process for each task that is being executed. This
-backend is primarily intended for local installations of vizier with a single
-user or for installations where each project is running in a separate container
-or virtual environment.
+backend maintains a pool of long-lived worker processes that execute tasks.
+This backend is primarily intended for local installations of vizier with a
+single user or for installations where each project is running in a separate
+container or virtual environment.
 """
 
-from functools import partial
-from multiprocessing import Lock, Pool
-from multiprocessing.pool import Pool as PoolType
-from typing import Dict, Tuple
+from collections import deque
+from multiprocessing import Lock, Process, Pipe
+from multiprocessing.connection import Connection, wait
+from threading import RLock, Thread
+from typing import cast, Any, Deque, Dict, List, Optional, Tuple
 
+from vizier.core.timestamp import get_current_time
 from vizier.engine.backend.base import VizierBackend, exec_command
 from vizier.engine.task.base import TaskContext
+from vizier.viztrail.command import ModuleCommand
 from vizier.viztrail.module.base import MODULE_RUNNING
+from vizier.viztrail.module.output import ModuleOutputs
 from vizier.engine.project.cache.base import ProjectCache
 from vizier.engine.backend.base import TaskExecEngine, NonSynchronousEngine
 from vizier.engine.task.processor import TaskProcessor, ExecResult
 from vizier.engine.task.base import TaskHandle
 
+
+"""Default number of worker processes in the pool."""
+DEFAULT_POOL_SIZE = 4
+
+"""Timeout (in seconds) after which the collector thread re-checks the set of
+worker connections it is waiting on. The collector is woken up explicitly
+whenever a task is handed to a worker. The timeout is only a safeguard.
+"""
+COLLECTOR_TIMEOUT = 1.0
+
+
 class MultiProcessBackend(VizierBackend):
-    """The multi-process backend lauches a single-process pool for each task
-    that is being executed. There is no limit on the number of tasks that are
-    executed in parallel.
+    """The multi-process backend executes tasks using a pool of long-lived
+    worker processes. The number of tasks that are executed in parallel is
+    bounded by the pool size. Tasks that are submitted while all workers are
+    busy are queued and executed in order of submission.
     """
-    def __init__(self, 
-            projects: ProjectCache, 
-            processors: Dict[str, TaskProcessor], 
-            synchronous: TaskExecEngine = NonSynchronousEngine()
+    def __init__(self,
+            projects: ProjectCache,
+            processors: Dict[str, TaskProcessor],
+            synchronous: TaskExecEngine = NonSynchronousEngine(),
+            processes: int = DEFAULT_POOL_SIZE
         ):
         """Initialize the index of package processors. Accepts an optional
         dictionary of commands that will be executed synchronously instead of
@@ -68,6 +85,8 @@ class MultiProcessBackend(VizierBackend):
             Task processors that are indexed by the package identifier
         synchronous: vizier.engine.backend.base.TaskExecEngine, optional
             Engine for synchronous task execution
+        processes: int, optional
+            Number of worker processes in the pool
         """
         # Initialize the synchronous command execution engine and the
         # multi-process lock in the super class.
@@ -77,33 +96,28 @@ class MultiProcessBackend(VizierBackend):
         )
         self.processors = processors
         self.projects = projects
-        # Maintain tasks that are currently being executed and the associated
-        # multiplressing pool. Values are tuples of (task handle, pool) and
-        # the index is the unique task identifier. This dictionary is used to
-        # cancel tasks and to update the controller when task execution
-        # is complete.
-        self.tasks: Dict[str, Tuple[TaskHandle, PoolType]] = dict()
+        # The worker pool is shared by all tasks. Worker processes are started
+        # when the first task is submitted for execution.
+        self.pool = WorkerPool(
+            processors=processors,
+            processes=processes,
+            callback=callback_function
+        )
 
     def cancel_task(self, task_id):
-        """Request to cancel execution of the given task.
+        """Request to cancel execution of the given task. Only the worker that
+        executes the task is terminated (and replaced by a new worker). All
+        other tasks in the pool are not affected.
 
         Parameters
         ----------
         task_id: string
             Unique task identifier
         """
-        # Catch errors in case the task has already been removed
-        try:
-            task, pool = self.tasks[task_id]
-            # Close the pool and terminate any running processes
-            pool.close()
-            pool.terminate()
-            del self.tasks[task_id]
-        except KeyError:
-            pass
-
-    def execute_async(self, 
-            task: TaskHandle, 
+        self.pool.cancel(task_id)
+
+    def execute_async(self,
+            task: TaskHandle,
             command, artifacts, resources=None):
         """Request execution of a given task. The task handle is used to
         identify the task when interacting with the API. The executed task
@@ -113,7 +127,7 @@ class MultiProcessBackend(VizierBackend):
 
         The multi-process backend first ensures that if has a processor for the
         package of the given command. If True, the package-specific processor
-        will be used to run the command in a separate process.
+        will be used to run the command by one of the pool workers.
 
         Parameters
         ----------
@@ -132,45 +146,26 @@ class MultiProcessBackend(VizierBackend):
         # Ensure there is a processor for the package that contains the command
         if command.package_id not in self.processors:
             raise ValueError('unknown package \'' + str(command.package_id) + '\' not in: ' + str(self.processors))
-        processor = self.processors[command.package_id]
-        # Create a pool with a single process to execute the task. Maintain
-        # pair of task handle and pool in the internal task index.
-        pool = Pool(processes=1)
-        self.tasks[task.task_id] = (task, pool)
-        # Create a callback function that is called when the pool finishes
-        # execution. Use partial to create a function that receives the
-        # internal task index as parameter so we can remove the finished task
-        # from the dictionary
-        task_callback_function = partial(callback_function, tasks=self.tasks)
         # Get the project context from the cache
         project = self.projects.get_project(task.project_id)
-        # Execute task using execute command function
-        import time
-        #TODO: figure out why sleeping here fixes a dependent cell re-execution not re-executing
-        time.sleep( 2 )
-        pool.apply_async(
-            exec_command,
-            args=(
-                task.task_id,
-                command,
-                TaskContext(
-                    project_id=task.project_id,
-                    datastore=project.datastore,
-                    filestore=project.filestore,
-                    resources=resources,
-                    artifacts=artifacts
-                ),
-                processor,
-            ),
-            callback=task_callback_function
+        self.pool.submit(
+            task=task,
+            command=command,
+            context=TaskContext(
+                project_id=task.project_id,
+                datastore=project.datastore,
+                filestore=project.filestore,
+                resources=resources,
+                artifacts=artifacts
+            )
         )
 
     def next_task_state(self):
         """Get the module state of the next task that will be submitted for
         execution.
 
-        For the multi-process backend a process will start running immediately
-        in a separate process.
+        For the multi-process backend a task is handed to the worker pool
+        immediately.
 
         Returns
         -------
@@ -191,40 +186,288 @@ class MultiProcessBackend(VizierBackend):
         pass
 
 
+class PoolWorker(object):
+    """Handle for a single worker process in the pool. The worker communicates
+    with the pool via a dedicated duplex pipe. Using a separate pipe for each
+    worker (instead of a shared queue) allows to terminate an individual worker
+    without corrupting the communication channel of the other workers.
+    """
+    def __init__(self, processors: Dict[str, TaskProcessor]):
+        """Start a new worker process.
+
+        Parameters
+        ----------
+        processors: dict(vizier.engine.packages.task.processor.TaskProcessor)
+            Task processors that are indexed by the package identifier
+        """
+        self.connection, worker_connection = Pipe()
+        self.process = Process(
+            target=worker_main,
+            args=(worker_connection, processors),
+            daemon=True
+        )
+        self.process.start()
+        # The worker end of the pipe is only used by the worker process
+        worker_connection.close()
+        # Handle for the task that is currently executed by the worker
+        self.task: Optional[TaskHandle] = None
+
+    @property
+    def is_idle(self) -> bool:
+        """True if the worker is currently not executing a task.
+
+        Returns
+        -------
+        bool
+        """
+        return self.task is None
+
+    def terminate(self) -> None:
+        """Terminate the worker process and release the pipe."""
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+class WorkerPool(object):
+    """Pool of long-lived worker processes. Each worker executes one task at a
+    time. Tasks are queued while all workers are busy.
+
+    Results are read by a single collector thread that notifies the given
+    callback function in the order in which tasks finish. The collector never
+    holds the pool lock while calling the callback. The callback may therefore
+    submit new tasks to the pool (which is what the workflow controller does
+    when it schedules the next module in a workflow).
+    """
+    def __init__(self,
+            processors: Dict[str, TaskProcessor],
+            processes: int = DEFAULT_POOL_SIZE,
+            callback: Any = None
+        ):
+        """Initialize the pool. Worker processes are started lazily when the
+        first task is submitted.
+
+        Parameters
+        ----------
+        processors: dict(vizier.engine.packages.task.processor.TaskProcessor)
+            Task processors that are indexed by the package identifier
+        processes: int, optional
+            Number of worker processes in the pool
+        callback: func, optional
+            Function that is called with the task handle and the execution
+            result when a task finishes
+        """
+        if processes < 1:
+            raise ValueError('invalid pool size \'' + str(processes) + '\'')
+        self.processors = processors
+        self.processes = processes
+        self.callback = callback
+        self.lock = RLock()
+        self.workers: List[PoolWorker] = list()
+        # Queue of tasks that are waiting for an idle worker. Each entry is a
+        # tuple of task handle, command and task context.
+        self.pending: Deque[Tuple[TaskHandle, ModuleCommand, TaskContext]] = deque()
+        self.collector: Optional[Thread] = None
+        # Pipe that is used to wake up the collector thread when the set of
+        # busy workers changes.
+        self.wakeup_reader, self.wakeup_writer = Pipe(duplex=False)
+
+    def cancel(self, task_id: str) -> bool:
+        """Cancel the task with the given identifier. If the task is still
+        waiting it is removed from the queue. If the task is running the
+        executing worker is terminated and replaced by a new worker. The
+        callback function is not called for canceled tasks.
+
+        Returns True if the task was found and False otherwise.
+
+        Parameters
+        ----------
+        task_id: string
+            Unique task identifier
+
+        Returns
+        -------
+        bool
+        """
+        with self.lock:
+            for entry in self.pending:
+                if entry[0].task_id == task_id:
+                    self.pending.remove(entry)
+                    return True
+            for i, worker in enumerate(self.workers):
+                if not worker.is_idle and worker.task.task_id == task_id: # type: ignore[union-attr]
+                    worker.terminate()
+                    self.workers[i] = PoolWorker(processors=self.processors)
+                    self.dispatch()
+                    return True
+        return False
+
+    def collect(self) -> None:
+        """Main loop of the collector thread. Waits for results from the
+        worker processes and notifies the callback function.
+        """
+        while True:
+            with self.lock:
+                connections = {w.connection: w for w in self.workers if not w.is_idle}
+            try:
+                ready = cast(List[Connection], wait(
+                    list(connections.keys()) + [self.wakeup_reader],
+                    timeout=COLLECTOR_TIMEOUT
+                ))
+            except OSError:
+                # The connection of a canceled task has been closed while
+                # waiting. The worker is no longer part of the pool.
+                continue
+            for conn in ready:
+                if conn is self.wakeup_reader:
+                    while self.wakeup_reader.poll():
+                        self.wakeup_reader.recv()
+                    continue
+                worker = connections[conn]
+                try:
+                    _, exec_result = conn.recv()
+                except (EOFError, OSError):
+                    exec_result = None
+                with self.lock:
+                    # Ignore results from workers that have been terminated
+                    # in the meantime (i.e., canceled tasks).
+                    if not worker in self.workers or worker.is_idle:
+                        continue
+                    task = worker.task
+                    if exec_result is None:
+                        # The worker process died without returning a result.
+                        # Replace it with a new worker and report an error.
+                        worker.terminate()
+                        self.workers[self.workers.index(worker)] = PoolWorker(
+                            processors=self.processors
+                        )
+                        exec_result = ExecResult(
+                            is_success=False,
+                            outputs=ModuleOutputs().error(
+                                RuntimeError('worker process terminated unexpectedly')
+                            )
+                        )
+                    else:
+                        worker.task = None
+                    self.dispatch()
+                if self.callback is not None and task is not None:
+                    self.callback(task, exec_result)
+
+    def dispatch(self) -> None:
+        """Hand pending tasks to idle workers. Expects the caller to hold the
+        pool lock.
+        """
+        while len(self.pending) > 0:
+            worker = None
+            for w in self.workers:
+                if w.is_idle:
+                    worker = w
+                    break
+            if worker is None:
+                if len(self.workers) >= self.processes:
+                    return
+                worker = PoolWorker(processors=self.processors)
+                self.workers.append(worker)
+            task, command, context = self.pending.popleft()
+            # Register the task with the worker before it is sent. This ensures
+            # that the collector always knows the task when the result
+            # arrives.
+            worker.task = task
+            try:
+                worker.connection.send((task.task_id, command, context))
+            except Exception:
+                # Release the worker if the task cannot be sent (e.g., because
+                # the task context cannot be pickled).
+                worker.task = None
+                raise
+            self.wakeup_writer.send(None)
+
+    def submit(self,
+            task: TaskHandle,
+            command: ModuleCommand,
+            context: TaskContext
+        ) -> None:
+        """Submit a task for execution.
+
+        Parameters
+        ----------
+        task: vizier.engine.task.base.TaskHandle
+            Handle for the submitted task
+        command : vizier.viztrail.command.ModuleCommand
+            Specification of the command that is to be executed
+        context: vizier.engine.task.base.TaskContext
+            Context for the executed task
+        """
+        with self.lock:
+            if self.collector is None:
+                self.collector = Thread(target=self.collect, daemon=True)
+                self.collector.start()
+            self.pending.append((task, command, context))
+            self.dispatch()
+
+
 # ------------------------------------------------------------------------------
 # Helper Methods
 # ------------------------------------------------------------------------------
 
-def callback_function(result: Tuple[str, ExecResult], tasks: Dict[str,Tuple[TaskHandle, PoolType]]):
+def callback_function(task: TaskHandle, exec_result: ExecResult) -> None:
     """Callback function for executed tasks. Notifies the workflow controller
-    and removes the task from the task index.
+    about the outcome of task execution.
 
     Parameters
     ----------
-    result: (string, vizier.engine.task.processor.ExecResult)
-        Tupe of task identifier and execution result
-    tasks: dict
-        Task index of the backend
+    task: vizier.engine.task.base.TaskHandle
+        Handle for the finished task
+    exec_result: vizier.engine.task.processor.ExecResult
+        Result of task execution
     """
-    task_id, exec_result = result
-    try:
-        task, pool = tasks[task_id]
-        # Close the pool and remove the entry from the task index
-        pool.close()
-        del tasks[task_id]
-        if task.controller is None:
-            raise Exception("Tried to close out a TaskHandle without a Controller")
-        else:
-            # Notify the workflow controller that the task is finished
-            if exec_result.is_success:
-                task.controller.set_success(
-                    task_id=task_id,
-                    result=exec_result
-                )
-            else:
-                task.controller.set_error(
-                    task_id=task_id,
-                    outputs=exec_result.outputs
-                )
-    except KeyError:
-        pass
+    if task.controller is None:
+        raise Exception("Tried to close out a TaskHandle without a Controller")
+    # Notify the workflow controller that the task is finished
+    if exec_result.is_success:
+        task.controller.set_success(
+            task_id=task.task_id,
+            finished_at=get_current_time(),
+            result=exec_result
+        )
+    else:
+        task.controller.set_error(
+            task_id=task.task_id,
+            finished_at=get_current_time(),
+            outputs=exec_result.outputs
+        )
+
+
+def worker_main(
+        connection: Connection,
+        processors: Dict[str, TaskProcessor]
+    ) -> None:
+    """Main loop for pool worker processes. The task processors are handed to
+    the worker once when the process is started. Tasks only contain the
+    command and the task context. The worker exits when the pipe is closed.
+
+    Parameters
+    ----------
+    connection: multiprocessing.connection.Connection
+        Worker end of the pipe to the pool
+    processors: dict(vizier.engine.packages.task.processor.TaskProcessor)
+        Task processors that are indexed by the package identifier
+    """
+    while True:
+        try:
+            task_id, command, context = connection.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            result = exec_command( # type: ignore[no-untyped-call]
+                task_id,
+                command,
+                context,
+                processors[command.package_id]
+            )
+        except BaseException as ex:
+            # Make sure that the worker survives user code that attempts to
+            # terminate the interpreter (e.g., by calling exit()).
+            outputs = ModuleOutputs().error(RuntimeError(repr(ex)))
+            result = task_id, ExecResult(is_success=False, outputs=outputs)
+        connection.send(result)
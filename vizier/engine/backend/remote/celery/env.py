@@ -107,7 +107,31 @@ def get_env(config):
         )
         datastores_dir = os.path.join(base_dir, app.DEFAULT_DATASTORES_DIR)
         filestores_dir = os.path.join(base_dir, app.DEFAULT_FILESTORES_DIR)
-        datastore_factory=FileSystemDatastoreFactory(datastores_dir)
+        data_format = base.get_config_value(
+            env_variable=app.VIZIERENGINE_DATASTORE_FORMAT,
+            default_values=app.DEFAULT_SETTINGS
+        )
+        max_delta_chain = base.get_config_value(
+            env_variable=app.VIZIERENGINE_DATASTORE_MAX_DELTA_CHAIN,
+            attribute_type=base.INTEGER,
+            default_values=app.DEFAULT_SETTINGS
+        )
+        profiler = base.get_config_value(
+            env_variable=app.VIZIERENGINE_DATASTORE_PROFILER,
+            default_values=app.DEFAULT_SETTINGS
+        )
+        profiler_sample = base.get_config_value(
+            env_variable=app.VIZIERENGINE_DATASTORE_PROFILER_SAMPLE,
+            attribute_type=base.INTEGER,
+            default_values=app.DEFAULT_SETTINGS
+        )
+        datastore_factory=FileSystemDatastoreFactory(
+            datastores_dir,
+            data_format=data_format,
+            max_delta_chain=max_delta_chain,
+            profiler=profiler,
+            profiler_sample=profiler_sample
+        )
         filestore_factory=FileSystemFilestoreFactory(filestores_dir)
     elif config.env.identifier == 'REMOTE':
         datastore_factory = DatastoreClientFactory(base_url=config.controller.url)
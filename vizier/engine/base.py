@@ -25,7 +25,8 @@ local machine, (b) with a set of celery workers, (c) running each project in
 its own container, etc). The engine that is used by a vizier instance is
 specified in the configuration file and loaded when the instance is started.
 """
-from typing import Dict, Any, List, Optional, cast, Tuple
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Set, cast, Tuple, Iterator
 from datetime import datetime
 
 from vizier.core.timestamp import get_current_time
@@ -33,6 +34,8 @@ from vizier.core.util import get_unique_identifier
 from vizier.datastore.dataset import DatasetDescriptor
 from vizier.datastore.artifact import ArtifactDescriptor
 from vizier.engine.controller import WorkflowController
+from vizier.engine.events import EventBus
+from vizier.engine.locks import LockManager
 from vizier.engine.task.base import TaskHandle
 from vizier.viztrail.module.base import ModuleHandle
 from vizier.viztrail.module.provenance import ModuleProvenance
@@ -43,6 +46,7 @@ from vizier.engine.backend.base import VizierBackend
 from vizier.engine.project.cache.base import ProjectCache
 from vizier.engine.packages.base import PackageIndex
 from vizier.engine.task.processor import ExecResult
+from vizier.viztrail.branch import BranchHandle
 from vizier.viztrail.workflow import WorkflowHandle
 
 import vizier.viztrail.workflow as wf
@@ -60,7 +64,8 @@ class ExtendedTaskHandle(TaskHandle):
             project_id: str, 
             branch_id: str, 
             module_id: Optional[str], 
-            controller: "VizierEngine"
+            controller: "VizierEngine",
+            concurrent: Optional[Set[str]] = None
         ):
         """Initialize the components of the extended task handle. Generates a
         unique identifier for the task.
@@ -75,6 +80,10 @@ class ExtendedTaskHandle(TaskHandle):
             Unique module identifier
         controller: vizier.engine.base.VizierEngine
             Reference to the vizier engine
+        concurrent: set(string), optional
+            Names of datasets that are accessed by modules that precede the
+            module in the workflow and that were still active when the task
+            was started
         """
         super(ExtendedTaskHandle, self).__init__(
             task_id=get_unique_identifier(),
@@ -83,6 +92,7 @@ class ExtendedTaskHandle(TaskHandle):
         )
         self.branch_id = branch_id
         self.module_id = module_id
+        self.concurrent = concurrent if concurrent is not None else set()
 
 
 class VizierEngine(WorkflowController):
@@ -100,7 +110,8 @@ class VizierEngine(WorkflowController):
             name: str, 
             projects: ProjectCache, 
             backend: VizierBackend, 
-            packages: Dict[str,PackageIndex]
+            packages: Dict[str,PackageIndex],
+            locks: Optional[LockManager] = None
         ):
         """Initialize the engine components.
 
@@ -114,6 +125,9 @@ class VizierEngine(WorkflowController):
             Backend to execute workflow modules
         packages: dict(vizier.engine.package.base.PackageIndex)
             Dictionary of loaded packages
+        locks: vizier.engine.locks.LockManager, optional
+            Project and branch locks. The locks are shared with the project
+            cache.
         """
         self.name = name
         self.projects = projects
@@ -121,6 +135,10 @@ class VizierEngine(WorkflowController):
         self.packages = packages
         # Maintain an internal dictionary of running tasks
         self.tasks: Dict[str,Any] = dict()
+        # Notify subscribers about changes to the workflows at branch heads
+        self.events = EventBus()
+        # Serialize changes to the workflows of each branch
+        self.locks = locks if locks is not None else LockManager()
 
     def append_workflow_module(
             self, 
@@ -149,52 +167,93 @@ class VizierEngine(WorkflowController):
         -------
         vizier.viztrail.module.base.ModuleHandle
         """
-        with self.backend.lock:
-            # Get the handle for the specified branch
-            branch = self.projects.get_branch(project_id=project_id, branch_id=branch_id)
-            if branch is None:
-                return None
-            # Get the current database state from the last module in the current
-            # branch head. At the same time we retrieve the list of modules for
-            # the current head of the branch.
-            head = branch.get_head()
-            if head is not None and len(head.modules) > 0:
-                modules = head.modules
-                is_active = head.is_active
-                is_error = head.modules[-1].is_error or head.modules[-1].is_canceled
-            else:
-                modules = list()
-                is_active = False
-                is_error = False
-            context = compute_context(modules)
-            # Get the external representation for the command
-            external_form = command.to_external_form(
-                command=self.packages[command.package_id].get(command.command_id),
-                datasets=dict(
-                    (name, cast(DatasetDescriptor, context[name]))
-                    for name in context 
-                    if context[name].is_dataset 
+        while True:
+            with self.update_branch(project_id, branch_id) as branch:
+                # Get the handle for the specified branch
+                if branch is None:
+                    return None
+                # Get the current database state from the last module in the
+                # current branch head. At the same time we retrieve the list
+                # of modules for the current head of the branch.
+                head = branch.get_head()
+                if head is not None and len(head.modules) > 0:
+                    modules = head.modules
+                    is_active = head.is_active
+                    is_error = head.modules[-1].is_error or head.modules[-1].is_canceled
+                else:
+                    modules = list()
+                    is_active = False
+                    is_error = False
+                context = compute_context(modules)
+                # Get the external representation for the command
+                external_form = command.to_external_form(
+                    command=self.packages[command.package_id].get(command.command_id),
+                    datasets=dict(
+                        (name, cast(DatasetDescriptor, context[name]))
+                        for name in context
+                        if context[name].is_dataset
+                    )
                 )
-            )
+                if is_active or not self.backend.can_execute(command):
+                    # Create new workflow by appending one module to the
+                    # current head of the branch. The module state is pending
+                    # if the workflow is active otherwise it depends on the
+                    # associated backend.
+                    if is_active:
+                        state = mstate.MODULE_PENDING
+                    elif is_error:
+                        state = mstate.MODULE_CANCELED
+                    else:
+                        state = self.backend.next_task_state()
+                    workflow = branch.append_workflow(
+                        modules=modules,
+                        action=wf.ACTION_APPEND,
+                        command=command,
+                        pending_modules=[
+                            ModuleHandle(
+                                state=state,
+                                command=command,
+                                external_form=external_form,
+                                provenance=ModuleProvenance(unexecuted=True)
+                            )
+                        ]
+                    )
+                    if not is_active and not state == mstate.MODULE_CANCELED:
+                        self.execute_module(
+                            project_id=project_id,
+                            branch_id=branch_id,
+                            module=workflow.modules[-1],
+                            artifacts=context
+                        )
+                    self.events.publish_workflow(project_id, branch_id, workflow)
+                    return workflow.modules[-1]
+                head_id = head.identifier if head is not None else None
             # If the workflow is not active and the command can be executed
-            # synchronously we run the command immediately and return the
-            # completed workflow. Otherwise, a pending workflow is created.
-            if not is_active and self.backend.can_execute(command):
-                ts_start = get_current_time()
-                result = self.backend.execute(
-                    task=TaskHandle(
-                        task_id=get_unique_identifier(),
-                        project_id=project_id,
-                        controller=self
-                    ),
-                    command=command,
-                    artifacts=context
-                )
-                ts = ModuleTimestamp(
-                    created_at=ts_start,
-                    started_at=ts_start,
-                    finished_at=get_current_time()
-                )
+            # synchronously we run the command immediately (without holding
+            # the branch lock) and append the completed module.
+            ts_start = get_current_time()
+            result = self.backend.execute(
+                task=TaskHandle(
+                    task_id=get_unique_identifier(),
+                    project_id=project_id,
+                    controller=self
+                ),
+                command=command,
+                artifacts=context
+            )
+            ts = ModuleTimestamp(
+                created_at=ts_start,
+                started_at=ts_start,
+                finished_at=get_current_time()
+            )
+            with self.update_branch(project_id, branch_id) as branch:
+                if branch is None:
+                    return None
+                # Execute the command again if the branch was modified while
+                # the command was running.
+                head = branch.get_head()
+                if (head.identifier if head is not None else None) != head_id:
+                    continue
                 # Depending on the execution outcome create a handle for the
                 # executed module
                 if result.is_success:
@@ -220,38 +279,8 @@ class VizierEngine(WorkflowController):
                     command=command,
                     pending_modules=[module]
                 )
-            else:
-                # Create new workflow by appending one module to the current
-                # head of the branch. The module state is pending if the
-                # workflow is active otherwise it depends on the associated
-                # backend.
-                if is_active:
-                    state = mstate.MODULE_PENDING
-                elif is_error:
-                    state = mstate.MODULE_CANCELED
-                else:
-                    state = self.backend.next_task_state()
-                workflow = branch.append_workflow(
-                    modules=modules,
-                    action=wf.ACTION_APPEND,
-                    command=command,
-                    pending_modules=[
-                        ModuleHandle(
-                            state=state,
-                            command=command,
-                            external_form=external_form,
-                            provenance=ModuleProvenance(unexecuted=True)
-                        )
-                    ]
-                )
-                if not is_active and not state == mstate.MODULE_CANCELED:
-                    self.execute_module(
-                        project_id=project_id,
-                        branch_id=branch_id,
-                        module=workflow.modules[-1],
-                        artifacts=context
-                    )
-        return workflow.modules[-1]
+                self.events.publish_workflow(project_id, branch_id, workflow)
+                return workflow.modules[-1]
 
     def cancel_exec(
             self, 
@@ -278,9 +307,8 @@ class VizierEngine(WorkflowController):
         -------
         list(vizier.viztrail.module.base.ModuleHandle)
         """
-        with self.backend.lock:
+        with self.update_branch(project_id, branch_id) as branch:
             # Get the handle for the head workflow of the specified branch.
-            branch = self.projects.get_branch(project_id=project_id, branch_id=branch_id)
             if branch is None:
                 return None
             workflow = branch.get_head()
@@ -295,12 +323,17 @@ class VizierEngine(WorkflowController):
                     if first_active_module_index is None:
                         first_active_module_index = i
             # Cancel all running tasks for the project branch
-            for task_id in list(self.tasks.keys()):
-                task = self.tasks[task_id]
+            for task_id, task in list(self.tasks.items()):
                 if task.project_id == project_id and task.branch_id == branch_id:
                     self.backend.cancel_task(task_id)
-                    del self.tasks[task_id]
+                    self.tasks.pop(task_id, None)
             if not first_active_module_index is None:
+                self.events.publish_modules(
+                    project_id,
+                    branch_id,
+                    workflow,
+                    workflow.modules[first_active_module_index:]
+                )
                 return workflow.modules[first_active_module_index:]
             else:
                 return list()
@@ -329,9 +362,8 @@ class VizierEngine(WorkflowController):
         modules that still need to be executed
         list(vizier.viztrail.module.base.ModuleHandle)
         """
-        with self.backend.lock:
+        with self.update_branch(project_id, branch_id) as branch:
             # Get the handle for the specified branch and the branch head
-            branch = self.projects.get_branch(project_id=project_id, branch_id=branch_id)
             if branch is None:
                 return None
             head = branch.get_head()
@@ -421,6 +453,10 @@ class VizierEngine(WorkflowController):
                         module=workflow.modules[module_index],
                         artifacts=context
                     )
+                    # Start all following modules that do not depend on
+                    # the re-executed module
+                    self.schedule_modules(project_id, workflow)
+                    self.events.publish_workflow(project_id, branch_id, workflow)
                     return workflow.modules[first_remaining_module:]
                 else:
                     # None of the module required execution and the workflow is
@@ -436,13 +472,15 @@ class VizierEngine(WorkflowController):
                     action=wf.ACTION_DELETE,
                     command=deleted_module.command
                 )
+            self.events.publish_workflow(project_id, branch_id, branch.get_head())
             return list()
 
     def execute_module(self, 
             project_id: str, 
             branch_id: str, 
             module: ModuleHandle, 
-            artifacts: Dict[str, ArtifactDescriptor]
+            artifacts: Dict[str, ArtifactDescriptor],
+            concurrent: Optional[Set[str]] = None
         ) -> None:
         """Create a new task for the given module and execute the module in
         asynchronous mode.
@@ -458,12 +496,16 @@ class VizierEngine(WorkflowController):
         artifacts: dict(string:vizier.datastore.dataset.DatasetDescriptor)
             Index of artifacts, identified by user-facing name, at the point of the module
             in the current workflow.
+        concurrent: set(string), optional
+            Names of datasets that are accessed by active modules that precede
+            the executed module in the workflow
         """
         task = ExtendedTaskHandle(
             project_id=project_id,
             branch_id=branch_id,
             module_id=module.identifier,
-            controller=self
+            controller=self,
+            concurrent=concurrent
         )
         self.tasks[task.task_id] = task
         # print("Starting execution of {} with artifacts: [{}]".format(module.command.command_id, artifacts))
@@ -538,9 +580,8 @@ class VizierEngine(WorkflowController):
         -------
         list(vizier.viztrail.module.base.ModuleHandle)
         """
-        with self.backend.lock:
+        with self.update_branch(project_id, branch_id) as branch:
             # Get the handle for the specified branch and the branch head
-            branch = self.projects.get_branch(project_id=project_id, branch_id=branch_id)
             if branch is None:
                 return None
             head = branch.get_head()
@@ -598,6 +639,7 @@ class VizierEngine(WorkflowController):
                     module=workflow.modules[module_index],
                     artifacts=context,
                 )
+            self.events.publish_workflow(project_id, branch_id, workflow)
             return workflow.modules[module_index:]
 
     def replace_workflow_module(self, 
@@ -629,9 +671,8 @@ class VizierEngine(WorkflowController):
         -------
         list(vizier.viztrail.module.base.ModuleHandle)
         """
-        with self.backend.lock:
+        with self.update_branch(project_id, branch_id) as branch:
             # Get the handle for the specified branch and the branch head
-            branch = self.projects.get_branch(project_id=project_id, branch_id=branch_id)
             if branch is None:
                 return None
             head = branch.get_head()
@@ -687,6 +728,7 @@ class VizierEngine(WorkflowController):
                 module=workflow.modules[module_index],
                 artifacts=context
             )
+            self.events.publish_workflow(project_id, branch_id, workflow)
             return workflow.modules[module_index:]
 
     def set_error(self, 
@@ -719,9 +761,14 @@ class VizierEngine(WorkflowController):
         bool
         """
         print("ERROR: {}".format(task_id))
-        with self.backend.lock:
-            # Get task handle and remove it from the internal index. The result
-            # is None if the task does not exist.
+        # Get the task handle to identify the branch that needs to be locked.
+        # The result is None if the task does not exist.
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        with self.update_branch(task.project_id, task.branch_id):
+            # Remove the task from the internal index. The task may have been
+            # removed (e.g., canceled) while waiting for the branch lock.
             task = pop_task(tasks=self.tasks, task_id=task_id)
             if task is None:
                 return None
@@ -735,8 +782,17 @@ class VizierEngine(WorkflowController):
             module = workflow.modules[module_index]
             if module.is_active:
                 module.set_error(finished_at=finished_at, outputs=outputs)
+                # Following modules may already be running if they do not
+                # depend on the failed module.
+                self.cancel_modules(task.project_id, workflow, module_index + 1)
                 for m in workflow.modules[module_index+1:]:
                     m.set_canceled()
+                self.events.publish_modules(
+                    task.project_id,
+                    task.branch_id,
+                    workflow,
+                    workflow.modules[module_index:]
+                )
                 return True
             else:
                 return False
@@ -763,13 +819,16 @@ class VizierEngine(WorkflowController):
         -------
         bool
         """
-        with self.backend.lock:
-            # Get task handle and remove it from the internal index. The result
-            # is None if the task does not exist.
-            # Check if a task with the given identifier exists
-            if not task_id in self.tasks:
+        # Get the task handle to identify the branch that needs to be locked.
+        # The result is None if the task does not exist.
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        with self.update_branch(task.project_id, task.branch_id):
+            # The task may have been removed (e.g., canceled) while waiting for
+            # the branch lock.
+            if self.tasks.get(task_id) is not task:
                 return None
-            task = self.tasks[task_id]
             # Get the handle for the head workflow of the specified branch and
             # the index for the module matching the identifier in the task.
             workflow, module_index = self.get_task_module(task)
@@ -780,6 +839,12 @@ class VizierEngine(WorkflowController):
                 module.set_running(
                     started_at=started_at
                 )
+                self.events.publish_modules(
+                    task.project_id,
+                    task.branch_id,
+                    workflow,
+                    [module]
+                )
                 return True
             else:
                 return False
@@ -802,9 +867,14 @@ class VizierEngine(WorkflowController):
         Returns True if the state of the workflow was changed and False
         otherwise. The result is None if the project or task did not exist.
         """
-        with self.backend.lock:
-            # Get task handle and remove it from the internal index. The result
-            # is None if the task does not exist.
+        # Get the task handle to identify the branch that needs to be locked.
+        # The result is None if the task does not exist.
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        with self.update_branch(task.project_id, task.branch_id):
+            # Remove the task from the internal index. The task may have been
+            # removed (e.g., canceled) while waiting for the branch lock.
             task = pop_task(tasks=self.tasks, task_id=task_id)
             if task is None:
                 return None
@@ -819,6 +889,27 @@ class VizierEngine(WorkflowController):
             if not module.is_running:
                 # The result is false if the state of the module did not change
                 return False
+            # Keep track of the state of the module and all following modules
+            # to notify subscribers about the modules that changed.
+            states = [m.state for m in workflow.modules[module_index:]]
+            # The datasets that the module accessed may differ from the
+            # datasets that it accessed in its previous execution (which were
+            # used for scheduling). If the module accessed any dataset that a
+            # preceding module was still working on, the module may have read
+            # outdated data and is executed again.
+            predicted = get_footprint(module.provenance)
+            actual = get_footprint(result.provenance)
+            # Following modules that were executed in parallel (based on the
+            # predicted footprint) are executed again if the module accessed
+            # datasets that were not predicted.
+            unpredicted = predicted is None or actual is None or not actual <= predicted
+            if len(task.concurrent) > 0 and (actual is None or not actual.isdisjoint(task.concurrent)):
+                if unpredicted:
+                    self.reset_modules(task.project_id, workflow, module_index + 1)
+                module.set_pending(provenance=result.provenance)
+                self.schedule_modules(task.project_id, workflow)
+                self.publish_changes(task, workflow, module_index, states)
+                return True
             # print("UPDATED ARGUMENTS: {}".format(result.updated_arguments))
             module.set_success(
                 finished_at=finished_at,
@@ -836,55 +927,183 @@ class VizierEngine(WorkflowController):
                 ",".join(result.provenance.read) if result.provenance.read is not None else "",
                 ",".join(result.provenance.write) if result.provenance.write is not None else "",
             ))
+            if unpredicted:
+                self.reset_modules(task.project_id, workflow, module_index + 1)
+            self.schedule_modules(task.project_id, workflow)
+            self.publish_changes(task, workflow, module_index, states)
+            return True
 
+    @contextmanager
+    def update_branch(self,
+            project_id: str,
+            branch_id: str
+        ) -> Iterator[Optional[BranchHandle]]:
+        """Acquire the lock for the given branch and yield the branch handle.
+        All module state changes that are made while the context is active
+        are written together when the context ends. Yields None if the
+        project or the branch does not exist.
 
-            for next_module in workflow.modules[module_index+1:]:
-                if not next_module.is_pending:
-                    # This case can only happen if we allow parallel execution
-                    # of modules in the future. At this point it should not
-                    # occur.
-                    raise RuntimeError('invalid workflow state')
-                elif not next_module.provenance.requires_exec(context):
-                    # print("Module {} does not need re-execution, skipping".format(next_module))
-                    context = next_module.provenance.get_database_state(context)
-                    next_module.set_success(
-                        finished_at=finished_at,
-                        outputs=next_module.outputs,
-                        provenance=next_module.provenance,
-                    )
-                else:
-                    # print("Scheduling {} for execution".format(next_module))
-                    command = next_module.command
-                    package_id = command.package_id
-                    command_id = command.command_id
-                    external_form = command.to_external_form(
-                        command=self.packages[package_id].get(command_id),
-                        datasets=dict( 
-                            (name, cast(DatasetDescriptor, context[name]))
-                            for name in context 
-                            if context[name].is_dataset 
-                        )
-                    )
-                    # If the backend is going to run the task immediately we
-                    # need to adjust the module state
-                    state = self.backend.next_task_state()
-                    if state == mstate.MODULE_RUNNING:
-                        next_module.set_running(
-                            external_form=external_form,
-                            started_at=get_current_time()
-                        )
-                    else:
-                        next_module.update_property(
-                            external_form=external_form
-                        )
-                    self.execute_module(
-                        project_id=task.project_id,
-                        branch_id=workflow.branch_id,
-                        module=next_module,
-                        artifacts=context
-                    )
-                    break
-            return True
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        branch_id: string
+            Unique branch identifier
+        """
+        with self.locks.branch(project_id, branch_id):
+            branch = self.projects.get_branch(project_id=project_id, branch_id=branch_id)
+            if branch is None:
+                yield None
+            else:
+                with branch.batch():
+                    yield branch
+
+    def cancel_modules(self,
+            project_id: str,
+            workflow: WorkflowHandle,
+            start_index: int
+        ) -> None:
+        """Cancel the running tasks for all modules in the given workflow
+        starting at the given index. Does not change the module state.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        workflow: vizier.viztrail.workflow.WorkflowHandle
+            Workflow handle
+        start_index: int
+            Index position of the first module
+        """
+        modules = set(m.identifier for m in workflow.modules[start_index:])
+        for task_id, task in list(self.tasks.items()):
+            if task.project_id == project_id and task.branch_id == workflow.branch_id and task.module_id in modules:
+                self.backend.cancel_task(task_id)
+                self.tasks.pop(task_id, None)
+
+    def publish_changes(self,
+            task: ExtendedTaskHandle,
+            workflow: WorkflowHandle,
+            module_index: int,
+            states: List[int]
+        ) -> None:
+        """Publish module events for the module that is associated with the
+        given task and for all following modules whose state differs from the
+        given list of previous states.
+
+        Parameters
+        ----------
+        task: vizier.engine.base.ExtendedTaskHandle
+            Handle for the finished task
+        workflow: vizier.viztrail.workflow.WorkflowHandle
+            Workflow handle
+        module_index: int
+            Index position of the module that is associated with the task
+        states: list(int)
+            Previous states of the module and all following modules
+        """
+        modules = workflow.modules[module_index:]
+        self.events.publish_modules(
+            task.project_id,
+            task.branch_id,
+            workflow,
+            [modules[0]] + [
+                m for m, state in zip(modules[1:], states[1:])
+                if m.state != state
+            ]
+        )
+
+    def reset_modules(self,
+            project_id: str,
+            workflow: WorkflowHandle,
+            start_index: int
+        ) -> None:
+        """Set all modules in the given workflow starting at the given index
+        back to pending state. Running tasks for these modules are canceled.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        workflow: vizier.viztrail.workflow.WorkflowHandle
+            Workflow handle
+        start_index: int
+            Index position of the first module
+        """
+        self.cancel_modules(project_id, workflow, start_index)
+        for m in workflow.modules[start_index:]:
+            if not m.is_pending:
+                m.set_pending()
+
+    def schedule_modules(self, project_id: str, workflow: WorkflowHandle) -> None:
+        """Execute all pending modules in the given workflow that are ready
+        for execution. Modules that do not require re-execution for the
+        current database state are set to success.
+
+        A pending module is ready if all preceding modules are complete or if
+        its provenance is known and none of the active modules that precede
+        it reads, writes, or deletes any of the datasets that the module
+        accessed in its previous execution. Modules with unknown provenance
+        are executed strictly in workflow order.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        workflow: vizier.viztrail.workflow.WorkflowHandle
+            Workflow handle
+        """
+        while True:
+            # Find the next module that is ready. Modules that have a task
+            # are active even if they are still in pending state.
+            tasks = set(
+                task.module_id for task in list(self.tasks.values())
+                    if task.project_id == project_id and task.branch_id == workflow.branch_id
+            )
+            ready = find_ready_module(workflow.modules, tasks)
+            if ready is None:
+                return
+            module_index, context, concurrent = ready
+            next_module = workflow.modules[module_index]
+            if not next_module.provenance.requires_exec(context):
+                # print("Module {} does not need re-execution, skipping".format(next_module))
+                next_module.set_success(
+                    finished_at=get_current_time(),
+                    outputs=next_module.outputs,
+                    provenance=next_module.provenance,
+                )
+                continue
+            # print("Scheduling {} for execution".format(next_module))
+            command = next_module.command
+            package_id = command.package_id
+            command_id = command.command_id
+            external_form = command.to_external_form(
+                command=self.packages[package_id].get(command_id),
+                datasets=dict( 
+                    (name, cast(DatasetDescriptor, context[name]))
+                    for name in context 
+                    if context[name].is_dataset 
+                )
+            )
+            # If the backend is going to run the task immediately we
+            # need to adjust the module state
+            state = self.backend.next_task_state()
+            if state == mstate.MODULE_RUNNING:
+                next_module.set_running(
+                    external_form=external_form,
+                    started_at=get_current_time()
+                )
+            else:
+                next_module.update_property(
+                    external_form=external_form
+                )
+            self.execute_module(
+                project_id=project_id,
+                branch_id=workflow.branch_id,
+                module=next_module,
+                artifacts=context,
+                concurrent=concurrent
+            )
 
 
 # ------------------------------------------------------------------------------
@@ -906,13 +1125,77 @@ def pop_task(tasks, task_id: str) -> Optional[ExtendedTaskHandle]:
     -------
     vizier.engine.base.ExtendedTaskHandle
     """
-    # Check if a task with the given identifier exists
-    if not task_id in tasks:
+    # Tasks of different branches are removed concurrently. Use a single
+    # (atomic) operation to get the task handle and remove it from the index.
+    return tasks.pop(task_id, None)
+
+
+def find_ready_module(
+        modules: List[ModuleHandle],
+        tasks: Set[str]
+    ) -> Optional[Tuple[int, Dict[str, ArtifactDescriptor], Set[str]]]:
+    """Find the first pending module in a workflow that is ready for
+    execution. Returns the index of the module, the database state for the
+    module, and the names of datasets that are accessed by active modules that
+    precede the module. The result is None if no module is ready.
+
+    The database state includes the effects of active modules as predicted by
+    their provenance from the previous execution. None of these datasets is
+    accessed by the returned module (according to its own provenance).
+
+    Parameters
+    ----------
+    modules: list(vizier.viztrail.module.ModuleHandle)
+        Workflow modules
+    tasks: set(string)
+        Identifier of modules that have a running task
+
+    Returns
+    -------
+    (int, dict(string:vizier.datastore.artifact.ArtifactDescriptor), set(string))
+    """
+    context: Dict[str, ArtifactDescriptor] = {}
+    # Names of datasets that are accessed by active modules
+    blocked: Set[str] = set()
+    has_active = False
+    for i, m in enumerate(modules):
+        if m.is_success:
+            context = m.provenance.get_database_state(context)
+            continue
+        elif not m.is_active:
+            # Nothing is executed after a module that failed or was canceled
+            return None
+        footprint = get_footprint(m.provenance)
+        if m.is_pending and m.identifier not in tasks:
+            if not has_active or (footprint is not None and footprint.isdisjoint(blocked)):
+                return i, context, set(blocked)
+        if footprint is None:
+            # All following modules depend on an active module with unknown
+            # provenance
+            return None
+        blocked.update(footprint)
+        has_active = True
+        context = m.provenance.get_database_state(context)
+    return None
+
+
+def get_footprint(provenance: ModuleProvenance) -> Optional[Set[str]]:
+    """Get the names of all datasets that a module reads, writes, or deletes
+    according to its provenance information. The result is None if the
+    provenance is unknown.
+
+    Parameters
+    ----------
+    provenance: vizier.viztrail.module.provenance.ModuleProvenance
+        Module provenance information
+
+    Returns
+    -------
+    set(string)
+    """
+    if provenance.unexecuted or provenance.read is None or provenance.write is None:
         return None
-    # Get the task handle and remove it from the task index
-    task = tasks[task_id]
-    del tasks[task_id]
-    return task
+    return set(provenance.read) | set(provenance.write) | set(provenance.delete)
 
 
 def compute_context(modules: List[ModuleHandle]) -> Dict[str, ArtifactDescriptor]:
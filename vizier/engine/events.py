@@ -0,0 +1,320 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Notifications about changes to the workflow at the head of project
+branches. The engine publishes an event whenever the state of a module in a
+branch head changes (module event) and whenever a new workflow becomes the
+head of a branch (workflow event). Clients subscribe to the events for a
+branch instead of repeatedly fetching the full workflow handle.
+
+Each subscription buffers events in a bounded queue. Events for a module that
+is already in the queue replace the queued event. If a client does not keep
+up with the events the queue is replaced by a single workflow event, i.e., the
+client is asked to fetch the full workflow handle again.
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+
+import threading
+
+from collections import OrderedDict
+
+from vizier.viztrail.module.base import ModuleHandle
+from vizier.viztrail.workflow import WorkflowHandle
+
+
+"""Event types."""
+EVENT_MODULE = 'module'
+EVENT_WORKFLOW = 'workflow'
+
+"""Default maximum number of buffered events for a subscription."""
+DEFAULT_QUEUE_SIZE = 1000
+
+
+class WorkflowEvent(object):
+    """Event for a change in the workflow at the head of a project branch.
+    Module events reference the modified module. The state of the module is
+    read when the event is delivered, i.e., the event always reflects the
+    latest state of the module.
+    """
+    def __init__(self,
+            event_type: str,
+            project_id: str,
+            branch_id: str,
+            workflow: Optional[WorkflowHandle],
+            module: Optional[ModuleHandle] = None
+        ):
+        """Initialize the event properties.
+
+        Parameters
+        ----------
+        event_type: string
+            Event type (EVENT_MODULE or EVENT_WORKFLOW)
+        project_id: string
+            Unique project identifier
+        branch_id: string
+            Unique branch identifier
+        workflow: vizier.viztrail.workflow.WorkflowHandle
+            Workflow at the branch head (None for an empty branch)
+        module: vizier.viztrail.module.base.ModuleHandle, optional
+            Modified module for module events
+        """
+        self.event_type = event_type
+        self.project_id = project_id
+        self.branch_id = branch_id
+        self.workflow = workflow
+        self.module = module
+
+    @property
+    def is_module_event(self) -> bool:
+        """True if the event is a module event.
+
+        Returns
+        -------
+        bool
+        """
+        return self.event_type == EVENT_MODULE
+
+    @property
+    def key(self) -> Tuple[str, Optional[str]]:
+        """Key that identifies the events that replace each other in the
+        subscription queue.
+
+        Returns
+        -------
+        (string, string)
+        """
+        if self.module is not None:
+            return (self.event_type, self.module.identifier)
+        return (self.event_type, None)
+
+
+class EventSubscription(object):
+    """Subscription to the events for a single project branch."""
+    def __init__(self,
+            project_id: str,
+            branch_id: str,
+            queue_size: int = DEFAULT_QUEUE_SIZE
+        ):
+        """Initialize the subscribed branch and the event queue.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        branch_id: string
+            Unique branch identifier
+        queue_size: int, optional
+            Maximum number of buffered events
+        """
+        self.project_id = project_id
+        self.branch_id = branch_id
+        self.queue_size = queue_size
+        self.queue: Dict[Tuple[str, Optional[str]], WorkflowEvent] = OrderedDict()
+        self.cond = threading.Condition()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[WorkflowEvent]:
+        """Get the next event. Blocks until an event is available or the
+        timeout expires. Returns None on timeout.
+
+        Parameters
+        ----------
+        timeout: float, optional
+            Maximum number of seconds to wait for an event
+
+        Returns
+        -------
+        vizier.engine.events.WorkflowEvent
+        """
+        with self.cond:
+            if len(self.queue) == 0:
+                self.cond.wait(timeout=timeout)
+            if len(self.queue) == 0:
+                return None
+            _, event = self.queue.popitem(last=False)
+            return event
+
+    def put(self, event: WorkflowEvent) -> None:
+        """Add an event to the queue. A queued event with the same key is
+        replaced. A workflow event replaces all queued events.
+
+        Parameters
+        ----------
+        event: vizier.engine.events.WorkflowEvent
+            Published event
+        """
+        with self.cond:
+            if not event.is_module_event:
+                self.queue.clear()
+            elif event.key in self.queue:
+                del self.queue[event.key]
+            elif len(self.queue) >= self.queue_size:
+                # The client has to fetch the full workflow again.
+                self.queue.clear()
+                event = WorkflowEvent(
+                    event_type=EVENT_WORKFLOW,
+                    project_id=event.project_id,
+                    branch_id=event.branch_id,
+                    workflow=event.workflow
+                )
+            self.queue[event.key] = event
+            self.cond.notify_all()
+
+
+class EventBus(object):
+    """Deliver published events to the subscriptions for the respective
+    project branch.
+    """
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """Initialize the subscription index.
+
+        Parameters
+        ----------
+        queue_size: int, optional
+            Maximum number of buffered events for each subscription
+        """
+        self.queue_size = queue_size
+        self.subscriptions: Dict[Tuple[str, str], Set[EventSubscription]] = dict()
+        self.lock = threading.Lock()
+
+    def has_subscriptions(self, project_id: str, branch_id: str) -> bool:
+        """Test if there are any subscriptions for the given branch.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        branch_id: string
+            Unique branch identifier
+
+        Returns
+        -------
+        bool
+        """
+        return (project_id, branch_id) in self.subscriptions
+
+    def publish(self, event: WorkflowEvent) -> None:
+        """Deliver an event to all subscriptions for the branch that the
+        event belongs to.
+
+        Parameters
+        ----------
+        event: vizier.engine.events.WorkflowEvent
+            Published event
+        """
+        with self.lock:
+            subscriptions = list(
+                self.subscriptions.get((event.project_id, event.branch_id), [])
+            )
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def publish_modules(self,
+            project_id: str,
+            branch_id: str,
+            workflow: WorkflowHandle,
+            modules: List[ModuleHandle]
+        ) -> None:
+        """Publish module events for the given modules in the workflow at the
+        head of a branch.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        branch_id: string
+            Unique branch identifier
+        workflow: vizier.viztrail.workflow.WorkflowHandle
+            Workflow at the branch head
+        modules: list(vizier.viztrail.module.base.ModuleHandle)
+            Modified modules
+        """
+        if not self.has_subscriptions(project_id, branch_id):
+            return
+        for module in modules:
+            self.publish(WorkflowEvent(
+                event_type=EVENT_MODULE,
+                project_id=project_id,
+                branch_id=branch_id,
+                workflow=workflow,
+                module=module
+            ))
+
+    def publish_workflow(self,
+            project_id: str,
+            branch_id: str,
+            workflow: Optional[WorkflowHandle]
+        ) -> None:
+        """Publish a workflow event for a new workflow at the head of a
+        branch.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        branch_id: string
+            Unique branch identifier
+        workflow: vizier.viztrail.workflow.WorkflowHandle
+            Workflow at the branch head
+        """
+        if not self.has_subscriptions(project_id, branch_id):
+            return
+        self.publish(WorkflowEvent(
+            event_type=EVENT_WORKFLOW,
+            project_id=project_id,
+            branch_id=branch_id,
+            workflow=workflow
+        ))
+
+    def subscribe(self, project_id: str, branch_id: str) -> EventSubscription:
+        """Create a new subscription for the events of the given branch.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        branch_id: string
+            Unique branch identifier
+
+        Returns
+        -------
+        vizier.engine.events.EventSubscription
+        """
+        subscription = EventSubscription(
+            project_id=project_id,
+            branch_id=branch_id,
+            queue_size=self.queue_size
+        )
+        with self.lock:
+            key = (project_id, branch_id)
+            self.subscriptions.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        """Remove the given subscription.
+
+        Parameters
+        ----------
+        subscription: vizier.engine.events.EventSubscription
+            Subscription that is removed
+        """
+        with self.lock:
+            key = (subscription.project_id, subscription.branch_id)
+            subscriptions = self.subscriptions.get(key)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if len(subscriptions) == 0:
+                    del self.subscriptions[key]
@@ -0,0 +1,150 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Locks that serialize changes to the workflows of project branches.
+
+Each branch has its own lock. All changes to the workflow at the head of a
+branch (e.g., appending modules or updating the state of a module when a
+task finishes) are made while holding the branch lock. Changes to different
+branches do not block each other.
+
+Creating and deleting branches changes the branch index of a project. These
+operations hold the project lock. The project lock is always acquired before
+any branch lock of the project to avoid deadlocks.
+
+Locks are re-entrant and are only kept while they are in use. The project
+cache only tries to acquire the locks (without blocking) when it releases the
+workflows of a project that is evicted. Projects that are in use are skipped.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterator
+
+import threading
+
+
+class LockEntry(object):
+    """Re-entrant lock and the number of threads that are using it."""
+    def __init__(self):
+        """Initialize the lock and the usage counter."""
+        self.lock = threading.RLock()
+        self.users = 0
+
+
+class LockManager(object):
+    """Manager for project and branch locks."""
+    def __init__(self):
+        """Initialize the indexes of the locks that are in use."""
+        self.lock = threading.Lock()
+        self.branches: Dict[Hashable, LockEntry] = dict()
+        self.projects: Dict[Hashable, LockEntry] = dict()
+
+    @contextmanager
+    def branch(self, project_id: str, branch_id: str) -> Iterator[None]:
+        """Context manager that holds the lock for the given branch.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        branch_id: string
+            Unique branch identifier
+        """
+        with self.hold(self.branches, (project_id, branch_id)):
+            yield
+
+    @contextmanager
+    def project(self, project_id: str) -> Iterator[None]:
+        """Context manager that holds the lock for the given project. The
+        project lock does not block changes to the workflows of the project
+        branches.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        """
+        with self.hold(self.projects, project_id):
+            yield
+
+    @contextmanager
+    def try_branch(self, project_id: str, branch_id: str) -> Iterator[bool]:
+        """Context manager that acquires the lock for the given branch if it
+        is not held by another thread. Does not block. Yields True if the lock
+        was acquired and False otherwise.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        branch_id: string
+            Unique branch identifier
+        """
+        with self.hold(self.branches, (project_id, branch_id), blocking=False) as acquired:
+            yield acquired
+
+    @contextmanager
+    def try_project(self, project_id: str) -> Iterator[bool]:
+        """Context manager that acquires the lock for the given project if it
+        is not held by another thread. Does not block. Yields True if the lock
+        was acquired and False otherwise.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        """
+        with self.hold(self.projects, project_id, blocking=False) as acquired:
+            yield acquired
+
+    @contextmanager
+    def hold(self,
+            locks: Dict[Hashable, LockEntry],
+            key: Hashable,
+            blocking: bool = True
+        ) -> Iterator[bool]:
+        """Context manager that holds the lock for the given key. The lock is
+        created if it is not in use and removed when it is no longer used.
+        Yields True if the lock is held. The result is only False if the lock
+        is not blocking and held by another thread.
+
+        Parameters
+        ----------
+        locks: dict
+            Index of locks that are in use
+        key: hashable
+            Key of the lock
+        blocking: bool, optional
+            Wait for the lock if it is held by another thread
+        """
+        with self.lock:
+            entry = locks.get(key)
+            if entry is None:
+                entry = LockEntry()
+                locks[key] = entry
+            entry.users += 1
+        try:
+            acquired = entry.lock.acquire(blocking=blocking)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    entry.lock.release()
+        finally:
+            with self.lock:
+                entry.users -= 1
+                if entry.users == 0:
+                    del locks[key]
@@ -0,0 +1,343 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Reduce the number of points in the result of a chart query to a given
+point budget. The method depends on the chart type:
+
+- Line charts select points using Largest-Triangle-Three-Buckets (LTTB) for
+  each data series. The selected points preserve the visual shape of the
+  series.
+- Area charts select the rows with the minimum and maximum value of each
+  series in equal-sized buckets of rows. The selected points preserve the
+  envelope of the series.
+- Bar charts aggregate equal-sized buckets of rows. The value of each bar is
+  the mean of the numeric values in the bucket. The label is taken from the
+  first row in the bucket.
+- Scatter plots keep one point for each occupied cell in a regular grid over
+  the value range of the x-axis and the data series.
+
+Line charts, area charts, and scatter plots only select rows from the query
+result, i.e., all points in the chart exist in the dataset.
+"""
+
+from typing import Any, List, Optional, Tuple
+
+import math
+
+import numpy as np
+
+
+"""Chart types."""
+CHART_AREA = 'Area Chart'
+CHART_BAR = 'Bar Chart'
+CHART_LINE = 'Line Chart'
+CHART_SCATTER = 'Scatter Plot'
+
+
+def downsample(
+        rows: List[List[Any]],
+        caveats: List[List[Optional[bool]]],
+        chart_type: str,
+        x_axis: Optional[int],
+        max_points: int
+    ) -> Tuple[List[List[Any]], List[List[Optional[bool]]]]:
+    """Reduce the rows in a chart query result to at most max_points rows.
+    The rows are returned unchanged if they do not exceed the point budget.
+
+    Parameters
+    ----------
+    rows: list(list)
+        Rows in the query result. Each row has one value per data series
+    caveats: list(list)
+        Caveat flags for the values in the query result
+    chart_type: string
+        Type of the chart
+    x_axis: int, optional
+        Index of the data series that contains the x-axis values
+    max_points: int
+        Maximum number of rows in the result
+
+    Returns
+    -------
+    (list, list)
+    """
+    if max_points <= 0 or len(rows) <= max_points:
+        return rows, caveats
+    series = [i for i in range(len(rows[0])) if i != x_axis]
+    if len(series) == 0:
+        # Only the x-axis is plotted. Keep evenly spaced rows.
+        indices = np.linspace(0, len(rows) - 1, max_points).astype(int)
+        return select_rows(rows, caveats, indices)
+    if x_axis is not None:
+        x = to_float_array([row[x_axis] for row in rows])
+        if np.isnan(x).any():
+            x = np.arange(len(rows), dtype=float)
+    else:
+        x = np.arange(len(rows), dtype=float)
+    columns = [to_float_array([row[s] for row in rows]) for s in series]
+    if chart_type == CHART_BAR:
+        return aggregate_buckets(rows, caveats, columns, series, max_points)
+    elif chart_type == CHART_SCATTER:
+        indices = grid_sample(x, columns, max_points)
+    elif chart_type == CHART_AREA:
+        indices = minmax(columns, max_points)
+    else:
+        indices = np.unique(np.concatenate([
+            lttb(x, y, max(3, max_points // len(columns))) for y in columns
+        ]))
+    return select_rows(rows, caveats, indices[:max_points])
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Select points of a series using the Largest-Triangle-Three-Buckets
+    algorithm. The first and last point are always selected. The remaining
+    points are divided into threshold - 2 buckets. From each bucket the point
+    is selected that forms the largest triangle with the point that was
+    selected from the previous bucket and the average of the next bucket.
+
+    Missing values are ignored when computing the triangle areas.
+
+    Parameters
+    ----------
+    x: numpy.ndarray
+        Values on the x-axis
+    y: numpy.ndarray
+        Values of the data series (NaN for missing values)
+    threshold: int
+        Number of selected points
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.where(np.isnan(y), np.nanmean(y) if not np.isnan(y).all() else 0.0, y)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.zeros(threshold, dtype=int)
+    selected[-1] = n - 1
+    a = 0
+    for b in range(threshold - 2):
+        start, end = edges[b], edges[b + 1]
+        # Average of the next bucket (the last point for the last bucket).
+        next_start = end
+        next_end = edges[b + 2] if b + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) -
+            (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[b + 1] = a
+    return selected
+
+
+def minmax(columns: List[np.ndarray], max_points: int) -> np.ndarray:
+    """Divide the rows into equal-sized buckets and select the rows with the
+    minimum and maximum value of each series in each bucket.
+
+    Parameters
+    ----------
+    columns: list(numpy.ndarray)
+        Values of the data series (NaN for missing values)
+    max_points: int
+        Maximum number of selected rows
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    n = len(columns[0])
+    buckets = max(1, (max_points - 2) // (2 * len(columns)))
+    size = int(math.ceil(n / buckets))
+    padded = buckets * size
+    indices = [np.array([0, n - 1])]
+    for y in columns:
+        # Missing values are never selected.
+        values = np.full(padded, np.nan)
+        values[:n] = y
+        values = values.reshape(buckets, size)
+        valid = ~np.isnan(values).all(axis=1)
+        offsets = np.arange(buckets)[valid] * size
+        indices.append(offsets + np.nanargmin(values[valid], axis=1))
+        indices.append(offsets + np.nanargmax(values[valid], axis=1))
+    return np.unique(np.concatenate(indices))
+
+
+def grid_sample(x: np.ndarray, columns: List[np.ndarray], max_points: int) -> np.ndarray:
+    """Select the first row for each occupied cell in a regular grid over the
+    range of x-axis values and the values of each data series.
+
+    Parameters
+    ----------
+    x: numpy.ndarray
+        Values on the x-axis
+    columns: list(numpy.ndarray)
+        Values of the data series (NaN for missing values)
+    max_points: int
+        Maximum number of selected rows
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    cells = max(1, int(math.sqrt(max_points / len(columns))))
+    x_cell = to_cells(x, cells)
+    indices = list()
+    for y in columns:
+        valid = ~np.isnan(y)
+        keys = x_cell * cells + to_cells(y, cells)
+        _, first = np.unique(keys[valid], return_index=True)
+        indices.append(np.flatnonzero(valid)[first])
+    return np.unique(np.concatenate(indices))
+
+
+def aggregate_buckets(
+        rows: List[List[Any]],
+        caveats: List[List[Optional[bool]]],
+        columns: List[np.ndarray],
+        series: List[int],
+        max_points: int
+    ) -> Tuple[List[List[Any]], List[List[Optional[bool]]]]:
+    """Aggregate equal-sized buckets of rows. Data series values are replaced
+    by the mean of the numeric values in the bucket. All other values are
+    taken from the first row in the bucket. A value in the result has a
+    caveat if any of the aggregated values has a caveat.
+
+    Parameters
+    ----------
+    rows: list(list)
+        Rows in the query result
+    caveats: list(list)
+        Caveat flags for the values in the query result
+    columns: list(numpy.ndarray)
+        Values of the data series (NaN for missing values)
+    series: list(int)
+        Index positions of the data series in the rows
+    max_points: int
+        Number of buckets
+
+    Returns
+    -------
+    (list, list)
+    """
+    n = len(rows)
+    edges = np.linspace(0, n, max_points + 1).astype(int)
+    starts = edges[:-1]
+    means = list()
+    for y in columns:
+        valid = ~np.isnan(y)
+        sums = np.add.reduceat(np.where(valid, y, 0.0), starts)
+        counts = np.add.reduceat(valid.astype(int), starts)
+        means.append([
+            float(s / c) if c > 0 else None
+            for s, c in zip(sums.tolist(), counts.tolist())
+        ])
+    result_rows = list()
+    result_caveats = list()
+    for b, start in enumerate(starts.tolist()):
+        end = int(edges[b + 1])
+        row = list(rows[start])
+        row_caveats = list(caveats[start])
+        for i, s in enumerate(series):
+            row[s] = means[i][b]
+            row_caveats[s] = any(c[s] for c in caveats[start:end])
+        result_rows.append(row)
+        result_caveats.append(row_caveats)
+    return result_rows, result_caveats
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def select_rows(
+        rows: List[List[Any]],
+        caveats: List[List[Optional[bool]]],
+        indices: np.ndarray
+    ) -> Tuple[List[List[Any]], List[List[Optional[bool]]]]:
+    """Get the rows and caveats at the given index positions.
+
+    Parameters
+    ----------
+    rows: list(list)
+        Rows in the query result
+    caveats: list(list)
+        Caveat flags for the values in the query result
+    indices: numpy.ndarray
+        Sorted index positions of the selected rows
+
+    Returns
+    -------
+    (list, list)
+    """
+    positions = indices.tolist()
+    return [rows[i] for i in positions], [caveats[i] for i in positions]
+
+
+def to_cells(values: np.ndarray, cells: int) -> np.ndarray:
+    """Get the grid cell for each value in an array. Values are divided into
+    the given number of equal-width cells over their range. Missing values are
+    assigned to the first cell.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        Array of numeric values
+    cells: int
+        Number of grid cells
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return np.zeros(len(values), dtype=np.int64)
+    low = values[valid].min()
+    width = values[valid].max() - low
+    if width == 0:
+        return np.zeros(len(values), dtype=np.int64)
+    scaled = np.where(valid, (values - low) / width * cells, 0.0)
+    return np.minimum(scaled.astype(np.int64), cells - 1)
+
+
+def to_float_array(values: List[Any]) -> np.ndarray:
+    """Convert a list of values into an array of floats. Values that are not
+    numeric are represented as NaN. Numeric strings are converted if all
+    values in the list can be converted.
+
+    Parameters
+    ----------
+    values: list
+        List of cell values
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    try:
+        return np.array(values, dtype=float)
+    except (ValueError, TypeError):
+        return np.array(
+            [
+                v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+                for v in values
+            ],
+            dtype=float
+        )
@@ -18,7 +18,7 @@
 from typing import Optional
 
 from vizier.core.util import is_valid_name
-from vizier.engine.packages.plot.query import ChartQuery
+from vizier.engine.packages.plot.query import ChartQuery, DEFAULT_MAX_POINTS
 from vizier.view.chart import ChartViewHandle
 from vizier.engine.task.processor import ExecResult, TaskProcessor
 from vizier.viztrail.module.output import ModuleOutputs, ChartOutput
@@ -124,8 +124,9 @@ class PlotProcessor(TaskProcessor):
                 view=view,
                 dataset=ds
             )
-        # Execute the query and get the result
-        (rows, caveats) = ChartQuery.exec_query(ds, view)
+        # Execute the query and get the result. Large results are reduced to
+        # the default point budget since the result is stored with the module.
+        (rows, caveats) = ChartQuery.exec_query(ds, view, max_points=DEFAULT_MAX_POINTS)
         # Add chart view handle as module output
         return ExecResult(
             outputs=ModuleOutputs(stdout=[ChartOutput(view=view, rows=rows, caveats=caveats)]),
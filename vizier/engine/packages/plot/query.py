@@ -14,14 +14,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Classes to support queries over datasets to generate simple plot charts."""
-from typing import List, Any, Optional
+"""Classes to support queries over datasets to generate simple plot charts.
+
+Cell values are collected for each data series while the dataset rows are
+streamed. Values are cast to numbers for the whole series at once. The query
+result can be reduced to a maximum number of points (see the downsample
+module) to avoid shipping millions of points to the browser.
+"""
+from typing import List, Any, Optional, Tuple
 
 from datetime import date, datetime
+from itertools import zip_longest
 import time
+
+import numpy as np
+
 from vizier.datastore.dataset import DatasetHandle, DatasetRow
+from vizier.engine.packages.plot.downsample import downsample
 from vizier.view.chart import ChartViewHandle
 
+
+"""Default maximum number of points in the result of a chart query."""
+DEFAULT_MAX_POINTS = 10000
+
+
 class DataStreamConsumer(object):
     """Consumer for data rows. The row consumers are used to filter cell values
     for a given column and a range interval of rows. The result is a list of
@@ -69,7 +85,8 @@ class DataStreamConsumer(object):
             row_index: int
         ) -> None:
         """Consume a dataset row. The position of the row in the ordered list of
-        dataset rows is given by the row_index.
+        dataset rows is given by the row_index. Values are cast when the
+        consumer is closed.
 
         Parameters
         ----------
@@ -80,34 +97,32 @@ class DataStreamConsumer(object):
         """
         # Check if the row index falls inside the consumed interval
         if row_index >= self.range_start and (self.range_end is None or row_index <= self.range_end):
-            val = row.values[self.column_index]
-            if val is not None:
-                if isinstance(val, date) or isinstance(val, datetime):
-                    val = time.mktime(val.timetuple())
-                if self.cast_to_number:
-                    # Only convert if not already a numeric value. Assumes a
-                    # string if not numeric
-                    if not isinstance(val, int) and not isinstance(val, float):
-                        # Try to cast to integer first. Remove commas.
-                        try:
-                            val = int(val.replace(',', ''))
-                        except ValueError:
-                            # Try to convert to float if int failed
-                            try:
-                                val = float(val)
-                            except ValueError:
-                                pass
-            self.values.append(val)
-        self.values_caveats.append(row.caveats[self.column_index])    
+            self.values.append(row.values[self.column_index])
+            self.values_caveats.append(row.caveats[self.column_index])
+
+    def close(self) -> None:
+        """Convert the consumed values after all rows have been consumed.
+        Dates are converted into timestamps. If cast_to_number is True all
+        values are cast to numbers if possible.
+        """
+        self.values = cast_values(self.values, self.cast_to_number)
+
 
 class ChartQuery(object):
     """Query processor for simple chart queries."""
     @staticmethod
-    def exec_query(dataset: DatasetHandle, view: ChartViewHandle):
+    def exec_query(
+            dataset: DatasetHandle,
+            view: ChartViewHandle,
+            max_points: Optional[int] = None
+        ) -> Tuple[List[List[Any]], List[List[Optional[bool]]]]:
         """Query a given dataset by selecting the columns in the given list.
         Each row in the result is the result of projecting a tuple in the
         dataset on the given columns.
 
+        If max_points is given, the result is reduced to at most max_points
+        rows using a method that depends on the chart type.
+
         Raises ValueError if any of the specified columns do not exist.
 
         Parameters
@@ -116,10 +131,12 @@ class ChartQuery(object):
             Handle for dataset that is being queried
         view: vizier.view.chart.ChartViewHandle
             Chart view definition handle
+        max_points: int, optional
+            Maximum number of rows in the query result
 
         Returns
         -------
-        list()
+        (list, list)
         """
         # Get index position for x-axis. Set to negative value if none is given.
         # the value is used to determine which data series are converted to
@@ -151,34 +168,129 @@ class ChartQuery(object):
             if range_end > max_interval[1]:
                 max_interval = (max_interval[0], range_end)
         # Consume all dataset rows in the maximum interval
-        rows = dataset.fetch_rows(
+        row_index = max_interval[0]
+        with dataset.reader(
             offset=max_interval[0],
             limit=(max_interval[1]-max_interval[0])+1
-        )
-        row_index = max_interval[0]
-        for exported_row in rows:
-            for c in consumers:
-                c.consume(row=exported_row, row_index=row_index)
-            row_index += 1
-        # the size of the result set is determined by the longest data series
-        max_values = -1
+        ) as reader:
+            for exported_row in reader:
+                for c in consumers:
+                    c.consume(row=exported_row, row_index=row_index)
+                row_index += 1
         for c in consumers:
-            if len(c.values) > max_values:
-                max_values = len(c.values)
-        # Create result array
-        data = []
-        data_caveats = []
-        for idx_row in range(max_values):
-            row: List[Any] = list()
-            row_caveats: List[Optional[bool]] = list()
-            for idx_series in range(len(consumers)):
-                consumer = consumers[idx_series]
-                if idx_row < len(consumer.values):
-                    row.append(consumer.values[idx_row])
-                    row_caveats.append(consumer.values_caveats[idx_row])
-                else:
-                    row.append(None)
-                    row_caveats.append(None)
-            data.append(row)
-            data_caveats.append(row_caveats)
+            c.close()
+        # The size of the result set is determined by the longest data series.
+        # Shorter series are padded with None.
+        data = [list(row) for row in zip_longest(*[c.values for c in consumers])]
+        data_caveats = [
+            list(row) for row in zip_longest(*[c.values_caveats for c in consumers])
+        ]
+        if max_points is not None:
+            return downsample(
+                rows=data,
+                caveats=data_caveats,
+                chart_type=view.chart_type,
+                x_axis=view.x_axis,
+                max_points=max_points
+            )
         return (data, data_caveats)
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def cast_values(values: List[Any], cast_to_number: bool) -> List[Any]:
+    """Convert the values of a data series. Dates are converted into
+    timestamps. If cast_to_number is True, string values are cast to integers
+    (ignoring commas) or floats where possible.
+
+    The values are first cast as a whole using numpy. Values are only cast
+    one by one if the series contains values that cannot be converted or that
+    may be integers in a series that numpy casts to floats. The result is the
+    same as casting each value with cast_value.
+
+    Parameters
+    ----------
+    values: list
+        Cell values in a data series
+    cast_to_number: bool
+        Attempt to cast values to numbers if True
+
+    Returns
+    -------
+    list
+    """
+    if not cast_to_number:
+        return [
+            time.mktime(val.timetuple()) if isinstance(val, (date, datetime)) else val
+            for val in values
+        ]
+    positions = [i for i, val in enumerate(values) if val is not None]
+    if len(positions) == 0:
+        return values
+    if len(positions) < len(values):
+        non_null = [values[i] for i in positions]
+    else:
+        non_null = values
+    cast: Optional[List[Any]] = None
+    if all(type(val) in (int, float) for val in non_null):
+        return values
+    elif all(isinstance(val, str) or type(val) is int for val in non_null):
+        text = np.array(non_null, dtype=str)
+        try:
+            cast = text.astype(np.int64).tolist()
+        except (ValueError, OverflowError):
+            try:
+                cast = np.char.replace(text, ',', '').astype(np.int64).tolist()
+            except (ValueError, OverflowError):
+                try:
+                    floats = text.astype(np.float64)
+                except ValueError:
+                    pass
+                else:
+                    # Values that may be integers (e.g., in a series of
+                    # mixed integers and floats, or integers that do not fit
+                    # into 64 bits) are cast one by one to keep their type.
+                    cast = floats.tolist()
+                    is_integral = np.isfinite(floats) & (floats == np.floor(floats))
+                    for i in np.flatnonzero(is_integral):
+                        cast[i] = cast_value(non_null[i])
+    if cast is None:
+        cast = [cast_value(val) for val in non_null]
+    if len(positions) == len(values):
+        return cast
+    result: List[Any] = [None] * len(values)
+    for i, val in zip(positions, cast):
+        result[i] = val
+    return result
+
+
+def cast_value(val: Any) -> Any:
+    """Cast a single value to a number if possible. Dates are converted into
+    timestamps.
+
+    Parameters
+    ----------
+    val: any
+        Cell value
+
+    Returns
+    -------
+    any
+    """
+    if isinstance(val, date) or isinstance(val, datetime):
+        val = time.mktime(val.timetuple())
+    # Only convert if not already a numeric value. Assumes a string if not
+    # numeric
+    if not isinstance(val, int) and not isinstance(val, float):
+        # Try to cast to integer first. Remove commas.
+        try:
+            val = int(val.replace(',', ''))
+        except ValueError:
+            # Try to convert to float if int failed
+            try:
+                val = float(val)
+            except ValueError:
+                pass
+    return val
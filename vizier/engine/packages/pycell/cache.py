@@ -0,0 +1,202 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cache for objects that are read by Python cells. Workers of the
+multiprocess backend are long-lived. Objects that were read by one Python
+cell are kept in memory for the following cells that run in the same worker.
+
+The cache contains the rows and data frames of datasets and the compiled code
+of exported Python objects. Entries are keyed by the project, the artifact
+identifier, and the kind of object. Artifacts are immutable, i.e., cached
+entries never become stale. Entries are evicted in least-recently-used order
+when the number of entries or their estimated memory size exceeds the limits.
+"""
+
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import os
+import sys
+import threading
+
+from pandas import DataFrame
+
+
+"""Kinds of cached objects."""
+KIND_CODE = 'code'
+KIND_FRAME = 'frame'
+KIND_ROWS = 'rows'
+
+"""Default maximum number of cached objects."""
+DEFAULT_CAPACITY = int(os.environ.get('PYCELL_CACHE_SIZE', '32'))
+
+"""Default maximum memory size (in MB) of cached objects."""
+DEFAULT_MAX_MEMORY = int(os.environ.get('PYCELL_CACHE_MEMORY', '1024'))
+
+"""Number of rows that are used to estimate the memory size of a row list."""
+SIZE_SAMPLE = 1000
+
+
+class ObjectCache(object):
+    """Least-recently-used cache for objects that are read by Python cells.
+    The memory size of each entry is estimated when it is added to the cache.
+    Objects that exceed the memory limit on their own are not cached.
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, max_memory: int = DEFAULT_MAX_MEMORY):
+        """Initialize the cache limits. A cache with a capacity of zero or
+        less does not cache any objects.
+
+        Parameters
+        ----------
+        capacity: int, optional
+            Maximum number of cached objects
+        max_memory: int, optional
+            Maximum estimated memory size of cached objects in MB
+        """
+        self.capacity = capacity
+        self.max_memory = max_memory * 1024 * 1024
+        self.memory = 0
+        self.entries: "OrderedDict[Tuple[str, str, str], Tuple[Any, int]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self, project_id: Optional[str] = None) -> None:
+        """Remove all cached objects for the given project. Removes all
+        objects if no project is given.
+
+        Parameters
+        ----------
+        project_id: string, optional
+            Unique project identifier
+        """
+        with self.lock:
+            for key in list(self.entries.keys()):
+                if project_id is None or key[0] == project_id:
+                    _, size = self.entries.pop(key)
+                    self.memory -= size
+
+    def get(self, project_id: str, identifier: str, kind: str) -> Optional[Any]:
+        """Get the cached object of the given kind for an artifact. Returns
+        None if the object is not cached.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        identifier: string
+            Unique artifact identifier
+        kind: string
+            Kind of the cached object
+
+        Returns
+        -------
+        any
+        """
+        key = (project_id, identifier, kind)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, project_id: str, identifier: str, kind: str, value: Any) -> Any:
+        """Add an object to the cache. Evicts least recently used objects if
+        the cache limits are exceeded. Returns the given value.
+
+        Parameters
+        ----------
+        project_id: string
+            Unique project identifier
+        identifier: string
+            Unique artifact identifier
+        kind: string
+            Kind of the cached object
+        value: any
+            Cached object
+
+        Returns
+        -------
+        any
+        """
+        size = estimate_size(value)
+        if self.capacity <= 0 or size > self.max_memory:
+            return value
+        key = (project_id, identifier, kind)
+        with self.lock:
+            if key in self.entries:
+                self.memory -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.memory += size
+            while len(self.entries) > self.capacity or self.memory > self.max_memory:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.memory -= evicted_size
+        return value
+
+
+"""Cache for the objects that are read by Python cells in this process."""
+_cache: Optional[ObjectCache] = None
+
+
+def get_cache() -> ObjectCache:
+    """Get the object cache of the current process. The cache is created on
+    first access.
+
+    Returns
+    -------
+    vizier.engine.packages.pycell.cache.ObjectCache
+    """
+    global _cache
+    if _cache is None:
+        _cache = ObjectCache()
+    return _cache
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory size (in bytes) of a cached object. The size of a
+    list of dataset rows is extrapolated from a sample of the rows.
+
+    Parameters
+    ----------
+    value: any
+        Cached object
+
+    Returns
+    -------
+    int
+    """
+    if isinstance(value, DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    elif isinstance(value, list):
+        sample = value[:SIZE_SAMPLE]
+        if len(sample) == 0:
+            return sys.getsizeof(value)
+        sample_size = sum(
+            sys.getsizeof(row.values) + sum(sys.getsizeof(v) for v in row.values)
+            for row in sample
+        )
+        return sys.getsizeof(value) + sample_size * len(value) // len(sample)
+    return sys.getsizeof(value)
@@ -21,8 +21,9 @@ a datastore from within a python script.
 from typing import Callable, Tuple, Optional, Dict, Set, List, Any
 
 from vizier.core.util import is_valid_name
-from vizier.datastore.dataset import DatasetColumn
+from vizier.datastore.dataset import DatasetColumn, DatasetHandle, DatasetRow
 from vizier.datastore.artifact import ArtifactDescriptor, ARTIFACT_TYPE_PYTHON
+from vizier.engine.packages.pycell.cache import get_cache, KIND_FRAME, KIND_ROWS
 from vizier.engine.packages.pycell.client.dataset import DatasetClient
 from vizier.viztrail.module.output import OutputObject, DatasetOutput, HtmlOutput, TextOutput
 from vizier.viztrail.module.output import OUTPUT_TEXT
@@ -459,11 +460,41 @@ class VizierDBClient(object):
         # Get identifier for the dataset with the given name. Will raise an
         # exception if the name is unknown
         identifier = self.get_dataset_identifier(name)
-        # Read dataset from datastore and return it.
-        dataset_frame = self.datastore.get_dataset_frame(identifier)
+        # Read dataset from the object cache or the datastore and return a
+        # copy that the cell can modify.
+        cache = get_cache()
+        dataset_frame = cache.get(self.project_id, identifier, KIND_FRAME)
         if dataset_frame is None:
-            raise ValueError('unknown dataset \'' + identifier + '\'')
-        return dataset_frame
+            dataset_frame = self.datastore.get_dataset_frame(identifier)
+            if dataset_frame is None:
+                raise ValueError('unknown dataset \'' + identifier + '\'')
+            cache.put(self.project_id, identifier, KIND_FRAME, dataset_frame)
+        return dataset_frame.copy()
+
+    def fetch_rows(self, dataset: DatasetHandle) -> List[DatasetRow]:
+        """Get the rows of a dataset. Rows are read from the object cache if
+        they were fetched by a previous cell. The returned rows must not be
+        modified.
+
+        Parameters
+        ----------
+        dataset: vizier.datastore.dataset.DatasetHandle
+            Handle for the dataset
+
+        Returns
+        -------
+        list(vizier.datastore.dataset.DatasetRow)
+        """
+        cache = get_cache()
+        rows = cache.get(self.project_id, dataset.identifier, KIND_ROWS)
+        if rows is None:
+            rows = cache.put(
+                self.project_id,
+                dataset.identifier,
+                KIND_ROWS,
+                dataset.fetch_rows()
+            )
+        return rows
         
     def dataset_from_s3(self, 
         bucket: str, 
@@ -286,13 +286,18 @@ class DatasetClient(object):
         """
         if self._rows is None:
             self._rows = list()
-            for row in self.dataset.fetch_rows():
+            if self.client is not None:
+                rows = self.client.fetch_rows(self.dataset)
+            else:
+                rows = self.dataset.fetch_rows()
+            for row in rows:
                 # Create mutable dataset row and set reference to this dataset
-                # for updates
+                # for updates. Copy the values since the fetched rows may be
+                # shared with other cells.
                 self._rows.append(
                     MutableDatasetRow(
                         identifier=row.identifier,
-                        values=row.values,
+                        values=list(row.values),
                         dataset=self
                     )
                 )
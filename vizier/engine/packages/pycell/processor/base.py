@@ -17,12 +17,14 @@
 """Implementation of the task processor for the Python cell package."""
 
 from typing import cast, List, Tuple, TextIO, Any, Dict
+from types import CodeType
 import sys
 import requests
 import os
 
 from vizier.engine.task.base import TaskContext
 from vizier.engine.task.processor import ExecResult, TaskProcessor
+from vizier.engine.packages.pycell.cache import get_cache, KIND_CODE
 from vizier.engine.packages.pycell.client.base import VizierDBClient
 from vizier.engine.packages.pycell.plugins import python_cell_preload
 from vizier.engine.packages.stream import OutputStream
@@ -41,6 +43,22 @@ VARS_OPEN = 'open'
 SANDBOX_PYTHON_EXECUTION = os.environ.get('SANDBOX_PYTHON_EXECUTION', "False")
 SANDBOX_PYTHON_URL = os.environ.get('SANDBOX_PYTHON_URL', 'http://127.0.0.1:5005/')
 
+"""Functions that are defined in the scope of every Python cell."""
+OVERRIDES = [
+    "def show(x):",
+    "  global vizierdb",
+    "  vizierdb.show(x)",
+    "def export(x):",
+    "  global vizierdb",
+    "  vizierdb.export_module(x)",
+    "def return_type(dt):",
+    "  def wrap(x):",
+    "    return x",
+    "  return wrap",
+    "pass"
+]
+OVERRIDES_CODE = compile("\n".join(OVERRIDES), '<vizier>', 'exec')
+
 class PyCellTaskProcessor(TaskProcessor):
     """Implementation of the task processor for the Python cell package."""
     def compute(self, command_id, arguments, context):
@@ -87,30 +105,25 @@ class PyCellTaskProcessor(TaskProcessor):
         # Get Python script from user arguments.  It is the source for VizierDBClient
         cell_src = args.get_value(cmd.PYTHON_SOURCE)
 
-        # prepend python objects exported in previous cells to the source
+        # Python objects that were exported in previous cells are defined in
+        # the cell scope before the cell is executed. The sandbox receives the
+        # exported source prepended to the cell source. Otherwise, the compiled
+        # code for the exported objects is taken from the object cache.
         exported_methods = [
-            context.datastore.get_object(descriptor.identifier).decode()
+            (name, descriptor.identifier)
             for name, descriptor in context.dataobjects.items()
             if descriptor.artifact_type == ARTIFACT_TYPE_PYTHON
         ]
-        overrides = [
-            "def show(x):",
-            "  global vizierdb",
-            "  vizierdb.show(x)",
-            "def export(x):", 
-            "  global vizierdb",
-            "  vizierdb.export_module(x)",
-            "def return_type(dt):",
-            "  def wrap(x):",
-            "    return x",
-            "  return wrap",
-            "pass"
-        ]
-
-        injected_source = "\n".join(exported_methods + overrides)
-        injected_lines = len([x for x in injected_source if x == '\n'])+1
-
-        source = injected_source + '\n' + cell_src
+        if SANDBOX_PYTHON_EXECUTION == "True":
+            injected_source = "\n".join([
+                context.datastore.get_object(identifier).decode()
+                for _, identifier in exported_methods
+            ] + OVERRIDES)
+            injected_lines = len([x for x in injected_source if x == '\n'])+1
+            source = injected_source + '\n' + cell_src
+        else:
+            injected_lines = 0
+            source = cell_src
 
         # Initialize the scope variables that are available to the executed
         # Python script. At this point this includes only the client to access
@@ -164,6 +177,13 @@ class PyCellTaskProcessor(TaskProcessor):
                     ])
                 
             else:
+                exec(OVERRIDES_CODE, variables, variables)
+                for name, identifier in exported_methods:
+                    exec(
+                        get_exported_code(context, name, identifier),
+                        variables,
+                        variables
+                    )
                 exec(source, variables, variables)
 
         except Exception as ex:
@@ -258,3 +278,38 @@ class DotDict(dict):
 
     def setattr(self, attr_name, val):
         self[attr_name] = val
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def get_exported_code(context: TaskContext, name: str, identifier: str) -> CodeType:
+    """Get the compiled code for a Python object that was exported by a
+    previous cell. The code is compiled once per worker and kept in the object
+    cache.
+
+    Parameters
+    ----------
+    context: vizier.engine.task.base.TaskContext
+        Context in which a task is being executed
+    name: string
+        Name of the exported object
+    identifier: string
+        Unique identifier of the data object that contains the source
+
+    Returns
+    -------
+    types.CodeType
+    """
+    cache = get_cache()
+    code = cache.get(context.project_id, identifier, KIND_CODE)
+    if code is None:
+        source = context.datastore.get_object(identifier).decode()
+        code = cache.put(
+            context.project_id,
+            identifier,
+            KIND_CODE,
+            compile(source, '<{}>'.format(name), 'exec')
+        )
+    return code
@@ -77,13 +77,10 @@ class RTaskProcessor(TaskProcessor):
         sys.stderr = OutputStream(tag='err', stream=stream)
         outputs = ModuleOutputs()
         
-        mimir_table_names = dict()
-        for ds_name_o in context.datasets:
-            dataset_id = context.datasets[ds_name_o]
-            dataset = context.datastore.get_dataset(dataset_id)
-            if dataset is None:
-                raise ValueError('unknown dataset \'' + ds_name_o + '\'')
-            mimir_table_names[ds_name_o] = dataset.identifier
+        mimir_table_names = {
+            ds_name_o: dataset.identifier
+            for ds_name_o, dataset in context.get_datasets().items()
+        }
         # Run the r code
         try:
             evalresp = mimir.evalR(mimir_table_names, source)
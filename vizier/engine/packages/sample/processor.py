@@ -21,14 +21,15 @@ are defined in the `sampling` package.
 from typing import List, Dict, Any, TYPE_CHECKING
 
 from vizier.engine.task.processor import ExecResult, TaskProcessor
-from vizier.api.webservice import server
 from vizier.viztrail.module.output import ModuleOutputs, DatasetOutput, TextOutput
 from vizier.viztrail.module.provenance import ModuleProvenance
-from vizier.datastore.dataset import DatasetDescriptor, DatasetColumn
+from vizier.datastore.dataset import DatasetDescriptor, DatasetColumn, DatasetHandle
 import vizier.engine.packages.sample.base as cmd
+import vizier.engine.packages.sample.sampler as sampler
 import vizier.mimir as mimir
 from vizier.core.util import get_unique_identifier
 from vizier.datastore.mimir.dataset import MimirDatasetHandle
+from vizier.datastore.mimir.store import MimirDatastore
 if TYPE_CHECKING:
     from vizier.viztrail.command import ModuleArguments
 from vizier.engine.task.base import TaskContext
@@ -36,10 +37,10 @@ from vizier.engine.task.base import TaskContext
 
 class SamplingProcessor(TaskProcessor):
     """
-    Implmentation of the task processor for the sampling package. The 
-    processor uses an instance of the vizual API to allow running on 
-    different types of datastores (e.g., the default datastore or the 
-    Mimir datastore).
+    Implmentation of the task processor for the sampling package. Samples
+    are created by the sampling lens for the Mimir datastore. For all other
+    datastores the sample is drawn while streaming the rows of the input
+    dataset and written directly as a new dataset.
     """
     def __init__(self):
         """
@@ -79,16 +80,134 @@ class SamplingProcessor(TaskProcessor):
             output_ds_name = input_ds_name + "_SAMPLE"
         output_ds_name = output_ds_name.lower()
 
+        if isinstance(context.datastore, MimirDatastore):
+            ds = self.create_mimir_sample(
+                command_id=command_id,
+                arguments=arguments,
+                input_dataset=input_dataset,
+                output_ds_name=output_ds_name
+            )
+        else:
+            ds = self.create_sample(
+                command_id=command_id,
+                arguments=arguments,
+                input_dataset=input_dataset,
+                context=context
+            )
+
+        # And start rendering some output
+        outputs = ModuleOutputs()
+        ds_output = DatasetOutput.from_handle(ds, context.project_id, output_ds_name)
+        if ds_output is not None:
+            outputs.stdout.append(ds_output)
+        else:
+            outputs.stderr.append(TextOutput("Error displaying dataset"))
+
+        # Record Reads and writes
+        provenance = ModuleProvenance(
+            read={
+                input_ds_name: input_dataset.identifier
+            },
+            write={
+                output_ds_name: DatasetDescriptor(
+                    identifier=ds.identifier,
+                    name=output_ds_name,
+                    columns=ds.columns
+                )
+            }
+        )
+
+        # Return task result
+        return ExecResult(
+            outputs=outputs,
+            provenance=provenance
+        )
+
+    def create_sample(self,
+            command_id: str,
+            arguments: "ModuleArguments",
+            input_dataset: DatasetHandle,
+            context: TaskContext
+        ) -> DatasetDescriptor:
+        """Create a sample of the input dataset for datastores other than the
+        Mimir datastore. The rows of the input dataset are read in a single
+        pass. The rows in the sample keep their identifier and their order
+        from the input dataset.
+
+        Parameters
+        ----------
+        command_id: string
+            Unique identifier for a command in a package declaration
+        arguments: vizier.viztrail.command.ModuleArguments
+            User-provided command arguments
+        input_dataset: vizier.datastore.dataset.DatasetHandle
+            Handle for the input dataset
+        context: vizier.engine.task.base.TaskContext
+            Context in which a task is being executed
+
+        Returns
+        -------
+        vizier.datastore.dataset.DatasetDescriptor
+        """
+        with input_dataset.reader() as reader:
+            if command_id == cmd.BASIC_SAMPLE:
+                sampling_rate = get_sampling_rate(arguments)
+                rows = list(sampler.bernoulli_sample(reader, sampling_rate))
+            elif command_id == cmd.MANUAL_STRATIFIED_SAMPLE:
+                column = arguments.get_value(cmd.PARA_STRATIFICATION_COLUMN)
+                strata = {
+                    sampler.stratum_key(stratum.get_value(cmd.PARA_STRATUM_VALUE)):
+                    float(stratum.get_value(cmd.PARA_SAMPLING_RATE))
+                    for stratum in arguments.get_value(cmd.PARA_STRATA)
+                }
+                rows = list(sampler.stratified_sample(reader, column, strata))
+            elif command_id == cmd.AUTOMATIC_STRATIFIED_SAMPLE:
+                column = arguments.get_value(cmd.PARA_STRATIFICATION_COLUMN)
+                rows = sampler.automatic_stratified_sample(
+                    rows=reader,
+                    column=column,
+                    probability=get_sampling_rate(arguments),
+                    row_count=input_dataset.row_count
+                )
+            else:
+                raise Exception("Unknown sampling command: {}".format(command_id))
+        return context.datastore.create_dataset(
+            columns=input_dataset.columns,
+            rows=rows,
+            properties={}
+        )
+
+    def create_mimir_sample(self,
+            command_id: str,
+            arguments: "ModuleArguments",
+            input_dataset: DatasetDescriptor,
+            output_ds_name: str
+        ) -> DatasetDescriptor:
+        """Create a sample of the input dataset using the sampling lens of
+        the Mimir datastore.
+
+        Parameters
+        ----------
+        command_id: string
+            Unique identifier for a command in a package declaration
+        arguments: vizier.viztrail.command.ModuleArguments
+            User-provided command arguments
+        input_dataset: vizier.datastore.dataset.DatasetDescriptor
+            Descriptor for the input dataset
+        output_ds_name: string
+            Name of the sample dataset
+
+        Returns
+        -------
+        vizier.datastore.dataset.DatasetDescriptor
+        """
         # Load the sampling configuration
         sample_mode = None
 
         if command_id == cmd.BASIC_SAMPLE:
-            sampling_rate = float(arguments.get_value(cmd.PARA_SAMPLING_RATE))
-            if sampling_rate > 1.0 or sampling_rate < 0.0:
-                raise Exception("Sampling rate must be between 0.0 and 1.0")
             sample_mode = {
                 "mode" : cmd.SAMPLING_MODE_UNIFORM_PROBABILITY,
-                "probability" : sampling_rate
+                "probability" : get_sampling_rate(arguments)
             }
         elif command_id == cmd.MANUAL_STRATIFIED_SAMPLE or command_id == cmd.AUTOMATIC_STRATIFIED_SAMPLE:
             column = arguments.get_value(cmd.PARA_STRATIFICATION_COLUMN)
@@ -98,7 +217,7 @@ class SamplingProcessor(TaskProcessor):
                     {
                         "value" : stratum.get_value(cmd.PARA_STRATUM_VALUE),
                         "probability" : stratum.get_value(cmd.PARA_SAMPLING_RATE)
-                    } 
+                    }
                     for stratum in arguments.get_value(cmd.PARA_STRATA)
                 ]
             else:
@@ -118,43 +237,9 @@ class SamplingProcessor(TaskProcessor):
             sample_mode,
             result_name = "SAMPLE_"+get_unique_identifier()
         )
-        ds = MimirDatasetHandle.from_mimir_result(table_name, schema, properties = {}, name = output_ds_name)
+        return MimirDatasetHandle.from_mimir_result(table_name, schema, properties = {}, name = output_ds_name)
 
-        # And start rendering some output
-        outputs = ModuleOutputs()
-        ds_output = server.api.datasets.get_dataset(
-            project_id=context.project_id,
-            dataset_id=ds.identifier,
-            offset=0,
-            limit=10
-        )
-        if ds_output is not None:
-            ds_output['name'] = output_ds_name
-            outputs.stdout.append(DatasetOutput(ds_output))
-        else:
-            outputs.stderr.append(TextOutput("Error displaying dataset"))
-
-        # Record Reads and writes
-        provenance = ModuleProvenance(
-            read={
-                input_ds_name: input_dataset.identifier
-            },
-            write={
-                output_ds_name: DatasetDescriptor(
-                    identifier=ds.identifier,
-                    name=output_ds_name,
-                    columns=ds.columns
-                )
-            }
-        )
-
-        # Return task result
-        return ExecResult(
-            outputs=outputs,
-            provenance=provenance
-        )
-
-    def get_automatic_strata(self, 
+    def get_automatic_strata(self,
             dataset: DatasetDescriptor, 
             column: DatasetColumn, 
             probability: float
@@ -191,3 +276,26 @@ class SamplingProcessor(TaskProcessor):
             for stratum in data
         ]
         return stratum_bins
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def get_sampling_rate(arguments: "ModuleArguments") -> float:
+    """Get the sampling rate from the command arguments. Raises an exception
+    if the rate is not between 0.0 and 1.0.
+
+    Parameters
+    ----------
+    arguments: vizier.viztrail.command.ModuleArguments
+        User-provided command arguments
+
+    Returns
+    -------
+    float
+    """
+    sampling_rate = float(arguments.get_value(cmd.PARA_SAMPLING_RATE))
+    if sampling_rate > 1.0 or sampling_rate < 0.0:
+        raise Exception("Sampling rate must be between 0.0 and 1.0")
+    return sampling_rate
@@ -0,0 +1,216 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Sampling methods for streams of dataset rows. All methods read the input
+rows in a single pass. The rows in the sample are returned in the order in
+which they occur in the input.
+
+Uniform samples are drawn using Bernoulli sampling. Stratified samples either
+use a given sampling rate for each stratum (Bernoulli sampling) or draw the
+same number of rows from each stratum (automatic strata). For automatic
+strata the sample for each stratum is maintained in a reservoir that keeps
+the rows with the smallest random priority. The reservoir capacity is
+derived from the total number of rows in the input. It never grows while the
+input is read. The memory that is used for the reservoirs is therefore
+bounded by the size of the sample.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import heapq
+import math
+import random
+
+from vizier.datastore.dataset import DatasetRow
+
+
+def bernoulli_sample(
+        rows: Iterable[DatasetRow],
+        probability: float,
+        seed: Optional[int] = None
+    ) -> Iterator[DatasetRow]:
+    """Include each row of the input in the sample with the given probability.
+
+    Parameters
+    ----------
+    rows: iterable(vizier.datastore.dataset.DatasetRow)
+        Stream of dataset rows
+    probability: float
+        Sampling rate
+    seed: int, optional
+        Seed for the random number generator
+
+    Returns
+    -------
+    iterator(vizier.datastore.dataset.DatasetRow)
+    """
+    rand = random.Random(seed)
+    for row in rows:
+        if rand.random() < probability:
+            yield row
+
+
+def stratified_sample(
+        rows: Iterable[DatasetRow],
+        column: int,
+        strata: Dict[str, float],
+        seed: Optional[int] = None
+    ) -> Iterator[DatasetRow]:
+    """Bernoulli sampling with a separate sampling rate for each stratum.
+    Strata are identified by the string representation of the value in the
+    stratification column. Rows that do not belong to any of the given strata
+    are not included in the sample.
+
+    Parameters
+    ----------
+    rows: iterable(vizier.datastore.dataset.DatasetRow)
+        Stream of dataset rows
+    column: int
+        Position of the stratification column
+    strata: dict(string, float)
+        Sampling rate for each stratum
+    seed: int, optional
+        Seed for the random number generator
+
+    Returns
+    -------
+    iterator(vizier.datastore.dataset.DatasetRow)
+    """
+    rand = random.Random(seed)
+    for row in rows:
+        probability = strata.get(stratum_key(row.values[column]))
+        if probability is not None and rand.random() < probability:
+            yield row
+
+
+def automatic_stratified_sample(
+        rows: Iterable[DatasetRow],
+        column: int,
+        probability: float,
+        row_count: int,
+        seed: Optional[int] = None
+    ) -> List[DatasetRow]:
+    """Draw the same number of rows from each stratum. The total sample size
+    is the sampling rate times the number of rows in the input.
+
+    Raises ValueError if any of the strata has fewer rows than needed.
+
+    Parameters
+    ----------
+    rows: iterable(vizier.datastore.dataset.DatasetRow)
+        Stream of dataset rows
+    column: int
+        Position of the stratification column
+    probability: float
+        Sampling rate
+    row_count: int
+        Number of rows in the input as recorded in the dataset descriptor
+    seed: int, optional
+        Seed for the random number generator
+
+    Returns
+    -------
+    list(vizier.datastore.dataset.DatasetRow)
+    """
+    rand = random.Random(seed)
+    # Reservoirs are max-heaps on the random priority of the rows. Each entry
+    # is a tuple (-priority, position, row).
+    reservoirs: Dict[str, List[Tuple[float, int, DatasetRow]]] = dict()
+    counts: Dict[str, int] = dict()
+    labels: Dict[str, Any] = dict()
+    capacity = 0
+    position = 0
+    for row in rows:
+        value = row.values[column]
+        key = stratum_key(value)
+        reservoir = reservoirs.get(key)
+        if reservoir is None:
+            reservoir = list()
+            reservoirs[key] = reservoir
+            counts[key] = 0
+            labels[key] = value
+            capacity = reservoir_capacity(probability, max(row_count, position), len(reservoirs))
+        counts[key] += 1
+        entry = (-rand.random(), position, row)
+        if len(reservoir) < capacity:
+            heapq.heappush(reservoir, entry)
+        elif capacity > 0 and entry > reservoir[0]:
+            heapq.heapreplace(reservoir, entry)
+        # Reservoirs that were filled before the current number of strata was
+        # known are trimmed when they are accessed.
+        while len(reservoir) > capacity:
+            heapq.heappop(reservoir)
+        position += 1
+    if len(reservoirs) == 0:
+        return list()
+    # Raise an error if any of the strata has fewer rows than needed for a
+    # sample of equal size for each stratum.
+    goal = position * probability / len(reservoirs)
+    imbalanced = [key for key in reservoirs if counts[key] < goal]
+    if len(imbalanced) > 0:
+        minimum_safe_rate = min(float(count) / position for count in counts.values())
+        raise ValueError(
+            'Sampling rate too high (maximum safe rate = {}).  Too few records for the following values: {}'.format(
+                minimum_safe_rate,
+                ', '.join(str(labels[key]) for key in imbalanced)
+            )
+        )
+    size = int(round(goal))
+    sample: List[Tuple[int, DatasetRow]] = list()
+    for reservoir in reservoirs.values():
+        for _, pos, row in heapq.nlargest(size, reservoir):
+            sample.append((pos, row))
+    return [row for _, row in sorted(sample, key=lambda entry: entry[0])]
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def reservoir_capacity(probability: float, row_count: int, strata_count: int) -> int:
+    """Get the capacity of the reservoir for each stratum. The capacity is an
+    upper bound for the final sample size of each stratum since the number of
+    strata can only grow.
+
+    Parameters
+    ----------
+    probability: float
+        Sampling rate
+    row_count: int
+        Total number of rows in the input
+    strata_count: int
+        Number of strata that have been seen so far
+
+    Returns
+    -------
+    int
+    """
+    return int(math.ceil(row_count * probability / strata_count))
+
+
+def stratum_key(value: Any) -> str:
+    """Get the key of the stratum for a value in the stratification column.
+
+    Parameters
+    ----------
+    value: any
+        Cell value
+
+    Returns
+    -------
+    string
+    """
+    return str(value) if value is not None else ''
@@ -17,7 +17,8 @@
 """Implementation of the task processor for the SQL package."""
 
 from typing import cast, Dict, Union
-from vizier.datastore.dataset import DatasetDescriptor
+from vizier.datastore.dataset import DatasetDescriptor, DatasetRow
+from vizier.datastore.fs.base import FileSystemDatastore
 from vizier.datastore.mimir.dataset import MimirDatasetHandle
 from vizier.engine.task.base import TaskContext
 from vizier.engine.task.processor import ExecResult, TaskProcessor
@@ -77,6 +78,8 @@ class SQLTaskProcessor(TaskProcessor):
         -------
         vizier.engine.task.processor.ExecResult
         """
+        if isinstance(context.datastore, FileSystemDatastore):
+            return self.execute_local_query(args=args, context=context)
         # Get SQL source code that is in this cell and the global
         # variables
         source = args.get_value(cmd.PARA_SQL_SOURCE)
@@ -85,13 +88,10 @@ class SQLTaskProcessor(TaskProcessor):
         ds_name = args.get_value(cmd.PARA_OUTPUT_DATASET, raise_error=False)
         # Get mapping of datasets in the context to their respective table
         # name in the Mimir backend
-        mimir_table_names = dict()
-        for ds_name_o in context.datasets:
-            dataset_id = context.datasets[ds_name_o].identifier
-            dataset = context.datastore.get_dataset(dataset_id)
-            if dataset is None:
-                raise ValueError('unknown dataset \'' + ds_name_o + '\'')
-            mimir_table_names[ds_name_o] = dataset.identifier
+        mimir_table_names = {
+            ds_name_o: dataset.identifier
+            for ds_name_o, dataset in context.get_datasets().items()
+        }
         # Module outputs
         outputs = ModuleOutputs()
         is_success = True
@@ -170,6 +170,77 @@ class SQLTaskProcessor(TaskProcessor):
             provenance=provenance
         )
 
+    def execute_local_query(self,
+            args: ModuleArguments,
+            context: TaskContext
+        ) -> ExecResult:
+        """Execute a SQL query using the embedded SQL engine of the file system
+        datastore. The query result is stored as a new dataset.
+
+        Parameters
+        ----------
+        args: vizier.viztrail.command.ModuleArguments
+            User-provided command arguments
+        context: vizier.engine.task.base.TaskContext
+            Context in which a task is being executed
+
+        Returns
+        -------
+        vizier.engine.task.processor.ExecResult
+        """
+        datastore = cast(FileSystemDatastore, context.datastore)
+        source = args.get_value(cmd.PARA_SQL_SOURCE)
+        ds_name = args.get_value(cmd.PARA_OUTPUT_DATASET, raise_error=False)
+        if ds_name is None or ds_name == '':
+            ds_name = "TEMPORARY_RESULT"
+        outputs = ModuleOutputs()
+        try:
+            result = datastore.execute_query(
+                query=source,
+                datasets={
+                    name: context.datasets[name].identifier
+                    for name in context.datasets
+                }
+            )
+            ds = datastore.create_dataset(
+                columns=result.columns,
+                rows=[
+                    DatasetRow(identifier=row_id, values=values)
+                    for row_id, values in enumerate(result.rows)
+                ]
+            )
+            ds_output = DatasetOutput.from_handle(ds, context.project_id, ds_name)
+            if ds_output is None:
+                outputs.stderr.append(TextOutput("Error displaying dataset {}".format(ds_name)))
+            else:
+                outputs.stdout.append(ds_output)
+            provenance = ModuleProvenance(
+                write={
+                    ds_name: DatasetDescriptor(
+                        identifier=ds.identifier,
+                        name=ds_name,
+                        columns=ds.columns
+                    )
+                },
+                read={
+                    name: context.datasets[name].identifier
+                    for name in result.dependencies
+                }
+            )
+        except Exception as ex:
+            outputs.error(ex)
+            return ExecResult(
+                is_success=False,
+                outputs=outputs,
+                provenance=ModuleProvenance()
+            )
+        return ExecResult(
+            is_success=True,
+            outputs=outputs,
+            provenance=provenance
+        )
+
+
 def get_artifact_id(artifact: Union[str, ArtifactDescriptor, None]) -> str:
     assert(artifact is not None)
     if isinstance(artifact, str):
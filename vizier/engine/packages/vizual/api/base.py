@@ -33,6 +33,7 @@ from vizier.datastore.dataset import DatasetDescriptor
 RESOURCE_DATASET = 'dataset'
 RESOURCE_FILEID = 'fileid'
 RESOURCE_URL = 'url'
+RESOURCE_VALIDATORS = 'validators'
 
 
 class VizualApiResult(object):
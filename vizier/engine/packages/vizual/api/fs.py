@@ -21,19 +21,26 @@ from typing import cast, Optional, List, Tuple, Dict, Any
 
 from vizier.core.util import is_valid_name, get_unique_identifier
 from vizier.datastore.dataset import DatasetColumn, DatasetRow, DatasetDescriptor
+from vizier.datastore.dataset import DatasetHandle
 from vizier.engine.packages.vizual.api.base import VizualApi, VizualApiResult
 from vizier.datastore.base import Datastore
 from vizier.filestore.base import Filestore
 from vizier.datastore.fs.base import FileSystemDatastore, FileSystemDatasetHandle
+from vizier.datastore.fs.delta import DatasetDelta, iter_rows
 from vizier.filestore.fs.base import FileSystemFilestore
 
 import vizier.engine.packages.vizual.api.base as base
 
 
 class DefaultVizualApi(VizualApi):
-    """Default implementation of the vizual API. Manipulates datasets in memory.
-    Expects an instance of the vizier.datastore.fs.base.FileSystemDatastore to
-    persist datasets.
+    """Default implementation of the vizual API. Expects an instance of the
+    vizier.datastore.fs.base.FileSystemDatastore to persist datasets.
+
+    Operations that only change the schema or a small number of rows create
+    the resulting dataset as a delta of the modified dataset. Only sorting
+    creates a full copy of the dataset. For other datastores (e.g., the
+    HISTORE datastore) the modified rows are always written as a new
+    dataset.
     """
     def delete_column(self, 
         identifier: str, 
@@ -66,20 +73,12 @@ class DefaultVizualApi(VizualApi):
         col_index = dataset.get_index(column_id)
         if col_index is None:
             raise ValueError('unknown column identifier \'' + str(column_id) + '\'')
-        # Delete column from schema. Keep track of the column name for the
-        # result output.
+        # Delete column from schema. Values for the deleted column are dropped
+        # when the delta is resolved.
         columns = list(dataset.columns)
         del columns[col_index]
-        # Delete all value for the deleted column
-        rows = dataset.fetch_rows()
-        for row in rows:
-            del row.values[col_index]
         # Store updated dataset to get new identifier
-        ds = datastore.create_dataset(
-            columns=columns,
-            rows=rows,
-            properties={}
-        )
+        ds = derive_dataset(datastore, dataset, columns=columns)
         return VizualApiResult(ds)
 
     def delete_row(self, 
@@ -113,13 +112,13 @@ class DefaultVizualApi(VizualApi):
         if int(row_index) < 0 or int(row_index) >= dataset.row_count:
             raise ValueError('invalid row index \'' + str(row_index) + '\'')
         # Delete the row at the given index position
-        rows = dataset.fetch_rows()
-        del rows[int(row_index)]
+        row = dataset.fetch_rows(offset=int(row_index), limit=1)[0]
         # Store updated dataset to get new identifier
-        ds = datastore.create_dataset(
+        ds = derive_dataset(
+            datastore,
+            dataset,
             columns=dataset.columns,
-            rows=rows,
-            properties={}
+            deletes=[row.identifier]
         )
         return VizualApiResult(ds)
 
@@ -158,9 +157,8 @@ class DefaultVizualApi(VizualApi):
         if dataset is None:
             raise ValueError('unknown dataset \'' + identifier + '\'')
         # The schema of the new dataset only contains the columns in the given
-        # list. Keep track of their index positions to filter values.
+        # list.
         schema = list()
-        val_filter = list()
         for i in range(len(columns)):
             col_idx = dataset.get_index(columns[i])
             if col_idx is None:
@@ -176,20 +174,9 @@ class DefaultVizualApi(VizualApi):
                 )
             else:
                 schema.append(col)
-            val_filter.append(col_idx)
-        # Create a list of projected rows
-        rows = list()
-        for row in dataset.fetch_rows():
-            values = list()
-            for v_idx in val_filter:
-                values.append(row.values[v_idx])
-            rows.append(DatasetRow(identifier=row.identifier, values=values))
-        # Store updated dataset to get new identifier
-        ds = datastore.create_dataset(
-            columns=schema,
-            rows=rows,
-            properties={}
-        )
+        # Store updated dataset to get new identifier. Values are projected
+        # when the delta is resolved.
+        ds = derive_dataset(datastore, dataset, columns=schema)
         return VizualApiResult(ds)
 
     def insert_column(self, 
@@ -229,9 +216,8 @@ class DefaultVizualApi(VizualApi):
         # Make sure that position is a valid column index in the new dataset
         if position < 0 or position > len(dataset.columns):
             raise ValueError('invalid column index \'' + str(position) + '\'')
-        # Insert new column into dataset
+        # Insert new column into dataset. The column is empty for all rows.
         columns = list(dataset.columns)
-        rows = dataset.fetch_rows()
         columns.insert(
             position,
             DatasetColumn(
@@ -239,15 +225,8 @@ class DefaultVizualApi(VizualApi):
                 name=name if not name is None else ''
             )
         )
-        # Add a null value to each row for the new column
-        for row in rows:
-            row.values.insert(position, None)
         # Store updated dataset to get new identifier
-        ds = datastore.create_dataset(
-            columns=columns,
-            rows=rows,
-            properties={}
-        )
+        ds = derive_dataset(datastore, dataset, columns=columns)
         return VizualApiResult(ds)
 
     def insert_row(self, 
@@ -275,27 +254,22 @@ class DefaultVizualApi(VizualApi):
         """
         # Get dataset. Raise exception if dataset is unknown
         dataset = datastore.get_dataset(identifier)
-        print('---------------' + str(dataset.__class__.__name__))
         if dataset is None:
             raise ValueError('unknown dataset \'' + identifier + '\'')
-        assert(isinstance(dataset, FileSystemDatasetHandle))
         # Make sure that position is a valid row index in the new dataset
         if position < 0 or position > dataset.row_count:
             raise ValueError('invalid row index \'' + str(position) + '\'')
         # Create empty set of values
-        rows = dataset.fetch_rows()
-        rows.insert(
-            position,
-            DatasetRow(
-                identifier=str(dataset.max_row_id() + 1),
-                values=[None] * len(dataset.columns)
-            )
+        row = DatasetRow(
+            identifier=str(max_row_id(dataset) + 1),
+            values=[None] * len(dataset.columns)
         )
         # Store updated dataset to get new identifier
-        ds = datastore.create_dataset(
+        ds = derive_dataset(
+            datastore,
+            dataset,
             columns=dataset.columns,
-            rows=rows,
-            properties={}
+            inserts=[(position, row)]
         )
         return VizualApiResult(ds)
 
@@ -371,20 +345,39 @@ class DefaultVizualApi(VizualApi):
         if url is not None:
             # If the same url has been previously used to generate a dataset
             # we do not need to download the file and re-create the dataset.
-            if not reload and not resources is None and base.RESOURCE_URL in resources and base.RESOURCE_DATASET in resources:
+            # When the reload flag is set the file is only downloaded if it
+            # has been modified since the previous download.
+            validators = None
+            if not resources is None and base.RESOURCE_URL in resources and base.RESOURCE_DATASET in resources:
                 # Check if the previous download matches the given Uri
                 if resources[base.RESOURCE_URL] == url:
-                    ds_id = resources[base.RESOURCE_DATASET]
-                    dataset = datastore.get_dataset(ds_id)
+                    validators = resources.get(base.RESOURCE_VALIDATORS)
+                    if not reload or validators:
+                        ds_id = resources[base.RESOURCE_DATASET]
+                        dataset = datastore.get_dataset(ds_id)
+            if dataset is not None and reload:
+                assert(isinstance(datastore, FileSystemDatastore))
+                modified, validators = datastore.download_dataset_if_modified(
+                    url=url,
+                    username=username,
+                    password=password,
+                    validators=validators,
+                    proposed_schema=proposed_schema
+                )
+                if modified is not None:
+                    dataset = modified
             # If dataset is still None we need to create a new dataset by
             # downloading the given Uri
             if dataset is None:
                 assert(isinstance(datastore, FileSystemDatastore))
-                dataset = datastore.download_dataset(
+                dataset, validators = datastore.download_dataset_if_modified(
                     url=url,
                     username=username,
                     password=password,
+                    proposed_schema=proposed_schema
                 )
+            if validators:
+                result_resources[base.RESOURCE_VALIDATORS] = validators
             result_resources[base.RESOURCE_URL] = url
         else:
             # either url or file_id must not be None
@@ -506,15 +499,8 @@ class DefaultVizualApi(VizualApi):
         if source_idx != position:
             columns = list(dataset.columns)
             columns.insert(position, columns.pop(source_idx))
-            rows = dataset.fetch_rows()
-            for row in rows:
-                row.values.insert(position, row.values.pop(source_idx))
             # Store updated dataset to get new identifier
-            ds = datastore.create_dataset(
-                columns=columns,
-                rows=rows,
-                properties={}
-            )
+            ds = derive_dataset(datastore, dataset, columns=columns)
             return VizualApiResult(ds)
         else:
             return VizualApiResult(dataset)
@@ -557,13 +543,16 @@ class DefaultVizualApi(VizualApi):
             raise ValueError('invalid target position \'' + str(position) + '\'')
         # No need to do anything if source position equals target position
         if row_id != position:
-            rows = dataset.fetch_rows()
-            rows.insert(position, rows.pop(int(row_id)))
+            # Moving a row is a deletion followed by an insertion of the same
+            # row at the target position.
+            row = dataset.fetch_rows(offset=int(row_id), limit=1)[0]
             # Store updated dataset to get new identifier
-            ds = datastore.create_dataset(
+            ds = derive_dataset(
+                datastore,
+                dataset,
                 columns=dataset.columns,
-                rows=rows,
-                properties={}
+                deletes=[row.identifier],
+                inserts=[(position, row)]
             )
             return VizualApiResult(ds)
         else:
@@ -617,11 +606,7 @@ class DefaultVizualApi(VizualApi):
                 data_type=col.data_type
             )
             # Store updated dataset to get new identifier
-            ds = datastore.create_dataset(
-                columns=columns,
-                rows=dataset.fetch_rows(),
-                properties={}
-            )
+            ds = derive_dataset(datastore, dataset, columns=columns)
             return VizualApiResult(ds)
         else:
             return VizualApiResult(dataset)
@@ -724,25 +709,24 @@ class DefaultVizualApi(VizualApi):
         col_idx = dataset.get_index(column_id)
         if col_idx is None:
             raise ValueError('unknown column identifier \'' + str(column_id) + '\'')
-        # Update the specified cell in the given data array
-        rows = dataset.fetch_rows()
-        row_index = -1
-        for i in range(len(rows)):
-            if int(rows[i].identifier) == int(row_id):
-                row_index = i
-                break
         # Make sure that row refers a valid row in the dataset
-        if row_index < 0:
+        if isinstance(dataset, FileSystemDatasetHandle):
+            row_exists = dataset.has_row(row_id)
+        else:
+            row_exists = False
+            with dataset.reader() as reader:
+                for row in reader:
+                    if int(row.identifier) == int(row_id):
+                        row_exists = True
+                        break
+        if not row_exists:
             raise ValueError('invalid row identifier \'' + str(row_id) + '\'')
-        r = rows[row_index]
-        values = list(r.values)
-        values[col_idx] = value
-        rows[row_index] = DatasetRow(identifier=r.identifier, values=values)
         # Store updated dataset to get new identifier
-        ds = datastore.create_dataset(
+        ds = derive_dataset(
+            datastore,
+            dataset,
             columns=dataset.columns,
-            rows=rows,
-            properties={}
+            updates={row_id: {column_id: value}}
         )
         return VizualApiResult(ds)
     
@@ -752,11 +736,96 @@ class DefaultVizualApi(VizualApi):
         ) -> VizualApiResult:
         """Create a materialized snapshot of the dataset for faster
         execution.
-    
-        This is a no-op for the FS Backend
+
+        Datasets that are stored as a delta are compacted into a snapshot.
+        The dataset identifier does not change.
         """
         dataset = datastore.get_dataset(identifier)
         if dataset is None:
             raise ValueError('unknown dataset \'' + identifier + '\'')
+        if isinstance(datastore, FileSystemDatastore):
+            if datastore.compact_dataset(identifier):
+                dataset = datastore.get_dataset(identifier)
         return VizualApiResult(dataset)
-        
\ No newline at end of file
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def derive_dataset(
+        datastore: Datastore,
+        dataset: DatasetHandle,
+        columns: List[DatasetColumn],
+        deletes: Optional[List[str]] = None,
+        updates: Optional[Dict[str, Dict[int, Any]]] = None,
+        inserts: Optional[List[Tuple[int, DatasetRow]]] = None
+    ) -> DatasetDescriptor:
+    """Create a new dataset that is derived from the given dataset by the
+    given changes (see FileSystemDatastore.create_delta). The new dataset is
+    stored as a delta if the datastore is a file system datastore. For all
+    other datastores the changes are applied to the rows of the given dataset
+    and the result is stored as a new dataset.
+
+    Parameters
+    ----------
+    datastore : vizier.datastore.base.Datastore
+        Datastore to update datasets
+    dataset: vizier.datastore.dataset.DatasetHandle
+        Handle for the modified dataset
+    columns: list(vizier.datastore.dataset.DatasetColumn)
+        Schema of the new dataset
+    deletes: list(string), optional
+        Identifier of deleted rows
+    updates: dict, optional
+        Updated cell values keyed by row identifier and column identifier
+    inserts: list((int, vizier.datastore.dataset.DatasetRow)), optional
+        Inserted rows and their position in the new dataset
+
+    Returns
+    -------
+    vizier.datastore.dataset.DatasetDescriptor
+    """
+    if isinstance(datastore, FileSystemDatastore) and isinstance(dataset, FileSystemDatasetHandle):
+        return datastore.create_delta(
+            dataset,
+            columns=columns,
+            deletes=deletes,
+            updates=updates,
+            inserts=inserts
+        )
+    delta = DatasetDelta(
+        parent=dataset.identifier,
+        deletes=deletes,
+        updates=updates,
+        inserts=inserts
+    )
+    return datastore.create_dataset(
+        columns=columns,
+        rows=list(iter_rows(dataset, columns, delta)),
+        properties={}
+    )
+
+
+def max_row_id(dataset: DatasetHandle) -> int:
+    """Get the maximum row identifier for the given dataset. The result is -1
+    if the dataset is empty. Only datasets in the file system datastore keep
+    track of the maximum row identifier. For all other datasets the rows are
+    read.
+
+    Parameters
+    ----------
+    dataset: vizier.datastore.dataset.DatasetHandle
+        Handle for a dataset
+
+    Returns
+    -------
+    int
+    """
+    if isinstance(dataset, FileSystemDatasetHandle):
+        return dataset.max_row_id()
+    result = -1
+    with dataset.reader() as reader:
+        for row in reader:
+            result = max(result, int(row.identifier))
+    return result
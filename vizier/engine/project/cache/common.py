@@ -16,15 +16,39 @@
 
 """The common project cache solely uses the functionality of a provided
 viztrails repository to manipulate the cached objects.
+
+Project handles are created when a project is first accessed. The cache is
+bounded by the number of project handles and by the number of workflow modules
+that are held in memory for the cached projects. When either bound is
+exceeded the least recently used projects are evicted and the workflows of
+their branches are released. Projects with active workflows are never
+evicted. Workflows are only released while holding the project lock and the
+locks for all project branches. Projects whose locks are held by another
+thread are skipped.
 """
+from contextlib import ExitStack
 from typing import Optional, Dict, Any
 
+import threading
+
+from collections import OrderedDict
+
+from vizier.engine.locks import LockManager
 from vizier.engine.project.base import ProjectHandle
 from vizier.engine.project.cache.base import ProjectCache
+from vizier.datastore.base import Datastore
 from vizier.datastore.factory import DatastoreFactory
+from vizier.filestore.base import Filestore
 from vizier.filestore.factory import FilestoreFactory
+from vizier.viztrail.base import ViztrailHandle
 from vizier.viztrail.repository import ViztrailRepository
 
+
+"""Default bounds for the project cache."""
+DEFAULT_MAX_PROJECTS = 100
+DEFAULT_MAX_MODULES = 10000
+
+
 class CommonProjectCache(ProjectCache):
     """The common project cache is a simple wrapper around a viztrail
     repository, a datastore factory, and a filestore factory.
@@ -32,11 +56,15 @@ class CommonProjectCache(ProjectCache):
     def __init__(self, 
             datastores: DatastoreFactory, 
             filestores: FilestoreFactory, 
-            viztrails: ViztrailRepository
+            viztrails: ViztrailRepository,
+            max_projects: int = DEFAULT_MAX_PROJECTS,
+            max_modules: int = DEFAULT_MAX_MODULES,
+            locks: Optional[LockManager] = None
         ):
-        """Initialize the cache components and load all projects in the given
-        viztrails repository. Maintains all projects in an dictionary keyed by
-        their identifier.
+        """Initialize the cache components. Handles for projects in the given
+        viztrails repository are created when the project is first accessed.
+        Maintains the handles in an ordered dictionary keyed by the project
+        identifier with the most recently used project last.
 
         Parameters
         ----------
@@ -46,20 +74,27 @@ class CommonProjectCache(ProjectCache):
             Factory for project filestores
         viztrails: vizier.vizual.repository.ViztrailRepository
             Repository for viztrails
+        max_projects: int, optional
+            Maximum number of cached project handles. There is no limit if the
+            value is 0.
+        max_modules: int, optional
+            Maximum number of workflow modules that are held in memory for the
+            cached projects. There is no limit if the value is 0.
+        locks: vizier.engine.locks.LockManager, optional
+            Project and branch locks of the workflow engine
         """
         self.datastores = datastores
         self.filestores = filestores
         self.viztrails = viztrails
-        # Create index of project handles from existing viztrails
-        self.projects = dict()
-        for viztrail in self.viztrails.list_viztrails():
-            identifier = viztrail.identifier
-            project = ProjectHandle(
-                viztrail=viztrail,
-                datastore=self.datastores.get_datastore(identifier),
-                filestore=self.filestores.get_filestore(identifier)
-            )
-            self.projects[viztrail.identifier] = project
+        self.max_projects = max_projects
+        self.max_modules = max_modules
+        self.locks = locks if locks is not None else LockManager()
+        self.projects: "OrderedDict[str, ProjectHandle]" = OrderedDict()
+        self.lock = threading.RLock()
+        # Cache statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
     def create_project(self, 
             properties: Optional[Dict[str, Any]] = None
@@ -79,16 +114,12 @@ class CommonProjectCache(ProjectCache):
         -------
         vizier.engine.project.base.ProjectHandle
         """
-        viztrail = self.viztrails.create_viztrail(properties=properties)
-        datastore = self.datastores.get_datastore(viztrail.identifier)
-        filestore = self.filestores.get_filestore(viztrail.identifier)
-        project = ProjectHandle(
-            viztrail=viztrail,
-            datastore=datastore,
-            filestore=filestore
-        )
-        self.projects[project.identifier] = project
-        return project
+        with self.lock:
+            viztrail = self.viztrails.create_viztrail(properties=properties)
+            project = self.load_project(viztrail)
+            self.projects[project.identifier] = project
+            self.evict()
+            return project
 
     def delete_project(self, project_id):
         """Delete all resources that are associated with the given project.
@@ -103,14 +134,38 @@ class CommonProjectCache(ProjectCache):
         -------
         bool
         """
-        if project_id in self.projects:
-            viztrail = self.projects[project_id].viztrail
+        with self.lock:
+            viztrail = self.viztrails.get_viztrail(project_id)
+            if viztrail is None:
+                return False
             self.viztrails.delete_viztrail(viztrail.identifier)
             self.datastores.delete_datastore(viztrail.identifier)
             self.filestores.delete_filestore(viztrail.identifier)
-            del self.projects[project_id]
+            self.projects.pop(project_id, None)
             return True
-        return False
+
+    def evict(self) -> None:
+        """Evict least recently used projects while the number of cached
+        projects or the number of loaded workflow modules exceeds the cache
+        bounds. The most recently used project, projects that have active
+        workflows, and projects whose locks are held by another thread are
+        never evicted.
+        """
+        with self.lock:
+            sizes = {
+                project_id: count_loaded_modules(project)
+                for project_id, project in self.projects.items()
+            }
+            loaded_modules = sum(sizes.values())
+            for project_id in list(self.projects.keys())[:-1]:
+                exceeds_projects = 0 < self.max_projects < len(self.projects)
+                exceeds_modules = 0 < self.max_modules < loaded_modules
+                if not exceeds_projects and not exceeds_modules:
+                    break
+                if unload_project(self.projects[project_id], self.locks):
+                    del self.projects[project_id]
+                    loaded_modules -= sizes[project_id]
+                    self.evictions += 1
 
     def get_branch(self, project_id, branch_id):
         """Get the branch with the given identifier for the specified project.
@@ -127,29 +182,187 @@ class CommonProjectCache(ProjectCache):
         -------
         vizier.viztrail.branch.BranchHandle
         """
-        # If the project is not in the internal cache it does not exist
-        if not project_id in self.projects:
+        project = self.get_project(project_id)
+        if project is None:
             return None
         # Return the handle for the specified branch
-        return self.projects[project_id].viztrail.get_branch(branch_id)
+        return project.viztrail.get_branch(branch_id)
 
     def get_project(self, project_id):
         """Get the handle for project. Returns None if the project does not
-        exist.
+        exist. The handle is created if the project is not in the cache.
 
         Returns
         -------
         vizier.engine.project.base.ProjectHandle
         """
-        if project_id in self.projects:
-            return self.projects[project_id]
-        return None
+        with self.lock:
+            project = self.projects.get(project_id)
+            if project is not None:
+                self.hits += 1
+                self.projects.move_to_end(project_id)
+                return project
+            # If the project is not in the cache get the viztrail from the
+            # repository.
+            viztrail = self.viztrails.get_viztrail(project_id)
+            if viztrail is None:
+                return None
+            self.misses += 1
+            project = self.load_project(viztrail)
+            self.projects[project_id] = project
+            self.evict()
+            return project
 
     def list_projects(self):
-        """Get a list of handles for all projects.
+        """Get a list of handles for all projects. Projects that are not in the
+        cache are not added to the cache. Their datastore and filestore are
+        only created when accessed.
 
         Returns
         -------
         list(vizier.engine.project.base.ProjectHandle)
         """
-        return list(self.projects.values())
+        with self.lock:
+            result = list()
+            for viztrail in self.viztrails.list_viztrails():
+                project = self.projects.get(viztrail.identifier)
+                if project is None:
+                    project = LazyProjectHandle(
+                        viztrail=viztrail,
+                        datastores=self.datastores,
+                        filestores=self.filestores
+                    )
+                result.append(project)
+            return result
+
+    def load_project(self, viztrail: ViztrailHandle) -> ProjectHandle:
+        """Create the handle for the project that is associated with the given
+        viztrail.
+
+        Parameters
+        ----------
+        viztrail: vizier.viztrail.base.ViztrailHandle
+            Viztrail for the project
+
+        Returns
+        -------
+        vizier.engine.project.base.ProjectHandle
+        """
+        identifier = viztrail.identifier
+        return ProjectHandle(
+            viztrail=viztrail,
+            datastore=self.datastores.get_datastore(identifier),
+            filestore=self.filestores.get_filestore(identifier)
+        )
+
+
+class LazyProjectHandle(ProjectHandle):
+    """Handle for a project that is not in the cache. The datastore and the
+    filestore of the project are created when they are first accessed.
+    """
+    def __init__(self,
+            viztrail: ViztrailHandle,
+            datastores: DatastoreFactory,
+            filestores: FilestoreFactory
+        ):
+        """Initialize the project viztrail and the factories for the project
+        datastore and filestore.
+
+        Parameters
+        ----------
+        viztrail: vizier.viztrail.base.ViztrailHandle
+            The viztrail handle for the project
+        datastores: vizier.datastore.factory.DatastoreFactory
+            Factory for project datastores
+        filestores: vizier.filestore.factory.FilestoreFactory
+            Factory for project filestores
+        """
+        self.viztrail = viztrail
+        self.datastores = datastores
+        self.filestores = filestores
+        self._datastore: Optional[Datastore] = None
+        self._filestore: Optional[Filestore] = None
+
+    @property  # type: ignore[override]
+    def datastore(self) -> Datastore:
+        """Datastore for the project.
+
+        Returns
+        -------
+        vizier.datastore.base.Datastore
+        """
+        if self._datastore is None:
+            self._datastore = self.datastores.get_datastore(self.identifier)
+        return self._datastore
+
+    @property  # type: ignore[override]
+    def filestore(self) -> Filestore:
+        """Filestore for the project.
+
+        Returns
+        -------
+        vizier.filestore.base.Filestore
+        """
+        if self._filestore is None:
+            self._filestore = self.filestores.get_filestore(self.identifier)
+        return self._filestore
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def count_loaded_modules(project: ProjectHandle) -> int:
+    """Count the number of distinct workflow modules that are held in memory
+    for the branches of the given project.
+
+    Parameters
+    ----------
+    project: vizier.engine.project.base.ProjectHandle
+        Handle for cached project
+
+    Returns
+    -------
+    int
+    """
+    modules = set()
+    for branch in project.viztrail.list_branches():
+        for workflow in branch.get_loaded_workflows():
+            for module in workflow.modules:
+                modules.add(id(module))
+    return len(modules)
+
+
+def unload_project(project: ProjectHandle, locks: LockManager) -> bool:
+    """Release the workflows for all branches of the given project. Returns
+    False if the project has active workflows or if the project lock or any
+    of the branch locks are held by another thread. The locks are held while
+    the workflows are released.
+
+    Parameters
+    ----------
+    project: vizier.engine.project.base.ProjectHandle
+        Handle for cached project
+    locks: vizier.engine.locks.LockManager
+        Project and branch locks of the workflow engine
+
+    Returns
+    -------
+    bool
+    """
+    with ExitStack() as stack:
+        if not stack.enter_context(locks.try_project(project.identifier)):
+            return False
+        branches = project.viztrail.list_branches()
+        for branch in branches:
+            lock = locks.try_branch(project.identifier, branch.identifier)
+            if not stack.enter_context(lock):
+                return False
+        for branch in branches:
+            for workflow in branch.get_loaded_workflows():
+                if workflow.is_active:
+                    return False
+        result = True
+        for branch in branches:
+            result = branch.unload() and result
+        return result
@@ -104,7 +104,26 @@ class TaskContext(object):
             if not dataset is None:
                 return dataset
         raise ValueError('unknown dataset \'' + str(name) + '\'')
-    
+
+    def get_datasets(self) -> Dict[str, DatasetHandle]:
+        """Get the handles for all datasets in the database state against
+        which the task is executed. The datasets are resolved by a single
+        datastore request. Raises ValueError if a dataset does not exist.
+
+        Returns
+        -------
+        dict(string: vizier.datastore.dataset.DatasetHandle)
+        """
+        datasets = self.datastore.get_datasets(
+            [ds.identifier for ds in self.datasets.values()]
+        )
+        result = dict()
+        for name, ds in self.datasets.items():
+            if ds.identifier not in datasets:
+                raise ValueError('unknown dataset \'' + str(name) + '\'')
+            result[name] = datasets[ds.identifier]
+        return result
+
     def get_dataobject(self, name):
         """Get the handle for the dataset with the given name. Raises ValueError
         if the dataset does not exist.
@@ -15,11 +15,12 @@
 # limitations under the License.
 
 
-from typing import Dict, List, IO, Optional
+from typing import Dict, List, IO, Optional, Tuple
+import os
 import shutil
 from io import BytesIO
 import json
-from tarfile import open as taropen, TarInfo
+from tarfile import open as taropen, TarInfo, LNKTYPE
 from datetime import datetime
 
 from vizier.engine.project.base import ProjectHandle
@@ -58,6 +59,12 @@ def export_project(
       info.size = size
       archive.addfile(info, stream)
 
+    def add_link(path: str, target: str):
+      info = TarInfo(path)
+      info.type = LNKTYPE
+      info.linkname = target
+      archive.addfile(info)
+
     add_buffer(EXPORT_VERSION.encode(), VERSION_PATH)
 
     project_handle = PROJECT_HANDLE(
@@ -111,13 +118,24 @@ def export_project(
       for file_handle in all_files
     ]
 
+    # Files that share their content in the filestore (i.e., are links to
+    # the same blob) are added to the archive once. All other copies are
+    # added as links to the first copy.
+    exported: Dict[Tuple[int, int], str] = dict()
     for file_handle in all_files:
+      path = FILE_PATH.format(file_handle.identifier)
+      stat = os.stat(file_handle.filepath)
+      key = (stat.st_dev, stat.st_ino)
+      if key in exported:
+        add_link(path, exported[key])
+        continue
       with file_handle.open(raw = True) as f:
         add_stream(
           f, 
-          FILE_PATH.format(file_handle.identifier), 
+          path, 
           file_handle.size(raw = True)
         )
+      exported[key] = path
 
     add_buffer(json.dumps(project_handle).encode(), PROJECT_PATH)
 
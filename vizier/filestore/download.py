@@ -0,0 +1,456 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming downloads of web resources.
+
+The content of a web resource is copied to the output file in chunks of fixed
+size, i.e., memory use does not depend on the size of the resource.
+
+Downloads can be conditional. The validators (ETag and Last-Modified header)
+of a previous download are sent with the request. If the server responds that
+the resource has not been modified the download is skipped.
+
+Large resources are fetched in parallel if the server accepts byte range
+requests. The first part is streamed from the response to the initial request
+while the remaining parts are fetched into temporary files by separate
+threads. The temporary files are created next to the output file. The parts
+are appended to the output file in order. If any of the range requests fails
+the remaining requests are canceled and the remainder of the initial response
+is streamed instead.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import base64
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+from vizier.filestore.base import get_download_filename
+
+
+"""Size of chunks when copying the content of a web resource."""
+CHUNK_SIZE = 1024 * 1024
+
+"""Number of parts that are fetched in parallel for large resources."""
+PARALLEL_PARTS = 4
+
+"""Minimum size of a resource (in bytes) for a parallel download."""
+PARALLEL_MIN_SIZE = 64 * 1024 * 1024
+
+"""Keys for the validators of a downloaded resource."""
+VALIDATOR_ETAG = 'etag'
+VALIDATOR_LAST_MODIFIED = 'lastModified'
+
+
+class Download(object):
+    """Download of a web resource. The request is sent when the download is
+    opened. The content is only transferred when it is written to an output
+    file. Downloads are context managers that close the response on exit.
+
+    Attributes
+    ----------
+    filename: string
+        Name of the downloaded file
+    modified: bool
+        False if the resource has not been modified since the download that
+        the given validators belong to
+    size: int
+        Size of the resource in bytes (None if unknown)
+    validators: dict
+        Validators of the downloaded resource
+    """
+    def __init__(self,
+            url: str,
+            username: Optional[str] = None,
+            password: Optional[str] = None,
+            validators: Optional[Dict[str, str]] = None,
+            parts: int = PARALLEL_PARTS,
+            min_parallel_size: int = PARALLEL_MIN_SIZE,
+            chunk_size: int = CHUNK_SIZE
+        ):
+        """Initialize the resource Url and the download options.
+
+        Parameters
+        ----------
+        url : string
+            Unique resource identifier for external resource that is accessed
+        username: string, optional
+            Optional user name for authentication
+        password: string, optional
+            Optional password for authentication
+        validators: dict, optional
+            Validators of a previous download of the resource. The resource is
+            only transferred if it has been modified since
+        parts: int, optional
+            Maximum number of parts that are fetched in parallel. Use 1 to
+            disable parallel downloads
+        min_parallel_size: int, optional
+            Minimum size of a resource (in bytes) for a parallel download
+        chunk_size: int, optional
+            Size of chunks when copying the resource content
+        """
+        self.url = url
+        self.username = username
+        self.password = password
+        self.parts = max(1, parts)
+        self.min_parallel_size = min_parallel_size
+        self.chunk_size = chunk_size
+        self.validators: Dict[str, str] = dict(validators) if validators else dict()
+        self.response = None
+        self.filename: Optional[str] = None
+        self.modified = True
+        self.size: Optional[int] = None
+        self.accept_ranges = False
+
+    def __enter__(self) -> "Download":
+        """Send the request when entering the context."""
+        return self.open()
+
+    def __exit__(self, type, value, traceback) -> None:
+        """Close the response when leaving the context."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the response to the initial request."""
+        if self.response is not None:
+            self.response.close()
+            self.response = None
+
+    def open(self) -> "Download":
+        """Send the request for the resource. The request is conditional if
+        validators were given.
+
+        Returns
+        -------
+        vizier.filestore.download.Download
+        """
+        headers = dict()
+        if VALIDATOR_ETAG in self.validators:
+            headers['If-None-Match'] = self.validators[VALIDATOR_ETAG]
+        if VALIDATOR_LAST_MODIFIED in self.validators:
+            headers['If-Modified-Since'] = self.validators[VALIDATOR_LAST_MODIFIED]
+        try:
+            self.response = self.request(headers)
+        except urllib.error.HTTPError as ex:
+            if ex.code != 304 or len(headers) == 0:
+                raise
+            ex.close()
+            self.modified = False
+            self.update_validators(ex.headers)
+            return self
+        info = self.response.info()
+        self.filename = get_download_filename(self.url, info)
+        # Validators of a previous download no longer apply
+        self.validators = dict()
+        self.update_validators(info)
+        if info.get('Content-Length') is not None:
+            self.size = int(info['Content-Length'])
+        self.accept_ranges = info.get('Accept-Ranges', '').strip() == 'bytes'
+        return self
+
+    def request(self, headers: Dict[str, str], byte_range: Optional[Tuple[int, int]] = None):
+        """Send a GET request for the resource.
+
+        Parameters
+        ----------
+        headers: dict
+            Additional request headers
+        byte_range: (int, int), optional
+            First and last byte (inclusive) of a range request
+
+        Returns
+        -------
+        http.client.HTTPResponse
+        """
+        request = urllib.request.Request(self.url, headers=headers)
+        if self.username is not None:
+            credentials = '{}:{}'.format(self.username, self.password or '')
+            request.add_header(
+                'Authorization',
+                'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+            )
+        if byte_range is not None:
+            request.add_header('Range', 'bytes={}-{}'.format(*byte_range))
+            # Ensure that all parts belong to the same version of the resource
+            if_range = self.get_if_range()
+            if if_range is not None:
+                request.add_header('If-Range', if_range)
+        return urllib.request.urlopen(request)
+
+    def get_if_range(self) -> Optional[str]:
+        """Get the validator for the If-Range header of range requests. Weak
+        entity tags cannot be used in an If-Range header. The modification
+        date is used instead if the resource does not have a strong entity
+        tag. The result is None if neither validator is available.
+
+        Returns
+        -------
+        string
+        """
+        etag = self.validators.get(VALIDATOR_ETAG)
+        if etag is not None and not etag.startswith('W/'):
+            return etag
+        return self.validators.get(VALIDATOR_LAST_MODIFIED)
+
+    def update_validators(self, info) -> None:
+        """Keep the validators from the headers of a response.
+
+        Parameters
+        ----------
+        info: http.client.HTTPMessage
+            Response headers
+        """
+        if info.get('ETag') is not None:
+            self.validators[VALIDATOR_ETAG] = info['ETag']
+        if info.get('Last-Modified') is not None:
+            self.validators[VALIDATOR_LAST_MODIFIED] = info['Last-Modified']
+
+    def write_to(self, f: BinaryIO, temp_dir: Optional[str] = None) -> int:
+        """Write the content of the resource to the given file. Returns the
+        number of bytes that were written.
+
+        Raises ValueError if the download is incomplete.
+
+        Parameters
+        ----------
+        f: file object
+            Output file
+        temp_dir: string, optional
+            Directory for the temporary files of a parallel download. By
+            default the directory of the output file is used if the file has
+            a name
+
+        Returns
+        -------
+        int
+        """
+        if self.response is None:
+            raise ValueError('resource has not been downloaded')
+        if temp_dir is None:
+            name = getattr(f, 'name', None)
+            if isinstance(name, str):
+                temp_dir = os.path.dirname(os.path.abspath(name))
+        parts = self.get_parts()
+        if len(parts) > 1:
+            written = self.write_parts(f, parts, temp_dir=temp_dir)
+        else:
+            written = copy_stream(self.response, f, self.chunk_size)
+        if self.size is not None and written != self.size:
+            raise ValueError('incomplete download of \'' + self.url + '\'')
+        return written
+
+    def get_parts(self) -> List[Tuple[int, int]]:
+        """Get byte ranges for the parts of a parallel download. The result
+        contains a single range if the resource is not downloaded in parallel.
+
+        Returns
+        -------
+        list((int, int))
+        """
+        if self.size is None:
+            return list()
+        if not self.accept_ranges or self.parts == 1 or self.size < self.min_parallel_size:
+            return [(0, self.size - 1)]
+        part_size = -(-self.size // self.parts)
+        return [
+            (start, min(start + part_size, self.size) - 1)
+            for start in range(0, self.size, part_size)
+        ]
+
+    def write_parts(self,
+            f: BinaryIO,
+            parts: List[Tuple[int, int]],
+            temp_dir: Optional[str] = None
+        ) -> int:
+        """Fetch the parts of the resource in parallel and write them to the
+        output file in order. The first failed part cancels the requests for
+        all other parts.
+
+        Parameters
+        ----------
+        f: file object
+            Output file
+        parts: list((int, int))
+            Byte ranges of the parts
+        temp_dir: string, optional
+            Directory for the temporary part files
+
+        Returns
+        -------
+        int
+        """
+        first_start, first_end = parts[0]
+        canceled = threading.Event()
+
+        def cancel_on_error(future: Future) -> None:
+            if not is_success(future):
+                canceled.set()
+
+        part_files = list()
+        try:
+            for _ in range(len(parts) - 1):
+                fd, filename = tempfile.mkstemp(prefix='.part', dir=temp_dir)
+                os.close(fd)
+                part_files.append(filename)
+            with ThreadPoolExecutor(max_workers=len(parts) - 1) as executor:
+                futures = list()
+                for byte_range, filename in zip(parts[1:], part_files):
+                    future = executor.submit(
+                        self.fetch_part,
+                        byte_range,
+                        filename,
+                        canceled
+                    )
+                    future.add_done_callback(cancel_on_error)
+                    futures.append(future)
+                try:
+                    written = copy_stream(
+                        self.response,
+                        f,
+                        self.chunk_size,
+                        limit=first_end - first_start + 1
+                    )
+                    wait(futures, return_when=FIRST_EXCEPTION)
+                finally:
+                    # Cancel all outstanding requests if the initial response
+                    # or any of the parts failed.
+                    complete = all(is_success(future) for future in futures)
+                    if not complete:
+                        canceled.set()
+                        for future in futures:
+                            future.cancel()
+            for future in futures:
+                if future.done() and not future.cancelled():
+                    ex = future.exception()
+                    if ex is not None and not isinstance(ex, (OSError, ValueError)):
+                        raise ex
+            if not complete:
+                # Fall back to the remainder of the initial response.
+                return written + copy_stream(self.response, f, self.chunk_size)
+            for part_file in part_files:
+                with open(part_file, 'rb') as part:
+                    written += copy_stream(part, f, self.chunk_size)
+        finally:
+            for part_file in part_files:
+                if os.path.exists(part_file):
+                    os.remove(part_file)
+        return written
+
+    def fetch_part(self,
+            byte_range: Tuple[int, int],
+            filename: str,
+            canceled: Optional[threading.Event] = None
+        ) -> str:
+        """Fetch a part of the resource into a temporary file.
+
+        Raises ValueError if the server does not respond with the requested
+        range or if the download is canceled.
+
+        Parameters
+        ----------
+        byte_range: (int, int)
+            First and last byte (inclusive) of the part
+        filename: string
+            Path to the temporary file
+        canceled: threading.Event, optional
+            Event that is set when the download of the part is canceled
+
+        Returns
+        -------
+        string
+        """
+        if canceled is not None and canceled.is_set():
+            raise ValueError('download canceled')
+        with self.request(dict(), byte_range=byte_range) as response:
+            expected = 'bytes {}-{}/'.format(*byte_range)
+            content_range = response.info().get('Content-Range', '')
+            if response.status != 206 or not content_range.startswith(expected):
+                raise ValueError('range request not satisfied')
+            with open(filename, 'wb') as f:
+                written = copy_stream(
+                    response,
+                    f,
+                    self.chunk_size,
+                    canceled=canceled
+                )
+        if written != byte_range[1] - byte_range[0] + 1:
+            raise ValueError('incomplete part')
+        return filename
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def copy_stream(
+        source: BinaryIO,
+        target: BinaryIO,
+        chunk_size: int,
+        limit: Optional[int] = None,
+        canceled: Optional[threading.Event] = None
+    ) -> int:
+    """Copy the content of a stream in chunks. Returns the number of bytes
+    that were copied.
+
+    Raises ValueError if the copy is canceled.
+
+    Parameters
+    ----------
+    source: file object
+        Input stream
+    target: file object
+        Output stream
+    chunk_size: int
+        Maximum size of the copied chunks
+    limit: int, optional
+        Maximum number of bytes that are copied
+    canceled: threading.Event, optional
+        Event that is set when the copy is canceled
+
+    Returns
+    -------
+    int
+    """
+    written = 0
+    while limit is None or written < limit:
+        if canceled is not None and canceled.is_set():
+            raise ValueError('download canceled')
+        size = chunk_size if limit is None else min(chunk_size, limit - written)
+        chunk = source.read(size)
+        if not chunk:
+            break
+        target.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def is_success(future: Future) -> bool:
+    """Test if a future has completed without an exception.
+
+    Parameters
+    ----------
+    future: concurrent.futures.Future
+        Future for a part of a parallel download
+
+    Returns
+    -------
+    bool
+    """
+    return future.done() and not future.cancelled() and future.exception() is None
@@ -15,20 +15,20 @@
 # limitations under the License.
 
 """Default implementation of the file store. This implementation keeps all
-files and their metadata on disk.
+files and their metadata on disk. File contents are kept in a content-addressed
+blob store (see vizier.filestore.fs.blob) that can be shared between the
+filestores of different projects.
 """
 
-from typing import Optional, IO, Tuple
+from typing import Optional, IO, Tuple, cast
 import json
 import os
 import shutil
-import urllib.request
-import urllib.error
-import urllib.parse
 
 from vizier.core.util import get_unique_identifier
 from vizier.filestore.base import Filestore, FileHandle
-from vizier.filestore.base import get_download_filename
+from vizier.filestore.download import Download
+from vizier.filestore.fs.blob import BlobStore, CHUNK_SIZE
 
 
 """File store constants."""
@@ -36,6 +36,8 @@ from vizier.filestore.base import get_download_filename
 DATA_FILENAME = 'file.dat'
 # Name of the metadata file
 METADATA_FILENAME = 'properties.json'
+# Name of the blob store folder for filestores that do not share blobs
+BLOBS_DIRNAME = '.blobs'
 
 
 """Configuration parameter."""
@@ -47,22 +49,33 @@ class FileSystemFilestore(Filestore):
     given base directory. Each subfolder contains the uploaded file (named
     file.dat for convenience), and the metadata file properties.json.
 
-    The metadata object is a dictionary with three elements: originalFilename
-    and mimeType, and encoding.
+    The data file is a hard link to the blob with the same content in the blob
+    store. The metadata object is a dictionary with four elements:
+    originalFilename, mimeType, encoding, and sha256 (the hash of the file
+    content). The hash is missing for files that were uploaded before the
+    blob store was introduced.
     """
-    def __init__(self, base_path):
+    def __init__(self, base_path: str, blobs: Optional[BlobStore] = None):
         """Initialize the base directory that is used for file storage. The
         directory will be created if they do not exist.
 
+        If no blob store is given the blobs are kept in a separate folder in
+        the base directory.
+
         Parameters
         ---------
         base_path : string
             Path to the base directory.
+        blobs: vizier.filestore.fs.blob.BlobStore, optional
+            Store for file contents
         """
         # Create the base directory if it does not exist
         if not os.path.isdir(base_path):
             os.makedirs(base_path)
         self.base_path = base_path
+        if blobs is None:
+            blobs = BlobStore(os.path.join(base_path, BLOBS_DIRNAME))
+        self.blobs = blobs
 
     def delete_file(self, identifier):
         """Delete file with given identifier. Returns True if file was deleted
@@ -79,7 +92,11 @@ class FileSystemFilestore(Filestore):
         """
         file_dir = self.get_file_dir(identifier)
         if os.path.isdir(file_dir):
+            digest = read_digest(file_dir)
             shutil.rmtree(file_dir, ignore_errors=True)
+            # Remove the blob if this was the last reference to it.
+            if digest is not None:
+                self.blobs.collect(digest)
             return True
         return False
 
@@ -107,11 +124,19 @@ class FileSystemFilestore(Filestore):
         identifier = get_unique_identifier()
         file_dir = self.get_file_dir(identifier, create=True)
         output_file = os.path.join(file_dir, DATA_FILENAME)
-        # Write web resource to output file.
-        response = urllib.request.urlopen(url)
-        filename = get_download_filename(url, response.info())
-        with open(output_file, 'wb') as f:
-            f.write(response.read())
+        # Stream the web resource to the output file. Remove the file if the
+        # download fails.
+        f = None
+        try:
+            with Download(url, username=username, password=password) as download:
+                with self.blobs.writer(output_file) as f:
+                    download.write_to(f, temp_dir=file_dir)
+        except Exception:
+            shutil.rmtree(file_dir, ignore_errors=True)
+            if f is not None and f.digest is not None:
+                self.blobs.collect(f.digest)
+            raise
+        filename = download.filename
         # Add file to file index
         f_handle = FileHandle(
             identifier,
@@ -119,7 +144,7 @@ class FileSystemFilestore(Filestore):
             file_name=filename
         )
         # Write metadata file
-        write_metadata_file(file_dir, f_handle)
+        write_metadata_file(file_dir, f_handle, digest=f.digest)
         return f_handle
 
     def get_file(self, identifier: str) -> Optional[FileHandle]:
@@ -153,10 +178,32 @@ class FileSystemFilestore(Filestore):
             mimetype: Optional[str] = None,
             encoding: Optional[str] = None
         ) -> IO[bytes]:
+        """Replace the content and metadata of the file with the given
+        identifier. Creates the file if it does not exist. Metadata values
+        that are None are taken from the existing file. Returns a writer for
+        the new file content. The file is updated when the writer is closed.
+
+        Parameters
+        ----------
+        identifier: string
+            Unique file identifier
+        file_name: string, optional
+            Original file name
+        mimetype: string, optional
+            File mime type
+        encoding: string, optional
+            File encoding
+
+        Returns
+        -------
+        io.RawIOBase
+        """
         file_dir = self.get_file_dir(identifier, create=True)
         file_path = os.path.join(file_dir, DATA_FILENAME)
+        digest = None
         if os.path.exists(file_path):
             orig_file_name, orig_mimetype, orig_encoding = read_metadata_file(file_dir)
+            digest = read_digest(file_dir)
             if file_name is None:
                 file_name = orig_file_name
             if mimetype is None:
@@ -173,10 +220,14 @@ class FileSystemFilestore(Filestore):
             encoding=encoding
         )
         write_metadata_file(file_dir, fh)
-        return open(file_path, 'wb+')
-
 
+        def on_close(new_digest: str) -> None:
+            write_metadata_file(file_dir, fh, digest=new_digest)
+            # Release the blob for the replaced content.
+            if digest is not None and digest != new_digest:
+                self.blobs.collect(digest)
 
+        return cast(IO[bytes], self.blobs.writer(file_path, on_close=on_close))
 
     def get_file_dir(self, 
             identifier: str, 
@@ -213,7 +264,7 @@ class FileSystemFilestore(Filestore):
         result = list()
         for f_name in os.listdir(self.base_path):
             dir_name = os.path.join(self.base_path, f_name)
-            if os.path.isdir(dir_name):
+            if os.path.isdir(dir_name) and f_name != BLOBS_DIRNAME:
                 file_name, mimetype, encoding = read_metadata_file(dir_name)
                 f_handle = FileHandle(
                     f_name,
@@ -249,7 +300,9 @@ class FileSystemFilestore(Filestore):
         file_dir = self.get_file_dir(identifier, create=True)
         output_file = os.path.join(file_dir, DATA_FILENAME)
         # Copy the uploaded file
-        shutil.copyfile(filename, output_file)
+        with open(filename, 'rb') as f_in:
+            with self.blobs.writer(output_file) as f_out:
+                shutil.copyfileobj(f_in, f_out, CHUNK_SIZE)
         # Add file to file index
         f_handle = FileHandle(
             identifier,
@@ -257,7 +310,7 @@ class FileSystemFilestore(Filestore):
             file_name=name
         )
         # Write metadata file
-        write_metadata_file(file_dir, f_handle)
+        write_metadata_file(file_dir, f_handle, digest=f_out.digest)
         return f_handle
 
     def upload_stream(self, file, file_name):
@@ -280,14 +333,15 @@ class FileSystemFilestore(Filestore):
         file_dir = self.get_file_dir(identifier, create=True)
         output_file = os.path.join(file_dir, DATA_FILENAME)
         # Save the file object to the new file path
-        file.save(output_file)
+        with self.blobs.writer(output_file) as f:
+            file.save(f, buffer_size=CHUNK_SIZE)
         f_handle = FileHandle(
             identifier,
             filepath=output_file,
             file_name=file_name
         )
         # Write metadata file
-        write_metadata_file(file_dir, f_handle)
+        write_metadata_file(file_dir, f_handle, digest=f.digest)
         return f_handle
 
 
@@ -295,6 +349,27 @@ class FileSystemFilestore(Filestore):
 # Helper Methods
 # ------------------------------------------------------------------------------
 
+def read_digest(file_dir: str) -> Optional[str]:
+    """Read the hash of the file content from the metadata file. Returns None
+    if the metadata does not contain the hash.
+
+    Parameters
+    ----------
+    file_dir: string
+        Base directory for the file
+
+    Returns
+    -------
+    string
+    """
+    metadata_file = os.path.join(file_dir, METADATA_FILENAME)
+    if not os.path.isfile(metadata_file):
+        return None
+    with open(metadata_file, 'r') as f:
+        obj = json.load(f)
+    return obj.get('sha256')
+
+
 def read_metadata_file(file_dir: str) -> Tuple[str, str, str]:
     """Read metadata information for the specified file. Returns the original
     file name, the mime type and encoding (the last two values may be None).
@@ -314,7 +389,11 @@ def read_metadata_file(file_dir: str) -> Tuple[str, str, str]:
     return obj['originalFilename'], obj['mimeType'], obj['encoding']
 
 
-def write_metadata_file(file_dir: str, f_handle: FileHandle) -> None:
+def write_metadata_file(
+        file_dir: str,
+        f_handle: FileHandle,
+        digest: Optional[str] = None
+    ) -> None:
     """Write the metadata file for the given file handle.
 
     Parameters
@@ -323,11 +402,16 @@ def write_metadata_file(file_dir: str, f_handle: FileHandle) -> None:
         Base directory for the file
     f_handle: vizier.filestore.base.FileHandle
         File handle
+    digest: string, optional
+        SHA-256 hash of the file content
     """
     metadata_file = os.path.join(file_dir, METADATA_FILENAME)
+    obj = {
+        'originalFilename': f_handle.file_name,
+        'mimeType': f_handle.mimetype,
+        'encoding': f_handle.encoding
+    }
+    if digest is not None:
+        obj['sha256'] = digest
     with open(metadata_file, 'w') as f:
-        json.dump({
-            'originalFilename': f_handle.file_name,
-            'mimeType': f_handle.mimetype,
-            'encoding': f_handle.encoding
-        }, f)
+        json.dump(obj, f)
@@ -0,0 +1,239 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content-addressed store for the contents of uploaded files. The store is
+shared by the file system filestores of all projects.
+
+Each blob is named by the SHA-256 hash of its content. The hash is computed
+while the file is written. The data file of an uploaded file is a hard link
+to the blob with the same content. Uploading the same file into multiple
+projects therefore stores the content only once. The link count of the blob
+is the reference count: a blob that is not linked from any data file has a
+link count of one and is removed when the last data file that references it
+is deleted.
+
+Data files never become invalid when a blob is removed concurrently since
+the content remains available as long as any hard link to it exists. If the
+file system does not support hard links the content is stored in the data
+file without deduplication.
+"""
+
+from typing import Callable, Optional
+
+import hashlib
+import io
+import os
+import threading
+
+from vizier.core.util import get_unique_identifier
+
+
+"""Name of the folder for temporary files while a blob is written."""
+TEMP_DIR = 'tmp'
+
+"""Size of chunks when copying file contents."""
+CHUNK_SIZE = 1024 * 1024
+
+"""Serialize changes to the blobs that are made by filestores in the same
+process.
+"""
+_blob_lock = threading.Lock()
+
+
+class BlobWriter(io.RawIOBase):
+    """Writer for the content of a data file. The content is written to a
+    temporary file and hashed. When the writer is closed the content is moved
+    into the blob store and the data file is linked to the blob.
+    """
+    def __init__(self,
+            store: "BlobStore",
+            target: str,
+            on_close: Optional[Callable[[str], None]] = None
+        ):
+        """Initialize the blob store and the path of the data file.
+
+        Parameters
+        ----------
+        store: vizier.filestore.fs.blob.BlobStore
+            Blob store for the file content
+        target: string
+            Path to the data file
+        on_close: callable, optional
+            Function that is called with the content hash when the writer is
+            closed
+        """
+        super(BlobWriter, self).__init__()
+        self.store = store
+        self.target = target
+        self.on_close = on_close
+        self.temp_file = store.get_temp_file()
+        self.file = open(self.temp_file, 'wb')
+        self.hash = hashlib.sha256()
+        self.digest: Optional[str] = None
+
+    def close(self) -> None:
+        """Move the written content into the blob store and link the data
+        file to the blob.
+        """
+        if not self.closed:
+            self.file.close()
+            self.digest = self.hash.hexdigest()
+            self.store.commit(self.temp_file, self.digest, self.target)
+            if self.on_close is not None:
+                self.on_close(self.digest)
+        super(BlobWriter, self).close()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:  # type: ignore[override]
+        """Write a chunk of the file content.
+
+        Parameters
+        ----------
+        b: bytes
+            Chunk of file content
+
+        Returns
+        -------
+        int
+        """
+        self.hash.update(b)
+        return self.file.write(b)
+
+
+class BlobStore(object):
+    """Content-addressed store for file contents. Blobs are kept in
+    subfolders of the base directory that are named by the first two
+    characters of the content hash.
+    """
+    def __init__(self, base_path: str):
+        """Initialize the base directory for the blobs. The directory is
+        created when the first blob is written.
+
+        Parameters
+        ----------
+        base_path: string
+            Path to the base directory
+        """
+        self.base_path = os.path.abspath(base_path)
+
+    def collect(self, digest: str) -> bool:
+        """Remove the blob with the given content hash if it is no longer
+        referenced by any data file. Returns True if the blob was removed.
+
+        Parameters
+        ----------
+        digest: string
+            SHA-256 hash of the blob content
+
+        Returns
+        -------
+        bool
+        """
+        blob_file = self.get_blob_file(digest)
+        with _blob_lock:
+            try:
+                if os.stat(blob_file).st_nlink > 1:
+                    return False
+                os.remove(blob_file)
+                return True
+            except FileNotFoundError:
+                return False
+
+    def commit(self, temp_file: str, digest: str, target: str) -> None:
+        """Move a temporary file with the given content hash into the store
+        and link the data file to the blob. If the blob exists already the
+        temporary file is deleted.
+
+        Parameters
+        ----------
+        temp_file: string
+            Path to the temporary file
+        digest: string
+            SHA-256 hash of the file content
+        target: string
+            Path to the data file
+        """
+        blob_file = self.get_blob_file(digest)
+        with _blob_lock:
+            if os.path.exists(target):
+                os.remove(target)
+            if os.path.isfile(blob_file):
+                try:
+                    os.link(blob_file, target)
+                    os.remove(temp_file)
+                    return
+                except FileNotFoundError:
+                    # The blob was removed concurrently.
+                    pass
+                except OSError:
+                    os.replace(temp_file, target)
+                    return
+            # Link the data file first so that the content is never without a
+            # reference.
+            try:
+                os.link(temp_file, target)
+            except OSError:
+                os.replace(temp_file, target)
+                return
+            os.makedirs(os.path.dirname(blob_file), exist_ok=True)
+            os.replace(temp_file, blob_file)
+
+    def get_blob_file(self, digest: str) -> str:
+        """Get the path to the blob with the given content hash.
+
+        Parameters
+        ----------
+        digest: string
+            SHA-256 hash of the blob content
+
+        Returns
+        -------
+        string
+        """
+        return os.path.join(self.base_path, digest[:2], digest)
+
+    def get_temp_file(self) -> str:
+        """Get path for a new temporary file in the blob store.
+
+        Returns
+        -------
+        string
+        """
+        temp_dir = os.path.join(self.base_path, TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        return os.path.join(temp_dir, get_unique_identifier())
+
+    def writer(self,
+            target: str,
+            on_close: Optional[Callable[[str], None]] = None
+        ) -> BlobWriter:
+        """Get a writer for the content of the given data file.
+
+        Parameters
+        ----------
+        target: string
+            Path to the data file
+        on_close: callable, optional
+            Function that is called with the content hash when the writer is
+            closed
+
+        Returns
+        -------
+        vizier.filestore.fs.blob.BlobWriter
+        """
+        return BlobWriter(store=self, target=target, on_close=on_close)
@@ -22,10 +22,18 @@ from typing import Optional, Dict, Any
 
 from vizier.filestore.factory import FilestoreFactory
 from vizier.filestore.fs.base import FileSystemFilestore, PARA_DIRECTORY
+from vizier.filestore.fs.blob import BlobStore
+
+
+"""Name of the folder for the blob store that is shared by all filestores."""
+BLOBS_DIRNAME = '.blobs'
 
 
 class FileSystemFilestoreFactory(FilestoreFactory):
-    """Filestore factory implementation for the default filestore."""
+    """Filestore factory implementation for the default filestore. All
+    filestores share a single blob store in the base directory. Files with
+    the same content are therefore stored only once across projects.
+    """
     def __init__(self, 
             base_path: Optional[str] = None, 
             properties: Optional[Dict[str, Any]] = None
@@ -49,13 +57,15 @@ class FileSystemFilestoreFactory(FilestoreFactory):
             self.base_path = os.path.abspath(properties[PARA_DIRECTORY])
         if self.base_path is None:
             raise ValueError('no base path given')
+        self.blobs = BlobStore(os.path.join(self.base_path, BLOBS_DIRNAME))
 
     def delete_filestore(self, identifier):
         """Delete a filestore. This method is normally called when the project
         with which the filestore is associated is deleted.
 
         Deletes the directory and all subfolders that contain the filestore
-        resources.
+        resources. Blobs that are no longer referenced by any other filestore
+        are removed.
 
         Parameters
         ----------
@@ -64,6 +74,9 @@ class FileSystemFilestoreFactory(FilestoreFactory):
         """
         filestore_dir = os.path.join(self.base_path, identifier)
         if os.path.isdir(filestore_dir):
+            filestore = self.get_filestore(identifier)
+            for f_handle in filestore.list_files():
+                filestore.delete_file(f_handle.identifier)
             shutil.rmtree(filestore_dir)
 
     def get_filestore(self, identifier):
@@ -79,4 +92,4 @@ class FileSystemFilestoreFactory(FilestoreFactory):
         vizier.filestore.fs.base.FileSystemFilestore
         """
         filestore_dir = os.path.join(self.base_path, identifier)
-        return FileSystemFilestore(filestore_dir)
+        return FileSystemFilestore(filestore_dir, blobs=self.blobs)
@@ -21,12 +21,29 @@ from typing import cast, Optional, List, Dict, Any, Tuple, Union
 
 import requests
 import os
-from requests.exceptions import HTTPError
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError, ConnectionError, ConnectTimeout, Timeout
 from requests import Response
+from urllib3.exceptions import NewConnectionError
 from vizier.datastore.annotation.base import DatasetCaveat
 
 _mimir_url = os.environ.get('MIMIR_URL', 'http://127.0.0.1:8089/api/v2/')
 
+# Connection settings for the shared HTTP session. Requests that time out or
+# fail with one of the RETRY_STATUS codes are retried (with exponential
+# backoff) only if they are idempotent. Requests that fail to connect are
+# always retried since they never reached the gateway.
+_connect_timeout = float(os.environ.get('MIMIR_CONNECT_TIMEOUT', '10'))
+_read_timeout = float(os.environ.get('MIMIR_READ_TIMEOUT', '600'))
+_max_connections = int(os.environ.get('MIMIR_MAX_CONNECTIONS', '10'))
+_max_retries = int(os.environ.get('MIMIR_MAX_RETRIES', '3'))
+_retry_backoff = float(os.environ.get('MIMIR_RETRY_BACKOFF', '0.5'))
+
+RETRY_STATUS = set([502, 503, 504])
+
 class MimirError(Exception):
     def __init___(self,dErrorArguments):
         Exception.__init__(self, dErrorArguments)
@@ -91,6 +108,145 @@ def readResponse(resp: Response) -> Dict[str, Any]:
   # Otherwise, we have a legitmate response.  Return it.
   return json_object
 
+class LatencyMetric(object):
+  """
+  Request count, error count, and latency (in seconds) for requests to a
+  single gateway endpoint. Retries are counted as separate requests.
+  """
+  def __init__(self):
+    self.count = 0
+    self.errors = 0
+    self.total_time = 0.0
+    self.max_time = 0.0
+
+  @property
+  def avg_time(self) -> float:
+    return self.total_time / self.count if self.count > 0 else 0.0
+
+  def to_dict(self) -> Dict[str, Any]:
+    return {
+      'count': self.count,
+      'errors': self.errors,
+      'totalTime': self.total_time,
+      'avgTime': self.avg_time,
+      'maxTime': self.max_time
+    }
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+_metrics: Dict[str, LatencyMetric] = dict()
+_metrics_lock = threading.Lock()
+
+def getSession() -> requests.Session:
+  """
+  Get the HTTP session that is shared by all threads in the current process.
+  The session keeps connections to the gateway alive. The pool blocks when
+  all connections are in use, i.e., there are never more than
+  MIMIR_MAX_CONNECTIONS open sockets to the gateway. A new session is
+  created after a fork since connections cannot be shared between processes.
+  """
+  global _session, _session_pid
+  with _session_lock:
+    if _session is None or _session_pid != os.getpid():
+      session = requests.Session()
+      adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=_max_connections,
+        pool_block=True
+      )
+      session.mount('http://', adapter)
+      session.mount('https://', adapter)
+      _session = session
+      _session_pid = os.getpid()
+    return _session
+
+def resetSession() -> None:
+  """
+  Close all open connections. The next request will create a new session.
+  """
+  global _session
+  with _session_lock:
+    if _session is not None and _session_pid == os.getpid():
+      _session.close()
+    _session = None
+
+def getLatencyMetrics() -> Dict[str, Dict[str, Any]]:
+  """
+  Get the latency metrics for all gateway endpoints that have been requested
+  by the current process. Metrics are keyed by the HTTP method and endpoint,
+  e.g., 'POST query/table'.
+  """
+  with _metrics_lock:
+    return { key: metric.to_dict() for key, metric in _metrics.items() }
+
+def resetLatencyMetrics() -> None:
+  with _metrics_lock:
+    _metrics.clear()
+
+def _record(key: str, elapsed: float, failed: bool) -> None:
+  with _metrics_lock:
+    metric = _metrics.get(key)
+    if metric is None:
+      metric = LatencyMetric()
+      _metrics[key] = metric
+    metric.count += 1
+    metric.total_time += elapsed
+    metric.max_time = max(metric.max_time, elapsed)
+    if failed:
+      metric.errors += 1
+
+def _request(
+    method: str,
+    route: str,
+    idempotent: bool,
+    endpoint: Optional[str] = None,
+    **kwargs: Any
+  ) -> Response:
+  """
+  Send a request to the gateway using the shared session. The endpoint is
+  the key under which the request latency is recorded (defaults to the
+  route).
+  """
+  key = '{} {}'.format(method, endpoint if endpoint is not None else route)
+  session = getSession()
+  attempt = 0
+  while True:
+    start = time.time()
+    try:
+      resp = session.request(
+        method,
+        _mimir_url + route,
+        timeout=(_connect_timeout, _read_timeout),
+        **kwargs
+      )
+    except (ConnectionError, Timeout) as ex:
+      _record(key, time.time() - start, True)
+      # A read timeout or a dropped connection may happen after the gateway
+      # received the request.
+      sent = not isinstance(ex, ConnectTimeout) and not _is_connect_error(ex)
+      if (sent and not idempotent) or attempt >= _max_retries:
+        raise
+    else:
+      failed = resp.status_code >= 400
+      _record(key, time.time() - start, failed)
+      if not (idempotent and resp.status_code in RETRY_STATUS) or attempt >= _max_retries:
+        return resp
+      resp.close()
+    time.sleep(_retry_backoff * (2 ** attempt))
+    attempt += 1
+
+def _is_connect_error(ex: Exception) -> bool:
+  """
+  Test whether a connection error was raised before the request was sent.
+  """
+  reason = ex.args[0] if len(ex.args) > 0 else None
+  reason = getattr(reason, 'reason', reason)
+  return isinstance(reason, NewConnectionError)
+
+def _post(route: str, req_json: Any, idempotent: bool = False) -> Dict[str, Any]:
+  return readResponse(_request('POST', route, idempotent, json=req_json))
+
 def createLens(dataset, params, type, materialize, human_readable_name = None, properties = {}):
     req_json = {
       "input": dataset,
@@ -100,7 +256,7 @@ def createLens(dataset, params, type, materialize, human_readable_name = None, p
       "humanReadableName": human_readable_name,
       "properties" : properties
     }
-    resp = readResponse(requests.post(_mimir_url + 'lens/create', json=req_json))
+    resp = _post('lens/create', req_json)
     return resp
 
 def createView(
@@ -117,7 +273,7 @@ def createView(
     }
     if functions is not None:
       req_json["functions"] = functions
-    resp = readResponse(requests.post(_mimir_url + 'view/create', json=req_json))
+    resp = _post('view/create', req_json)
     return (resp['name'], resp['dependencies'], resp['schema'], resp['properties'], resp['functions'])
 
 def createAdaptiveSchema(dataset, params, type):
@@ -126,7 +282,7 @@ def createAdaptiveSchema(dataset, params, type):
       "params": params,
       "type": type
     } 
-    resp = readResponse(requests.post(_mimir_url + 'adaptive/create', json=req_json))
+    resp = _post('adaptive/create', req_json)
     return resp['adaptiveSchemaName']
     
 def vistrailsDeployWorkflowToViztool(x, name, type, users, start, end, fields, latlonfields, housenumberfield, streetfield, cityfield, statefield, orderbyfields):
@@ -159,7 +315,7 @@ def loadDataSource(
     }
     if human_readable_name is not None:
       req_json["humanReadableName"] = human_readable_name
-    resp = readResponse(requests.post(_mimir_url + 'dataSource/load', json=req_json))
+    resp = _post('dataSource/load', req_json)
     return (resp['name'], resp['schema'])
 
 def loadDataInline(
@@ -180,7 +336,7 @@ def loadDataInline(
       req_json["humanReadableName"] = human_readable_name
     if result_name is not None:
       req_json["resultName"] = result_name
-    resp = readResponse(requests.post(_mimir_url + 'dataSource/inlined', json=req_json))
+    resp = _post('dataSource/inlined', req_json)
     return (resp['name'], resp['schema'])
 
     
@@ -196,7 +352,7 @@ def unloadDataSource(
       "format": format,
       "backendOption": backend_options
     }
-    resp = readResponse(requests.post(_mimir_url + 'dataSource/unload', json=req_json))
+    resp = _post('dataSource/unload', req_json)
     return resp['outputFiles']
     
 def repairReason(reasons, reasonIdx):
@@ -210,7 +366,7 @@ def feedback(reasons, idx, ack, rvalue):
       "ack": ack,
       "repairStr": rvalue
     } 
-    resp = readResponse(requests.post(_mimir_url + 'annotations/feedback', json=req_json))
+    resp = _post('annotations/feedback', req_json)
     return resp
     
 #def feedbackCell(query, col, row, ack): 
@@ -224,7 +380,7 @@ def explainRow(query: str, rowProv: Optional[str]) -> List[DatasetCaveat]:
       "row": rowProv,
       "col": 0
     }
-    resp = readResponse(requests.post(_mimir_url + 'annotations/cell', json=req_json))
+    resp = _post('annotations/cell', req_json, idempotent=True)
     return [
       DatasetCaveat.from_dict(caveat)
       for caveat in resp['reasons']
@@ -236,7 +392,7 @@ def explainCell(query: str, col: Optional[str], rowProv: Optional[str]) -> List[
       "row": rowProv,
       "col": col
     }
-    resp = readResponse(requests.post(_mimir_url + 'annotations/cell', json=req_json))
+    resp = _post('annotations/cell', req_json, idempotent=True)
     return [
       DatasetCaveat.from_dict(caveat)
       for caveat in resp['reasons']
@@ -246,7 +402,7 @@ def explainEverythingJson(query: str) -> List[DatasetCaveat]:
     req_json = {
       "query": query
     }
-    resp = readResponse(requests.post(_mimir_url + 'annotations/all', json=req_json))
+    resp = _post('annotations/all', req_json, idempotent=True)
     return [
       DatasetCaveat.from_dict(caveat)
       for caveat in resp['reasons']
@@ -263,7 +419,7 @@ def sqlQuery(
     } 
     if views is not None:
       req_json['views'] = views
-    resp = readResponse(requests.post(_mimir_url + 'query/data', json=req_json))
+    resp = _post('query/data', req_json, idempotent=True)
     return resp
 
 def vistrailsQueryMimirJson(
@@ -289,7 +445,7 @@ def getDataframe(
     } 
     if views is not None:
       req_json['views'] = views
-    resp = readResponse(requests.post(_mimir_url + 'query/dataframe', json=req_json))
+    resp = _post('query/dataframe', req_json, idempotent=True)
     return resp
 
 def getTable(
@@ -319,7 +475,7 @@ def getTable(
     if force_profiler is not None:
       req_json["profile"] = force_profiler
 
-    resp = readResponse(requests.post(_mimir_url + 'query/table', json=req_json))
+    resp = _post('query/table', req_json, idempotent=True)
     return resp
 
 def countRows(view_name: str) -> int:
@@ -334,7 +490,7 @@ def evalScala(inputs, source):
       "language": "scala",
       "source": source
     }
-    resp = readResponse(requests.post(_mimir_url + 'eval/scala', json=req_json))
+    resp = _post('eval/scala', req_json)
     return resp
 
 def evalR(inputs, source):
@@ -343,7 +499,7 @@ def evalR(inputs, source):
       "language": "R",
       "source": source
     }
-    resp = readResponse(requests.post(_mimir_url + 'eval/R', json=req_json))
+    resp = _post('eval/R', req_json)
     return resp
 
 def getTableInfo(table: str, force_profiler: Optional[bool] = None) -> Tuple[List[Dict[str,str]], Dict[str, Any]]:
@@ -352,18 +508,63 @@ def getTableInfo(table: str, force_profiler: Optional[bool] = None) -> Tuple[Lis
     }
     if force_profiler is not None:
       req_json["profile"] = force_profiler
-    resp = readResponse(requests.post(_mimir_url + 'tableInfo', json=req_json))
+    resp = _post('tableInfo', req_json, idempotent=True)
     # print("TABLEINFO: {}".format(resp))
     return (
       cast(List[Dict[str,str]], resp['schema']), 
       cast(Dict[str,Any], resp['properties'])
     )
 
+def getTableInfos(tables: List[str]) -> Dict[str, Tuple[List[Dict[str,str]], Dict[str, Any]]]:
+    """
+    Get schema and properties for a list of tables. The gateway has no
+    endpoint for multiple tables. The requests are therefore sent concurrently
+    over the shared session (with at most MIMIR_MAX_CONNECTIONS requests in
+    flight), i.e., the result is available after a single round trip for up
+    to MIMIR_MAX_CONNECTIONS tables. Tables for which Mimir reports an error
+    (i.e., tables that do not exist) are omitted from the result. All other
+    errors, e.g., if the gateway cannot be reached or responds with a server
+    error, are raised.
+    """
+    tables = list(dict.fromkeys(tables))
+    if len(tables) <= 1:
+      results = [ _getTableInfoOrNone(table) for table in tables ]
+    else:
+      workers = min(len(tables), max(_max_connections, 1))
+      with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_getTableInfoOrNone, tables))
+    return {
+      table: info
+      for table, info in zip(tables, results)
+      if info is not None
+    }
+
+def _getTableInfoOrNone(table: str) -> Optional[Tuple[List[Dict[str,str]], Dict[str, Any]]]:
+    """
+    Get schema and properties for a table. Returns None if Mimir reports an
+    error for the table. Errors that are not reported by Mimir itself (e.g.,
+    HTTP or parse errors) are raised.
+    """
+    try:
+      return getTableInfo(table)
+    except MimirError as ex:
+      if _isMimirProvidedError(ex):
+        return None
+      raise
+
+def _isMimirProvidedError(ex: MimirError) -> bool:
+    """
+    Test if an error was reported by Mimir (as an error type and message in
+    the response) rather than raised for a failed or unparsable response.
+    """
+    details = ex.args[0] if len(ex.args) > 0 else None
+    return isinstance(details, dict) and details.get('errorType') is not None
+
 def getSchema(query):
     req_json = {
       "query": query
     }
-    resp = readResponse(requests.post(_mimir_url + 'schema', json=req_json))
+    resp = _post('schema', req_json, idempotent=True)
     return resp['schema']
 
 def tableExists(tableName):
@@ -371,7 +572,7 @@ def tableExists(tableName):
       "query": 'SELECT * FROM ' + str(tableName)
     }
     try:
-        resp = readResponse(requests.post(_mimir_url + 'schema', json=req_json))
+        resp = _post('schema', req_json, idempotent=True)
         if resp['schema']:
             return True
         else:
@@ -412,7 +613,7 @@ def createSample(
     "properties" : properties if properties is not None else {},
     "resultName" : result_name
   }
-  resp = readResponse(requests.post(_mimir_url + 'view/sample', json=req_json))
+  resp = _post('view/sample', req_json)
   return (resp['name'], resp['schema'])
 
 def vizualScript(
@@ -461,13 +662,13 @@ def vizualScript(
   }
   # print(_mimir_url + "vizual/create")
   # print(json.dumps(req_json))
-  resp = readResponse(requests.post(_mimir_url + 'vizual/create', json=req_json))
+  resp = _post('vizual/create', req_json)
   assert("name" in resp)
   assert("script" in resp)
   return resp
 
 def getBlob(identifier, expected_type = None):
-  resp = requests.get(_mimir_url + 'blob/{}'.format(identifier))
+  resp = _request('GET', 'blob/{}'.format(identifier), True, endpoint='blob')
   if resp.status_code != 200:
     raise MimirError(
       "Blob {} does not exist".format(identifier)
@@ -484,7 +685,14 @@ def createBlob(identifier: str, blob_type: str, data: bytes) -> str:
   route = "blob"
   if identifier is not None:
     route += "/{}".format(identifier)
-  resp = requests.put(_mimir_url + route+'?type={}'.format(blob_type), data = data)
+  resp = _request(
+    'PUT',
+    route,
+    identifier is not None,
+    endpoint='blob',
+    params={'type': blob_type},
+    data=data
+  )
   if resp.status_code != 200:
     raise MimirError(
       "Blob {} creation failed".format(identifier)
@@ -492,10 +700,10 @@ def createBlob(identifier: str, blob_type: str, data: bytes) -> str:
   return resp.text
   
 def getAvailableLensTypes():
-    return requests.get(_mimir_url + 'lens').json()['lensTypes']
+    return readResponse(_request('GET', 'lens', True))['lensTypes']
     
 def getAvailableAdaptiveSchemas():
-    return requests.get(_mimir_url + 'adaptive').json()['adaptiveSchemaTypes']
+    return readResponse(_request('GET', 'adaptive', True))['adaptiveSchemaTypes']
 
 def materialize(identifier, result_name = None) -> Dict[str, Any]: 
   req_json = {
@@ -503,5 +711,5 @@ def materialize(identifier, result_name = None) -> Dict[str, Any]:
   }
   if result_name is not None:
     req_json["resultName"] = result_name
-  resp = readResponse(requests.post(_mimir_url + 'view/materialize', json=req_json))
+  resp = _post('view/materialize', req_json)
   return resp
@@ -254,3 +254,19 @@ class ViztrailHandle(NamedObject):
         module.
         """
         raise NotImplementedError
+
+    def read_output(self, output_id: str) -> Any:
+        """Read the value of a module output that is maintained separately
+        from the module. Raises ValueError if the output does not exist. By
+        default, all outputs are contained in their modules.
+
+        Parameters
+        ----------
+        output_id: string
+            Unique identifier of the stored output value
+
+        Returns
+        -------
+        any
+        """
+        raise ValueError('unknown output \'' + str(output_id) + '\'')
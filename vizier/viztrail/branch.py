@@ -20,7 +20,8 @@ that represent the history of the branch.
 """
 
 from abc import abstractmethod
-from typing import Optional, List
+from contextlib import contextmanager
+from typing import Optional, List, Iterator
 from datetime import datetime
 
 from vizier.core.timestamp import get_current_time
@@ -158,6 +159,14 @@ class BranchHandle(NamedObject):
         """
         raise NotImplementedError()
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group all module state changes that are made by the current thread
+        while the context is active into a single write. The default
+        implementation writes every state change immediately.
+        """
+        yield
+
     @property
     def created_at(self):
         """Shortcut to get the created_at timestamp from the associated
@@ -189,6 +198,17 @@ class BranchHandle(NamedObject):
         """
         raise NotImplementedError()
 
+    def get_loaded_workflows(self) -> List[WorkflowHandle]:
+        """Get the handles for the workflows of the branch that are currently
+        held in memory. The default implementation does not hold any workflows
+        in memory.
+
+        Returns
+        -------
+        list(vizier.viztrail.workflow.base.WorkflowHandle)
+        """
+        return list()
+
     @abstractmethod
     def get_workflow(self, workflow_id: Optional[str] = None) -> WorkflowHandle:
         """Get the workflow with the given identifier. If the identifier is
@@ -221,3 +241,14 @@ class BranchHandle(NamedObject):
             if ts < head.descriptor.created_at:
                 ts = head.descriptor.created_at
         return ts
+
+    def unload(self) -> bool:
+        """Release the workflows of the branch that are held in memory. The
+        workflows are read again when they are accessed next. Returns False if
+        the branch has an active workflow that cannot be released.
+
+        Returns
+        -------
+        bool
+        """
+        return True
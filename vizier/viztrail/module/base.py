@@ -167,9 +167,9 @@ class ModuleHandle(ModuleState):
             external_form: Optional[str], 
             identifier: Optional[str] = None, 
             state: int = MODULE_PENDING,
-            timestamp: ModuleTimestamp = ModuleTimestamp(), 
-            outputs: ModuleOutputs = ModuleOutputs(), 
-            provenance: ModuleProvenance = ModuleProvenance()
+            timestamp: Optional[ModuleTimestamp] = None, 
+            outputs: Optional[ModuleOutputs] = None, 
+            provenance: Optional[ModuleProvenance] = None
         ):
         """Initialize the module handle. For new modules, datasets and outputs
         are initially empty.
@@ -277,6 +277,23 @@ class ModuleHandle(ModuleState):
         self.timestamp.finished_at = finished_at
         self.outputs = outputs
 
+    def set_pending(self,
+            provenance: Optional[ModuleProvenance] = None
+        ) -> None:
+        """Set status of the module to pending. This is used to re-execute a
+        module that has been executed (or that is running) in parallel with
+        modules that it turned out to depend on. Outputs are kept until the
+        module is executed again.
+
+        Parameters
+        ----------
+        provenance: vizier.viztrail.module.provenance.ModuleProvenance, optional
+            Provenance information from the discarded execution of the module
+        """
+        self.state = MODULE_PENDING
+        if provenance is not None:
+            self.provenance = provenance
+
     def set_running(self, 
             started_at: datetime = get_current_time(), 
             external_form: Optional[str] = None
@@ -18,7 +18,7 @@
 standard output and one for error messages.
 """
 
-from typing import List, Any, Iterable, Dict, Optional
+from typing import List, Any, Iterable, Dict, Optional, Callable
 from vizier.view.chart import ChartViewHandle
 
 import traceback
@@ -216,6 +216,55 @@ class TextOutput(OutputObject):
         super(TextOutput, self).__init__(type=OUTPUT_TEXT, value=value)
 
 
+class StoredOutput(OutputObject):
+    """Output object where the value is maintained outside of the module
+    (e.g., because it is large). The value is read using the given reader
+    every time it is accessed. The output contains a truncated preview of the
+    value that can be accessed without reading the value.
+    """
+    def __init__(self,
+            type: str,
+            identifier: str,
+            size: int,
+            preview: Any = None,
+            reader: Optional[Callable[[str], Any]] = None
+        ):
+        """Initialize the output object. The value is not accessible if no
+        reader is given.
+
+        Parameters
+        ----------
+        type: string
+            Unique object type identifier
+        identifier: string
+            Unique identifier of the stored value
+        size: int
+            Size of the serialized value
+        preview: any, optional
+            Truncated preview of the value
+        reader: callable, optional
+            Function that returns the value for a given identifier
+        """
+        # Do not call the super constructor since the value is a property.
+        self.type = type
+        self.identifier = identifier
+        self.size = size
+        self.preview = preview
+        self.reader = reader
+
+    @property
+    def value(self) -> Any:  # type: ignore[override]
+        """Read the output value.
+
+        Returns
+        -------
+        any
+        """
+        if self.reader is None:
+            raise ValueError('output \'{}\' is not accessible'.format(self.identifier))
+        return self.reader(self.identifier)
+
+
 # ------------------------------------------------------------------------------
 # Helper Methods
 # ------------------------------------------------------------------------------
@@ -17,17 +17,21 @@
 """Implementation for branch handles that maintain all resources as objects
 and folders in an object store.
 """
-from typing import cast, Optional, Dict, Any, List
+from contextlib import contextmanager, ExitStack
+from typing import cast, Optional, Dict, Any, List, Iterator
 from datetime import datetime
 
+import threading
+
 from vizier.core.io.base import ObjectStore, DefaultObjectStore
 from vizier.core.util import init_value
 from vizier.core.timestamp import get_current_time, to_datetime
 from vizier.core.annotation.base import ObjectAnnotationSet
 from vizier.core.annotation.persistent import PersistentAnnotationSet
 from vizier.viztrail.branch import BranchHandle, BranchProvenance
-from vizier.viztrail.objectstore.module import OSModuleHandle
+from vizier.viztrail.objectstore.module import OSModuleHandle, ModuleStateLog
 from vizier.viztrail.objectstore.module import get_module_path
+from vizier.viztrail.objectstore.output import ModuleOutputStore
 from vizier.viztrail.workflow import WorkflowDescriptor, WorkflowHandle
 from vizier.viztrail.workflow import ACTION_CREATE
 from vizier.viztrail.module.base import ModuleHandle, ModuleCommand
@@ -35,6 +39,7 @@ from vizier.viztrail.module.base import ModuleHandle, ModuleCommand
 """Resource identifier"""
 OBJ_METADATA = 'branch'
 OBJ_PROPERTIES = 'properties'
+OBJ_WORKFLOWINDEX = 'workflows'
 
 
 """Json object element keys."""
@@ -77,6 +82,12 @@ class OSBranchHandle(BranchHandle):
     - modules: List of module identifier representing the sequence of modules in
                the workflow
 
+    The workflow index is an append-only object that contains a copy of every
+    workflow object in the order in which the workflows were created. It
+    allows to read the branch history without reading each workflow object.
+    The index and the modules of the workflow at the branch head are read
+    lazily when they are first accessed.
+
     The workflow at the branch head is kept in memory with all modules fully
     loaded. The branch cache allows to keep an additional number of workflows in
     memory with all their modules loaded. Access to all other workflow version
@@ -86,7 +97,7 @@ class OSBranchHandle(BranchHandle):
     ---------------------
     branch.       : Branch provenance object
     properties    : Branch annotations
-    workflows     : Sequence of workflow identifier in branch history
+    workflows     : Index of workflow objects in branch history
     <workflow-id> : Workflow object containing workflow descriptor and
                     sequence of module identifier. Workflow identifier are
                     positive integer and the order of identifiers reflects
@@ -99,12 +110,17 @@ class OSBranchHandle(BranchHandle):
             modules_folder: str, 
             provenance: BranchProvenance,
             properties: ObjectAnnotationSet, 
-            workflows: List[WorkflowDescriptor] = list(), 
+            workflows: Optional[List[WorkflowDescriptor]] = None,
             head: Optional[WorkflowHandle] = None, 
             object_store: Optional[ObjectStore] = None,
-            cache_size: int = DEFAULT_CACHE_SIZE
+            cache_size: int = DEFAULT_CACHE_SIZE,
+            state_log: Optional[ModuleStateLog] = None,
+            output_store: Optional[ModuleOutputStore] = None
     ):
-        """Initialize the branch handle.
+        """Initialize the branch handle. If the list of workflow descriptors
+        is None the descriptors are read from the workflow index when they are
+        first accessed. The module state log and the module output store are
+        shared by all branches of a viztrail.
         """
         super(OSBranchHandle, self).__init__(
             identifier=identifier,
@@ -115,11 +131,65 @@ class OSBranchHandle(BranchHandle):
         self.base_path = base_path
         self.modules_folder = modules_folder
         self.object_store = init_value(object_store, DefaultObjectStore())
-        self.workflows = init_value(workflows, list())
-        self.head = head
+        self.state_log = state_log
+        self.output_store = output_store
+        self._workflows = workflows
+        self._head = head
+        # Lock for lazy loading of the workflow index and the branch head.
+        self.lock = threading.RLock()
         self.cache_size = cache_size if not cache_size is None else DEFAULT_CACHE_SIZE
         self.cache: List[WorkflowHandle] = list()
 
+    @property
+    def head(self) -> Optional[WorkflowHandle]:
+        """Workflow at the head of the branch. The modules of the workflow are
+        read when the head is first accessed. The result is None if the branch
+        is empty.
+
+        Returns
+        -------
+        vizier.viztrail.workflow.WorkflowHandle
+        """
+        with self.lock:
+            if self._head is None and len(self.workflows) > 0:
+                descriptor = self.workflows[-1]
+                self._head = read_workflow(
+                    branch_id=self.identifier,
+                    workflow_descriptor=descriptor,
+                    workflow_path=self.object_store.join(
+                        self.base_path,
+                        descriptor.identifier
+                    ),
+                    modules_folder=self.modules_folder,
+                    object_store=self.object_store,
+                    state_log=self.state_log,
+                    output_store=self.output_store
+                )
+            return self._head
+
+    @head.setter
+    def head(self, workflow: Optional[WorkflowHandle]) -> None:
+        """Set the workflow at the head of the branch."""
+        with self.lock:
+            self._head = workflow
+
+    @property
+    def workflows(self) -> List[WorkflowDescriptor]:
+        """Descriptors for all workflows in the branch history. The list is
+        read from the workflow index when it is first accessed.
+
+        Returns
+        -------
+        list(vizier.viztrail.workflow.WorkflowDescriptor)
+        """
+        with self.lock:
+            if self._workflows is None:
+                self._workflows = read_workflow_index(
+                    base_path=self.base_path,
+                    object_store=self.object_store
+                )
+            return self._workflows
+
     def add_to_cache(self, workflow: WorkflowHandle):
         """Add the given workflow the the internal cache. Returns the given
         handle for convenience.
@@ -150,6 +220,17 @@ class OSBranchHandle(BranchHandle):
                         index += 1
         return workflow
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group all module state changes that are made by the current thread
+        into a single write to the module state log.
+        """
+        if self.state_log is None:
+            yield
+        else:
+            with self.state_log.batch():
+                yield
+
     def append_workflow(self, modules, action, command, pending_modules=None):
         """Append a workflow as the new head of the branch. The new workflow may
         contain modules that have not been persisted prevoiusly (pending
@@ -171,34 +252,39 @@ class OSBranchHandle(BranchHandle):
         -------
         vizier.viztrail.workflow.base.WorkflowHandle
         """
-        workflow_modules = list(modules)
-        if not pending_modules is None:
-            for pm in pending_modules:
-                # Make sure the started_at timestamp is set if the module is
-                # running
-                if pm.is_running and pm.timestamp.started_at is None:
-                    pm.timestamp.started_at = pm.timestamp.created_at
-                module = OSModuleHandle.create_module(
-                    command=pm.command,
-                    external_form=pm.external_form,
-                    state=pm.state,
-                    timestamp=pm.timestamp,
-                    outputs=pm.outputs,
-                    provenance=pm.provenance,
-                    module_folder=self.modules_folder,
-                    object_store=self.object_store
-                )
-                workflow_modules.append(module)
-        # Write handle for workflow at branch head
-        descriptor = write_workflow_handle(
-            modules=[m.identifier for m in workflow_modules],
-            workflow_count=len(self.workflows),
-            base_path=self.base_path,
-            object_store=self.object_store,
-            action=action,
-            command=command,
-            created_at=get_current_time()
-        )
+        # The pending modules and the workflow handle are written in a single
+        # transaction (if supported by the object store).
+        with self.object_store.transaction():
+            workflow_modules = list(modules)
+            if not pending_modules is None:
+                for pm in pending_modules:
+                    # Make sure the started_at timestamp is set if the module is
+                    # running
+                    if pm.is_running and pm.timestamp.started_at is None:
+                        pm.timestamp.started_at = pm.timestamp.created_at
+                    module = OSModuleHandle.create_module(
+                        command=pm.command,
+                        external_form=pm.external_form,
+                        state=pm.state,
+                        timestamp=pm.timestamp,
+                        outputs=pm.outputs,
+                        provenance=pm.provenance,
+                        module_folder=self.modules_folder,
+                        object_store=self.object_store,
+                        state_log=self.state_log,
+                        output_store=self.output_store
+                    )
+                    workflow_modules.append(module)
+            # Write handle for workflow at branch head
+            descriptor = write_workflow_handle(
+                modules=[m.identifier for m in workflow_modules],
+                workflow_count=len(self.workflows),
+                base_path=self.base_path,
+                object_store=self.object_store,
+                action=action,
+                command=command,
+                created_at=get_current_time()
+            )
         # Get new workflow and replace the branch head. Move the current head
         # to the cache.
         workflow = WorkflowHandle(
@@ -207,10 +293,12 @@ class OSBranchHandle(BranchHandle):
             modules=workflow_modules,
             descriptor=descriptor
         )
-        self.workflows.append(workflow.descriptor)
-        if not self.head is None:
-            self.add_to_cache(self.head)
-        self.head = workflow
+        with self.lock:
+            self.workflows.append(workflow.descriptor)
+            # Only move the current head to the cache if it has been loaded.
+            if not self._head is None:
+                self.add_to_cache(self._head)
+            self._head = workflow
         return workflow
 
     @staticmethod
@@ -223,7 +311,9 @@ class OSBranchHandle(BranchHandle):
         properties: Optional[Dict[str, Any]] = None, 
         created_at: Optional[datetime] = None, 
         modules: Optional[List[str]] = None, 
-        object_store: Optional[ObjectStore] = None
+        object_store: Optional[ObjectStore] = None,
+        state_log: Optional[ModuleStateLog] = None,
+        output_store: Optional[ModuleOutputStore] = None
     ):
         """Create a new branch. If the workflow is given the new branch contains
         exactly this workflow. Otherwise, the branch is empty.
@@ -250,6 +340,10 @@ class OSBranchHandle(BranchHandle):
         modules: list(string), optional
             List of module identifier for the modules in the workflow at the
             head of the branch
+        state_log: vizier.viztrail.objectstore.module.ModuleStateLog, optional
+            Log for module state changes of the viztrail
+        output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+            Store for large module outputs of the viztrail
 
         Returns
         -------
@@ -267,7 +361,9 @@ class OSBranchHandle(BranchHandle):
             wf_modules = read_workflow_modules(
                 modules_list=modules,
                 modules_folder=modules_folder,
-                object_store=object_store
+                object_store=object_store,
+                state_log=state_log,
+                output_store=output_store
             )
             for m in wf_modules:
                 if m.is_active:
@@ -286,6 +382,11 @@ class OSBranchHandle(BranchHandle):
             object_path=object_store.join(base_path, OBJ_METADATA),
             content=doc
         )
+        # Create an empty workflow index
+        object_store.create_object(
+            parent_folder=base_path,
+            identifier=OBJ_WORKFLOWINDEX
+        )
         # Create the initial workflow if the list of modules is given
         workflows = list()
         head = None
@@ -321,7 +422,9 @@ class OSBranchHandle(BranchHandle):
             ),
             workflows=workflows,
             head=head,
-            object_store=object_store
+            object_store=object_store,
+            state_log=state_log,
+            output_store=output_store
         )
 
     def delete_branch(self) -> None:
@@ -342,6 +445,20 @@ class OSBranchHandle(BranchHandle):
         """
         return self.workflows
 
+    def get_loaded_workflows(self) -> List[WorkflowHandle]:
+        """Get the handles for the branch head and the cached workflows if
+        they have been read from the object store.
+
+        Returns
+        -------
+        list(vizier.viztrail.workflow.base.WorkflowHandle)
+        """
+        with self.lock:
+            workflows = list(self.cache)
+            if not self._head is None:
+                workflows.append(self._head)
+            return workflows
+
     def get_workflow(self, workflow_id=None):
         """Get the workflow with the given identifier. If the identifier is
         none the head of the branch is returned. The result is None if the
@@ -376,7 +493,9 @@ class OSBranchHandle(BranchHandle):
                         workflow_id
                     ),
                     modules_folder=self.modules_folder,
-                    object_store=self.object_store
+                    object_store=self.object_store,
+                    state_log=self.state_log,
+                    output_store=self.output_store
                 )
                 # Add workflow to cache.
                 return self.add_to_cache(wf)
@@ -390,12 +509,14 @@ class OSBranchHandle(BranchHandle):
             is_default: bool, 
             base_path: str, 
             modules_folder: str, 
-            object_store: Optional[ObjectStore] = None
+            object_store: Optional[ObjectStore] = None,
+            state_log: Optional[ModuleStateLog] = None,
+            output_store: Optional[ModuleOutputStore] = None
         ):
-        """Load branch from disk. Reads the branch provenance information and
-        descriptors for all workflows in the branch history. If the branch
-        history is not empty the modules for the workflow at the branch head
-        will be read as well.
+        """Load branch from disk. Reads the branch provenance information only.
+        The descriptors for the workflows in the branch history are read from
+        the workflow index and the modules for the workflow at the branch head
+        are read when they are first accessed.
 
         Parameters
         ----------
@@ -409,6 +530,10 @@ class OSBranchHandle(BranchHandle):
             Path to folder containing workflow modules
         object_store: vizier.core.io.base.ObjectStore, optional
             Object store implementation to access and maintain resources
+        state_log: vizier.viztrail.objectstore.module.ModuleStateLog, optional
+            Log for module state changes of the viztrail
+        output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+            Store for large module outputs of the viztrail
 
         Returns
         -------
@@ -433,41 +558,8 @@ class OSBranchHandle(BranchHandle):
             )
         else:
             provenance = BranchProvenance(created_at=created_at)
-        # Read descriptors for all branch workflows. Workflow descriptors are
-        # objects in the base directory that do no match the name of any of the
-        # predefied branch object.
-        workflows = list()
-        for resource in object_store.list_objects(base_path):
-            if not resource in [OBJ_METADATA, OBJ_PROPERTIES]:
-                resource_path = object_store.join(base_path, resource)
-                obj = cast(Dict[str, Any], object_store.read_object(resource_path))
-                desc = obj[KEY_WORKFLOW_DESCRIPTOR]
-                workflows.append(
-                    WorkflowDescriptor(
-                        identifier=obj[KEY_WORKFLOW_ID],
-                        action=desc[KEY_ACTION],
-                        package_id=desc[KEY_PACKAGE_ID],
-                        command_id=desc[KEY_COMMAND_ID],
-                        created_at=to_datetime(desc[KEY_CREATED_AT])
-                    )
-                )
-        # Sort workflows in ascending order of their identifier
-        workflows.sort(key=lambda x: x.identifier)
-        # Read all modules for the workflow at the branch head (if exists)
-        head = None
-        if len(workflows) > 0:
-            # The workflow descriptor is the last element in the workflows list
-            descriptor = workflows[-1]
-            head = read_workflow(
-                branch_id=identifier,
-                workflow_descriptor=descriptor,
-                workflow_path=object_store.join(
-                    base_path,
-                    descriptor.identifier
-                ),
-                modules_folder=modules_folder,
-                object_store=object_store
-            )
+        # Workflow descriptors and the modules of the workflow at the branch
+        # head are read when they are first accessed.
         return OSBranchHandle(
             identifier=identifier,
             is_default=is_default,
@@ -478,11 +570,30 @@ class OSBranchHandle(BranchHandle):
                 object_path=object_store.join(base_path, OBJ_PROPERTIES),
                 object_store=object_store
             ),
-            workflows=workflows,
-            head=head,
-            object_store=object_store
+            object_store=object_store,
+            state_log=state_log,
+            output_store=output_store
         )
 
+    def unload(self) -> bool:
+        """Release the branch head, the cached workflows, and the workflow
+        descriptors. All of them are read from the object store when they are
+        accessed next. Returns False if any of the loaded workflows is active.
+        The branch is not modified in this case.
+
+        Returns
+        -------
+        bool
+        """
+        with self.lock:
+            for workflow in self.get_loaded_workflows():
+                if workflow.is_active:
+                    return False
+            self._head = None
+            self._workflows = None
+            self.cache = list()
+            return True
+
 
 # ------------------------------------------------------------------------------
 # Helper Method
@@ -504,12 +615,90 @@ def get_workflow_id(identifier: int) -> str:
     return hex(identifier)[2:].zfill(8).upper()
 
 
+def get_workflow_descriptor(obj: Dict[str, Any]) -> WorkflowDescriptor:
+    """Get the workflow descriptor from the serialization of a workflow
+    object.
+
+    Parameters
+    ----------
+    obj: dict
+        Workflow object
+
+    Returns
+    -------
+    vizier.viztrail.workflow.WorkflowDescriptor
+    """
+    desc = obj[KEY_WORKFLOW_DESCRIPTOR]
+    return WorkflowDescriptor(
+        identifier=obj[KEY_WORKFLOW_ID],
+        action=desc[KEY_ACTION],
+        package_id=desc[KEY_PACKAGE_ID],
+        command_id=desc[KEY_COMMAND_ID],
+        created_at=to_datetime(desc[KEY_CREATED_AT])
+    )
+
+
+def read_workflow_index(
+        base_path: str,
+        object_store: ObjectStore
+    ) -> List[WorkflowDescriptor]:
+    """Read descriptors for all workflows in a branch from the workflow index.
+
+    Workflow objects that are not in the index are added to it. If the index
+    does not exist (for branches that were created before the index was
+    introduced) all workflow objects in the branch folder are read and added
+    to a new index. If the index exists only the workflow objects following
+    the last indexed workflow are read. These exist if a workflow object was
+    written but the index was not updated.
+
+    Parameters
+    ----------
+    base_path: string
+        Path to folder containing branch resources
+    object_store: vizier.core.io.base.ObjectStore
+        Object store implementation to access and maintain resources
+
+    Returns
+    -------
+    list(vizier.viztrail.workflow.WorkflowDescriptor)
+    """
+    index_path = object_store.join(base_path, OBJ_WORKFLOWINDEX)
+    missing = list()
+    if object_store.exists(index_path):
+        objects = object_store.read_appended_objects(index_path)
+        workflow_path = object_store.join(
+            base_path,
+            get_workflow_id(len(objects))
+        )
+        while object_store.exists(workflow_path):
+            missing.append(object_store.read_object(workflow_path))
+            workflow_path = object_store.join(
+                base_path,
+                get_workflow_id(len(objects) + len(missing))
+            )
+    else:
+        objects = list()
+        for resource in object_store.list_objects(base_path):
+            if not resource in [OBJ_METADATA, OBJ_PROPERTIES, OBJ_WORKFLOWINDEX]:
+                resource_path = object_store.join(base_path, resource)
+                missing.append(object_store.read_object(resource_path))
+        missing.sort(key=lambda obj: obj[KEY_WORKFLOW_ID])
+    for obj in missing:
+        object_store.append_object(index_path, content=obj)
+    workflows = [get_workflow_descriptor(obj) for obj in objects + missing]
+    # Sort workflows in ascending order of their identifier
+    workflows.sort(key=lambda x: x.identifier)
+    return workflows
+
+
 def read_workflow(
         branch_id: str, 
         workflow_descriptor: WorkflowDescriptor, 
         workflow_path: str, 
         modules_folder: str, 
-        object_store: ObjectStore
+        object_store: ObjectStore,
+        state_log: Optional[ModuleStateLog] = None,
+        output_store: Optional[ModuleOutputStore] = None
     ) -> WorkflowHandle:
     """Read workflow from object store.
 
@@ -532,6 +721,10 @@ def read_workflow(
         Path to the folder containing moudle objects
     object_store: vizier.core.io.base.ObjectStore
         Object store implementation to access and maintain resources
+    state_log: vizier.viztrail.objectstore.module.ModuleStateLog, optional
+        Log for module state changes of the viztrail
+    output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+        Store for large module outputs of the viztrail
 
     Returns
     -------
@@ -542,13 +735,19 @@ def read_workflow(
     modules = read_workflow_modules(
         modules_list=obj[KEY_WORKFLOW_MODULES],
         modules_folder=modules_folder,
-        object_store=object_store
+        object_store=object_store,
+        state_log=state_log,
+        output_store=output_store
     )
-    # If any of the modules is active we set the module state to canceled
-    for m in modules:
-        if m.is_active:
-            assert isinstance(m, OSModuleHandle)
-            m.set_canceled()
+    # If any of the modules is active we set the module state to canceled.
+    # All state changes are written to the module state log together.
+    with ExitStack() as stack:
+        if state_log is not None:
+            stack.enter_context(state_log.batch())
+        for m in modules:
+            if m.is_active:
+                assert isinstance(m, OSModuleHandle)
+                m.set_canceled()
     # Return workflow handle
     return WorkflowHandle(
         identifier=workflow_descriptor.identifier,
@@ -561,7 +760,9 @@ def read_workflow(
 def read_workflow_modules(
         modules_list: List[str], 
         modules_folder: str, 
-        object_store: ObjectStore
+        object_store: ObjectStore,
+        state_log: Optional[ModuleStateLog] = None,
+        output_store: Optional[ModuleOutputStore] = None
     ) -> List[ModuleHandle]:
     """Read workflow modules from object store.
 
@@ -573,6 +774,10 @@ def read_workflow_modules(
         Path to the folder containing moudle objects
     object_store: vizier.core.io.base.ObjectStore
         Object store implementation to access and maintain resources
+    state_log: vizier.viztrail.objectstore.module.ModuleStateLog, optional
+        Log for module state changes of the viztrail
+    output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+        Store for large module outputs of the viztrail
 
     Returns
     -------
@@ -588,7 +793,9 @@ def read_workflow_modules(
         m = OSModuleHandle.load_module(
             identifier=module_id,
             module_path=module_path,
-            object_store=object_store
+            object_store=object_store,
+            state_log=state_log,
+            output_store=output_store
         )
         modules.append(m)
     return modules
@@ -645,19 +852,24 @@ def write_workflow_handle(
             command_id=command.command_id,
             created_at=created_at
         )
-    # Write the workflow handle to the object store
-    workflow_path = object_store.join(base_path, workflow_id)
+    # Write the workflow handle to the object store and add it to the
+    # workflow index
+    doc = {
+        KEY_WORKFLOW_ID: workflow_id,
+        KEY_WORKFLOW_DESCRIPTOR: {
+            KEY_ACTION: descriptor.action,
+            KEY_PACKAGE_ID: descriptor.package_id,
+            KEY_COMMAND_ID: descriptor.command_id,
+            KEY_CREATED_AT: descriptor.created_at.isoformat()
+        },
+        KEY_WORKFLOW_MODULES: modules
+    }
     object_store.write_object(
-        object_path=workflow_path,
-        content={
-            KEY_WORKFLOW_ID: workflow_id,
-            KEY_WORKFLOW_DESCRIPTOR: {
-                KEY_ACTION: descriptor.action,
-                KEY_PACKAGE_ID: descriptor.package_id,
-                KEY_COMMAND_ID: descriptor.command_id,
-                KEY_CREATED_AT: descriptor.created_at.isoformat()
-            },
-            KEY_WORKFLOW_MODULES: modules
-        }
+        object_path=object_store.join(base_path, workflow_id),
+        content=doc
+    )
+    object_store.append_object(
+        object_store.join(base_path, OBJ_WORKFLOWINDEX),
+        content=doc
     )
     return descriptor
@@ -18,9 +18,12 @@
 object store.
 """
 
-from typing import cast, Dict, Any, Optional, List
+from contextlib import contextmanager
+from typing import cast, Dict, Any, Optional, List, Iterator, Tuple
 from datetime import datetime
 
+import threading
+
 from vizier.core.io.base import DefaultObjectStore, ObjectStore
 from vizier.core.timestamp import get_current_time, to_datetime
 from vizier.datastore.dataset import DatasetColumn, DatasetDescriptor
@@ -28,9 +31,11 @@ from vizier.datastore.artifact import ArtifactDescriptor
 from vizier.view.chart import ChartViewHandle
 from vizier.viztrail.command import ModuleCommand, UNKNOWN_ID, ModuleArguments
 from vizier.viztrail.module.base import ModuleHandle
-from vizier.viztrail.module.output import ModuleOutputs, OutputObject, TextOutput
+from vizier.viztrail.module.output import ModuleOutputs, OutputObject, StoredOutput
+from vizier.viztrail.module.output import TextOutput
 from vizier.viztrail.module.provenance import ModuleProvenance
 from vizier.viztrail.module.timestamp import ModuleTimestamp
+from vizier.viztrail.objectstore.output import ModuleOutputStore
 
 import vizier.viztrail.module.base as mstate
 
@@ -55,6 +60,9 @@ KEY_EXTERNAL_FORM = 'externalForm'
 KEY_FINISHED_AT = 'finishedAt'
 KEY_STARTED_AT = 'startedAt'
 KEY_OUTPUTS = 'output'
+KEY_OUTPUT_BLOB = 'blob'
+KEY_OUTPUT_PREVIEW = 'preview'
+KEY_OUTPUT_SIZE = 'size'
 KEY_OUTPUT_TYPE = 'type'
 KEY_OUTPUT_VALUE = 'value'
 KEY_PACKAGE_ID = 'packageId'
@@ -68,6 +76,12 @@ KEY_STATE = 'state'
 KEY_STDERR = 'stderr'
 KEY_STDOUT = 'stdout'
 KEY_TIMESTAMP = 'timestamp'
+KEY_VERSION = 'version'
+
+
+"""Default number of documents in a module state log before the log is
+compacted when it is read."""
+DEFAULT_COMPACT_THRESHOLD = 1000
 
 
 class OSModuleHandle(ModuleHandle):
@@ -111,6 +125,14 @@ class OSModuleHandle(ModuleHandle):
       - delete: [],
       - resources: {}
       - charts: []
+    - version: ...
+
+    If the module has a state log, changes that only affect the module state,
+    timestamp, external form, or outputs are written as state records to the
+    log instead of rewriting the module object. The module object is only
+    rewritten if the provenance or the command arguments change. The version
+    number is incremented with every write and determines whether the module
+    object or the latest state record in the log is more recent.
     """
     def __init__(self, 
             identifier: str, 
@@ -121,7 +143,11 @@ class OSModuleHandle(ModuleHandle):
             timestamp: ModuleTimestamp = ModuleTimestamp(), 
             outputs: ModuleOutputs = ModuleOutputs(),
             provenance: ModuleProvenance = ModuleProvenance(), 
-            object_store: ObjectStore = DefaultObjectStore()
+            object_store: ObjectStore = DefaultObjectStore(),
+            state_log: Optional["ModuleStateLog"] = None,
+            version: int = 0,
+            stored_outputs: Optional[ModuleOutputs] = None,
+            output_store: Optional[ModuleOutputStore] = None
         ):
         """Initialize the module handle. For new modules, datasets and outputs
         are initially empty.
@@ -147,6 +173,17 @@ class OSModuleHandle(ModuleHandle):
             previous execution of the module.
         object_store: vizier.core.io.base.ObjectStore, optional
             Object store implementation to access and maintain resources
+        state_log: vizier.viztrail.objectstore.module.ModuleStateLog, optional
+            Log for module state changes. All changes are written to the
+            module object if no log is given.
+        version: int, optional
+            Version of the module object in the object store
+        stored_outputs: vizier.viztrail.module.output.ModuleOutputs, optional
+            Outputs that are contained in the module object. By default these
+            are the given outputs.
+        output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+            Store for large output values. All outputs are embedded in the
+            module object if no store is given.
         """
         super(OSModuleHandle, self).__init__(
             identifier=identifier,
@@ -159,6 +196,16 @@ class OSModuleHandle(ModuleHandle):
         )
         self.module_path = module_path
         self.object_store = object_store
+        self.state_log = state_log
+        self.output_store = output_store
+        self.version = version
+        # References to the parts of the module that are contained in the
+        # module object. Changes to the outputs are written as part of the
+        # state record. Changes to the provenance or the command arguments
+        # require the module object to be rewritten.
+        self.stored_outputs = stored_outputs if stored_outputs is not None else self.outputs
+        self.stored_provenance = self.provenance
+        self.stored_arguments = self.command.arguments
 
     @staticmethod
     def create_module(
@@ -170,7 +217,9 @@ class OSModuleHandle(ModuleHandle):
         provenance: ModuleProvenance,
         module_folder: str, 
         object_store: Optional[ObjectStore] = None,
-        identifier: Optional[str] = None
+        identifier: Optional[str] = None,
+        state_log: Optional["ModuleStateLog"] = None,
+        output_store: Optional[ModuleOutputStore] = None
     ) -> ModuleHandle:
         """Create a new materialized module instance for the given values.
 
@@ -196,6 +245,12 @@ class OSModuleHandle(ModuleHandle):
             Object store folder containing module resources
         object_store: vizier.core.io.base.ObjectStore, optional
             Object store implementation to access and maintain resources
+        identifier: string, optional
+            Unique module identifier
+        state_log: vizier.viztrail.objectstore.module.ModuleStateLog, optional
+            Log for state changes of the created module
+        output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+            Store for large output values of the created module
 
         Returns
         -------
@@ -211,7 +266,8 @@ class OSModuleHandle(ModuleHandle):
             state=state,
             timestamp=timestamp,
             outputs=outputs,
-            provenance=provenance
+            provenance=provenance,
+            output_store=output_store
         )
         identifier = object_store.create_object(
             parent_folder=module_folder,
@@ -228,7 +284,9 @@ class OSModuleHandle(ModuleHandle):
             timestamp=timestamp,
             outputs=outputs,
             provenance=provenance,
-            object_store=object_store
+            object_store=object_store,
+            state_log=state_log,
+            output_store=output_store
         )
 
     @staticmethod
@@ -236,7 +294,9 @@ class OSModuleHandle(ModuleHandle):
             identifier: str, 
             module_path: str, 
             prev_state: Optional[Dict[str, ArtifactDescriptor]] = None, 
-            object_store: ObjectStore = DefaultObjectStore()
+            object_store: ObjectStore = DefaultObjectStore(),
+            state_log: Optional["ModuleStateLog"] = None,
+            output_store: Optional[ModuleOutputStore] = None
         ) -> "OSModuleHandle":
         """Load module from given object store.
 
@@ -252,6 +312,12 @@ class OSModuleHandle(ModuleHandle):
             in the workflow)
         object_store: vizier.core.io.base.ObjectStore, optional
             Object store implementation to access and maintain resources
+        state_log: vizier.viztrail.objectstore.module.ModuleStateLog, optional
+            Log for module state changes. The latest state record for the
+            module is applied if it is more recent than the module object.
+        output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+            Store for large output values. Values of outputs that reference
+            the store are read when they are accessed.
 
         Returns
         -------
@@ -275,8 +341,21 @@ class OSModuleHandle(ModuleHandle):
                 external_form='fatal error: object not found',
                 module_path=module_path,
                 state=mstate.MODULE_ERROR,
-                object_store=object_store
+                object_store=object_store,
+                state_log=state_log,
+                output_store=output_store
             )
+        # Apply the latest state record from the log if it is more recent
+        # than the module object. The outputs in the record are not contained
+        # in the module object.
+        version = obj.get(KEY_VERSION, 0)
+        has_stored_outputs = True
+        if state_log is not None:
+            record = state_log.get(identifier)
+            if record is not None and record[KEY_VERSION] > version:
+                version = record[KEY_VERSION]
+                has_stored_outputs = KEY_OUTPUTS not in record
+                obj = apply_state_record(obj, record)
         # Create module command
         command = ModuleCommand(
             package_id=obj[KEY_COMMAND][KEY_PACKAGE_ID],
@@ -301,8 +380,8 @@ class OSModuleHandle(ModuleHandle):
         )
         # Create module output streams.
         outputs = ModuleOutputs(
-            stdout=get_output_stream(obj[KEY_OUTPUTS][KEY_STDOUT]),
-            stderr=get_output_stream(obj[KEY_OUTPUTS][KEY_STDERR])
+            stdout=get_output_stream(obj[KEY_OUTPUTS][KEY_STDOUT], output_store),
+            stderr=get_output_stream(obj[KEY_OUTPUTS][KEY_STDERR], output_store)
         )
         # Create module provenance information
         read_prov = None
@@ -372,6 +451,10 @@ class OSModuleHandle(ModuleHandle):
             outputs=outputs,
             provenance=provenance,
             object_store=object_store,
+            state_log=state_log,
+            version=version,
+            stored_outputs=outputs if has_stored_outputs else ModuleOutputs(),
+            output_store=output_store
         )
 
     def set_canceled(self, 
@@ -407,6 +490,20 @@ class OSModuleHandle(ModuleHandle):
         # Materialize module state
         self.write_safe()
 
+    def set_pending(self,
+            provenance: Optional[ModuleProvenance] = None
+        ) -> None:
+        """Set status of the module to pending.
+
+        Parameters
+        ----------
+        provenance: vizier.viztrail.module.provenance.ModuleProvenance, optional
+            Provenance information from the discarded execution of the module
+        """
+        super().set_pending(provenance)
+        # Materialize module state
+        self.write_safe()
+
     def set_running(self, 
             started_at: datetime = get_current_time(), 
             external_form: Optional[str] = None
@@ -469,6 +566,50 @@ class OSModuleHandle(ModuleHandle):
         )
         self.write_safe()
 
+    def get_state_record(self) -> Dict[str, Any]:
+        """Get the state record for the current module state. The record
+        contains the module outputs only if they differ from the outputs in
+        the module object.
+
+        Returns
+        -------
+        dict
+        """
+        record = {
+            KEY_VERSION: self.version,
+            KEY_EXTERNAL_FORM: self.external_form,
+            KEY_STATE: self.state,
+            KEY_TIMESTAMP: serialize_timestamp(self.timestamp)
+        }
+        if self.outputs is not self.stored_outputs:
+            record[KEY_OUTPUTS] = serialize_outputs(self.outputs, self.output_store)
+        return record
+
+    def requires_write(self) -> bool:
+        """Test if the module object needs to be rewritten because the
+        provenance or the command arguments changed.
+
+        Returns
+        -------
+        bool
+        """
+        if self.provenance is not self.stored_provenance:
+            return True
+        return self.command.arguments is not self.stored_arguments
+
+    def set_write_error(self, ex: Exception) -> None:
+        """Set the module into error state after a state change could not be
+        written to the object store.
+
+        Parameters
+        ----------
+        ex: Exception
+            Exception that was raised by the failed write
+        """
+        self.state = mstate.MODULE_ERROR
+        #TODO: make this work like elsewhere for error message and debug
+        self.outputs = ModuleOutputs(stderr=[TextOutput(str(ex))])
+
     def write_module(self) -> None:
         """Write current module state to object store."""
         obj = serialize_module(
@@ -477,12 +618,17 @@ class OSModuleHandle(ModuleHandle):
             state=self.state,
             timestamp=self.timestamp,
             outputs=self.outputs,
-            provenance=self.provenance
+            provenance=self.provenance,
+            version=self.version,
+            output_store=self.output_store
         )
         self.object_store.write_object(
             object_path=self.module_path,
             content=obj
         )
+        self.stored_outputs = self.outputs
+        self.stored_provenance = self.provenance
+        self.stored_arguments = self.command.arguments
 
     def write_safe(self) -> None:
         """The write safe method writes the current module state to the object
@@ -490,19 +636,254 @@ class OSModuleHandle(ModuleHandle):
         state if an exception occurs. This method is used to ensure that the
         state of the module is in error (i.e., the workflow cannot further be
         executed) if a state change fails.
+
+        If the module has a state log the change is handed to the log. The
+        log may defer the write until the end of the current batch.
         """
         try:
-            self.write_module()
+            if self.state_log is not None:
+                self.state_log.add(self)
+            else:
+                self.version += 1
+                self.write_module()
         except Exception as ex:
-            self.state = mstate.MODULE_ERROR
-            #TODO: make this work like elsewhere for error message and debug
-            self.outputs = ModuleOutputs(stderr=[TextOutput(str(ex))])
+            self.set_write_error(ex)
+
+
+class ModuleStateLog(object):
+    """Append-only log of state changes for the modules of a viztrail.
+
+    Most state changes of a module (running, canceled, error, or success for a
+    module that does not require re-execution) only modify the state, the
+    timestamp, the external form, and the outputs of the module. These changes
+    are appended as small state records to the log instead of rewriting the
+    module object with its command and provenance. Each log document maps
+    module identifiers to their state record. The log is read once, when the
+    first module of the viztrail is loaded. It is compacted (i.e., the
+    records are merged into the module objects and the log is deleted)
+    whenever it contains more than a given number of documents.
+
+    State changes that are made inside a batch are buffered and written when
+    the outermost batch of the current thread ends. All state records of a
+    batch are coalesced into a single log document (keeping only the latest
+    state of every module) that is appended with a single synchronized write.
+    Changes outside of a batch are written immediately.
+    """
+    def __init__(self,
+            object_path: str,
+            modules_folder: str,
+            object_store: ObjectStore,
+            compact_threshold: int = DEFAULT_COMPACT_THRESHOLD
+        ):
+        """Initialize the path of the log object and the folder that contains
+        the module objects.
+
+        Parameters
+        ----------
+        object_path: string
+            Path to the log object
+        modules_folder: string
+            Path to the folder containing module objects
+        object_store: vizier.core.io.base.ObjectStore
+            Object store implementation to access and maintain resources
+        compact_threshold: int, optional
+            Maximum number of documents in the log before it is compacted
+        """
+        self.object_path = object_path
+        self.modules_folder = modules_folder
+        self.object_store = object_store
+        self.compact_threshold = compact_threshold
+        # Latest version of each module that was read or written. Module
+        # handles for the same module may exist in different branches.
+        self.versions: Dict[str, int] = dict()
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self._records: Optional[Dict[str, Dict[str, Any]]] = None
+        # Number of documents in the log
+        self.doc_count = 0
+
+    def add(self, module: OSModuleHandle) -> None:
+        """Add a changed module. The module is written immediately if the
+        current thread is not inside a batch.
+
+        Parameters
+        ----------
+        module: vizier.viztrail.objectstore.module.OSModuleHandle
+            Module with modified state
+        """
+        pending = getattr(self.local, 'pending', None)
+        if pending is None:
+            self.write([module])
+        else:
+            pending[id(module)] = module
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Buffer all module state changes of the current thread until the
+        outermost batch ends. Batches may be nested.
+        """
+        if getattr(self.local, 'pending', None) is not None:
+            yield
+            return
+        self.local.pending = dict()
+        try:
+            yield
+        finally:
+            modules = list(self.local.pending.values())
+            self.local.pending = None
+            if len(modules) > 0:
+                self.write(modules)
+
+    def get(self, module_id: str) -> Optional[Dict[str, Any]]:
+        """Get the latest state record for the given module. The result is
+        None if the log does not contain a record for the module.
+
+        Parameters
+        ----------
+        module_id: string
+            Unique module identifier
+
+        Returns
+        -------
+        dict
+        """
+        with self.lock:
+            return self.records.get(module_id)
+
+    @property
+    def records(self) -> Dict[str, Dict[str, Any]]:
+        """Latest state record for each module in the log. The log is read
+        when the records are first accessed.
+
+        Raises ValueError if the log cannot be read.
+
+        Returns
+        -------
+        dict
+        """
+        with self.lock:
+            if self._records is None:
+                docs = list()
+                if self.object_store.exists(self.object_path):
+                    docs = self.object_store.read_appended_objects(self.object_path)
+                records: Dict[str, Dict[str, Any]] = dict()
+                for doc in docs:
+                    records.update(doc)
+                for module_id, record in records.items():
+                    self.versions[module_id] = record[KEY_VERSION]
+                self._records = records
+                self.doc_count = len(docs)
+                if self.doc_count > self.compact_threshold:
+                    self.compact()
+            return self._records
+
+    def compact(self) -> None:
+        """Merge the latest state records into the module objects and delete
+        the log. Records are only merged if they are more recent than the
+        module object. Compaction can therefore safely be repeated if it is
+        interrupted.
+        """
+        with self.lock:
+            with self.object_store.transaction():
+                for module_id, record in self.records.items():
+                    module_path = get_module_path(
+                        modules_folder=self.modules_folder,
+                        module_id=module_id,
+                        object_store=self.object_store
+                    )
+                    try:
+                        obj = cast(Dict[str, Any], self.object_store.read_object(module_path))
+                    except ValueError:
+                        continue
+                    if record[KEY_VERSION] > obj.get(KEY_VERSION, 0):
+                        self.object_store.write_object(
+                            object_path=module_path,
+                            content=apply_state_record(obj, record)
+                        )
+                self.object_store.delete_object(self.object_path)
+            # All records are part of the module objects now.
+            self._records = dict()
+            self.doc_count = 0
+
+    def write(self, modules: List[OSModuleHandle]) -> None:
+        """Write the state of the given modules. Modules whose provenance or
+        command arguments changed are rewritten. For all other modules the
+        state records are appended to the log as a single document. All
+        modules are set into error state if the write fails. The log is
+        compacted once it contains more than the threshold number of
+        documents.
+
+        Parameters
+        ----------
+        modules: list(vizier.viztrail.objectstore.module.OSModuleHandle)
+            Modules with modified state
+        """
+        with self.lock:
+            try:
+                records = self.records
+                doc: Dict[str, Dict[str, Any]] = dict()
+                with self.object_store.transaction():
+                    for module in modules:
+                        module.version = max(
+                            module.version,
+                            self.versions.get(module.identifier, 0)
+                        ) + 1
+                        self.versions[module.identifier] = module.version
+                        if module.requires_write():
+                            module.write_module()
+                            doc.pop(module.identifier, None)
+                        else:
+                            doc[module.identifier] = module.get_state_record()
+                    if len(doc) > 0:
+                        self.object_store.append_object(
+                            object_path=self.object_path,
+                            content=doc,
+                            sync=True
+                        )
+                        self.doc_count += 1
+                records.update(doc)
+            except Exception as ex:
+                for module in modules:
+                    module.set_write_error(ex)
+                return
+            if self.doc_count > self.compact_threshold:
+                # The log remains valid if compaction fails. It is compacted
+                # again with the next write.
+                try:
+                    self.compact()
+                except Exception:
+                    pass
 
 
 # ------------------------------------------------------------------------------
 # Helper Methods
 # ------------------------------------------------------------------------------
 
+def apply_state_record(
+        obj: Dict[str, Any],
+        record: Dict[str, Any]
+    ) -> Dict[str, Any]:
+    """Apply a state record from the module state log to a serialized module
+    object. Returns a modified copy of the object.
+
+    Parameters
+    ----------
+    obj: dict
+        Default serialization of a module object
+    record: dict
+        Module state record
+
+    Returns
+    -------
+    dict
+    """
+    obj = dict(obj)
+    for key in [KEY_EXTERNAL_FORM, KEY_OUTPUTS, KEY_STATE, KEY_TIMESTAMP, KEY_VERSION]:
+        if key in record:
+            obj[key] = record[key]
+    return obj
+
+
 def get_module_path(
         modules_folder: str, 
         module_id: str, 
@@ -529,28 +910,45 @@ def get_module_path(
     return object_store.join(modules_folder, module_id)
 
 
-def get_output_stream(items: List[Dict[str, Any]]) -> List[OutputObject]:
+def get_output_stream(
+        items: List[Dict[str, Any]],
+        output_store: Optional[ModuleOutputStore] = None
+    ) -> List[OutputObject]:
     """Convert a list of items in an output stream into a list of output
     objects. The element in list items are expected to be in default
-    serialization format for output objects.
+    serialization format for output objects. Items that reference a value in
+    the output store are converted into stored outputs.
 
     Paramaters
     ----------
     items: list(dict)
         Items in the output stream in default serialization format
+    output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+        Store for output values that are not contained in the items
 
     Returns
     -------
     list(vizier.viztrail.module.OutputObject)
     """
-    result = list()
+    result: List[OutputObject] = list()
     for item in items:
-        result.append(
-            OutputObject(
-                type=item[KEY_OUTPUT_TYPE],
-                value=item[KEY_OUTPUT_VALUE]
+        if KEY_OUTPUT_BLOB in item:
+            result.append(
+                StoredOutput(
+                    type=item[KEY_OUTPUT_TYPE],
+                    identifier=item[KEY_OUTPUT_BLOB],
+                    size=item[KEY_OUTPUT_SIZE],
+                    preview=item.get(KEY_OUTPUT_PREVIEW),
+                    reader=output_store.read if output_store is not None else None
+                )
+            )
+        else:
+            result.append(
+                OutputObject(
+                    type=item[KEY_OUTPUT_TYPE],
+                    value=item[KEY_OUTPUT_VALUE]
+                )
             )
-        )
     return result
 
 
@@ -560,7 +958,9 @@ def serialize_module(
         state: int, 
         timestamp: ModuleTimestamp, 
         outputs: ModuleOutputs, 
-        provenance: ModuleProvenance
+        provenance: ModuleProvenance,
+        version: int = 0,
+        output_store: Optional[ModuleOutputStore] = None
     ) -> Dict[str, Any]:
     """Get dictionary serialization of a module.
 
@@ -579,17 +979,15 @@ def serialize_module(
     provenance: vizier.viztrail.module.provenance.ModuleProvenance
         Provenance information about datasets that were read and writen by
         previous execution of the module.
+    version: int, optional
+        Version number of the module object
+    output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+        Store for large output values
 
     Returns
     -------
     dict
     """
-    # Create dictionary serialization for module timestamps
-    ts = {KEY_CREATED_AT: timestamp.created_at.isoformat()}
-    if not timestamp.started_at is None:
-        ts[KEY_STARTED_AT] = timestamp.started_at.isoformat()
-    if not timestamp.finished_at is None:
-        ts[KEY_FINISHED_AT] = timestamp.finished_at.isoformat()
     # Create dictionary serialization for module provenance
     prov: Dict[str, Any] = dict()
     if not provenance.read is None:
@@ -633,16 +1031,88 @@ def serialize_module(
             KEY_ARGUMENTS: command.arguments.to_list()
         },
         KEY_STATE: state,
-        KEY_OUTPUTS: {
-            KEY_STDERR: [{
-                    KEY_OUTPUT_TYPE: obj.type,
-                    KEY_OUTPUT_VALUE: obj.value
-                } for obj in outputs.stderr],
-            KEY_STDOUT: [{
-                    KEY_OUTPUT_TYPE: obj.type,
-                    KEY_OUTPUT_VALUE: obj.value
-                } for obj in outputs.stdout]
-        },
-        KEY_TIMESTAMP: ts,
-        KEY_PROVENANCE: prov
+        KEY_OUTPUTS: serialize_outputs(outputs, output_store),
+        KEY_TIMESTAMP: serialize_timestamp(timestamp),
+        KEY_PROVENANCE: prov,
+        KEY_VERSION: version
     }
+
+
+def serialize_output(
+        obj: OutputObject,
+        output_store: Optional[ModuleOutputStore] = None
+    ) -> Dict[str, Any]:
+    """Get dictionary serialization of an output object. Large values are
+    written to the given output store. The serialization then only contains a
+    reference to the stored value, its size, and a truncated preview. Values of
+    stored outputs are never read.
+
+    Parameters
+    ----------
+    obj: vizier.viztrail.module.output.OutputObject
+        Output object
+    output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+        Store for large output values
+
+    Returns
+    -------
+    dict
+    """
+    if isinstance(obj, StoredOutput):
+        stored: Optional[Tuple[str, int, Any]] = (obj.identifier, obj.size, obj.preview)
+    elif output_store is not None:
+        stored = output_store.write(obj.value)
+    else:
+        stored = None
+    if stored is None:
+        return {KEY_OUTPUT_TYPE: obj.type, KEY_OUTPUT_VALUE: obj.value}
+    identifier, size, preview = stored
+    return {
+        KEY_OUTPUT_TYPE: obj.type,
+        KEY_OUTPUT_BLOB: identifier,
+        KEY_OUTPUT_SIZE: size,
+        KEY_OUTPUT_PREVIEW: preview
+    }
+
+
+def serialize_outputs(
+        outputs: ModuleOutputs,
+        output_store: Optional[ModuleOutputStore] = None
+    ) -> Dict[str, Any]:
+    """Get dictionary serialization of module output streams.
+
+    Parameters
+    ----------
+    outputs: vizier.viztrail.module.output.ModuleOutputs
+        Module output streams STDOUT and STDERR
+    output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+        Store for large output values
+
+    Returns
+    -------
+    dict
+    """
+    return {
+        KEY_STDERR: [serialize_output(obj, output_store) for obj in outputs.stderr],
+        KEY_STDOUT: [serialize_output(obj, output_store) for obj in outputs.stdout]
+    }
+
+
+def serialize_timestamp(timestamp: ModuleTimestamp) -> Dict[str, str]:
+    """Get dictionary serialization of module timestamps.
+
+    Parameters
+    ----------
+    timestamp: vizier.viztrail.module.timestamp.ModuleTimestamp
+        Module timestamp
+
+    Returns
+    -------
+    dict
+    """
+    ts = {KEY_CREATED_AT: timestamp.created_at.isoformat()}
+    if not timestamp.started_at is None:
+        ts[KEY_STARTED_AT] = timestamp.started_at.isoformat()
+    if not timestamp.finished_at is None:
+        ts[KEY_FINISHED_AT] = timestamp.finished_at.isoformat()
+    return ts
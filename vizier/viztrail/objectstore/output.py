@@ -0,0 +1,193 @@
+# Copyright (C) 2017-2020 New York University,
+#                         University at Buffalo,
+#                         Illinois Institute of Technology.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content-addressed store for large module outputs.
+
+Outputs like dataset views, charts, or rendered Html can be large. Outputs
+whose serialized value exceeds a given size are not embedded in the module
+object. They are written as separate objects to the output folder of the
+viztrail instead. Each object is named by the SHA-256 hash of the serialized
+value. Identical outputs (e.g., outputs of modules that are copied into a new
+workflow version) are therefore stored only once. The module object contains
+the hash, the size, and a truncated preview of the value. The value itself is
+read when it is accessed.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from vizier.core.io.base import ObjectStore
+
+
+"""Outputs with a serialized value that is larger than the given number of
+bytes are stored as separate objects. Outputs are never stored separately if
+the value is 0."""
+DEFAULT_BLOB_SIZE = int(os.environ.get('VIZIERENGINE_OUTPUT_BLOB_SIZE', '65536'))
+
+"""Maximum size (in characters) of the preview for outputs that are stored as
+separate objects."""
+DEFAULT_PREVIEW_SIZE = int(os.environ.get('VIZIERENGINE_OUTPUT_PREVIEW_SIZE', '4096'))
+
+"""Resource identifier"""
+FOLDER_OUTPUTS = 'outputs'
+
+"""Json labels for serialized objects."""
+KEY_VALUE = 'value'
+
+"""Key for the list of rows in dataset outputs."""
+KEY_ROWS = 'rows'
+
+"""Pattern for output identifiers (SHA-256 hex digests)."""
+OUTPUT_ID = re.compile('[0-9a-f]{64}')
+
+
+class ModuleOutputStore(object):
+    """Store for module outputs that are too large to be embedded in the
+    module object. Outputs are maintained as objects in the outputs subfolder
+    of the given base folder. The subfolder is created when the first output
+    is written.
+    """
+    def __init__(self,
+            base_path: str,
+            object_store: ObjectStore,
+            blob_size: int = DEFAULT_BLOB_SIZE,
+            preview_size: int = DEFAULT_PREVIEW_SIZE
+        ):
+        """Initialize the output folder and the size limits.
+
+        Parameters
+        ----------
+        base_path: string
+            Path to the folder that contains the outputs folder
+        object_store: vizier.core.io.base.ObjectStore
+            Object store implementation to access and maintain resources
+        blob_size: int, optional
+            Minimum size of serialized values that are stored separately
+        preview_size: int, optional
+            Maximum size of the preview for separately stored values
+        """
+        self.base_path = base_path
+        self.folder_path = object_store.join(base_path, FOLDER_OUTPUTS)
+        self.object_store = object_store
+        self.blob_size = blob_size
+        self.preview_size = preview_size
+        self.lock = threading.Lock()
+        self.has_folder = False
+
+    def read(self, identifier: str) -> Any:
+        """Read the output value with the given identifier. Raises ValueError
+        if the output does not exist.
+
+        Parameters
+        ----------
+        identifier: string
+            Content hash of the output value
+
+        Returns
+        -------
+        any
+        """
+        # Identifiers are content hashes. Reject anything else to avoid
+        # reading objects outside of the output folder.
+        if OUTPUT_ID.fullmatch(identifier) is None:
+            raise ValueError('invalid output identifier \'' + str(identifier) + '\'')
+        obj = self.object_store.read_object(
+            self.object_store.join(self.folder_path, identifier)
+        )
+        return obj[KEY_VALUE]
+
+    def write(self, value: Any) -> Optional[Tuple[str, int, Any]]:
+        """Write the given output value if its serialization exceeds the
+        size limit. The result is None if the value is too small to be stored
+        separately. Otherwise, the result is a tuple of the content hash, the
+        size of the serialized value, and the value preview.
+
+        Parameters
+        ----------
+        value: any
+            Output value
+
+        Returns
+        -------
+        (string, int, any)
+        """
+        if self.blob_size <= 0:
+            return None
+        text = json.dumps(value, sort_keys=True)
+        if len(text) <= self.blob_size:
+            return None
+        identifier = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        object_path = self.object_store.join(self.folder_path, identifier)
+        with self.lock:
+            if not self.has_folder:
+                if not self.object_store.exists(self.folder_path):
+                    self.object_store.create_folder(
+                        self.base_path,
+                        identifier=FOLDER_OUTPUTS
+                    )
+                self.has_folder = True
+            # Outputs are written atomically. An existing object is therefore
+            # complete and does not need to be written again.
+            if not self.object_store.exists(object_path):
+                self.object_store.write_object(
+                    object_path=object_path,
+                    content={KEY_VALUE: value},
+                    atomic=True
+                )
+        return identifier, len(text), get_preview(value, self.preview_size)
+
+
+# ------------------------------------------------------------------------------
+# Helper Methods
+# ------------------------------------------------------------------------------
+
+def get_preview(value: Any, size: int) -> Any:
+    """Get a truncated copy of an output value. Strings are truncated to the
+    given number of characters. For dataset outputs the list of rows is
+    truncated such that the serialized preview does not exceed the given size.
+    The result is None for all other values.
+
+    Parameters
+    ----------
+    value: any
+        Output value
+    size: int
+        Maximum size of the preview
+
+    Returns
+    -------
+    any
+    """
+    if isinstance(value, str):
+        return value[:size]
+    if isinstance(value, dict) and isinstance(value.get(KEY_ROWS), list):
+        preview: Dict[str, Any] = dict(value)
+        preview[KEY_ROWS] = list()
+        used = len(json.dumps(preview))
+        if used > size:
+            return None
+        for row in value[KEY_ROWS]:
+            used += len(json.dumps(row)) + 1
+            if used > size:
+                break
+            preview[KEY_ROWS].append(row)
+        return preview
+    return None
@@ -25,7 +25,8 @@ from vizier.core.timestamp import get_current_time, to_datetime
 from vizier.core.util import init_value
 from vizier.core.annotation.persistent import PersistentAnnotationSet
 from vizier.viztrail.objectstore.branch import OSBranchHandle
-from vizier.viztrail.objectstore.module import OSModuleHandle
+from vizier.viztrail.objectstore.module import OSModuleHandle, ModuleStateLog
+from vizier.viztrail.objectstore.output import ModuleOutputStore
 from vizier.viztrail.base import ViztrailHandle
 from vizier.viztrail.named_object import PROPERTY_NAME
 from vizier.viztrail.branch import BranchProvenance, DEFAULT_BRANCH, BranchHandle
@@ -41,6 +42,7 @@ FOLDER_BRANCHES = 'branches'
 FOLDER_MODULES = 'modules'
 OBJ_BRANCHINDEX = 'active'
 OBJ_METADATA = 'viztrail'
+OBJ_MODULE_STATES = 'states'
 OBJ_PROPERTIES = 'properties'
 
 """Json labels for serialized object."""
@@ -61,6 +63,7 @@ class OSViztrailHandle(ViztrailHandle):
     ---------------------
     branches/active : List of active branches
     properties      : Viztrail annotations
+    states          : Log of module state changes
     viztrail        : Viztrail metadata (identifier, timestamp, environment)
     branches/       : Viztrail branches
     modules/        : Modules in viztrail workflows
@@ -75,7 +78,9 @@ class OSViztrailHandle(ViztrailHandle):
             created_at: datetime = get_current_time(), 
             branch_index: Optional[str] = None,
             branch_folder: Optional[str] = None, 
-            modules_folder: Optional[str] = None
+            modules_folder: Optional[str] = None,
+            state_log: Optional[ModuleStateLog] = None,
+            output_store: Optional[ModuleOutputStore] = None
     ):
         """Initialize the viztrail descriptor.
 
@@ -101,6 +106,10 @@ class OSViztrailHandle(ViztrailHandle):
             Path to branches folder
         modules_folder: string, optional
             Path to modules folder
+        state_log: vizier.viztrail.objectstore.module.ModuleStateLog, optional
+            Log for module state changes
+        output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+            Store for large module outputs
         """
         super(OSViztrailHandle, self).__init__(
             identifier=identifier,
@@ -115,6 +124,18 @@ class OSViztrailHandle(ViztrailHandle):
         self.branch_folder = init_value(branch_folder, self.object_store.join(base_path, FOLDER_BRANCHES))
         self.branch_index = init_value(branch_index, self.object_store.join(self.branch_folder, OBJ_BRANCHINDEX))
         self.modules_folder =  init_value(modules_folder, self.object_store.join(base_path, FOLDER_MODULES))
+        self.state_log = init_value(
+            state_log,
+            ModuleStateLog(
+                object_path=self.object_store.join(base_path, OBJ_MODULE_STATES),
+                modules_folder=self.modules_folder,
+                object_store=self.object_store
+            )
+        )
+        self.output_store = init_value(
+            output_store,
+            ModuleOutputStore(base_path=base_path, object_store=self.object_store)
+        )
 
     def create_branch(self, 
             provenance: Optional[BranchProvenance] = None, 
@@ -147,7 +168,9 @@ class OSViztrailHandle(ViztrailHandle):
             branch_folder=self.branch_folder,
             modules_folder=self.modules_folder,
             object_store=self.object_store,
-            identifier=identifier
+            identifier=identifier,
+            state_log=self.state_log,
+            output_store=self.output_store
         )
         # Add the new branch to index and materialize the updated index
         # information
@@ -196,6 +219,15 @@ class OSViztrailHandle(ViztrailHandle):
         object_store.write_object(object_path=branch_index, content=content)
         modules_folder = object_store.join(base_path, FOLDER_MODULES)
         object_store.create_folder(base_path, identifier=FOLDER_MODULES)
+        state_log = ModuleStateLog(
+            object_path=object_store.join(base_path, OBJ_MODULE_STATES),
+            modules_folder=modules_folder,
+            object_store=object_store
+        )
+        output_store = ModuleOutputStore(
+            base_path=base_path,
+            object_store=object_store
+        )
         # Write viztrail metadata to disk
         created_at = get_current_time()
         object_store.write_object(
@@ -214,7 +246,9 @@ class OSViztrailHandle(ViztrailHandle):
             modules_folder=modules_folder,
             object_store=object_store,
             is_default=True,
-            created_at=created_at
+            created_at=created_at,
+            state_log=state_log,
+            output_store=output_store
         )
         # Materialize the updated branch index
         write_branch_index(
@@ -237,7 +271,9 @@ class OSViztrailHandle(ViztrailHandle):
             object_store=object_store,
             branch_index=branch_index,
             branch_folder=branch_folder,
-            modules_folder=modules_folder
+            modules_folder=modules_folder,
+            state_log=state_log,
+            output_store=output_store
         )
 
     def delete_viztrail(self) :
@@ -314,6 +350,15 @@ class OSViztrailHandle(ViztrailHandle):
         branch_folder = object_store.join(base_path, FOLDER_BRANCHES)
         branch_index = object_store.join(branch_folder, OBJ_BRANCHINDEX)
         modules_folder = object_store.join(base_path, FOLDER_MODULES)
+        state_log = ModuleStateLog(
+            object_path=object_store.join(base_path, OBJ_MODULE_STATES),
+            modules_folder=modules_folder,
+            object_store=object_store
+        )
+        output_store = ModuleOutputStore(
+            base_path=base_path,
+            object_store=object_store
+        )
         branches = list()
         default_branch: Optional[BranchHandle] = None
         for b in cast(List[Dict[str, Any]], object_store.read_object(branch_index)):
@@ -325,7 +370,9 @@ class OSViztrailHandle(ViztrailHandle):
                     is_default=is_default,
                     base_path=object_store.join(branch_folder, branch_id),
                     modules_folder=modules_folder,
-                    object_store=object_store
+                    object_store=object_store,
+                    state_log=state_log,
+                    output_store=output_store
                 )
             )
             if is_default:
@@ -344,7 +391,9 @@ class OSViztrailHandle(ViztrailHandle):
             object_store=object_store,
             branch_index=branch_index,
             branch_folder=branch_folder,
-            modules_folder=modules_folder
+            modules_folder=modules_folder,
+            state_log=state_log,
+            output_store=output_store
         )
 
     def set_default_branch(self, branch_id: str) -> BranchHandle:
@@ -401,9 +450,26 @@ class OSViztrailHandle(ViztrailHandle):
             provenance = provenance,
             module_folder = self.modules_folder, 
             object_store = self.object_store,
-            identifier = identifier
+            identifier = identifier,
+            state_log = self.state_log,
+            output_store = self.output_store
         )
 
+    def read_output(self, output_id: str) -> Any:
+        """Read the value of a module output from the output store of the
+        viztrail. Raises ValueError if the output does not exist.
+
+        Parameters
+        ----------
+        output_id: string
+            Unique identifier of the stored output value
+
+        Returns
+        -------
+        any
+        """
+        return self.output_store.read(output_id)
+
 
 # ------------------------------------------------------------------------------
 # Helper Methods
@@ -418,7 +484,9 @@ def create_branch(
     object_store: ObjectStore, 
     is_default: bool = False, 
     created_at: Optional[datetime] = None,
-    identifier: Optional[str] = None
+    identifier: Optional[str] = None,
+    state_log: Optional[ModuleStateLog] = None,
+    output_store: Optional[ModuleOutputStore] = None
 ) -> OSBranchHandle:
     """Create a new branch. If the list of workflow modules is given the list
     defines the branch head. Otherwise, the branch is empty.
@@ -440,6 +508,10 @@ def create_branch(
         Object store implementation to access and maintain resources
     is_default: bool, optional
         True if this is the new default branch for the viztrail
+    state_log: vizier.viztrail.objectstore.module.ModuleStateLog, optional
+        Log for module state changes of the viztrail
+    output_store: vizier.viztrail.objectstore.output.ModuleOutputStore, optional
+        Store for large module outputs of the viztrail
 
     Returns
     -------
@@ -460,7 +532,9 @@ def create_branch(
             modules_folder=modules_folder,
             modules=modules,
             base_path=branch_path,
-            object_store=object_store
+            object_store=object_store,
+            state_log=state_log,
+            output_store=output_store
         )
     except ValueError as ex:
         # Remove the created folder
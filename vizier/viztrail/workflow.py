@@ -157,17 +157,19 @@ class WorkflowHandle(object):
 
     @property
     def is_active(self):
-        """True if the workflow is in an active state. This is indicated by the
-        state of the last module in the workflow.
+        """True if the workflow is in an active state. This is the case if any
+        of the workflow modules is active. Independent modules may be executed
+        in parallel, i.e., the last module may finish before modules that
+        precede it.
 
         Returns
         -------
         bool
         """
-        if len(self.modules) > 0:
-            return self.modules[-1].is_active
-        else:
-            return False
+        for m in self.modules:
+            if m.is_active:
+                return True
+        return False
 
     @property
     def tail_artifacts(self) -> Dict[str, ArtifactDescriptor]: